@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""NumPy BM25 fallback engine for claude-memory retrieval.
+
+Used by memory_retrieve.py only when SQLite lacks FTS5 and NumPy is
+importable (see memory_search_engine.load_numpy_bm25()). It replaces the
+per-entry Python keyword loop of the legacy path with BM25 ranking that
+mirrors FTS5's bm25() over the same title/tags columns.
+
+The index is a sparse term-document matrix in CSC form (postings grouped by
+term, terms sorted so a prefix query is one contiguous slice), plus per-doc
+column lengths and the raw result rows. It is persisted next to index.md as
+a single flat file (.index-bm25.bin) that is memory-mapped on open and keyed
+to the index.md generation, just like the persistent FTS5 db.
+
+Differences from FTS5 (documented, acceptable for a fallback):
+- Phrase queries ("user_id") match documents containing every phrase token
+  in the same column; token positions are not stored.
+- Tokenization approximates unicode61: lowercase, diacritics stripped,
+  runs of letters/digits (underscore and punctuation are separators).
+
+Requires NumPy; importing this module raises ImportError without it.
+"""
+
+import bisect
+import json
+import math
+import os
+import re
+import struct
+import time
+import unicodedata
+from pathlib import Path
+
+import numpy as np
+
+from memory_search_engine import index_generation, load_index_entries
+
+# Derived artifact next to index.md; safe to delete or .gitignore.
+BM25_INDEX_FILENAME = ".index-bm25.bin"
+
+# Bump when the on-disk layout changes so stale files are rebuilt.
+_BM25_SCHEMA_VERSION = "1"
+_MAGIC = b"CMBM25\x00\n"
+_HEADER_LEN = struct.Struct("<Q")
+_ALIGN = 8
+
+# FTS5 bm25() defaults
+_K1 = 1.2
+_B = 0.75
+
+# Columns scored, in FTS5 table order
+_COLUMNS = ("title", "tags")
+
+_TOKEN_RE = re.compile(r"[^\W_]+")
+_PHRASE_RE = re.compile(r'"([^"]*)"(\*?)')
+
+
+def _tokens(text: str) -> list[str]:
+    """unicode61-style tokens: lowercase, no diacritics, alnum runs."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return _TOKEN_RE.findall(text)
+
+
+def _tags_text(tags) -> str:
+    """Tags column text, identical to what _populate_fts() inserts."""
+    return " ".join(sorted(tags)) if isinstance(tags, (set, list)) else str(tags or "")
+
+
+def build_bm25_arrays(entries: list[dict]) -> tuple[dict, dict]:
+    """Build the term-document arrays for parsed index entries.
+
+    Returns (header, arrays). header holds the sorted vocab, doc count and
+    average column lengths; arrays holds:
+      term_ptr (V+1 int64)  -- postings of term i are [term_ptr[i], term_ptr[i+1])
+      post_doc (nnz int32)  -- doc id per posting, ascending within a term
+      post_tf  (nnz x 2 float32) -- term frequency per column
+      doc_len  (N x 2 float32)   -- tokens per column
+      doc_ptr  (N+1 int64) / doc_blob (uint8) -- JSON result rows
+    """
+    term_ids: dict[str, int] = {}
+    tids, docs, cols = [], [], []
+    rows = []
+    for doc, e in enumerate(entries):
+        tags = _tags_text(e.get("tags", ""))
+        for col, text in enumerate((e["title"], tags)):
+            for tok in _tokens(text):
+                tids.append(term_ids.setdefault(tok, len(term_ids)))
+                docs.append(doc)
+                cols.append(col)
+        rows.append(json.dumps([e["title"], tags, e["path"], e["category"]],
+                               ensure_ascii=False).encode("utf-8"))
+
+    n_docs = len(entries)
+    vocab = sorted(term_ids)
+    rank = np.empty(len(vocab), dtype=np.int64)
+    rank[[term_ids[t] for t in vocab]] = np.arange(len(vocab), dtype=np.int64)
+
+    tid_arr = rank[np.asarray(tids, dtype=np.int64)] if tids else np.empty(0, np.int64)
+    doc_arr = np.asarray(docs, dtype=np.int64)
+    col_arr = np.asarray(cols, dtype=np.int64)
+
+    # One posting per (term, doc); sorted by term then doc
+    keys, inverse = np.unique(tid_arr * max(n_docs, 1) + doc_arr, return_inverse=True)
+    post_tf = np.zeros((len(keys), len(_COLUMNS)), dtype=np.float32)
+    np.add.at(post_tf, (inverse, col_arr), 1)
+    post_term = keys // max(n_docs, 1)
+    post_doc = (keys % max(n_docs, 1)).astype(np.int32)
+    term_ptr = np.searchsorted(post_term, np.arange(len(vocab) + 1)).astype(np.int64)
+
+    doc_len = np.bincount(doc_arr * len(_COLUMNS) + col_arr,
+                          minlength=n_docs * len(_COLUMNS)).astype(np.float32)
+    doc_len = doc_len.reshape(n_docs, len(_COLUMNS))
+    avg_len = (doc_len.sum(axis=0) / n_docs).tolist() if n_docs else [0.0] * len(_COLUMNS)
+
+    doc_ptr = np.zeros(n_docs + 1, dtype=np.int64)
+    if rows:
+        np.cumsum([len(r) for r in rows], out=doc_ptr[1:])
+    doc_blob = np.frombuffer(b"".join(rows), dtype=np.uint8)
+
+    header = {"n_docs": n_docs, "vocab": vocab, "avg_len": avg_len}
+    arrays = {
+        "term_ptr": term_ptr, "post_doc": post_doc, "post_tf": post_tf,
+        "doc_len": doc_len, "doc_ptr": doc_ptr, "doc_blob": doc_blob,
+    }
+    return header, arrays
+
+
+def write_bm25_file(memory_root: Path, entries: list[dict], generation: str) -> Path:
+    """Write a fresh .index-bm25.bin for entries and atomically swap it in.
+
+    Layout: magic, u64 header length, JSON header (schema, generation, vocab,
+    array offsets/dtypes/shapes), then 8-byte aligned raw arrays.
+    """
+    header, arrays = build_bm25_arrays(entries)
+    layout = {}
+    offset = 0
+    for name, arr in arrays.items():
+        layout[name] = [offset, arr.dtype.str, list(arr.shape)]
+        offset += -(-arr.nbytes // _ALIGN) * _ALIGN
+    header.update({
+        "schema_version": _BM25_SCHEMA_VERSION,
+        "generation": generation,
+        "arrays": layout,
+    })
+    header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    prefix_len = len(_MAGIC) + _HEADER_LEN.size + len(header_bytes)
+    header_bytes += b" " * (-prefix_len % _ALIGN)
+
+    path = memory_root / BM25_INDEX_FILENAME
+    tmp_path = memory_root / f"{BM25_INDEX_FILENAME}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(_MAGIC)
+            f.write(_HEADER_LEN.pack(len(header_bytes)))
+            f.write(header_bytes)
+            for arr in arrays.values():
+                data = np.ascontiguousarray(arr).tobytes()
+                f.write(data)
+                f.write(b"\0" * (-len(data) % _ALIGN))
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+        raise
+    return path
+
+
+def _read_bm25_file(path: Path) -> tuple[dict, dict]:
+    """Memory-map a .index-bm25.bin. Raises OSError/ValueError if unusable."""
+    with open(path, "rb") as f:
+        if f.read(len(_MAGIC)) != _MAGIC:
+            raise ValueError("not a BM25 index file")
+        (header_len,) = _HEADER_LEN.unpack(f.read(_HEADER_LEN.size))
+        header = json.loads(f.read(header_len))
+    data_start = len(_MAGIC) + _HEADER_LEN.size + header_len
+    mm = np.memmap(path, dtype=np.uint8, mode="r")
+    arrays = {}
+    for name, (offset, dtype, shape) in header["arrays"].items():
+        dt = np.dtype(dtype)
+        count = int(np.prod(shape)) if shape else 1
+        arrays[name] = np.frombuffer(mm, dtype=dt, count=count,
+                                     offset=data_start + offset).reshape(shape)
+    return header, arrays
+
+
+class NumpyBM25Index:
+    """Query side of the BM25 fallback engine.
+
+    Drop-in for the FTS5 connection in retrieval: query_fts() calls
+    search() and gets the same result dicts (title, tags, path, category,
+    score with score = -bm25, more negative = better).
+    """
+
+    def __init__(self, header: dict, arrays: dict):
+        self.n_docs = int(header["n_docs"])
+        self._vocab = header["vocab"]
+        self._avg_len = np.asarray(header["avg_len"], dtype=np.float64)
+        self._term_ptr = arrays["term_ptr"]
+        self._post_doc = arrays["post_doc"]
+        self._post_tf = arrays["post_tf"]
+        self._doc_len = arrays["doc_len"]
+        self._doc_ptr = arrays["doc_ptr"]
+        self._doc_blob = arrays["doc_blob"]
+
+    def close(self) -> None:
+        """Release array references (the memmap closes with them)."""
+        self._term_ptr = self._post_doc = self._post_tf = None
+        self._doc_len = self._doc_ptr = self._doc_blob = None
+
+    def _term_range(self, token: str, prefix: bool) -> tuple[int, int]:
+        lo = bisect.bisect_left(self._vocab, token)
+        if prefix:
+            return lo, bisect.bisect_left(self._vocab, token + "\U0010ffff", lo)
+        return lo, lo + 1 if lo < len(self._vocab) and self._vocab[lo] == token else lo
+
+    def _postings(self, token: str, prefix: bool) -> tuple["np.ndarray", "np.ndarray"]:
+        """(doc ids, per-column tf) for one token; prefix terms are summed."""
+        lo, hi = self._term_range(token, prefix)
+        start, end = int(self._term_ptr[lo]), int(self._term_ptr[hi])
+        docs = self._post_doc[start:end]
+        tf = self._post_tf[start:end]
+        if hi - lo > 1:
+            docs, inverse = np.unique(docs, return_inverse=True)
+            summed = np.zeros((len(docs), tf.shape[1]), dtype=np.float64)
+            np.add.at(summed, inverse, tf)
+            tf = summed
+        return docs, tf
+
+    def _phrase_postings(self, tokens: list[str], prefix: bool):
+        """Docs matching every phrase token in the same column (no positions)."""
+        docs, tf = self._postings(tokens[0], prefix and len(tokens) == 1)
+        for i, token in enumerate(tokens[1:], start=1):
+            other_docs, other_tf = self._postings(token, prefix and i == len(tokens) - 1)
+            docs, a, b = np.intersect1d(docs, other_docs, assume_unique=True,
+                                        return_indices=True)
+            tf = np.minimum(tf[a], other_tf[b])
+            keep = tf.sum(axis=1) > 0
+            docs, tf = docs[keep], tf[keep]
+        return docs, tf
+
+    def search(self, fts_query: str, limit: int = 15) -> list[dict]:
+        """Rank docs for a build_fts_query() string ("a"* OR "b_c" ...)."""
+        if not self.n_docs:
+            return []
+        scores = np.zeros(self.n_docs, dtype=np.float64)
+        matched = np.zeros(self.n_docs, dtype=bool)
+        # Like FTS5 bm25(): frequencies and lengths are summed over columns
+        avgdl = float(self._avg_len.sum()) or 1.0
+        for phrase, star in _PHRASE_RE.findall(fts_query):
+            tokens = _tokens(phrase)
+            if not tokens:
+                continue
+            docs, tf = self._phrase_postings(tokens, bool(star))
+            if not len(docs):
+                continue
+            n = len(docs)
+            idf = math.log((self.n_docs - n + 0.5) / (n + 0.5))
+            if idf <= 0:
+                idf = 1e-6  # Same clamp as FTS5 bm25()
+            freq = tf.sum(axis=1)
+            norm = _K1 * (1 - _B + _B * self._doc_len[docs].sum(axis=1) / avgdl)
+            scores[docs] += idf * freq * (_K1 + 1) / (freq + norm)
+            matched[docs] = True
+
+        candidates = np.flatnonzero(matched)
+        if limit <= 0:
+            return []
+        if len(candidates) > limit:
+            # Keep everything tied with the limit-th score so the cut is deterministic
+            cutoff = -np.partition(-scores[candidates], limit - 1)[limit - 1]
+            candidates = candidates[scores[candidates] >= cutoff]
+        # Best first; ties by index.md order (FTS5 rowid order)
+        candidates = candidates[np.lexsort((candidates, -scores[candidates]))][:limit]
+
+        results = []
+        for doc in candidates.tolist():
+            raw = bytes(self._doc_blob[self._doc_ptr[doc]:self._doc_ptr[doc + 1]])
+            title, tags_str, path, category = json.loads(raw)
+            results.append({
+                "title": title,
+                "tags": set(t for t in tags_str.split() if t),
+                "path": path,
+                "category": category,
+                "score": -float(scores[doc]),
+            })
+        return results
+
+
+def open_bm25_index(memory_root: Path,
+                    timings: dict | None = None) -> tuple[NumpyBM25Index, int, bool]:
+    """Return a NumpyBM25Index over memory_root/index.md.
+
+    Same contract as memory_search_engine.open_fts_index(): reuses the
+    persisted file while its generation matches index.md, rebuilds it when
+    stale, and falls back to in-memory arrays if it cannot be written.
+    Build time is recorded as "fts_build" so timing reports line up.
+
+    Returns (index, entry_count, rebuilt). Raises OSError if index.md
+    itself cannot be read.
+    """
+    index_path = memory_root / "index.md"
+    path = memory_root / BM25_INDEX_FILENAME
+    generation = index_generation(index_path)
+
+    if generation is not None and path.exists():
+        try:
+            header, arrays = _read_bm25_file(path)
+            if (header.get("generation") == generation
+                    and header.get("schema_version") == _BM25_SCHEMA_VERSION):
+                return NumpyBM25Index(header, arrays), int(header["n_docs"]), False
+        except (OSError, ValueError, KeyError, TypeError, struct.error):
+            pass  # Stale, truncated or unreadable -- rebuild below
+
+    t0 = time.perf_counter()
+    entries = load_index_entries(index_path)
+    t1 = time.perf_counter()
+    if timings is not None:
+        timings["index_parse"] = (t1 - t0) * 1000
+    index = None
+    if generation is not None:
+        try:
+            write_bm25_file(memory_root, entries, generation)
+            index = NumpyBM25Index(*_read_bm25_file(path))
+        except (OSError, ValueError):
+            index = None  # Fail-open: in-memory arrays below
+    if index is None:
+        index = NumpyBM25Index(*build_bm25_arrays(entries))
+    if timings is not None:
+        timings["fts_build"] = (time.perf_counter() - t1) * 1000
+    return index, len(entries), True
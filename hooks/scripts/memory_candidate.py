@@ -18,6 +18,22 @@ import re
 import sys
 from pathlib import Path
 
+# Merged index view (index.md + delta log written by memory_write.py).
+# Fallback for partial deployments: plain index.md.
+try:
+    from memory_search_engine import read_index_lines
+except ImportError:
+    def read_index_lines(index_path, missing_ok=False):
+        with open(index_path, "r", encoding="utf-8") as f:
+            return [l.rstrip("\n") for l in f]
+
+# OCC token for the candidate, taken from the read that builds the excerpt.
+# Without it the orchestrator hashes the candidate file itself.
+try:
+    from memory_search_engine import read_occ_token
+except ImportError:
+    def read_occ_token(path): return None
+
 # Stop words for candidate scoring (subset of memory_search_engine.py's set;
 # engine adds 2-char stopwords 'as','am','us','vs' needed for FTS5's lower threshold)
 STOP_WORDS = frozenset({
@@ -149,17 +165,19 @@ def score_entry(new_info_tokens: set[str], entry: dict) -> int:
     return score
 
 
-def build_excerpt(file_path: Path, category: str) -> dict | None:
+def build_excerpt(file_path: Path, category: str, data: dict | None = None) -> dict | None:
     """Build a structured excerpt from a candidate JSON file.
 
-    Returns excerpt dict or None if file cannot be read.
+    *data* is the already-parsed file, if the caller has it. Returns
+    excerpt dict or None if file cannot be read.
     """
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-    except (OSError, json.JSONDecodeError) as e:
-        print(f"WARNING: Could not read candidate file {file_path}: {e}", file=sys.stderr)
-        return None
+    if data is None:
+        try:
+            with open(file_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"WARNING: Could not read candidate file {file_path}: {e}", file=sys.stderr)
+            return None
 
     # Build key_fields from category-specific content fields
     content = data.get("content", {})
@@ -192,87 +210,46 @@ def build_excerpt(file_path: Path, category: str) -> dict | None:
     }
 
 
-def main():
-    default_root = str(Path(*_DEFAULT_ROOT_PARTS))
-
-    parser = argparse.ArgumentParser(
-        description="ACE candidate selection + structural verification."
-    )
-    parser.add_argument(
-        "--category", required=True,
-        choices=list(CATEGORY_FOLDERS.keys()),
-        help="Memory category to search within",
-    )
-    parser.add_argument(
-        "--new-info",
-        help="New information to match against existing entries",
-    )
-    parser.add_argument(
-        "--new-info-file",
-        help="Path to file containing new information (alternative to --new-info)",
-    )
-    parser.add_argument(
-        "--lifecycle-event",
-        choices=sorted(VALID_LIFECYCLE_EVENTS),
-        default=None,
-        help="Lifecycle event (resolved, removed, reversed, superseded, deprecated)",
-    )
-    parser.add_argument(
-        "--root", default=default_root,
-        help="Root directory of memory storage",
-    )
-    args = parser.parse_args()
-
-    # Resolve new-info: --new-info-file takes precedence over --new-info
-    if args.new_info_file is not None:
-        try:
-            nif = Path(args.new_info_file)
-            args.new_info = nif.read_text(encoding="utf-8")
-        except FileNotFoundError:
-            parser.error(f"--new-info-file not found: {args.new_info_file}")
-        except PermissionError:
-            parser.error(f"--new-info-file permission denied: {args.new_info_file}")
-        except OSError as e:
-            parser.error(f"--new-info-file read error: {e}")
-    elif args.new_info is None:
-        parser.error("one of --new-info or --new-info-file is required")
-
-    root = Path(args.root)
+def ensure_index(root: Path) -> None:
+    """Rebuild index.md on demand if missing (derived artifact pattern)."""
     index_path = root / "index.md"
-
-    # Rebuild index on demand if missing (derived artifact pattern)
-    if not index_path.exists() and root.is_dir():
-        import subprocess
-        index_tool = Path(__file__).parent / "memory_index.py"
-        if index_tool.exists():
-            try:
-                subprocess.run(
-                    [sys.executable, str(index_tool), "--rebuild", "--root", str(root)],
-                    capture_output=True, timeout=10,
-                )
-            except subprocess.TimeoutExpired:
-                pass
-
-    if not index_path.exists():
-        print(f"ERROR: index.md not found at {index_path}", file=sys.stderr)
-        sys.exit(1)
-
-    category = args.category
-    new_info = args.new_info
-    lifecycle_event = args.lifecycle_event
+    if index_path.exists() or not root.is_dir():
+        return
+    import subprocess
+    index_tool = Path(__file__).parent / "memory_index.py"
+    if index_tool.exists():
+        try:
+            subprocess.run(
+                [sys.executable, str(index_tool), "--rebuild", "--root", str(root)],
+                capture_output=True, timeout=10,
+            )
+        except subprocess.TimeoutExpired:
+            pass
+
+
+def select_candidate(
+    category: str,
+    new_info: str,
+    root: Path,
+    lifecycle_event: str | None = None,
+    index_lines: list[str] | None = None,
+) -> dict:
+    """Select the best candidate for *category* and classify the structural CUD.
+
+    Returns the same dict main() prints. *index_lines* lets a caller that
+    handles several categories parse the index once; when omitted, the
+    merged index view under *root* is read (OSError propagates).
+    """
     target_display = CATEGORY_DISPLAY[category]
+    if index_lines is None:
+        index_lines = read_index_lines(root / "index.md")
 
     # Parse index, filter to target category
     entries = []
-    try:
-        with open(index_path, "r", encoding="utf-8") as f:
-            for line in f:
-                parsed = parse_index_line(line)
-                if parsed and parsed["category_display"] == target_display:
-                    entries.append(parsed)
-    except OSError as e:
-        print(f"ERROR: Could not read index: {e}", file=sys.stderr)
-        sys.exit(1)
+    for line in index_lines:
+        parsed = parse_index_line(line)
+        if parsed and parsed["category_display"] == target_display:
+            entries.append(parsed)
 
     # Tokenize new_info
     new_info_tokens = tokenize(new_info)
@@ -373,13 +350,16 @@ def main():
                     file=sys.stderr,
                 )
             else:
-                # Read the actual JSON file for excerpt
-                excerpt = build_excerpt(resolved, category)
+                # Read the actual JSON file once: excerpt + OCC token
+                loaded = read_occ_token(resolved)
+                data, token = loaded if loaded else (None, None)
+                excerpt = build_excerpt(resolved, category, data)
                 candidate_output = {
                     "path": candidate["path"],
                     "title": candidate["title"],
                     "tags": candidate["tags"],
                     "excerpt": excerpt,
+                    "occ_token": token,
                 }
 
     # If candidate was invalidated during path checks, recompute
@@ -389,7 +369,7 @@ def main():
         vetoes = []
         hints = [f"Candidate path invalid; falling back to {pre_action}"]
 
-    result = {
+    return {
         "category": category,
         "candidate": candidate_output,
         "lifecycle_event": lifecycle_event,
@@ -400,6 +380,67 @@ def main():
         "hints": hints,
     }
 
+
+def main():
+    default_root = str(Path(*_DEFAULT_ROOT_PARTS))
+
+    parser = argparse.ArgumentParser(
+        description="ACE candidate selection + structural verification."
+    )
+    parser.add_argument(
+        "--category", required=True,
+        choices=list(CATEGORY_FOLDERS.keys()),
+        help="Memory category to search within",
+    )
+    parser.add_argument(
+        "--new-info",
+        help="New information to match against existing entries",
+    )
+    parser.add_argument(
+        "--new-info-file",
+        help="Path to file containing new information (alternative to --new-info)",
+    )
+    parser.add_argument(
+        "--lifecycle-event",
+        choices=sorted(VALID_LIFECYCLE_EVENTS),
+        default=None,
+        help="Lifecycle event (resolved, removed, reversed, superseded, deprecated)",
+    )
+    parser.add_argument(
+        "--root", default=default_root,
+        help="Root directory of memory storage",
+    )
+    args = parser.parse_args()
+
+    # Resolve new-info: --new-info-file takes precedence over --new-info
+    if args.new_info_file is not None:
+        try:
+            nif = Path(args.new_info_file)
+            args.new_info = nif.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            parser.error(f"--new-info-file not found: {args.new_info_file}")
+        except PermissionError:
+            parser.error(f"--new-info-file permission denied: {args.new_info_file}")
+        except OSError as e:
+            parser.error(f"--new-info-file read error: {e}")
+    elif args.new_info is None:
+        parser.error("one of --new-info or --new-info-file is required")
+
+    root = Path(args.root)
+    index_path = root / "index.md"
+    ensure_index(root)
+    if not index_path.exists():
+        print(f"ERROR: index.md not found at {index_path}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        result = select_candidate(
+            args.category, args.new_info, root, args.lifecycle_event,
+        )
+    except OSError as e:
+        print(f"ERROR: Could not read index: {e}", file=sys.stderr)
+        sys.exit(1)
+
     print(json.dumps(result, separators=(",", ":")))
 
 
@@ -298,6 +298,74 @@ def write_draft(data: dict, category: str, root: str) -> str:
     return draft_path
 
 
+def draft_memory(
+    action: str,
+    category: str,
+    input_file: str,
+    candidate_file: str | None = None,
+    root: str = ".claude/memory",
+) -> dict | None:
+    """Assemble, validate and stage one draft.
+
+    Returns the success payload main() prints, or None after reporting
+    the error on stderr (same messages as the CLI).
+    """
+    # Validate input path security
+    err = validate_input_path(input_file)
+    if err:
+        print(f"SECURITY_ERROR\n{err}", file=sys.stderr)
+        return None
+
+    # Read input file
+    input_data = read_json_file(input_file, "Input")
+    if input_data is None:
+        return None
+
+    # Check required fields
+    err = check_required_fields(input_data)
+    if err:
+        print(f"INPUT_ERROR\n{err}", file=sys.stderr)
+        return None
+
+    # Assemble the complete memory JSON
+    if action == "create":
+        assembled = assemble_create(input_data, category)
+    else:
+        # UPDATE: read existing memory
+        err = validate_candidate_path(candidate_file)
+        if err:
+            print(f"INPUT_ERROR\n{err}", file=sys.stderr)
+            return None
+
+        existing = read_json_file(candidate_file, "Candidate")
+        if existing is None:
+            return None
+
+        assembled = assemble_update(input_data, existing, category)
+
+    # Validate assembled JSON against Pydantic schema
+    Model = build_memory_model(category)
+    try:
+        Model.model_validate(assembled)
+    except ValidationError as e:
+        print("VALIDATION_ERROR", file=sys.stderr)
+        for err_item in e.errors():
+            loc = ".".join(str(part) for part in err_item["loc"])
+            print(f"  field: {loc}", file=sys.stderr)
+            print(f"  error: {err_item['msg']}", file=sys.stderr)
+        return None
+
+    # Write draft to staging
+    draft_path = write_draft(assembled, category, root)
+
+    return {
+        "status": "ok",
+        "category": category,
+        "action": action,
+        "draft_path": draft_path,
+    }
+
+
 # ---------------------------------------------------------------------------
 # Main
 # ---------------------------------------------------------------------------
@@ -334,61 +402,12 @@ def main() -> int:
         print("ERROR: --candidate-file is required for update action.", file=sys.stderr)
         return 1
 
-    # Validate input path security
-    err = validate_input_path(args.input_file)
-    if err:
-        print(f"SECURITY_ERROR\n{err}", file=sys.stderr)
-        return 1
-
-    # Read input file
-    input_data = read_json_file(args.input_file, "Input")
-    if input_data is None:
-        return 1
-
-    # Check required fields
-    err = check_required_fields(input_data)
-    if err:
-        print(f"INPUT_ERROR\n{err}", file=sys.stderr)
-        return 1
-
-    # Assemble the complete memory JSON
-    if args.action == "create":
-        assembled = assemble_create(input_data, args.category)
-    else:
-        # UPDATE: read existing memory
-        err = validate_candidate_path(args.candidate_file)
-        if err:
-            print(f"INPUT_ERROR\n{err}", file=sys.stderr)
-            return 1
-
-        existing = read_json_file(args.candidate_file, "Candidate")
-        if existing is None:
-            return 1
-
-        assembled = assemble_update(input_data, existing, args.category)
-
-    # Validate assembled JSON against Pydantic schema
-    Model = build_memory_model(args.category)
-    try:
-        Model.model_validate(assembled)
-    except ValidationError as e:
-        print("VALIDATION_ERROR", file=sys.stderr)
-        for err_item in e.errors():
-            loc = ".".join(str(part) for part in err_item["loc"])
-            print(f"  field: {loc}", file=sys.stderr)
-            print(f"  error: {err_item['msg']}", file=sys.stderr)
+    result = draft_memory(
+        args.action, args.category, args.input_file,
+        candidate_file=args.candidate_file, root=args.root,
+    )
+    if result is None:
         return 1
-
-    # Write draft to staging
-    draft_path = write_draft(assembled, args.category, args.root)
-
-    # Success output (stdout)
-    result = {
-        "status": "ok",
-        "category": args.category,
-        "action": args.action,
-        "draft_path": draft_path,
-    }
     print(json.dumps(result))
     return 0
 
@@ -1,11 +1,21 @@
 #!/usr/bin/env python3
-"""Rolling window enforcement for claude-memory.
+"""Rolling window and retention enforcement for claude-memory.
 
-Scans a category folder for active memories and retires the oldest
-when the count exceeds the configured max_retained limit.
+Rolling window: scans a category folder for active memories and retires
+the oldest when the count exceeds the configured max_retained limit.
+
+Retention sweep (--retention): retires active memories older than their
+category's retention_days, and the least recently updated ones beyond
+max_memories_per_category, in one locked batch. Candidates are the files
+listed in each category folder; their timestamps come from fresh rows in
+the metadata sidecar (.index-meta.sqlite3), and only files without one
+are parsed. Rows for parsed files are written back, so on a store that
+predates the sidecar the first sweep parses every file and later sweeps
+parse only what changed. Without a sidecar the folder is scanned.
 
 Usage:
     python3 memory_enforce.py --category session_summary [--max-retained 5] [--dry-run]
+    python3 memory_enforce.py --retention [--dry-run]
 """
 
 import os
@@ -29,18 +39,29 @@ if _script_dir not in sys.path:
 # ── imports ─────────────────────────────────────────────────────────────
 import argparse
 import json
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
 from memory_write import (  # noqa: E402
-    retire_record,
+    retire_records,
     FlockIndex,
     CATEGORY_FOLDERS,
 )
+from memory_layout import list_memory_names  # noqa: E402
+
+try:
+    from memory_search_engine import list_active_by_age, record_memory_meta_many
+except ImportError:
+    def list_active_by_age(memory_root, folder):  # type: ignore[misc]
+        return None
+    def record_memory_meta_many(memory_root, records):  # type: ignore[misc]
+        return False
 
 # ── constants ───────────────────────────────────────────────────────────
 MAX_RETIRE_ITERATIONS_FLOOR = 10   # Minimum safety valve (original value)
 MAX_RETIRE_MULTIPLIER = 10         # Dynamic cap = max_retained * this
 DEFAULT_MAX_RETAINED = 5
+DEFAULT_MAX_PER_CATEGORY = 100     # max_memories_per_category (0 = no cap)
 
 
 # ---------------------------------------------------------------------------
@@ -109,6 +130,50 @@ def _read_max_retained(memory_root: Path, category: str, cli_override: int | Non
     return DEFAULT_MAX_RETAINED
 
 
+def _read_retention_config(memory_root: Path) -> tuple[dict[str, int], int]:
+    """Read per-category retention_days and max_memories_per_category.
+
+    Returns ({category: retention_days}, max_per_category). retention_days
+    0 means permanent; invalid values fall back to 0 (never expire) and an
+    invalid cap to DEFAULT_MAX_PER_CATEGORY, each with a warning.
+    """
+    config = {}
+    config_path = memory_root / "memory-config.json"
+    if config_path.exists():
+        try:
+            with open(config_path, "r", encoding="utf-8") as f:
+                config = json.load(f)
+        except (json.JSONDecodeError, OSError):
+            config = {}
+    if not isinstance(config, dict):
+        config = {}
+
+    categories = config.get("categories")
+    categories = categories if isinstance(categories, dict) else {}
+    retention = {}
+    for category in CATEGORY_FOLDERS:
+        cat_cfg = categories.get(category)
+        value = cat_cfg.get("retention_days", 0) if isinstance(cat_cfg, dict) else 0
+        if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+            print(
+                f"[WARN] categories.{category}.retention_days must be an integer >= 0, "
+                f"got {value!r}. Treating as permanent.",
+                file=sys.stderr,
+            )
+            value = 0
+        retention[category] = value
+
+    cap = config.get("max_memories_per_category", DEFAULT_MAX_PER_CATEGORY)
+    if isinstance(cap, bool) or not isinstance(cap, int) or cap < 0:
+        print(
+            f"[WARN] max_memories_per_category must be an integer >= 0, got {cap!r}. "
+            f"Using default {DEFAULT_MAX_PER_CATEGORY}.",
+            file=sys.stderr,
+        )
+        cap = DEFAULT_MAX_PER_CATEGORY
+    return retention, cap
+
+
 # ---------------------------------------------------------------------------
 # Active session scanning
 # ---------------------------------------------------------------------------
@@ -123,7 +188,8 @@ def _scan_active(category_dir: Path) -> list[dict]:
     if not category_dir.is_dir():
         return results
 
-    for f in sorted(category_dir.glob("*.json")):
+    for name in list_memory_names(category_dir):
+        f = category_dir / name
         try:
             with open(f, "r", encoding="utf-8") as fh:
                 data = json.load(fh)
@@ -252,38 +318,36 @@ def enforce_rolling_window(
             return {"retired": [], "active_count": len(active), "max_retained": max_retained}
 
         excess = min(excess, retire_cap)
-
-        for victim in active[:excess]:
+        victims = active[:excess]
+        for victim in victims:
             _deletion_guard(victim["data"], victim["id"])
 
-            try:
-                result = retire_record(
-                    target_abs=victim["path"],
-                    reason="Session rolling window: exceeded max_retained limit",
-                    memory_root=memory_root,
-                    index_path=index_path,
-                )
-                retired_list.append(victim["id"])
-                remaining = len(active) - len(retired_list)
+        # One retire pass: per-victim JSON writes, then a single index
+        # append and sidecar transaction for the whole batch
+        reason = "Session rolling window: exceeded max_retained limit"
+        outcomes = retire_records([(v["path"], reason) for v in victims],
+                                  memory_root, index_path)
+        for victim, (_, outcome) in zip(victims, outcomes):
+            if isinstance(outcome, FileNotFoundError):
+                # File disappeared between scan and retire (rare, non-fatal)
                 print(
-                    f"[ROLLING_WINDOW] Retired {victim['id']} "
-                    f"(active: {remaining}/{max_retained})",
+                    f"[WARN] File gone before retire {victim['id']}: {outcome}. Continuing.",
                     file=sys.stderr,
                 )
-            except FileNotFoundError as e:
-                # File disappeared between scan and retire (rare, non-fatal)
+            elif isinstance(outcome, Exception):
+                # Structural error -- retire_records() stopped here
                 print(
-                    f"[WARN] File gone before retire {victim['id']}: {e}. Continuing.",
+                    f"[WARN] Failed to retire {victim['id']}: {outcome}. Stopping enforcement loop.",
                     file=sys.stderr,
                 )
-                continue
-            except Exception as e:
-                # Structural error -- stop the loop
+            else:
+                retired_list.append(victim["id"])
+                remaining = len(active) - len(retired_list)
                 print(
-                    f"[WARN] Failed to retire {victim['id']}: {e}. Stopping enforcement loop.",
+                    f"[ROLLING_WINDOW] Retired {victim['id']} "
+                    f"(active: {remaining}/{max_retained})",
                     file=sys.stderr,
                 )
-                break
 
     return {
         "retired": retired_list,
@@ -292,6 +356,177 @@ def enforce_rolling_window(
     }
 
 
+# ---------------------------------------------------------------------------
+# Retention sweep
+# ---------------------------------------------------------------------------
+
+def _parse_ts(value) -> datetime | None:
+    """Parse an ISO 8601 timestamp (Z or offset); None if missing or invalid."""
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def _active_by_age(memory_root: Path, folder: str,
+                   backfill: bool = True) -> tuple[list[dict], str]:
+    """Active memories in a folder, least recently updated first.
+
+    The folder listing decides which files are candidates, so memories
+    the metadata sidecar has no row for (stores older than the sidecar,
+    hand-copied files) are still seen. Timestamps come from fresh sidecar
+    rows; files without one are read from JSON and, with backfill, get a
+    sidecar row so the next sweep skips them. Without a sidecar, falls
+    back to _scan_active(). Returns (entries, source) where entries are
+    {"path": Path, "id", "created_at", "updated_at", "data": dict | None}
+    and source is "sidecar" or "scan".
+    """
+    project_root = memory_root.parent.parent
+    rows = list_active_by_age(memory_root, folder)
+    if rows is None:
+        entries = [
+            {"path": a["path"], "id": a["id"], "created_at": a["data"].get("created_at"),
+             "updated_at": a["data"].get("updated_at"), "data": a["data"]}
+            for a in _scan_active(memory_root / folder)
+        ]
+        source = "scan"
+    else:
+        fresh = {row["path"]: row for row in rows if row["fresh"]}
+        folder_dir = memory_root / folder
+        entries = []
+        parsed = []
+        for name in list_memory_names(folder_dir):
+            path = folder_dir / name
+            row = fresh.get(path.relative_to(project_root).as_posix())
+            if row is not None:
+                entries.append({"path": path, "id": path.stem, "created_at": row["created_at"],
+                                "updated_at": row["updated_at"], "data": None})
+                continue
+            try:
+                with open(path, "r", encoding="utf-8") as fh:
+                    data = json.load(fh)
+            except (json.JSONDecodeError, OSError):
+                continue  # Gone or unreadable: nothing to retire
+            if not isinstance(data, dict):
+                continue
+            parsed.append((path, data))
+            if data.get("record_status", "active") != "active":
+                continue
+            entries.append({"path": path, "id": data.get("id", path.stem), "data": data,
+                            "created_at": data.get("created_at"),
+                            "updated_at": data.get("updated_at")})
+        if backfill and parsed:
+            record_memory_meta_many(memory_root, parsed)
+        source = "sidecar"
+    entries.sort(key=lambda e: (e["updated_at"] or e["created_at"] or "", e["path"].name))
+    return entries, source
+
+
+def _retention_victims(memory_root: Path, retention: dict[str, int], cap: int,
+                       now: datetime, backfill: bool = True) -> tuple[list[dict], dict]:
+    """Pick expired and over-cap memories for every category.
+
+    backfill is passed to _active_by_age() (off for dry runs).
+
+    Returns (victims, stats): victims are entries from _active_by_age()
+    plus "category" and "reason"; stats has per-category active counts and
+    the listing source.
+    """
+    victims = []
+    stats = {"active": {}, "source": "sidecar"}
+    for category, folder in CATEGORY_FOLDERS.items():
+        days = retention.get(category, 0)
+        if not days and not cap:
+            continue
+        entries, source = _active_by_age(memory_root, folder, backfill)
+        if source == "scan":
+            stats["source"] = "scan"
+        stats["active"][category] = len(entries)
+        keep = []
+        if days:
+            cutoff = now - timedelta(days=days)
+            for entry in entries:
+                # Unparseable timestamps never expire (the cap still applies)
+                last = _parse_ts(entry["updated_at"]) or _parse_ts(entry["created_at"])
+                if last is not None and last < cutoff:
+                    victims.append({**entry, "category": category,
+                                    "reason": f"Retention: not updated in {days} days"})
+                else:
+                    keep.append(entry)
+        else:
+            keep = entries
+        if cap and len(keep) > cap:
+            for entry in keep[:len(keep) - cap]:
+                victims.append({**entry, "category": category,
+                                "reason": f"Category cap: exceeded max_memories_per_category ({cap})"})
+    return victims, stats
+
+
+def enforce_retention(memory_root: Path, dry_run: bool = False,
+                      now: datetime | None = None) -> dict:
+    """Retire expired and over-cap memories across all categories.
+
+    A memory expires when its updated_at (created_at if missing) is more
+    than the category's retention_days ago. After expiry, each category
+    keeps at most max_memories_per_category active memories; the least
+    recently updated beyond the cap are retired. Everything is retired
+    under one index lock with one index append (retire_records()).
+
+    Returns {"retired": {category: [id, ...]}, "expired": n, "over_cap": n,
+    "errors": [str, ...], "source": "sidecar" | "scan"} (plus "dry_run").
+    """
+    now = now or datetime.now(timezone.utc)
+    retention, cap = _read_retention_config(memory_root)
+    summary = {"retired": {}, "expired": 0, "over_cap": 0, "errors": [], "source": "sidecar"}
+    if not cap and not any(retention.values()):
+        return summary
+
+    def tally(victim):
+        summary["retired"].setdefault(victim["category"], []).append(victim["id"])
+        key = "expired" if victim["reason"].startswith("Retention") else "over_cap"
+        summary[key] += 1
+
+    if dry_run:
+        victims, stats = _retention_victims(memory_root, retention, cap, now,
+                                            backfill=False)
+        summary["source"] = stats["source"]
+        for victim in victims:
+            print(f"[RETENTION] Would retire: {victim['id']} ({victim['reason']})",
+                  file=sys.stderr)
+            tally(victim)
+        summary["dry_run"] = True
+        return summary
+
+    index_path = memory_root / "index.md"
+    with FlockIndex(index_path) as lock:
+        lock.require_acquired()  # STRICT: raises TimeoutError if lock not held
+        victims, stats = _retention_victims(memory_root, retention, cap, now)
+        summary["source"] = stats["source"]
+        if not victims:
+            return summary
+        for victim in victims:
+            if victim["category"] == "session_summary" and victim["data"] is not None:
+                _deletion_guard(victim["data"], victim["id"])
+        by_path = {victim["path"]: victim for victim in victims}
+        outcomes = retire_records([(v["path"], v["reason"]) for v in victims],
+                                  memory_root, index_path)
+        for path, outcome in outcomes:
+            victim = by_path[path]
+            if isinstance(outcome, Exception):
+                summary["errors"].append(f"{victim['id']}: {outcome}")
+                print(f"[WARN] Failed to retire {victim['id']}: {outcome}", file=sys.stderr)
+            elif outcome.get("status") == "retired":
+                tally(victim)
+                print(f"[RETENTION] Retired {victim['id']} ({victim['reason']})",
+                      file=sys.stderr)
+    return summary
+
+
 # ---------------------------------------------------------------------------
 # CLI entry point
 # ---------------------------------------------------------------------------
@@ -302,10 +537,15 @@ def main():
     )
     parser.add_argument(
         "--category",
-        required=True,
         choices=list(CATEGORY_FOLDERS.keys()),
         help="Category to enforce rolling window on",
     )
+    parser.add_argument(
+        "--retention",
+        action="store_true",
+        help="Sweep all categories for retention_days / max_memories_per_category "
+             "(runs after the rolling window when --category is also given)",
+    )
     parser.add_argument(
         "--max-retained",
         type=int,
@@ -325,6 +565,9 @@ def main():
     )
     args = parser.parse_args()
 
+    if not args.category and not args.retention:
+        parser.error("one of --category or --retention is required")
+
     # Validate --max-retained
     if args.max_retained is not None and args.max_retained < 1:
         print("ERROR: --max-retained must be >= 1", file=sys.stderr)
@@ -336,13 +579,18 @@ def main():
         sys.exit(1)
 
     memory_root = _resolve_memory_root()
-    max_retained = _read_max_retained(memory_root, args.category, args.max_retained)
 
     try:
-        result = enforce_rolling_window(
-            memory_root, args.category, max_retained, args.dry_run,
-            max_retire_override=args.max_retire,
-        )
+        result = None
+        if args.category:
+            max_retained = _read_max_retained(memory_root, args.category, args.max_retained)
+            result = enforce_rolling_window(
+                memory_root, args.category, max_retained, args.dry_run,
+                max_retire_override=args.max_retire,
+            )
+        if args.retention:
+            retention = enforce_retention(memory_root, args.dry_run)
+            result = {**result, "retention": retention} if result is not None else retention
     except TimeoutError as e:
         print(str(e), file=sys.stderr)
         sys.exit(1)
@@ -2,25 +2,87 @@
 """
 Memory index management utility for claude-memory plugin.
 
-Rebuild, validate, query, health-check, or garbage-collect the index.md
-file that serves as the lightweight retrieval layer for stored memories.
+Rebuild, validate, query, health-check, compact, or garbage-collect the
+index.md file that serves as the lightweight retrieval layer for stored memories.
 
 Usage:
   python memory_index.py --rebuild --root .claude/memory
+  python memory_index.py --rebuild --incremental --root .claude/memory
   python memory_index.py --validate --root .claude/memory
   python memory_index.py --query "authentication" --root .claude/memory
   python memory_index.py --health --root .claude/memory
   python memory_index.py --gc --root .claude/memory
-
-No external dependencies required (stdlib only).
+  python memory_index.py --compact --root .claude/memory
+  python memory_index.py --pack-inactive --root .claude/memory
+  python memory_index.py --list-archived --root .claude/memory
+  python memory_index.py --migrate-layout --root .claude/memory
+
+No external dependencies required (stdlib only; the index lock comes from
+memory_lock.py, which --compact, --pack-inactive, --migrate-layout and --gc
+of packed records require).
 """
 
 import argparse
+import contextlib
 import json
 import os
+import sqlite3
 import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from pathlib import Path
+from pathlib import Path, PurePosixPath
+
+# Metadata sidecar read by retrieval. Optional: without it retrieval just
+# reads the memory JSON files directly.
+try:
+    from memory_search_engine import rebuild_memory_meta, update_memory_meta
+except ImportError:
+    rebuild_memory_meta = update_memory_meta = None
+
+# Index delta log (appended by memory_write.py, merged on read). Fallback for
+# partial deployments: plain index.md, no --compact.
+try:
+    from memory_search_engine import (
+        compact_index,
+        index_delta_path,
+        read_index_lines,
+        rewrite_index_paths,
+    )
+except ImportError:
+    compact_index = index_delta_path = rewrite_index_paths = None
+
+    def read_index_lines(index_path, missing_ok=False):
+        with open(index_path, "r", encoding="utf-8") as f:
+            return [l.rstrip("\n") for l in f]
+
+# Cold storage packs for inactive records (--pack-inactive). Without the
+# module nothing is ever packed, so there is nothing to read back either.
+try:
+    from memory_pack import append_to_pack, load_pack_table, rename_in_pack, repack
+except ImportError:
+    append_to_pack = load_pack_table = rename_in_pack = repack = None
+
+# Hashed directory fan-out (decisions/3f/use-jwt.json). Without the module
+# only the flat layout is listed and --migrate-layout is unavailable.
+try:
+    from memory_layout import layout_path, list_memory_names, read_fanout
+except ImportError:
+    layout_path = read_fanout = None
+
+    def list_memory_names(folder_dir):
+        try:
+            with os.scandir(folder_dir) as it:
+                return sorted(e.name for e in it if e.name.endswith(".json") and e.is_file())
+        except (FileNotFoundError, NotADirectoryError):
+            return []
+
+# Index lock (stdlib only). Readers skip it when the module is missing;
+# writers that need it refuse to run.
+try:
+    from memory_lock import FlockIndex
+except ImportError:
+    FlockIndex = None
 
 # Category folder mapping
 CATEGORY_FOLDERS = {
@@ -42,6 +104,82 @@ CATEGORY_DISPLAY = {
 }
 
 
+# Full scans parse JSON on a bounded thread pool. Parsing holds the GIL, but
+# the open/read syscalls overlap, which matters on cold caches and network
+# filesystems. Small stores stay serial (pool startup costs more than it saves).
+SCAN_MAX_WORKERS = 8
+_SCAN_PARALLEL_MIN_FILES = 64
+
+# Scan manifest for --rebuild --incremental: one row per memory file with the
+# stat it was parsed at and the fields index.md needs. Derived artifact; safe
+# to delete (the next incremental rebuild falls back to a full scan).
+MANIFEST_FILENAME = ".index-manifest.sqlite3"
+_MANIFEST_SCHEMA_VERSION = "1"
+_MANIFEST_TABLE_SQL = (
+    "CREATE TABLE IF NOT EXISTS manifest ("
+    "path TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL, "
+    "ino INTEGER NOT NULL, status TEXT NOT NULL, entry TEXT NOT NULL)"
+)
+
+
+def _list_memory_files(root: Path) -> list[tuple[str, str, str]]:
+    """(category, folder, name) for every *.json in the category folders, in scan order.
+
+    name is folder-relative: "use-jwt.json", or "3f/use-jwt.json" under fan-out.
+    """
+    files = []
+    for category, folder in CATEGORY_FOLDERS.items():
+        files.extend((category, folder, name) for name in list_memory_names(root / folder))
+    return files
+
+
+def _load_json(json_file: Path) -> tuple[dict | None, Exception | None]:
+    try:
+        with open(json_file, "r", encoding="utf-8") as f:
+            return json.load(f), None
+    except json.JSONDecodeError as e:
+        return None, e
+
+
+def _load_all(paths: list[Path]) -> list[tuple[dict | None, Exception | None]]:
+    """Parse JSON files, in order, on a bounded thread pool when there are many."""
+    if len(paths) < _SCAN_PARALLEL_MIN_FILES:
+        return [_load_json(p) for p in paths]
+    workers = min(SCAN_MAX_WORKERS, (os.cpu_count() or 1) + 4)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_load_json, paths, chunksize=64))
+
+
+def _memory_record(root: Path, category: str, json_file: Path, data: dict) -> dict:
+    """Build a scan_memories() record from a parsed memory file."""
+    title = data.get("title", json_file.stem)
+    cat = data.get("category", category)
+    rel_path = json_file.relative_to(root.parent.parent)
+    return {
+        "category": cat,
+        "display": CATEGORY_DISPLAY.get(cat, cat.upper()),
+        "title": title,
+        "path": str(rel_path).replace("\\", "/"),
+        "tags": data.get("tags", []),
+        "file": json_file,
+        "record_status": data.get("record_status", "active"),
+        "data": data,
+    }
+
+
+def _parse_files(root: Path, files: list[tuple[str, Path]]) -> list[dict]:
+    """Parse (category, path) pairs into records; unparseable files are skipped."""
+    records = []
+    for (category, json_file), (data, err) in zip(files, _load_all([p for _, p in files])):
+        try:
+            if err is not None:
+                raise err
+            records.append(_memory_record(root, category, json_file, data))
+        except (json.JSONDecodeError, KeyError) as e:
+            print(f"WARNING: Could not parse {json_file}: {e}", file=sys.stderr)
+    return records
+
+
 def scan_memories(root: Path, include_inactive: bool = False) -> list[dict]:
     """Scan all JSON files in category subfolders and extract metadata.
 
@@ -50,39 +188,10 @@ def scan_memories(root: Path, include_inactive: bool = False) -> list[dict]:
         include_inactive: If True, include retired/archived entries.
                          If False (default), only include active entries.
     """
-    memories = []
-    for category, folder in CATEGORY_FOLDERS.items():
-        folder_path = root / folder
-        if not folder_path.is_dir():
-            continue
-        for json_file in sorted(folder_path.glob("*.json")):
-            try:
-                with open(json_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-
-                record_status = data.get("record_status", "active")
-
-                # Skip non-active unless explicitly requested
-                if not include_inactive and record_status != "active":
-                    continue
-
-                title = data.get("title", json_file.stem)
-                cat = data.get("category", category)
-                display = CATEGORY_DISPLAY.get(cat, cat.upper())
-                tags = data.get("tags", [])
-                rel_path = json_file.relative_to(root.parent.parent)
-                memories.append({
-                    "category": cat,
-                    "display": display,
-                    "title": title,
-                    "path": str(rel_path).replace("\\", "/"),
-                    "tags": tags,
-                    "file": json_file,
-                    "record_status": record_status,
-                    "data": data,
-                })
-            except (json.JSONDecodeError, KeyError) as e:
-                print(f"WARNING: Could not parse {json_file}: {e}", file=sys.stderr)
+    files = [(category, root / folder / name) for category, folder, name in _list_memory_files(root)]
+    memories = _parse_files(root, files)
+    if not include_inactive:
+        memories = [m for m in memories if m["record_status"] == "active"]
     return memories
 
 
@@ -99,18 +208,99 @@ def _sanitize_index_title(title: str) -> str:
     return title[:120]
 
 
-def rebuild_index(root: Path) -> None:
-    """Scan all memory files and regenerate index.md with enriched format.
-
-    Only indexes active memories. Includes #tags: suffix from JSON tags.
-    """
-    memories = scan_memories(root, include_inactive=False)
-    if not memories:
-        print("No active memory files found. Nothing to index.")
+def _rebuild_meta_sidecar(root: Path, memories: list[dict]) -> None:
+    """Regenerate the retrieval metadata sidecar. Non-fatal on failure."""
+    if rebuild_memory_meta is None:
         return
+    try:
+        rebuild_memory_meta(root, [(m["file"], m["data"]) for m in memories])
+    except Exception as e:
+        print(f"WARNING: Could not write metadata sidecar: {e}", file=sys.stderr)
+
+
+def _manifest_entry(m: dict) -> str:
+    return json.dumps({"category": m["category"], "title": m["title"], "tags": m["tags"]})
+
+
+def _load_manifest(root: Path) -> dict[str, tuple] | None:
+    """Return {rel_path: (mtime_ns, size, ino, status, entry_json)}, or None if unusable."""
+    db_path = root / MANIFEST_FILENAME
+    if not db_path.exists():
+        return None
+    try:
+        conn = sqlite3.connect(db_path.resolve().as_uri() + "?mode=ro", uri=True)
+        try:
+            row = conn.execute("SELECT value FROM manifest_meta WHERE key = 'schema'").fetchone()
+            if not row or row[0] != _MANIFEST_SCHEMA_VERSION:
+                return None
+            return {path: rest for path, *rest in conn.execute(
+                "SELECT path, mtime_ns, size, ino, status, entry FROM manifest")}
+        finally:
+            conn.close()
+    except (sqlite3.Error, OSError):
+        return None
+
+
+def _manifest_row(m: dict) -> tuple | None:
+    try:
+        st = os.stat(m["file"])
+    except OSError:
+        return None
+    return (m["path"], st.st_mtime_ns, st.st_size, st.st_ino, m["record_status"],
+            _manifest_entry(m))
+
+
+def _write_manifest(root: Path, memories: list[dict]) -> None:
+    """Write a fresh manifest for a full scan and swap it in. Non-fatal on failure."""
+    db_path = root / MANIFEST_FILENAME
+    tmp_path = root / f"{MANIFEST_FILENAME}.{os.getpid()}.tmp"
+    rows = [r for r in map(_manifest_row, memories) if r]
+    try:
+        try:
+            tmp_path.unlink()
+        except FileNotFoundError:
+            pass
+        conn = sqlite3.connect(str(tmp_path))
+        try:
+            conn.execute(_MANIFEST_TABLE_SQL)
+            conn.execute("CREATE TABLE manifest_meta (key TEXT PRIMARY KEY, value TEXT)")
+            conn.execute("INSERT INTO manifest_meta VALUES ('schema', ?)", (_MANIFEST_SCHEMA_VERSION,))
+            conn.executemany("INSERT OR REPLACE INTO manifest VALUES (?, ?, ?, ?, ?, ?)", rows)
+            conn.commit()
+        finally:
+            conn.close()
+        os.replace(tmp_path, db_path)
+    except (sqlite3.Error, OSError) as e:
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+        print(f"WARNING: Could not write scan manifest: {e}", file=sys.stderr)
 
+
+def _update_manifest(root: Path, changed: list[dict], removed: list[str]) -> None:
+    """Upsert changed rows and drop removed paths. Non-fatal on failure."""
+    rows = [r for r in map(_manifest_row, changed) if r]
+    try:
+        conn = sqlite3.connect(str(root / MANIFEST_FILENAME), timeout=5)
+        try:
+            conn.executemany("DELETE FROM manifest WHERE path = ?", [(p,) for p in removed])
+            conn.executemany("INSERT OR REPLACE INTO manifest VALUES (?, ?, ?, ?, ?, ?)", rows)
+            conn.commit()
+        finally:
+            conn.close()
+    except (sqlite3.Error, OSError) as e:
+        print(f"WARNING: Could not update scan manifest: {e}", file=sys.stderr)
+
+
+def _write_index(root: Path, memories: list[dict]) -> Path:
+    """Write index.md for active memories and discard any pending delta log.
+
+    Caller must hold the exclusive index lock (_index_write_lock): a delta
+    record appended between the scan and the unlink would otherwise be lost.
+    """
     # Sort by category display name, then title
-    memories.sort(key=lambda m: (m["display"], m["title"].lower()))
+    memories = sorted(memories, key=lambda m: (m["display"], m["title"].lower()))
 
     lines = ["# Memory Index", "", "<!-- Auto-generated by memory_index.py. Do not edit manually. -->", ""]
     for m in memories:
@@ -122,11 +312,133 @@ def rebuild_index(root: Path) -> None:
         lines.append(line)
     lines.append("")
 
+    # Readers that skip the lock see the old or the new index.md, never a
+    # truncated one
     index_path = root / "index.md"
-    with open(index_path, "w", encoding="utf-8") as f:
-        f.write("\n".join(lines))
+    fd, tmp_path = tempfile.mkstemp(dir=str(root), suffix=".tmp", prefix=".mw-")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines))
+        os.replace(tmp_path, index_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    # A full rebuild supersedes any pending delta records
+    if index_delta_path is not None:
+        try:
+            index_delta_path(index_path).unlink()
+        except FileNotFoundError:
+            pass
+    return index_path
+
+
+def rebuild_index(root: Path) -> None:
+    """Scan all memory files and regenerate index.md with enriched format.
+
+    Only indexes active memories. Includes #tags: suffix from JSON tags.
+    Also regenerates the retrieval metadata sidecar (all statuses) and the
+    scan manifest used by rebuild_incremental().
+    """
+    with _index_write_lock(root):
+        scanned = scan_memories(root, include_inactive=True)
+        _rebuild_meta_sidecar(root, scanned)
+        _write_manifest(root, scanned)
+        memories = [m for m in scanned if m["record_status"] == "active"]
+        if not memories:
+            print("No active memory files found. Nothing to index.")
+            return
+
+        index_path = _write_index(root, memories)
+        print(f"Rebuilt index.md with {len(memories)} entries at {index_path}")
+
+
+def rebuild_incremental(root: Path) -> None:
+    """Regenerate index.md re-parsing only files changed since the last rebuild.
+
+    A file is unchanged while its (mtime_ns, size, inode) match the scan
+    manifest; its index fields come from the manifest instead of the JSON
+    (those records carry no "file"/"data").
+    Falls back to a full rebuild_index() when there is no usable manifest.
+    """
+    with _index_write_lock(root):
+        manifest = _load_manifest(root)
+        if manifest is None:
+            print("No scan manifest found; doing a full rebuild.")
+            rebuild_index(root)
+            return
+
+        # String paths: at tens of thousands of files pathlib overhead dominates
+        root_str = str(root)
+        rel_prefix = root.relative_to(root.parent.parent).as_posix()
+        records: list[dict | None] = []
+        changed: list[tuple[int, str, Path]] = []
+        for category, folder, name in _list_memory_files(root):
+            rel_path = f"{rel_prefix}/{folder}/{name}"
+            row = manifest.pop(rel_path, None)
+            try:
+                st = os.stat(os.path.join(root_str, folder, name))
+            except OSError:
+                continue
+            if row is not None and tuple(row[:3]) == (st.st_mtime_ns, st.st_size, st.st_ino):
+                entry = json.loads(row[4])
+                records.append({
+                    "category": entry["category"],
+                    "display": CATEGORY_DISPLAY.get(entry["category"], entry["category"].upper()),
+                    "title": entry["title"],
+                    "path": rel_path,
+                    "tags": entry["tags"],
+                    "record_status": row[3],
+                })
+            else:
+                changed.append((len(records), category, root / folder / name))
+                records.append(None)
+
+        parsed = {m["file"]: m for m in _parse_files(root, [(c, f) for _, c, f in changed])}
+        for slot, _, json_file in changed:
+            records[slot] = parsed.get(json_file)
+        records = [m for m in records if m is not None]
+        removed = sorted(manifest)  # Manifest rows with no file left on disk
+
+        if update_memory_meta is not None and (parsed or removed):
+            try:
+                update_memory_meta(root, [(m["file"], m["data"]) for m in parsed.values()], removed)
+            except Exception as e:
+                print(f"WARNING: Could not update metadata sidecar: {e}", file=sys.stderr)
+        _update_manifest(root, list(parsed.values()), removed)
+
+        memories = [m for m in records if m["record_status"] == "active"]
+        stats = (f"{len(changed)} changed, {len(removed)} removed, "
+                 f"{len(records) - len(parsed)} unchanged")
+        if not memories:
+            print(f"No active memory files found. Nothing to index. ({stats})")
+            return
+        index_path = _write_index(root, memories)
+        print(f"Rebuilt index.md with {len(memories)} entries at {index_path} ({stats})")
+
+
+def _index_write_lock(root: Path):
+    """Exclusive FlockIndex hold for rebuilds, across the scan, the index.md
+    replace and the delta unlink, so concurrent memory_write.py mutations
+    are either in the scan or appended after the rebuild. Like
+    memory_write.py, proceeds without the lock on timeout or when
+    memory_lock.py is unavailable.
+    """
+    if FlockIndex is None:
+        return contextlib.nullcontext()
+    return FlockIndex(root / "index.md")
+
 
-    print(f"Rebuilt index.md with {len(memories)} entries at {index_path}")
+def _index_read_lock(root: Path):
+    """Shared FlockIndex hold, so index.md, the delta log and the memory files
+    are read as one consistent snapshot. No-op when memory_lock.py is
+    unavailable; readers never fail for want of a lock.
+    """
+    if FlockIndex is None:
+        return contextlib.nullcontext()
+    return FlockIndex(root / "index.md", shared=True)
 
 
 def validate_index(root: Path) -> bool:
@@ -136,19 +448,21 @@ def validate_index(root: Path) -> bool:
         print("ERROR: index.md does not exist. Run --rebuild first.")
         return False
 
+    with _index_read_lock(root):
+        index_lines = read_index_lines(index_path)
+        # Scan actual active files
+        actual_memories = scan_memories(root, include_inactive=False)
+
     # Parse index entries
     indexed_paths = set()
-    with open(index_path, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if line.startswith("- [") and " -> " in line:
-                # Extract path, stripping any #tags: suffix
-                after_arrow = line.split(" -> ", 1)[1]
-                path_part = after_arrow.split(" #tags:")[0].strip()
-                indexed_paths.add(path_part)
+    for line in index_lines:
+        line = line.strip()
+        if line.startswith("- [") and " -> " in line:
+            # Extract path, stripping any #tags: suffix
+            after_arrow = line.split(" -> ", 1)[1]
+            path_part = after_arrow.split(" #tags:")[0].strip()
+            indexed_paths.add(path_part)
 
-    # Scan actual active files
-    actual_memories = scan_memories(root, include_inactive=False)
     actual_paths = {m["path"] for m in actual_memories}
 
     # Compare
@@ -185,11 +499,10 @@ def query_index(root: Path, query: str) -> None:
 
     query_lower = query.lower()
     matches = []
-    with open(index_path, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if line.startswith("- [") and query_lower in line.lower():
-                matches.append(line)
+    for line in read_index_lines(index_path):
+        line = line.strip()
+        if line.startswith("- [") and query_lower in line.lower():
+            matches.append(line)
 
     if matches:
         print(f"Found {len(matches)} match(es) for '{query}':")
@@ -224,17 +537,20 @@ def gc_retired(root: Path) -> None:
     now = datetime.now(timezone.utc)
     deleted = []
     errors = []
+    packed_drops: dict[str, set[str]] = {}
+    packed_deleted = []
 
-    # Scan all category folders for retired files
-    all_memories = scan_memories(root, include_inactive=True)
+    # Scan all category folders for retired files, plus the cold packs
+    all_memories = scan_memories(root, include_inactive=True) + _packed_records(root)
     for m in all_memories:
         if m["record_status"] != "retired":
             continue
 
         data = m["data"]
+        name = m["file"].name if m["file"] is not None else Path(m["path"]).name + " (packed)"
         retired_at_str = data.get("retired_at")
         if not retired_at_str:
-            errors.append(f"  SKIP {m['file'].name}: missing retired_at timestamp")
+            errors.append(f"  SKIP {name}: missing retired_at timestamp")
             continue
 
         try:
@@ -243,16 +559,29 @@ def gc_retired(root: Path) -> None:
             if retired_at.tzinfo is None:
                 retired_at = retired_at.replace(tzinfo=timezone.utc)
         except (ValueError, TypeError):
-            errors.append(f"  SKIP {m['file'].name}: invalid retired_at timestamp")
+            errors.append(f"  SKIP {name}: invalid retired_at timestamp")
             continue
 
         age_days = (now - retired_at).days
         if age_days >= grace_period_days:
+            if m["file"] is None:
+                packed_drops.setdefault(m["folder"], set()).add(m["path"])
+                packed_deleted.append(f"  DELETED {name} (retired {age_days} days ago)")
+                continue
             try:
                 m["file"].unlink()
-                deleted.append(f"  DELETED {m['file'].name} (retired {age_days} days ago)")
+                deleted.append(f"  DELETED {name} (retired {age_days} days ago)")
             except OSError as e:
-                errors.append(f"  ERROR deleting {m['file'].name}: {e}")
+                errors.append(f"  ERROR deleting {name}: {e}")
+
+    # Packed records are dropped by rewriting their pack (which also reclaims
+    # tombstones); that needs the index lock
+    if packed_drops:
+        failed = _repack_folders(root, packed_drops)
+        if failed:
+            errors.append(f"  ERROR rewriting packs: {failed}")
+        else:
+            deleted.extend(packed_deleted)
 
     # Report
     print(f"Garbage Collection (grace period: {grace_period_days} days)")
@@ -287,8 +616,21 @@ def health_report(root: Path) -> None:
     print("Memory Health Report")
     print("=" * 50)
 
-    # Scan all memories (including inactive for full picture)
-    all_memories = scan_memories(root, include_inactive=True)
+    # Scan all memories (including inactive for full picture), and read the
+    # index in the same shared hold so the sync check sees one snapshot
+    index_path = root / "index.md"
+    index_lines = None
+    index_unreadable = False
+    with _index_read_lock(root):
+        all_memories = scan_memories(root, include_inactive=True)
+        packed = _packed_records(root)
+        all_memories += packed
+        if index_path.exists():
+            try:
+                index_lines = read_index_lines(index_path)
+            except OSError:
+                index_lines = []
+                index_unreadable = True
     active_memories = [m for m in all_memories if m["record_status"] == "active"]
     retired_memories = [m for m in all_memories if m["record_status"] == "retired"]
     archived_memories = [m for m in all_memories if m["record_status"] == "archived"]
@@ -309,13 +651,15 @@ def health_report(root: Path) -> None:
         print(f"  Retired: {len(retired_memories)}")
     if archived_memories:
         print(f"  Archived: {len(archived_memories)}")
+    if packed:
+        print(f"  Packed (cold storage): {len(packed)}")
 
     # Heavily updated memories (times_updated > 5)
     print(f"\n--- Heavily Updated (times_updated > 5) ---")
     heavy = []
     for m in all_memories:
         times_updated = m["data"].get("times_updated", 0)
-        if times_updated > 5:
+        if isinstance(times_updated, int) and times_updated > 5:
             heavy.append((times_updated, m["title"], m["display"]))
     if heavy:
         heavy.sort(key=lambda x: -x[0])
@@ -351,24 +695,20 @@ def health_report(root: Path) -> None:
 
     # Index desync detection
     print(f"\n--- Index Sync Status ---")
-    index_path = root / "index.md"
     index_desynced = False
-    if not index_path.exists():
+    if index_lines is None:
         print("  WARNING: index.md does not exist!")
         index_desynced = True
     else:
-        indexed_paths = set()
-        try:
-            with open(index_path, "r", encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    if line.startswith("- [") and " -> " in line:
-                        after_arrow = line.split(" -> ", 1)[1]
-                        path_part = after_arrow.split(" #tags:")[0].strip()
-                        indexed_paths.add(path_part)
-        except OSError:
+        if index_unreadable:
             print("  ERROR: Could not read index.md")
-            indexed_paths = set()
+        indexed_paths = set()
+        for line in index_lines:
+            line = line.strip()
+            if line.startswith("- [") and " -> " in line:
+                after_arrow = line.split(" -> ", 1)[1]
+                path_part = after_arrow.split(" #tags:")[0].strip()
+                indexed_paths.add(path_part)
 
         active_paths = {m["path"] for m in active_memories}
         missing_from_idx = active_paths - indexed_paths
@@ -404,6 +744,256 @@ def health_report(root: Path) -> None:
             print(f"    - {issue}")
 
 
+def _packed_records(root: Path) -> list[dict]:
+    """scan_memories()-style records for packed (cold storage) memories.
+
+    Built from the pack offset tables, so nothing is decompressed: "data"
+    holds only the summary fields (memory_pack.SUMMARY_FIELDS) and "file"
+    is None. Records whose hot file exists again are skipped (the hot copy
+    wins until the pack is rewritten).
+    """
+    if load_pack_table is None:
+        return []
+    project_root = root.parent.parent
+    records = []
+    for category, folder in CATEGORY_FOLDERS.items():
+        for rel_path, entry in load_pack_table(root, folder).items():
+            if (project_root / rel_path).exists():
+                continue
+            cat = entry.get("category", category)
+            records.append({
+                "category": cat,
+                "display": CATEGORY_DISPLAY.get(cat, str(cat).upper()),
+                "title": entry.get("title", Path(rel_path).stem),
+                "path": rel_path,
+                "tags": [],
+                "file": None,
+                "folder": folder,
+                "record_status": entry.get("record_status", "retired"),
+                "data": entry,
+            })
+    return records
+
+
+def _exclusive_index_lock(root: Path):
+    """Strict exclusive FlockIndex hold, or None (error printed) if unavailable."""
+    if FlockIndex is None:
+        print("ERROR: this operation needs the index lock from memory_lock.py.",
+              file=sys.stderr)
+        return None
+    return FlockIndex(root / "index.md")
+
+
+def _repack_folders(root: Path, drops: dict[str, set[str]]) -> str | None:
+    """Rewrite packs without the given records. Returns an error string or None."""
+    lock = _exclusive_index_lock(root)
+    if lock is None or repack is None:
+        return "index lock or memory_pack.py unavailable"
+    with lock:
+        try:
+            lock.require_acquired()
+        except TimeoutError as e:
+            return str(e)
+        try:
+            for folder, paths in drops.items():
+                repack(root, folder, drop=paths)
+        except OSError as e:
+            return str(e)
+    return None
+
+
+def pack_inactive(root: Path) -> bool:
+    """Move retired and archived records into their category's cold pack.
+
+    Under the exclusive index lock, each inactive file is appended to
+    .cold/<folder>.pack, then deleted from the hot folder; its metadata
+    sidecar and scan manifest rows are dropped. Restore, unarchive,
+    --list-archived, --gc and --health read packed records from the pack.
+    """
+    if append_to_pack is None:
+        print("ERROR: memory_pack.py is required for --pack-inactive.", file=sys.stderr)
+        return False
+    lock = _exclusive_index_lock(root)
+    if lock is None:
+        return False
+    packed = {}
+    with lock:
+        try:
+            lock.require_acquired()
+        except TimeoutError as e:
+            print(f"ERROR: {e}", file=sys.stderr)
+            return False
+        inactive = [m for m in scan_memories(root, include_inactive=True)
+                    if m["record_status"] in ("retired", "archived")]
+        by_folder: dict[str, list[dict]] = {}
+        for m in inactive:
+            by_folder.setdefault(m["file"].relative_to(root).parts[0], []).append(m)
+        for folder, memories in by_folder.items():
+            # Appended and fsynced before any hot file is removed
+            append_to_pack(root, folder, [(m["path"], m["data"]) for m in memories])
+            for m in memories:
+                try:
+                    m["file"].unlink()
+                except FileNotFoundError:
+                    pass
+            packed[folder] = [m["path"] for m in memories]
+
+        removed = [p for paths in packed.values() for p in paths]
+        if removed and update_memory_meta is not None:
+            try:
+                update_memory_meta(root, [], removed)
+            except Exception as e:
+                print(f"WARNING: Could not update metadata sidecar: {e}", file=sys.stderr)
+        if removed and (root / MANIFEST_FILENAME).exists():
+            _update_manifest(root, [], removed)
+
+    if not packed:
+        print("No retired or archived memories to pack.")
+        return True
+    for folder in sorted(packed):
+        print(f"Packed {len(packed[folder])} inactive record(s) into "
+              f"{root / '.cold' / (folder + '.pack')}")
+    return True
+
+
+def list_archived(root: Path) -> None:
+    """List archived memories from the hot folders and the cold packs.
+
+    Sorted by archived_at, most recent first.
+    """
+    with _index_read_lock(root):
+        memories = [m for m in scan_memories(root, include_inactive=True) + _packed_records(root)
+                    if m["record_status"] == "archived"]
+    if not memories:
+        print("No archived memories found.")
+        return
+    memories.sort(key=lambda m: str(m["data"].get("archived_at") or ""), reverse=True)
+    print(f"Archived memories ({len(memories)}):")
+    for m in memories:
+        data = m["data"]
+        where = " (packed)" if m["file"] is None else ""
+        print(f"  [{m['display']}] {m['title']} ({data.get('id', Path(m['path']).stem)}){where}")
+        print(f"    archived_at: {data.get('archived_at', '?')}  "
+              f"reason: {data.get('archived_reason', '')}")
+        print(f"    path: {m['path']}")
+
+
+def _link_or_copy(src: Path, dest: Path) -> bool:
+    """Make dest a second name for src. False if dest already holds other content."""
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.link(src, dest)
+        return True
+    except FileExistsError:
+        # Left behind by an interrupted migration: fine if it is the same file
+        return os.path.samefile(src, dest) or src.read_bytes() == dest.read_bytes()
+    except OSError:
+        pass  # No hard links on this filesystem
+    tmp = dest.with_name(f".{dest.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(src.read_bytes())
+    os.replace(tmp, dest)
+    return True
+
+
+def migrate_layout(root: Path) -> bool:
+    """Move every memory file to the layout set by directory_fanout.
+
+    Under the exclusive index lock: each file first gets its new name as a
+    hard link (or copy), then index.md, the metadata sidecar, the scan
+    manifest and the cold pack tables are pointed at the new paths, and
+    only then are the old names removed. index.md switches in one atomic
+    replace, so readers never see a path that does not exist. An
+    interrupted run is finished by running it again.
+    """
+    if layout_path is None or rewrite_index_paths is None:
+        print("ERROR: memory_layout.py and memory_search_engine.py are required for "
+              "--migrate-layout.", file=sys.stderr)
+        return False
+    fanout = read_fanout(root)
+    layout = "fanned-out (<folder>/<bucket>/<slug>.json)" if fanout else "flat (<folder>/<slug>.json)"
+    lock = _exclusive_index_lock(root)
+    if lock is None:
+        return False
+    project_root = root.parent.parent
+    conflicts = []
+    with lock:
+        try:
+            lock.require_acquired()
+        except TimeoutError as e:
+            print(f"ERROR: {e}", file=sys.stderr)
+            return False
+        moved = []
+        for m in scan_memories(root, include_inactive=True):
+            dest = layout_path(m["file"], fanout)
+            if dest == m["file"]:
+                continue
+            if not _link_or_copy(m["file"], dest):
+                conflicts.append(f"{m['path']} -> {dest.relative_to(project_root).as_posix()}")
+                continue
+            moved.append((m, {**m, "file": dest,
+                              "path": dest.relative_to(project_root).as_posix()}))
+
+        renames = {old["path"]: new["path"] for old, new in moved}
+        if renames:
+            rewrite_index_paths(root / "index.md", renames)
+            if update_memory_meta is not None:
+                try:
+                    update_memory_meta(root, [(new["file"], new["data"]) for _, new in moved],
+                                       list(renames))
+                except Exception as e:
+                    print(f"WARNING: Could not update metadata sidecar: {e}", file=sys.stderr)
+            if (root / MANIFEST_FILENAME).exists():
+                _update_manifest(root, [new for _, new in moved], list(renames))
+            for old, _ in moved:
+                try:
+                    old["file"].unlink()
+                except FileNotFoundError:
+                    pass
+                with contextlib.suppress(OSError):
+                    if old["file"].parent.parent.name in CATEGORY_FOLDERS.values():
+                        old["file"].parent.rmdir()  # Emptied bucket; non-empty stays
+
+        packed = 0
+        if rename_in_pack is not None:
+            for folder in CATEGORY_FOLDERS.values():
+                pack_renames = {}
+                for rel_path in load_pack_table(root, folder):
+                    new = layout_path(PurePosixPath(rel_path), fanout).as_posix()
+                    if new != rel_path:
+                        pack_renames[rel_path] = new
+                if pack_renames:
+                    packed += rename_in_pack(root, folder, pack_renames)
+
+    if not renames and not packed and not conflicts:
+        print(f"Nothing to migrate: all memory files already use the {layout} layout.")
+        return True
+    print(f"Migrated {len(renames)} memory file(s) and {packed} packed record(s) "
+          f"to the {layout} layout.")
+    for conflict in conflicts:
+        print(f"  CONFLICT {conflict}: a different file already exists there; left in place.")
+    return not conflicts
+
+
+def compact(root: Path) -> bool:
+    """Fold the index delta log into index.md under the index lock."""
+    index_path = root / "index.md"
+    if compact_index is None:
+        print("ERROR: memory_search_engine.py is required for --compact.", file=sys.stderr)
+        return False
+    if FlockIndex is None:
+        print("ERROR: memory_lock.py is required for --compact.", file=sys.stderr)
+        return False
+    with FlockIndex(index_path) as lock:
+        try:
+            lock.require_acquired()
+        except TimeoutError as e:
+            print(f"ERROR: {e}", file=sys.stderr)
+            return False
+        merged = compact_index(index_path)
+    print(f"Compacted {merged} delta record(s) into {index_path}")
+    return True
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Memory index management utility for claude-memory plugin."
@@ -420,6 +1010,11 @@ def main():
         action="store_true",
         help="Scan all memory files and regenerate index.md",
     )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="With --rebuild: re-parse only files changed since the last rebuild",
+    )
     group.add_argument(
         "--validate",
         action="store_true",
@@ -441,6 +1036,26 @@ def main():
         action="store_true",
         help="Garbage collect retired memories past grace period",
     )
+    group.add_argument(
+        "--compact",
+        action="store_true",
+        help="Fold the index delta log (.index-delta.log) into index.md",
+    )
+    group.add_argument(
+        "--pack-inactive",
+        action="store_true",
+        help="Move retired/archived records into per-category cold packs (.cold/)",
+    )
+    group.add_argument(
+        "--list-archived",
+        action="store_true",
+        help="List archived memories (hot folders and cold packs)",
+    )
+    group.add_argument(
+        "--migrate-layout",
+        action="store_true",
+        help="Move memory files to the flat or fanned-out layout set by directory_fanout",
+    )
 
     args = parser.parse_args()
     root = Path(args.root)
@@ -449,8 +1064,14 @@ def main():
         print(f"ERROR: Memory root '{root}' is not a directory.", file=sys.stderr)
         sys.exit(1)
 
+    if args.incremental and not args.rebuild:
+        parser.error("--incremental requires --rebuild")
+
     if args.rebuild:
-        rebuild_index(root)
+        if args.incremental:
+            rebuild_incremental(root)
+        else:
+            rebuild_index(root)
     elif args.validate:
         ok = validate_index(root)
         sys.exit(0 if ok else 1)
@@ -460,6 +1081,14 @@ def main():
         health_report(root)
     elif args.gc:
         gc_retired(root)
+    elif args.compact:
+        sys.exit(0 if compact(root) else 1)
+    elif args.pack_inactive:
+        sys.exit(0 if pack_inactive(root) else 1)
+    elif args.list_archived:
+        list_archived(root)
+    elif args.migrate_layout:
+        sys.exit(0 if migrate_layout(root) else 1)
 
 
 if __name__ == "__main__":
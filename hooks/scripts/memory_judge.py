@@ -25,7 +25,6 @@ import sys
 import time
 import urllib.error
 import urllib.request
-from collections import deque
 
 # Lazy import: logging module may not exist during partial deployments
 try:
@@ -37,6 +36,12 @@ except (ImportError, SyntaxError) as e:
     def get_session_id(*args, **kwargs): return ""
     def parse_logging_config(*args, **kwargs): return {"enabled": False, "level": "info", "retention_days": 14}
 
+# Lazy import: transcript reader; degrade to no conversation context on partial deploy
+try:
+    from memory_transcript import read_transcript_tail
+except ImportError:
+    def read_transcript_tail(*args, **kwargs): return []
+
 _API_URL = "https://api.anthropic.com/v1/messages"
 _API_VERSION = "2023-06-01"
 _DEFAULT_MODEL = "claude-haiku-4-5-20251001"
@@ -111,7 +116,8 @@ def extract_recent_context(transcript_path: str, max_turns: int = 5) -> str:
     """Extract last N conversation turns from transcript JSONL.
 
     Uses msg["type"] (not "role") and nested content path,
-    matching the format used by memory_triage.py.
+    matching the format used by memory_triage.py. Shares its tail
+    reader (memory_transcript.read_transcript_tail).
     """
     # Validate transcript path is within expected scope (defense in depth)
     # Matches memory_triage.py pattern (lines 964-968)
@@ -121,24 +127,9 @@ def extract_recent_context(transcript_path: str, max_turns: int = 5) -> str:
     if not (resolved.startswith(_resolved_tmp_prefix) or resolved.startswith(home + "/")):
         return ""
 
-    messages: deque = deque(maxlen=max_turns * 2)
-    try:
-        with open(resolved) as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    msg = json.loads(line)
-                except json.JSONDecodeError:
-                    continue
-                if not isinstance(msg, dict):
-                    continue
-                # Transcript uses "type" key with values "user"/"human"/"assistant"
-                if msg.get("type") in ("user", "human", "assistant"):
-                    messages.append(msg)
-    except (FileNotFoundError, OSError):
+    if max_turns <= 0:
         return ""
+    messages = read_transcript_tail(resolved, max_turns * 2)
 
     parts = []
     for msg in messages:
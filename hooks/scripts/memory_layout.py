@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Category folder layout: flat or hashed two-level fan-out.
+
+By default every memory of a category lives directly in its folder
+(``decisions/use-jwt.json``). With ``"directory_fanout": true`` in
+memory-config.json new files go one level deeper, into a bucket named by
+the first two hex digits of the MD5 of the slug
+(``decisions/3f/use-jwt.json``), so no directory grows past a few hundred
+entries at tens of thousands of memories.
+
+Readers accept both layouts at once: folder listings descend into bucket
+directories, and a path given in one layout is found in the other
+(``locate_memory_file``). Writers place new files by the configured
+layout. ``memory_index.py --migrate-layout`` moves existing files (and
+their index, sidecar, manifest and cold pack paths) to the configured
+layout.
+
+Stdlib only; works on relative and absolute paths alike.
+"""
+
+import hashlib
+import json
+import os
+import re
+from pathlib import Path, PurePath
+
+FANOUT_CONFIG_KEY = "directory_fanout"
+
+_BUCKET_RE = re.compile(r"^[0-9a-f]{2}$")
+
+
+def bucket_for(slug: str) -> str:
+    """Bucket directory name for a slug (two lowercase hex digits)."""
+    return hashlib.md5(slug.encode("utf-8")).hexdigest()[:2]
+
+
+def is_bucket(name: str) -> bool:
+    return bool(_BUCKET_RE.match(name))
+
+
+def read_fanout(memory_root) -> bool:
+    """directory_fanout from memory-config.json; False when absent or invalid."""
+    try:
+        with open(os.path.join(memory_root, "memory-config.json"), "r", encoding="utf-8") as f:
+            config = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return isinstance(config, dict) and config.get(FANOUT_CONFIG_KEY) is True
+
+
+def category_dir(path: PurePath) -> PurePath:
+    """Category folder of a memory file path in either layout."""
+    parent = path.parent
+    return parent.parent if is_bucket(parent.name) else parent
+
+
+def is_fanned(path: PurePath) -> bool:
+    return is_bucket(path.parent.name)
+
+
+def layout_path(path: PurePath, fanout: bool) -> PurePath:
+    """Where a memory file path belongs in the given layout."""
+    folder = category_dir(path)
+    if fanout:
+        return folder / bucket_for(path.stem) / path.name
+    return folder / path.name
+
+
+def sibling_path(path: PurePath, slug: str) -> PurePath:
+    """Path for another slug in the same category folder and layout as *path*."""
+    return layout_path(category_dir(path) / f"{slug}.json", is_fanned(path))
+
+
+def other_layout_path(path: PurePath) -> PurePath:
+    """The same memory file's path in the other layout."""
+    return layout_path(path, not is_fanned(path))
+
+
+def locate_memory_file(path: Path) -> Path:
+    """*path* if it exists, else its other-layout path if that exists, else *path*."""
+    if path.exists():
+        return path
+    other = other_layout_path(path)
+    return other if other.exists() else path
+
+
+def list_memory_names(folder_dir) -> list[str]:
+    """Folder-relative names of the *.json files in a category folder.
+
+    Includes files in bucket subdirectories ("3f/use-jwt.json"). Sorted by
+    file name, so scan order does not depend on the layout. Bucket
+    symlinks are not followed. Missing folder -> [].
+    """
+    names = []
+    try:
+        with os.scandir(folder_dir) as it:
+            entries = list(it)
+    except (FileNotFoundError, NotADirectoryError):
+        return names
+    for entry in entries:
+        if entry.name.endswith(".json"):
+            if entry.is_file():
+                names.append(entry.name)
+        elif is_bucket(entry.name) and entry.is_dir(follow_symlinks=False):
+            try:
+                with os.scandir(entry.path) as sub:
+                    names.extend(f"{entry.name}/{e.name}" for e in sub
+                                 if e.name.endswith(".json") and e.is_file())
+            except OSError:
+                continue
+    names.sort(key=lambda n: (n.rsplit("/", 1)[-1], n))
+    return names
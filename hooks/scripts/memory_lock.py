@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""Index lock shared by every script that mutates or reads index.md.
+
+FlockIndex serialises index.md, the delta log, the metadata sidecar and
+the cold packs across processes. It lives apart from memory_write.py so
+that memory_index.py and memory_enforce.py can take it without importing
+pydantic; memory_write.py re-exports it.
+
+No external dependencies (stdlib only).
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+# Lazy import: logging module may not exist during partial deployments
+try:
+    from memory_logger import emit_event
+except (ImportError, SyntaxError) as e:
+    if isinstance(e, ImportError) and getattr(e, 'name', None) != 'memory_logger':
+        raise  # Transitive dependency failure -- fail-fast
+    def emit_event(*args, **kwargs): pass
+
+# flock-based index lock where available (POSIX); mkdir lock elsewhere.
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+def _flock_wait(fd: int, op: int, timeout: float) -> bool:
+    """Block in flock(fd, op) for at most `timeout` seconds.
+
+    flock() has no timeout, so the blocking call runs on a helper thread
+    parked on the kernel wait queue. Returns True with the lock held on fd.
+    On False the caller no longer owns fd: it is closed here, or by the
+    helper once its pending flock() returns (dropping the lock it was granted).
+    """
+    guard = threading.Lock()
+    state = {"done": False, "ok": False, "abandoned": False}
+
+    def wait():
+        try:
+            fcntl.flock(fd, op)
+            ok = True
+        except OSError:
+            ok = False
+        with guard:
+            state["done"], state["ok"] = True, ok
+            if state["abandoned"]:
+                os.close(fd)
+
+    waiter = threading.Thread(target=wait, name="index-lock-wait", daemon=True)
+    waiter.start()
+    waiter.join(timeout)
+    with guard:
+        if not state["done"]:
+            state["abandoned"] = True
+            return False
+    if not state["ok"]:
+        os.close(fd)
+    return state["ok"]
+
+
+class FlockIndex:
+    """Lock for index mutations (and, with shared=True, consistent index reads).
+
+    Backends:
+    - "flock" (POSIX): `fcntl.flock` on `.index.lock`. Waiters block in the
+      kernel instead of polling, and the lock is released when its holder
+      exits or crashes, so there is nothing stale to break. shared=True
+      takes LOCK_SH, so readers only wait for writers.
+    - "mkdir" (no fcntl, or flock unsupported by the filesystem): `os.mkdir`
+      on `.index.lockdir` (atomic on all FS including NFS), polled every 50ms,
+      with locks older than 60s broken as stale. No shared mode: readers
+      take it exclusively.
+
+    Either way, after _LOCK_TIMEOUT the caller proceeds without the lock
+    (acquired=False) unless it calls require_acquired().
+
+    Re-entrant per thread: a nested `with FlockIndex(...)` on the same index
+    (batch mode runs the single-op handlers under one outer lock) does not
+    touch the lock and inherits the outer `acquired` state. An exclusive
+    hold nested in a shared one raises RuntimeError: the process only has
+    LOCK_SH, and upgrading in place is not atomic under flock.
+
+    Each outermost hold emits an `index.lock` event with the wait and hold
+    times (debug level; warning when the lock was not acquired).
+
+    Public API: imported by memory_enforce.py and memory_index.py.
+    """
+
+    _LOCK_TIMEOUT = 15.0   # Max seconds to wait for lock
+    _STALE_AGE = 60.0      # Seconds before a mkdir lock is considered stale
+    _POLL_INTERVAL = 0.05   # Seconds between mkdir retry attempts
+    _BACKEND = "flock" if fcntl is not None else "mkdir"
+
+    # (resolved memory root, thread id) -> [depth, acquired, exclusive] for
+    # locks held by this process
+    _held: dict[tuple[str, int], list] = {}
+
+    # memory-config.json path -> ((mtime_ns, size, inode), parsed config),
+    # so a release costs one stat instead of a parse
+    _config_cache: dict[str, tuple[tuple, dict]] = {}
+
+    def __init__(self, index_path: Path, shared: bool = False):
+        self.lock_dir = index_path.parent / ".index.lockdir"
+        self.lock_file = index_path.parent / ".index.lock"
+        self.shared = shared
+        self.backend = self._BACKEND
+        self.acquired = False
+        self._fd: Optional[int] = None
+        # Resolved, so "mem/index.md" and "/abs/mem/index.md" share one hold
+        self._key = (os.path.realpath(index_path.parent), threading.get_ident())
+        self._wait_ms = 0.0
+        self._acquired_at = 0.0
+
+    def __enter__(self):
+        held = FlockIndex._held.get(self._key)
+        if held is not None:
+            if not self.shared and not held[2]:
+                raise RuntimeError(
+                    "LOCK_MODE_ERROR: exclusive index lock requested while this "
+                    "thread holds it shared"
+                )
+            held[0] += 1
+            self.acquired = held[1]
+            return self
+        start = time.monotonic()
+        self._acquire()
+        self._acquired_at = time.monotonic()
+        self._wait_ms = (self._acquired_at - start) * 1000
+        # The mkdir backend has no shared mode: its holds are exclusive
+        exclusive = not self.shared or self.backend == "mkdir"
+        FlockIndex._held[self._key] = [1, self.acquired, exclusive]
+        return self
+
+    def _acquire(self) -> None:
+        if self.backend == "flock":
+            self._acquire_flock()
+        else:
+            self._acquire_mkdir()
+
+    def _acquire_flock(self) -> None:
+        try:
+            fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT | getattr(os, "O_NOFOLLOW", 0), 0o600)
+        except OSError:
+            print(
+                "[WARN] Could not open lock file; proceeding without lock",
+                file=sys.stderr,
+            )
+            return
+        op = fcntl.LOCK_SH if self.shared else fcntl.LOCK_EX
+        try:
+            fcntl.flock(fd, op | fcntl.LOCK_NB)
+        except BlockingIOError:
+            if not _flock_wait(fd, op, self._LOCK_TIMEOUT):
+                print(
+                    "[WARN] Index lock timeout; proceeding without lock",
+                    file=sys.stderr,
+                )
+                return
+        except OSError:
+            # flock not supported here (some network filesystems)
+            os.close(fd)
+            self.backend = "mkdir"
+            self._acquire_mkdir()
+            return
+        self._fd = fd
+        self.acquired = True
+
+    def _acquire_mkdir(self) -> None:
+        deadline = time.monotonic() + self._LOCK_TIMEOUT
+        while True:
+            try:
+                os.mkdir(self.lock_dir)
+                self.acquired = True
+                return
+            except FileExistsError:
+                # Lock held by another process -- check for stale
+                try:
+                    mtime = self.lock_dir.stat().st_mtime
+                    if (time.time() - mtime) > self._STALE_AGE:
+                        # Stale lock -- break it with warning
+                        try:
+                            os.rmdir(self.lock_dir)
+                        except OSError:
+                            pass
+                        print(
+                            "[WARN] Broke stale index lock (older than 60s)",
+                            file=sys.stderr,
+                        )
+                        continue
+                except OSError:
+                    pass  # Lock dir disappeared between check and stat -- retry
+
+                if time.monotonic() >= deadline:
+                    print(
+                        "[WARN] Index lock timeout; proceeding without lock",
+                        file=sys.stderr,
+                    )
+                    return
+                time.sleep(self._POLL_INTERVAL)
+            except OSError:
+                # mkdir failed for non-existence reason (permissions, etc.)
+                # Proceed without lock rather than failing the write
+                print(
+                    "[WARN] Could not create lock directory; proceeding without lock",
+                    file=sys.stderr,
+                )
+                return
+
+    def __exit__(self, *args):
+        held = FlockIndex._held[self._key]
+        held[0] -= 1
+        if held[0]:
+            return
+        del FlockIndex._held[self._key]
+        hold_ms = (time.monotonic() - self._acquired_at) * 1000 if self.acquired else 0.0
+        if self._fd is not None:
+            try:
+                os.close(self._fd)  # Drops the flock
+            except OSError:
+                pass
+            self._fd = None
+        elif self.acquired:
+            try:
+                os.rmdir(self.lock_dir)
+            except OSError:
+                pass
+        self._log(hold_ms)
+
+    @classmethod
+    def _load_config(cls, memory_root: Path) -> Optional[dict]:
+        """Parsed memory-config.json, cached per file version; None if unusable."""
+        config_path = str(memory_root / "memory-config.json")
+        try:
+            st = os.stat(config_path)
+        except OSError:
+            return None
+        stamp = (st.st_mtime_ns, st.st_size, st.st_ino)
+        cached = cls._config_cache.get(config_path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        try:
+            with open(config_path, "r", encoding="utf-8") as f:
+                config = json.load(f)
+        except (OSError, ValueError):
+            return None
+        cls._config_cache[config_path] = (stamp, config)
+        return config
+
+    def _log(self, hold_ms: float) -> None:
+        memory_root = self.lock_file.parent
+        config = self._load_config(memory_root)
+        if config is None:
+            return  # No config -> logging is off
+        emit_event("index.lock", {
+            "mode": "shared" if self.shared else "exclusive",
+            "backend": self.backend,
+            "acquired": self.acquired,
+            "wait_ms": round(self._wait_ms, 2),
+            "hold_ms": round(hold_ms, 2),
+        }, level="debug" if self.acquired else "warning",
+           script=os.path.basename(sys.argv[0]) or "memory_write.py",
+           memory_root=str(memory_root), config=config)
+
+    def require_acquired(self) -> None:
+        """Raise TimeoutError if the lock was not acquired.
+
+        Call this inside a `with` block when strict lock enforcement is needed.
+        Existing callers (do_create, etc.) do NOT call this -- they continue
+        with the legacy "proceed without lock" behavior.
+
+        Public API: used by memory_enforce.py.
+        """
+        if not self.acquired:
+            raise TimeoutError(
+                "LOCK_TIMEOUT_ERROR: Index lock not acquired. "
+                "Another process may hold the lock. Retry later."
+            )
@@ -10,6 +10,11 @@ Supports three action modes:
   - --action prepare: steps 1-6 + target path generation + manifest enrichment
   - --action commit: step 7 only from existing manifest
   - --action run: steps 1-7 (prepare + commit in one call)
+
+Candidate selection, drafting and writes run in-process by calling
+memory_candidate / memory_draft / memory_write as libraries (one
+interpreter, one parsed index). --subprocess or
+triage.subprocess_isolation=true restores one child process per step.
 """
 
 import sys
@@ -29,12 +34,17 @@ if os.path.isfile(_venv_python) and os.path.realpath(sys.executable) != os.path.
         os.execv(_venv_python, [_venv_python] + sys.argv)
 
 import argparse
+import contextlib
 import fnmatch
+import functools
 import hashlib
+import io
 import json
+import math
 import re
 import subprocess
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
 
@@ -69,6 +79,14 @@ CUD_TABLE = {
     ("UPDATE", "DELETE"): "UPDATE",  # DELETE vetoed structurally
 }
 
+# Per-category fan-out for subprocess-mode candidate/draft steps
+# (triage.orchestrate_concurrency / --concurrency) and each child's timeout
+# (triage.category_timeout_seconds). In-process steps ignore the fan-out
+# (see _note_concurrency_ignored).
+DEFAULT_CONCURRENCY = 4
+MAX_CONCURRENCY = 8
+DEFAULT_CATEGORY_TIMEOUT = 30
+
 # ---------------------------------------------------------------------------
 # Markdown fence stripping (H5 / D7)
 # ---------------------------------------------------------------------------
@@ -146,7 +164,8 @@ def generate_target_path(memory_root, category, title, category_folders, slugify
         slugify_fn: slugify() function from memory_write.
 
     Returns:
-        Target path string (e.g., ".claude/memory/decisions/use-jwt.json").
+        Target path string (e.g., ".claude/memory/decisions/use-jwt.json", or
+        ".claude/memory/decisions/3f/use-jwt.json" with directory_fanout).
     """
     folder = category_folders.get(category)
     if not folder:
@@ -154,6 +173,9 @@ def generate_target_path(memory_root, category, title, category_folders, slugify
     slug = slugify_fn(title)
     if not slug:
         slug = f"untitled-{os.getpid()}"
+    from memory_layout import bucket_for, read_fanout
+    if read_fanout(memory_root):
+        return os.path.join(memory_root, folder, bucket_for(slug), f"{slug}.json")
     return os.path.join(memory_root, folder, f"{slug}.json")
 
 
@@ -228,56 +250,133 @@ def run_candidate_selection(
     python: str,
     memory_root: str | None = None,
     pinned=None,
+    inprocess: bool = False,
+    concurrency: int = 1,
+    timeout: float = DEFAULT_CATEGORY_TIMEOUT,
 ) -> dict:
     """Step 2: Run memory_candidate.py for each intent + capture OCC hashes.
 
     Returns dict mapping category -> candidate result (or None on failure).
-    For candidates with a file path, computes MD5 hash and stores as 'file_hash'.
+    For candidates with a file path, stores the OCC token as 'file_hash'.
+    With inprocess=True, memory_candidate.select_candidate() is called
+    directly and the index is read once for all categories. Otherwise up
+    to *concurrency* memory_candidate.py processes run at once, each
+    limited to *timeout* seconds; the result keeps the intents' order.
     """
-    candidates = {}
+    index_lines = None
+    if inprocess:
+        import memory_candidate
+        cand_root = Path(memory_root) if memory_root else Path(".claude", "memory")
+        memory_candidate.ensure_index(cand_root)
+        try:
+            index_lines = memory_candidate.read_index_lines(cand_root / "index.md")
+        except OSError:
+            index_lines = None  # Every category fails, as the CLI would
+
+    jobs = []
     for cat, intent in intents.items():
         # Write new-info summary to a temp file for candidate.py
         new_info_path = os.path.join(staging_dir, f"new-info-{cat}.txt")
         _safe_write(new_info_path, intent["new_info_summary"], pinned=pinned)
 
-        cmd = [
-            python,
-            os.path.join(scripts_dir, "memory_candidate.py"),
-            "--category", cat,
-            "--new-info-file", new_info_path,
-        ]
-        if memory_root:
-            cmd.extend(["--root", memory_root])
-
         lifecycle_hints = intent.get("lifecycle_hints", [])
-        if lifecycle_hints:
-            cmd.extend(["--lifecycle-event", lifecycle_hints[0]])
+        lifecycle_event = lifecycle_hints[0] if lifecycle_hints else None
 
-        try:
-            result = subprocess.run(
-                cmd, capture_output=True, text=True, timeout=30
+        if inprocess:
+            job = functools.partial(
+                _candidate_inprocess, memory_candidate, cat,
+                intent["new_info_summary"], cand_root, lifecycle_event, index_lines,
             )
-            if result.returncode == 0:
-                cand = json.loads(result.stdout)
-                candidates[cat] = cand
-
-                # OCC hash capture: read candidate file and compute MD5
-                cand_entry = cand.get("candidate")
-                if cand_entry and cand_entry.get("path"):
-                    cand_path = cand_entry["path"]
-                    try:
-                        file_bytes = Path(cand_path).read_bytes()
-                        cand["file_hash"] = hashlib.md5(file_bytes).hexdigest()
-                    except (OSError, IOError):
-                        cand["file_hash"] = None
-                else:
-                    cand["file_hash"] = None
-            else:
-                candidates[cat] = None
-        except (subprocess.TimeoutExpired, json.JSONDecodeError):
-            candidates[cat] = None
+        else:
+            job = functools.partial(
+                _candidate_subprocess, python, scripts_dir, cat, new_info_path,
+                memory_root, lifecycle_event, timeout,
+            )
+        jobs.append((cat, job))
+
+    # In-process steps share redirected stderr, so they stay sequential
+    return _run_per_category(jobs, 1 if inprocess else concurrency)
 
-    return candidates
+
+def _run_per_category(jobs: list, concurrency: int) -> dict:
+    """Run (category, job) pairs on up to *concurrency* threads.
+
+    Returns {category: job result} in the order of *jobs*, however the
+    jobs finish. Jobs handle their own errors and timeouts.
+    """
+    if concurrency <= 1 or len(jobs) <= 1:
+        return {cat: job() for cat, job in jobs}
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(jobs))) as pool:
+        futures = [(cat, pool.submit(job)) for cat, job in jobs]
+        return {cat: future.result() for cat, future in futures}
+
+
+def _candidate_subprocess(python: str, scripts_dir: str, cat: str,
+                          new_info_path: str, memory_root: str | None,
+                          lifecycle_event: str | None,
+                          timeout: float) -> dict | None:
+    """Run memory_candidate.py for one category (None on failure)."""
+    cmd = [
+        python,
+        os.path.join(scripts_dir, "memory_candidate.py"),
+        "--category", cat,
+        "--new-info-file", new_info_path,
+    ]
+    if memory_root:
+        cmd.extend(["--root", memory_root])
+    if lifecycle_event:
+        cmd.extend(["--lifecycle-event", lifecycle_event])
+
+    try:
+        result = subprocess.run(
+            cmd, capture_output=True, text=True, timeout=timeout
+        )
+        if result.returncode == 0:
+            return _attach_file_hash(json.loads(result.stdout))
+    except (subprocess.TimeoutExpired, json.JSONDecodeError):
+        pass
+    return None
+
+
+def _candidate_inprocess(memory_candidate, cat: str, new_info: str, root: Path,
+                         lifecycle_event: str | None,
+                         index_lines: list | None) -> dict | None:
+    """In-process counterpart of _candidate_subprocess()."""
+    if (index_lines is None
+            or cat not in memory_candidate.CATEGORY_FOLDERS
+            or (lifecycle_event is not None
+                and lifecycle_event not in memory_candidate.VALID_LIFECYCLE_EVENTS)):
+        return None  # The CLI would exit non-zero
+    try:
+        # Candidate warnings are discarded, as in subprocess mode
+        with contextlib.redirect_stderr(io.StringIO()):
+            cand = memory_candidate.select_candidate(
+                cat, new_info, root, lifecycle_event, index_lines=index_lines,
+            )
+    except Exception:
+        return None
+    return _attach_file_hash(cand)
+
+
+def _attach_file_hash(cand: dict) -> dict:
+    """OCC capture: store the candidate's OCC token as file_hash.
+
+    memory_candidate reports the token (stat + times_updated) from the read
+    it already does for the excerpt. Only when it is absent (older
+    candidate script, unreadable file) is the file read and MD5-hashed.
+    """
+    cand_entry = cand.get("candidate")
+    if cand_entry and cand_entry.get("occ_token"):
+        cand["file_hash"] = cand_entry["occ_token"]
+    elif cand_entry and cand_entry.get("path"):
+        try:
+            file_bytes = Path(cand_entry["path"]).read_bytes()
+            cand["file_hash"] = hashlib.md5(file_bytes).hexdigest()
+        except (OSError, IOError):
+            cand["file_hash"] = None
+    else:
+        cand["file_hash"] = None
+    return cand
 
 
 # ---------------------------------------------------------------------------
@@ -359,13 +458,23 @@ def execute_drafts(
     memory_root: str | None = None,
     slugify_fn=None,
     category_folders=None,
+    inprocess: bool = False,
+    concurrency: int = 1,
+    timeout: float = DEFAULT_CATEGORY_TIMEOUT,
 ) -> None:
     """Step 4: Run memory_draft.py for each CREATE/UPDATE action.
 
     Mutates resolved dict in-place, adding draft_path or changing action to SKIP.
     When slugify_fn and category_folders are provided (prepare/run modes),
-    generates target_path for CREATE actions.
+    generates target_path for CREATE actions. With inprocess=True,
+    memory_draft.draft_memory() is called directly. Otherwise up to
+    *concurrency* memory_draft.py processes run at once, each limited to
+    *timeout* seconds.
     """
+    if inprocess:
+        import memory_draft
+
+    jobs = []
     for cat, res in resolved.items():
         if res["action"] not in ("CREATE", "UPDATE"):
             continue
@@ -378,32 +487,28 @@ def execute_drafts(
             pinned=pinned,
         )
 
-        cmd = [
-            python,
-            os.path.join(scripts_dir, "memory_draft.py"),
-            "--action", res["action"].lower(),
-            "--category", cat,
-            "--input-file", input_path,
-            "--root", staging_dir,
-        ]
-
+        candidate_file = None
         if res["action"] == "UPDATE" and res.get("candidate_path"):
-            cmd.extend(["--candidate-file", res["candidate_path"]])
+            candidate_file = res["candidate_path"]
 
-        try:
-            result = subprocess.run(
-                cmd, capture_output=True, text=True, timeout=30
+        if inprocess:
+            job = functools.partial(
+                _draft_inprocess, memory_draft, cat, res, input_path,
+                candidate_file, staging_dir,
             )
-            if result.returncode == 0:
-                draft_output = json.loads(result.stdout)
-                res["draft_path"] = draft_output.get("draft_path")
-            else:
-                res["action"] = "SKIP"
-                res["reason"] = f"draft_failed: {result.stderr[:200]}"
-        except (subprocess.TimeoutExpired, json.JSONDecodeError) as e:
-            res["action"] = "SKIP"
-            res["reason"] = f"draft_error: {e}"
+        else:
+            job = functools.partial(
+                _draft_subprocess, python, scripts_dir, cat, res, input_path,
+                candidate_file, staging_dir, timeout,
+            )
+        jobs.append((cat, job))
+
+    # Each job mutates only its own category's entry in *resolved*
+    _run_per_category(jobs, 1 if inprocess else concurrency)
 
+    for cat, _job in jobs:
+        res = resolved[cat]
+        intent = intents[cat]
         # Generate target paths only in prepare/run modes (not no-flag default)
         if slugify_fn is not None and category_folders is not None:
             # CREATE: generate path from slugified title
@@ -418,6 +523,66 @@ def execute_drafts(
                 res["target_path"] = res["candidate_path"]
 
 
+def _draft_subprocess(python: str, scripts_dir: str, cat: str, res: dict,
+                      input_path: str, candidate_file: str | None,
+                      staging_dir: str,
+                      timeout: float = DEFAULT_CATEGORY_TIMEOUT) -> None:
+    """Run memory_draft.py for one category; sets draft_path or SKIP on res."""
+    cmd = [
+        python,
+        os.path.join(scripts_dir, "memory_draft.py"),
+        "--action", res["action"].lower(),
+        "--category", cat,
+        "--input-file", input_path,
+        "--root", staging_dir,
+    ]
+    if candidate_file:
+        cmd.extend(["--candidate-file", candidate_file])
+
+    try:
+        result = subprocess.run(
+            cmd, capture_output=True, text=True, timeout=timeout
+        )
+        if result.returncode == 0:
+            draft_output = json.loads(result.stdout)
+            res["draft_path"] = draft_output.get("draft_path")
+        else:
+            res["action"] = "SKIP"
+            res["reason"] = f"draft_failed: {result.stderr[:200]}"
+    except (subprocess.TimeoutExpired, json.JSONDecodeError) as e:
+        res["action"] = "SKIP"
+        res["reason"] = f"draft_error: {e}"
+
+
+def _draft_inprocess(memory_draft, cat: str, res: dict, input_path: str,
+                     candidate_file: str | None, staging_dir: str) -> None:
+    """In-process counterpart of _draft_subprocess() (same SKIP reasons)."""
+    if cat not in memory_draft.VALID_CATEGORIES:
+        res["action"] = "SKIP"
+        res["reason"] = f"draft_failed: invalid category: {cat}"
+        return
+    if res["action"] == "UPDATE" and not candidate_file:
+        res["action"] = "SKIP"
+        res["reason"] = "draft_failed: ERROR: --candidate-file is required for update action."
+        return
+    err = io.StringIO()
+    try:
+        with contextlib.redirect_stderr(err):
+            draft_output = memory_draft.draft_memory(
+                res["action"].lower(), cat, input_path,
+                candidate_file=candidate_file, root=staging_dir,
+            )
+    except Exception as e:
+        res["action"] = "SKIP"
+        res["reason"] = f"draft_error: {type(e).__name__}: {e}"
+        return
+    if draft_output is not None:
+        res["draft_path"] = draft_output.get("draft_path")
+    else:
+        res["action"] = "SKIP"
+        res["reason"] = f"draft_failed: {err.getvalue()[:200]}"
+
+
 def handle_deletes(intents: dict, resolved: dict, staging_dir: str, pinned=None) -> None:
     """Step 5: Write retire JSONs for DELETE actions.
 
@@ -475,9 +640,21 @@ def execute_saves(
     python: str,
     exclude_categories: set | None = None,
     pinned=None,
+    batch: bool = False,
+    inprocess: bool = False,
+    queue: bool = False,
 ) -> dict:
     """Step 7: Execute saves via memory_write.py subprocess calls.
 
+    With batch=True all categories go to one ``memory_write.py --action
+    batch`` process (one interpreter, one index lock); otherwise each
+    category gets its own process. With queue=True as well, the batch is
+    spooled to the project's write queue, so sessions saving at the same
+    time are applied together by whichever of them gets the index lock. With inprocess=True the same batch
+    logic, sentinel updates, result file and cleanup run through
+    memory_write functions in this process; only enforcement (rolling
+    window and retention sweep) still runs as a child process.
+
     Args:
         manifest: Orchestration manifest from steps 1-6 (or loaded from file).
         staging_dir: Path to staging directory.
@@ -486,6 +663,9 @@ def execute_saves(
         python: Python executable path.
         exclude_categories: Categories to skip (verifier-blocked).
         pinned: Optional PinnedStagingDir for TOCTOU-safe I/O.
+        batch: Run all writes in a single memory_write.py batch process.
+        inprocess: Call memory_write directly instead of starting processes.
+        queue: Route the batch through the write queue (batch only).
 
     Returns:
         {
@@ -552,13 +732,14 @@ def execute_saves(
     write_py = os.path.join(scripts_dir, "memory_write.py")
 
     # 1. Sentinel -> saving
-    _update_sentinel(python, write_py, staging_dir, "saving")
+    _update_sentinel(python, write_py, staging_dir, "saving", inprocess=inprocess)
 
     # -- Timing: mark write phase start (after sentinel, before actual writes) --
     _save_write_start = time.time()
 
-    # 2. Per-category subprocess calls
+    # 2. Build one write operation per actionable category
     session_summary_saved = False
+    ops = []  # (category, action, res, op)
     for cat, res in categories.items():
         action = res.get("action", "NOOP")
         if action not in ("CREATE", "UPDATE", "DELETE"):
@@ -577,7 +758,6 @@ def execute_saves(
         candidate_path = res.get("candidate_path")
         occ_hash = res.get("occ_hash")
 
-        # Build subprocess command
         if action == "CREATE":
             if not target_path:
                 errors.append({
@@ -585,14 +765,8 @@ def execute_saves(
                     "error": "SKIP: null target_path for CREATE action",
                 })
                 continue
-            cmd = [
-                python, write_py,
-                "--action", "create",
-                "--target", target_path,
-                "--input", draft_path,
-                "--category", cat,
-                "--skip-auto-enforce",
-            ]
+            op = {"action": "create", "target": target_path,
+                  "input": draft_path, "category": cat}
         elif action == "UPDATE":
             update_target = candidate_path or target_path
             if not update_target:
@@ -607,15 +781,9 @@ def execute_saves(
                     "error": "SKIP: null draft_path for UPDATE action",
                 })
                 continue
-            cmd = [
-                python, write_py,
-                "--action", "update",
-                "--target", update_target,
-                "--input", draft_path,
-                "--skip-auto-enforce",
-            ]
+            op = {"action": "update", "target": update_target, "input": draft_path}
             if occ_hash:
-                cmd.extend(["--hash", occ_hash])
+                op["hash"] = occ_hash
         elif action == "DELETE":
             if not candidate_path:
                 errors.append({
@@ -631,52 +799,42 @@ def execute_saves(
                     reason = retire_data.get("reason", reason)
                 except (json.JSONDecodeError, OSError):
                     pass
-            cmd = [
-                python, write_py,
-                "--action", "retire",
-                "--target", candidate_path,
-                "--reason", reason,
-                "--skip-auto-enforce",
-            ]
+            op = {"action": "retire", "target": candidate_path, "reason": reason}
         else:
             continue
+        ops.append((cat, action, res, op))
+
+    # Execute: one batch process for all categories, or one process each
+    if inprocess:
+        outcomes = _run_write_inprocess([op for *_, op in ops], batch, queue=queue)
+    elif batch and ops:
+        outcomes = _run_write_batch(python, write_py, staging_dir, [op for *_, op in ops], pinned,
+                                    queue=queue)
+    else:
+        outcomes = [_run_write_single(python, write_py, op) for *_, op in ops]
 
-        # Execute
-        try:
-            result = subprocess.run(
-                cmd, capture_output=True, text=True, timeout=30
-            )
-            if result.returncode == 0:
-                # Extract title from stdout if available
-                title = _extract_title(result.stdout, res, cat)
-                saved.append({
-                    "category": cat,
-                    "action": action,
-                    "title": title,
-                    "target": target_path or candidate_path or "",
-                })
-                if cat == "session_summary":
-                    session_summary_saved = True
-            else:
-                err_msg = result.stderr.strip()[-500:] if result.stderr else "unknown error"
-                errors.append({
-                    "category": cat,
-                    "error": f"WRITE_ERROR: {err_msg}",
-                })
-        except subprocess.TimeoutExpired:
-            errors.append({
+    for (cat, action, res, op), (ok, output) in zip(ops, outcomes):
+        if ok:
+            saved.append({
                 "category": cat,
-                "error": "SUBPROCESS_TIMEOUT: memory_write.py timed out after 30s",
+                "action": action,
+                "title": _extract_title(output, res, cat),
+                "target": res.get("target_path") or res.get("candidate_path") or "",
             })
+            if cat == "session_summary":
+                session_summary_saved = True
+        else:
+            errors.append({"category": cat, "error": output})
 
-    # 3. Enforce once (session_summary only)
-    if session_summary_saved:
+    # 3. Enforce once: rolling window (session_summary only) plus the
+    #    retention_days / max_memories_per_category sweep after any save
+    if saved:
         enforce_py = os.path.join(scripts_dir, "memory_enforce.py")
+        cmd = [python, enforce_py, "--retention"]
+        if session_summary_saved:
+            cmd += ["--category", "session_summary"]
         try:
-            subprocess.run(
-                [python, enforce_py, "--category", "session_summary"],
-                capture_output=True, text=True, timeout=30,
-            )
+            subprocess.run(cmd, capture_output=True, text=True, timeout=30)
         except (subprocess.TimeoutExpired, OSError):
             pass  # fail-open: enforcement failure is not fatal
 
@@ -745,28 +903,42 @@ def execute_saves(
         if _phase_timing is not None:
             result_data["phase_timing"] = _phase_timing
         result_json = json.dumps(result_data, ensure_ascii=False)
-        result_file_path = os.path.join(staging_dir, ".save-result-payload.json")
-        try:
-            _safe_write(result_file_path, result_json, pinned=pinned)
-        except OSError:
-            pass  # fail-open: sentinel and cleanup must still run
-        try:
-            subprocess.run(
-                [python, write_py,
-                 "--action", "write-save-result",
-                 "--staging-dir", staging_dir,
-                 "--result-file", result_file_path],
-                capture_output=True, text=True, timeout=15,
-            )
-        except (subprocess.TimeoutExpired, OSError):
-            pass  # fail-open
+        if inprocess:
+            try:
+                import memory_write
+                memory_write.write_save_result(
+                    staging_dir, memory_write.fill_session_id(staging_dir, result_json))
+            except Exception:
+                pass  # fail-open
+        else:
+            result_file_path = os.path.join(staging_dir, ".save-result-payload.json")
+            try:
+                _safe_write(result_file_path, result_json, pinned=pinned)
+            except OSError:
+                pass  # fail-open: sentinel and cleanup must still run
+            try:
+                subprocess.run(
+                    [python, write_py,
+                     "--action", "write-save-result",
+                     "--staging-dir", staging_dir,
+                     "--result-file", result_file_path],
+                    capture_output=True, text=True, timeout=15,
+                )
+            except (subprocess.TimeoutExpired, OSError):
+                pass  # fail-open
 
     # 6. Sentinel -> saved/failed
     sentinel_state = "saved" if status == "success" else "failed"
-    _update_sentinel(python, write_py, staging_dir, sentinel_state)
+    _update_sentinel(python, write_py, staging_dir, sentinel_state, inprocess=inprocess)
 
     # 7. Cleanup staging (only on full success)
-    if status == "success":
+    if status == "success" and inprocess:
+        try:
+            import memory_write
+            memory_write.cleanup_staging(staging_dir)
+        except Exception:
+            pass  # fail-open
+    elif status == "success":
         try:
             subprocess.run(
                 [python, write_py,
@@ -804,8 +976,113 @@ def execute_saves(
     }
 
 
-def _update_sentinel(python: str, write_py: str, staging_dir: str, state: str):
+def _single_write_cmd(python: str, write_py: str, op: dict) -> list:
+    """memory_write.py command line for one batch-style operation."""
+    cmd = [python, write_py, "--action", op["action"], "--target", op["target"]]
+    if op["action"] in ("create", "update"):
+        cmd.extend(["--input", op["input"]])
+    if op["action"] == "create":
+        cmd.extend(["--category", op["category"]])
+    if op["action"] == "retire":
+        cmd.extend(["--reason", op["reason"]])
+    cmd.append("--skip-auto-enforce")
+    if op.get("hash"):
+        cmd.extend(["--hash", op["hash"]])
+    return cmd
+
+
+def _run_write_single(python: str, write_py: str, op: dict) -> tuple[bool, str]:
+    """Run one memory_write.py process. Returns (ok, stdout or error message)."""
+    try:
+        result = subprocess.run(
+            _single_write_cmd(python, write_py, op),
+            capture_output=True, text=True, timeout=30,
+        )
+    except subprocess.TimeoutExpired:
+        return False, "SUBPROCESS_TIMEOUT: memory_write.py timed out after 30s"
+    if result.returncode == 0:
+        return True, result.stdout
+    err_msg = result.stderr.strip()[-500:] if result.stderr else "unknown error"
+    return False, f"WRITE_ERROR: {err_msg}"
+
+
+def _run_write_batch(python: str, write_py: str, staging_dir: str,
+                     ops: list, pinned=None, queue: bool = False) -> list[tuple[bool, str]]:
+    """Run all operations in one memory_write.py --action batch process.
+
+    Returns one (ok, stdout-or-error) pair per operation, in order. If the
+    batch process itself fails, every operation gets the same error.
+    """
+    batch_path = os.path.join(staging_dir, "write-batch.json")
+    timeout = 30 * len(ops)
+    cmd = [python, write_py, "--action", "batch", "--manifest", batch_path,
+           "--skip-auto-enforce"]
+    if queue:
+        cmd.append("--queue")
+        timeout += 60  # Queue wait: other sessions' batches may go first
+    try:
+        _safe_write(batch_path, json.dumps({"operations": ops}, ensure_ascii=False), pinned=pinned)
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return [(False, f"SUBPROCESS_TIMEOUT: memory_write.py batch timed out after {timeout}s")] * len(ops)
+    except OSError as e:
+        return [(False, f"WRITE_ERROR: cannot run batch: {e}")] * len(ops)
+    try:
+        results = json.loads(result.stdout)["results"]
+        if len(results) != len(ops):
+            raise ValueError("result count mismatch")
+    except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+        detail = (result.stderr or result.stdout).strip()[-500:] or "unknown error"
+        return [(False, f"WRITE_ERROR: {detail}")] * len(ops)
+    return _batch_outcomes(results)
+
+
+def _run_write_inprocess(ops: list, batch: bool, queue: bool = False) -> list[tuple[bool, str]]:
+    """Apply operations with memory_write.run_batch() in this process.
+
+    batch=True holds one index lock for all operations; otherwise each
+    operation gets its own run (and lock), like separate processes would.
+    queue=True (with batch) goes through memory_write.run_queued_batch().
+    Returns (ok, stdout-or-error) pairs in the same form as the
+    subprocess runners.
+    """
+    if not ops:
+        return []
+    try:
+        import memory_write
+        # Handler warnings are discarded, as in subprocess mode
+        with contextlib.redirect_stderr(io.StringIO()):
+            if batch and queue:
+                results = memory_write.run_queued_batch(ops, auto_enforce=False)["results"]
+            elif batch:
+                results = memory_write.run_batch(ops, auto_enforce=False)["results"]
+            else:
+                results = [memory_write.run_batch([op], auto_enforce=False)["results"][0]
+                           for op in ops]
+    except (Exception, SystemExit) as e:
+        return [(False, f"WRITE_ERROR: in-process write failed: {e}")] * len(ops)
+    return _batch_outcomes(results)
+
+
+def _batch_outcomes(results: list) -> list[tuple[bool, str]]:
+    """Map memory_write batch result entries to (ok, stdout-or-error) pairs."""
+    return [
+        (True, json.dumps(r.get("result") or {})) if r.get("ok")
+        else (False, f"WRITE_ERROR: {str(r.get('error', 'unknown error'))[-500:]}")
+        for r in results
+    ]
+
+
+def _update_sentinel(python: str, write_py: str, staging_dir: str, state: str,
+                     inprocess: bool = False):
     """Update sentinel state (fail-open)."""
+    if inprocess:
+        try:
+            import memory_write
+            memory_write.update_sentinel_state(staging_dir, state)
+        except Exception:
+            pass  # fail-open per existing convention
+        return
     try:
         subprocess.run(
             [python, write_py,
@@ -837,8 +1114,81 @@ def _extract_title(stdout: str, res: dict, cat: str) -> str:
 # Action mode: commit (step 7 from existing manifest)
 # ---------------------------------------------------------------------------
 
+def _triage_flag(memory_root: str, key: str, default: bool) -> bool:
+    """Read a boolean triage.<key> from memory-config.json (fail-open to default)."""
+    try:
+        with open(os.path.join(memory_root, "memory-config.json"), "r", encoding="utf-8") as f:
+            config = json.load(f)
+        value = config.get("triage", {}).get(key, default)
+    except (OSError, json.JSONDecodeError, AttributeError):
+        return default
+    return value if isinstance(value, bool) else default
+
+
+def _triage_int(memory_root: str, key: str, default: int, lo: int, hi: int) -> int:
+    """Read an integer triage.<key> clamped to [lo, hi] (fail-open to default)."""
+    try:
+        with open(os.path.join(memory_root, "memory-config.json"), "r", encoding="utf-8") as f:
+            config = json.load(f)
+        value = config.get("triage", {}).get(key, default)
+    except (OSError, json.JSONDecodeError, AttributeError):
+        return default
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return default
+    if not math.isfinite(value):
+        return default
+    return max(lo, min(hi, int(value)))
+
+
+def _note_concurrency_ignored(memory_root: str, concurrency: int) -> None:
+    """Log a save.concurrency_ignored event (fail-open).
+
+    In-process candidate/draft steps share the redirected stderr and are
+    CPU-bound under one GIL, so they run one category at a time whatever
+    orchestrate_concurrency says.
+    """
+    try:
+        with open(os.path.join(memory_root, "memory-config.json"), "r", encoding="utf-8") as f:
+            config = json.load(f)
+        emit_event("save.concurrency_ignored", {
+            "concurrency": concurrency,
+            "reason": "inprocess",
+        }, level="info", hook="Stop", script="memory_orchestrate.py",
+           memory_root=memory_root, config=config)
+    except Exception:
+        pass  # fail-open
+
+
+def _batch_writes_enabled(memory_root: str) -> bool:
+    """Read triage.batch_writes from memory-config.json (default True)."""
+    return _triage_flag(memory_root, "batch_writes", True)
+
+
+def _write_queue_enabled(memory_root: str) -> bool:
+    """Read triage.write_queue from memory-config.json (default True)."""
+    return _triage_flag(memory_root, "write_queue", True)
+
+
+def _inprocess_enabled(memory_root: str) -> bool:
+    """True unless triage.subprocess_isolation is set or the libraries won't import.
+
+    memory_draft and memory_write need pydantic; if it cannot be imported
+    here, steps fall back to child processes (which bootstrap the venv).
+    """
+    if _triage_flag(memory_root, "subprocess_isolation", False):
+        return False
+    try:
+        import memory_candidate  # noqa: F401
+        import memory_draft  # noqa: F401
+        import memory_write  # noqa: F401
+    except (ImportError, SystemExit):
+        return False
+    return True
+
+
 def _run_commit(staging_dir: str, scripts_dir: str, python: str,
-                memory_root: str | None, exclude_cats: set, pinned) -> int:
+                memory_root: str | None, exclude_cats: set, pinned,
+                inprocess: bool = False) -> int:
     """Read manifest from orchestration-result.json and run step 7 (execute_saves).
 
     Validates manifest version, staleness (2h TTL per p1-final.md), and status.
@@ -895,6 +1245,9 @@ def _run_commit(staging_dir: str, scripts_dir: str, python: str,
     result = execute_saves(
         manifest, staging_dir, effective_root, scripts_dir, python,
         exclude_categories=exclude_cats, pinned=pinned,
+        batch=_batch_writes_enabled(effective_root),
+        inprocess=inprocess,
+        queue=_write_queue_enabled(effective_root),
     )
 
     print(json.dumps(result, separators=(",", ":")))
@@ -934,6 +1287,20 @@ def main() -> int:
         help="Comma-separated categories to skip in commit mode "
              "(verifier-blocked categories).",
     )
+    parser.add_argument(
+        "--subprocess",
+        action="store_true",
+        help="Run candidate, draft and write steps as separate processes "
+             "instead of in-process (same as triage.subprocess_isolation=true).",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=None,
+        help="Max candidate/draft processes run at once in subprocess mode "
+             f"(1-{MAX_CONCURRENCY}; default: triage.orchestrate_concurrency "
+             f"or {DEFAULT_CONCURRENCY}).",
+    )
     args = parser.parse_args()
 
     staging_dir = str(Path(args.staging_dir).resolve())
@@ -946,6 +1313,18 @@ def main() -> int:
     if args.exclude_categories:
         exclude_cats = {c.strip() for c in args.exclude_categories.split(",") if c.strip()}
 
+    config_root = args.memory_root or ".claude/memory"
+    inprocess = not args.subprocess and _inprocess_enabled(config_root)
+    if args.concurrency is not None:
+        concurrency = max(1, min(MAX_CONCURRENCY, args.concurrency))
+    else:
+        concurrency = _triage_int(config_root, "orchestrate_concurrency",
+                                  DEFAULT_CONCURRENCY, 1, MAX_CONCURRENCY)
+    category_timeout = _triage_int(config_root, "category_timeout_seconds",
+                                   DEFAULT_CATEGORY_TIMEOUT, 5, 120)
+    if inprocess and concurrency > 1 and action != "commit":
+        _note_concurrency_ignored(config_root, concurrency)
+
     # Lazy import: only needed for prepare/run modes (target path generation)
     # commit reads target paths from manifest; no-flag default skips target gen
     slugify_fn = None
@@ -963,10 +1342,12 @@ def main() -> int:
         if PinnedStagingDir is not None:
             with PinnedStagingDir(path=staging_dir) as pinned:
                 return _run_commit(staging_dir, scripts_dir, python,
-                                   args.memory_root, exclude_cats, pinned)
+                                   args.memory_root, exclude_cats, pinned,
+                                   inprocess=inprocess)
         else:
             return _run_commit(staging_dir, scripts_dir, python,
-                               args.memory_root, exclude_cats, None)
+                               args.memory_root, exclude_cats, None,
+                               inprocess=inprocess)
     else:
         # None, "prepare", "run" all start with steps 1-6
         enrich = action in ("prepare", "run")
@@ -977,12 +1358,16 @@ def main() -> int:
                     enrich=enrich,
                     slugify_fn=slugify_fn,
                     category_folders=category_folders,
+                    inprocess=inprocess,
+                    concurrency=concurrency,
+                    timeout=category_timeout,
                 )
                 if rc != 0:
                     return rc
                 if action == "run":
                     return _run_commit(staging_dir, scripts_dir, python,
-                                       args.memory_root, exclude_cats, pinned)
+                                       args.memory_root, exclude_cats, pinned,
+                                       inprocess=inprocess)
                 return 0
         else:
             rc = _run_pipeline(
@@ -990,12 +1375,16 @@ def main() -> int:
                 enrich=enrich,
                 slugify_fn=slugify_fn,
                 category_folders=category_folders,
+                inprocess=inprocess,
+                concurrency=concurrency,
+                timeout=category_timeout,
             )
             if rc != 0:
                 return rc
             if action == "run":
                 return _run_commit(staging_dir, scripts_dir, python,
-                                   args.memory_root, exclude_cats, None)
+                                   args.memory_root, exclude_cats, None,
+                                   inprocess=inprocess)
             return 0
 
 
@@ -1003,7 +1392,10 @@ def _run_pipeline(staging_dir: str, scripts_dir: str, python: str,
                   memory_root: str | None, pinned,
                   enrich: bool = False,
                   slugify_fn=None,
-                  category_folders=None) -> int:
+                  category_folders=None,
+                  inprocess: bool = False,
+                  concurrency: int = 1,
+                  timeout: float = DEFAULT_CATEGORY_TIMEOUT) -> int:
     """Execute the orchestration pipeline (steps 1-6).
 
     When *pinned* is not None, all staging I/O uses the fd-pinned directory
@@ -1011,6 +1403,11 @@ def _run_pipeline(staging_dir: str, scripts_dir: str, python: str,
 
     When enrich=True (prepare/run modes), generates target paths for CREATE
     actions and adds manifest_version/prepared_at to the manifest.
+
+    In subprocess mode, steps 2 and 4 each fan out over up to *concurrency*
+    categories and join before the next step; CUD resolution and the
+    manifest only see joined results, in intent order. In-process steps
+    run one category at a time and *concurrency* is ignored.
     """
     # Resolve effective memory root for target path generation (prepare/run).
     # memory_root=None is fine for candidate selection (candidate.py has its own default),
@@ -1037,6 +1434,9 @@ def _run_pipeline(staging_dir: str, scripts_dir: str, python: str,
         intents, staging_dir, scripts_dir, python,
         memory_root=memory_root,
         pinned=pinned,
+        inprocess=inprocess,
+        concurrency=concurrency,
+        timeout=timeout,
     )
 
     # Step 3: CUD Resolution (propagates occ_hash from candidates)
@@ -1049,6 +1449,9 @@ def _run_pipeline(staging_dir: str, scripts_dir: str, python: str,
         memory_root=effective_memory_root,
         slugify_fn=slugify_fn,
         category_folders=category_folders,
+        inprocess=inprocess,
+        concurrency=concurrency,
+        timeout=timeout,
     )
 
     # Step 5: Handle DELETE actions
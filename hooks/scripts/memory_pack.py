@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""Cold storage packs for retired and archived memories.
+
+``memory_index.py --pack-inactive`` moves inactive records out of the hot
+category folders, so folder scans (``scan_memories``, rolling window,
+retention, health) only open active files. Each category gets one
+append-only pack under ``<memory_root>/.cold/``:
+
+    <folder>.pack      concatenated gzip members, one per record
+    <folder>.idx.json  offset table for the live records in the pack
+
+Every member is one JSON object: ``{"path": rel_path, "data": record}``
+for a packed record, or ``{"path": rel_path, "data": null}`` for a
+tombstone (the record went back to its hot folder). ``zcat <folder>.pack``
+prints the whole history as JSON lines. The offset table maps each live
+rel_path to its member's offset and length plus a few summary fields, so
+listing, GC and health reports never decompress anything. It is derived:
+when it is missing or does not match the pack's size it is rebuilt by
+reading the pack. The table also records where the last complete member
+ends, so an append first truncates any member torn by a crash.
+
+Writers must hold the index lock (FlockIndex). Stdlib only.
+"""
+
+import gzip
+import json
+import os
+import zlib
+from pathlib import Path
+
+from memory_layout import is_bucket
+
+COLD_DIR = ".cold"
+PACK_SUFFIX = ".pack"
+TABLE_SUFFIX = ".idx.json"
+_SCAN_CHUNK = 64 * 1024
+_GZIP_MAGIC = b"\x1f\x8b\x08"  # ID1, ID2, CM=deflate
+
+# Copied into the offset table so listing, GC and health need no decompression
+SUMMARY_FIELDS = (
+    "id", "title", "category", "record_status", "updated_at", "times_updated",
+    "retired_at", "retired_reason", "archived_at", "archived_reason",
+)
+
+
+def pack_paths(memory_root: Path, folder: str) -> tuple[Path, Path]:
+    """(pack file, offset table) for a category folder."""
+    cold = Path(memory_root) / COLD_DIR
+    return cold / f"{folder}{PACK_SUFFIX}", cold / f"{folder}{TABLE_SUFFIX}"
+
+
+def _folder_of(rel_path: str) -> str:
+    """Category folder of a project-relative memory path, flat or fanned out."""
+    parts = rel_path.split("/")
+    return parts[-3] if len(parts) > 2 and is_bucket(parts[-2]) else parts[-2]
+
+
+def _summary(data: dict) -> dict:
+    return {k: data[k] for k in SUMMARY_FIELDS if k in data}
+
+
+def _scan_pack(pack: Path) -> tuple[dict[str, dict], int]:
+    """Rebuild the offset table by reading every member of a pack.
+
+    Returns (table, end), where end is the offset just past the last
+    complete member. A member torn by an interrupted append is skipped by
+    resyncing to the next gzip header, so members appended after it are
+    still found.
+    """
+    try:
+        blob = pack.read_bytes()
+    except FileNotFoundError:
+        return {}, 0
+    raw = memoryview(blob)
+    table = {}
+    offset = end = 0
+    while offset < len(raw):
+        # Feed bounded chunks: unused_data then copies at most one chunk
+        d = zlib.decompressobj(wbits=31)
+        parts = []
+        pos = offset
+        try:
+            while not d.eof and pos < len(raw):
+                chunk = raw[pos:pos + _SCAN_CHUNK]
+                parts.append(d.decompress(chunk))
+                pos += len(chunk)
+            complete = d.eof
+        except zlib.error:
+            complete = False
+        if not complete:
+            # Torn or corrupt member: resume at the next gzip header, if any
+            offset = blob.find(_GZIP_MAGIC, offset + 1)
+            if offset < 0:
+                break
+            continue
+        length = pos - len(d.unused_data) - offset
+        end = offset + length
+        payload = b"".join(parts)
+        try:
+            member = json.loads(payload)
+            path, data = member["path"], member["data"]
+        except (ValueError, KeyError, TypeError):
+            offset = end
+            continue
+        if isinstance(data, dict):
+            table[path] = {"offset": offset, "length": length, **_summary(data)}
+        else:
+            table.pop(path, None)
+        offset = end
+    return table, end
+
+
+def _write_table(table_path: Path, pack_size: int, end: int,
+                 table: dict[str, dict]) -> None:
+    tmp = table_path.with_name(f"{table_path.name}.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"pack_size": pack_size, "end": end, "records": table}, f,
+                  separators=(",", ":"))
+    os.replace(tmp, table_path)
+
+
+def _load_table(memory_root: Path, folder: str) -> tuple[dict[str, dict], int]:
+    """(offset table, end of the last complete member) for a folder's pack."""
+    pack, table_path = pack_paths(memory_root, folder)
+    try:
+        pack_size = pack.stat().st_size
+    except FileNotFoundError:
+        return {}, 0
+    try:
+        with open(table_path, "r", encoding="utf-8") as f:
+            stored = json.load(f)
+        if (stored.get("pack_size") == pack_size
+                and isinstance(stored.get("end"), int)
+                and isinstance(stored.get("records"), dict)):
+            return stored["records"], stored["end"]
+    except (OSError, ValueError, AttributeError):
+        pass
+    table, end = _scan_pack(pack)
+    try:
+        _write_table(table_path, pack_size, end, table)
+    except OSError:
+        pass
+    return table, end
+
+
+def load_pack_table(memory_root: Path, folder: str) -> dict[str, dict]:
+    """Offset table for a folder's pack: {rel_path: {"offset", "length", summary...}}.
+
+    Empty when there is no pack. Rebuilt from the pack (and rewritten, best
+    effort) when the stored table is missing or stale.
+    """
+    return _load_table(memory_root, folder)[0]
+
+
+def append_to_pack(memory_root: Path, folder: str,
+                   members: list[tuple[str, dict | None]]) -> dict[str, dict]:
+    """Append (rel_path, data) members to a folder's pack; data None is a tombstone.
+
+    A member torn by an earlier interrupted append is truncated away first,
+    so new members never land behind unreadable bytes. The members are
+    fsynced before the offset table is replaced, so a crash leaves at worst
+    a stale table (rebuilt on the next read). Caller MUST hold FlockIndex.
+    Returns the updated offset table.
+    """
+    pack, table_path = pack_paths(memory_root, folder)
+    table, offset = _load_table(memory_root, folder)
+    pack.parent.mkdir(parents=True, exist_ok=True)
+    with open(pack, "ab") as f:
+        if f.seek(0, os.SEEK_END) > offset:
+            f.truncate(offset)
+        for rel_path, data in members:
+            line = json.dumps({"path": rel_path, "data": data}, ensure_ascii=False)
+            blob = gzip.compress((line + "\n").encode("utf-8"), mtime=0)
+            f.write(blob)
+            if data is None:
+                table.pop(rel_path, None)
+            else:
+                table[rel_path] = {"offset": offset, "length": len(blob), **_summary(data)}
+            offset += len(blob)
+        f.flush()
+        os.fsync(f.fileno())
+    _write_table(table_path, offset, offset, table)
+    return table
+
+
+def read_packed(memory_root: Path, rel_path: str) -> dict | None:
+    """The packed record stored for rel_path, or None if it is not in a pack."""
+    entry = load_pack_table(memory_root, _folder_of(rel_path)).get(rel_path)
+    if entry is None:
+        return None
+    pack, _ = pack_paths(memory_root, _folder_of(rel_path))
+    try:
+        with open(pack, "rb") as f:
+            f.seek(entry["offset"])
+            member = json.loads(gzip.decompress(f.read(entry["length"])))
+    except (OSError, ValueError, EOFError, zlib.error):
+        return None
+    return member.get("data") if member.get("path") == rel_path else None
+
+
+def drop_from_pack(memory_root: Path, rel_path: str) -> None:
+    """Tombstone a packed record that was moved back to its hot folder.
+
+    Caller MUST hold FlockIndex. No-op if rel_path is not packed.
+    """
+    folder = _folder_of(rel_path)
+    if rel_path in load_pack_table(memory_root, folder):
+        append_to_pack(memory_root, folder, [(rel_path, None)])
+
+
+def rename_in_pack(memory_root: Path, folder: str, renames: dict[str, str]) -> int:
+    """Move packed records to new rel_paths (--migrate-layout).
+
+    Each renamed record is appended under its new path and its old path is
+    tombstoned, in one append. Caller MUST hold FlockIndex. Returns the
+    number of records renamed.
+    """
+    table = load_pack_table(memory_root, folder)
+    members = []
+    for old, new in renames.items():
+        if old not in table:
+            continue
+        data = read_packed(memory_root, old)
+        if data is not None:
+            members += [(new, data), (old, None)]
+    if members:
+        append_to_pack(memory_root, folder, members)
+    return len(members) // 2
+
+
+def repack(memory_root: Path, folder: str, drop: set[str] = frozenset()) -> int:
+    """Rewrite a folder's pack with only its live records, minus *drop*.
+
+    Reclaims tombstones and superseded members (GC). The new pack and table
+    are swapped in with os.replace(). Caller MUST hold FlockIndex.
+    Returns the number of records kept.
+    """
+    pack, table_path = pack_paths(memory_root, folder)
+    if not pack.exists():
+        return 0
+    table = load_pack_table(memory_root, folder)
+    keep = []
+    with open(pack, "rb") as f:
+        for rel_path, entry in sorted(table.items(), key=lambda kv: kv[1]["offset"]):
+            if rel_path in drop:
+                continue
+            f.seek(entry["offset"])
+            keep.append((rel_path, entry, f.read(entry["length"])))
+
+    tmp = pack.with_name(f"{pack.name}.{os.getpid()}.tmp")
+    new_table = {}
+    offset = 0
+    with open(tmp, "wb") as f:
+        for rel_path, entry, blob in keep:
+            f.write(blob)
+            new_table[rel_path] = {**entry, "offset": offset}
+            offset += len(blob)
+        f.flush()
+        os.fsync(f.fileno())
+    if keep:
+        os.replace(tmp, pack)
+        _write_table(table_path, offset, offset, new_table)
+    else:
+        tmp.unlink()
+        pack.unlink()
+        table_path.unlink(missing_ok=True)
+    return len(keep)
@@ -18,6 +18,7 @@ import re
 import sys
 import time
 import unicodedata
+from collections import OrderedDict
 from datetime import datetime, timezone
 from pathlib import Path
 
@@ -27,13 +28,20 @@ sys.path.insert(0, str(Path(__file__).resolve().parent))
 from memory_search_engine import (  # noqa: E402
     BODY_FIELDS,
     CATEGORY_PRIORITY,
+    DEFAULT_QUERY_CACHE_ENTRIES,
     HAS_FTS5,
     STOP_WORDS,
     apply_threshold,
-    build_fts_index,
     build_fts_query,
     extract_body_text,
-    parse_index_line,
+    index_generation,
+    load_index_entries,
+    load_memory_meta,
+    load_numpy_bm25,
+    open_fts_index,
+    query_cache_get,
+    query_cache_key,
+    query_cache_put,
     query_fts,
     tokenize,
 )
@@ -127,25 +135,32 @@ def score_description(prompt_words: set[str], description_tokens: set[str]) -> i
     return min(2, int(score + 0.5))
 
 
-def check_recency(file_path: Path) -> tuple[bool, bool]:
+def check_recency(file_path: Path, meta: dict | None = None) -> tuple[bool, bool]:
     """Read a JSON memory file and check recency and retired status.
 
+    If meta (a fresh sidecar record from load_memory_meta) is given, its
+    status/updated_at are used and the file is not opened.
+
     Returns (is_retired, is_recent).
     If file cannot be read, returns (False, False).
     """
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-    except (OSError, json.JSONDecodeError):
-        return False, False
+    if meta is not None:
+        record_status = meta.get("status") or "active"
+        updated_at_str = meta.get("updated_at")
+    else:
+        try:
+            with open(file_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return False, False
+        record_status = data.get("record_status", "active")
+        updated_at_str = data.get("updated_at")
 
     # Check retired/archived status
-    record_status = data.get("record_status", "active")
     if record_status in ("retired", "archived"):
         return True, False
 
     # Check recency
-    updated_at_str = data.get("updated_at")
     if not updated_at_str:
         return False, False
 
@@ -159,7 +174,7 @@ def check_recency(file_path: Path) -> tuple[bool, bool]:
         now = datetime.now(timezone.utc)
         age_days = (now - updated_at).days
         return False, age_days <= _RECENCY_DAYS
-    except (ValueError, TypeError):
+    except (ValueError, TypeError, AttributeError):
         return False, False
 
 
@@ -227,7 +242,8 @@ def _check_path_containment(json_path: Path, memory_root_resolved: Path) -> bool
 
 def score_with_body(conn: "sqlite3.Connection", fts_query: str, user_prompt: str,
                     top_k_paths: int, memory_root: Path, mode: str = "auto",
-                    max_inject: int | None = None) -> list[dict]:
+                    max_inject: int | None = None,
+                    timings: dict | None = None) -> list[dict]:
     """Hybrid scoring: FTS5 title+tags ranking + body content bonus.
 
     Steps:
@@ -237,10 +253,18 @@ def score_with_body(conn: "sqlite3.Connection", fts_query: str, user_prompt: str
     4. For top-K non-retired candidates, extract body text and compute body bonus
     5. Apply threshold and return results
 
+    Status and body tokens come from the metadata sidecar when its record is
+    fresh; only files without a fresh record are opened and parsed.
+
     SECURITY: Path containment check prevents reading files outside memory_root.
+
+    If timings is given, ms spent in "query" (FTS5 MATCH) and "body_scoring"
+    (everything after) are recorded there.
     """
     # Step 1: Get initial rankings from title+tags FTS5
+    _t0 = time.perf_counter()
     initial = query_fts(conn, fts_query, limit=top_k_paths * 3)
+    _t1 = time.perf_counter()
 
     # Resolve paths relative to project root (memory_root is .claude/memory)
     # Index paths are project-relative (e.g. .claude/memory/decisions/foo.json)
@@ -258,7 +282,17 @@ def score_with_body(conn: "sqlite3.Connection", fts_query: str, user_prompt: str
     # Step 3 (M2 fix): Check retired status on ALL path-contained entries,
     # not just top_k_paths. This prevents retired entries from slipping through
     # when they rank beyond top_k_paths in initial FTS5 results.
+    meta = load_memory_meta(memory_root, [r["path"] for r in initial])
     for result in initial:
+        record = meta.get(result["path"])
+        if record is not None:
+            if record["status"] in ("retired", "archived"):
+                result["_retired"] = True
+                result["body_bonus"] = 0
+            else:
+                result["_body_tokens"] = record["body_tokens"]
+            continue
+
         json_path = project_root / result["path"]
         try:
             data = json.loads(json_path.read_text(encoding="utf-8"))
@@ -282,9 +316,10 @@ def score_with_body(conn: "sqlite3.Connection", fts_query: str, user_prompt: str
     query_tokens = tokenize(user_prompt)
     for result in initial[:top_k_paths]:
         data = result.pop("_data", None)
-        if data is not None:
-            body_text = extract_body_text(data)
-            body_tokens = tokenize(body_text)
+        body_tokens = result.pop("_body_tokens", None)
+        if body_tokens is None and data is not None:
+            body_tokens = tokenize(extract_body_text(data))
+        if body_tokens is not None:
             body_matches = query_tokens & body_tokens
             result["body_bonus"] = min(3, len(body_matches))
         # body_bonus already set to 0 for file-read failures above
@@ -295,6 +330,7 @@ def score_with_body(conn: "sqlite3.Connection", fts_query: str, user_prompt: str
     # "not analyzed" and "analyzed with 0 matches" at logging call sites).
     for result in initial[top_k_paths:]:
         result.pop("_data", None)
+        result.pop("_body_tokens", None)
         if "body_bonus" not in result:
             result["body_bonus"] = 0
 
@@ -303,7 +339,137 @@ def score_with_body(conn: "sqlite3.Connection", fts_query: str, user_prompt: str
         r["raw_bm25"] = r["score"]  # Preserve raw BM25 for debugging/benchmarking
         r["score"] = r["score"] - r.get("body_bonus", 0)  # More negative = better
 
-    return apply_threshold(initial, mode, max_inject=max_inject)
+    results = apply_threshold(initial, mode, max_inject=max_inject)
+    if timings is not None:
+        timings["query"] = (_t1 - _t0) * 1000
+        timings["body_scoring"] = (time.perf_counter() - _t1) * 1000
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Resident state (memory_retrieve_server.py)
+# ---------------------------------------------------------------------------
+
+# None in a one-shot hook. The resident server calls enable_resident_state()
+# so each memory root's parsed config, index entries and open search handle
+# survive between main() calls: {memory_root: {"config": (stamp, dict),
+# "index": (key, handle, count), "entries": (generation, list)}}.
+_resident: "OrderedDict[str, dict] | None" = None
+_RESIDENT_MAX_ROOTS = 8
+
+
+def enable_resident_state() -> None:
+    """Keep config, index entries and search handles warm across main() calls."""
+    global _resident
+    if _resident is None:
+        _resident = OrderedDict()
+
+
+def _resident_slot(memory_root: Path) -> dict | None:
+    """Warm state for memory_root (LRU over roots), or None when not resident."""
+    if _resident is None:
+        return None
+    key = str(memory_root)
+    slot = _resident.pop(key, None)
+    _resident[key] = slot = slot if slot is not None else {}
+    while len(_resident) > _RESIDENT_MAX_ROOTS:
+        _, evicted = _resident.popitem(last=False)
+        if "index" in evicted:
+            evicted["index"][1].close()
+    return slot
+
+
+def load_config(memory_root: Path) -> dict:
+    """Parse memory_root/memory-config.json.
+
+    Resident: parsed once per file version (mtime, size, inode). Callers
+    must not mutate the returned dict. Raises OSError / JSONDecodeError.
+    """
+    config_path = memory_root / "memory-config.json"
+    slot = _resident_slot(memory_root)
+    if slot is not None:
+        st = os.stat(config_path)
+        stamp = (st.st_mtime_ns, st.st_size, st.st_ino)
+        cached = slot.get("config")
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+    with open(config_path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    if slot is not None:
+        slot["config"] = (stamp, config)
+    return config
+
+
+def _open_search_index(memory_root: Path, open_index, generation: str | None,
+                       timings: dict) -> tuple:
+    """open_index(memory_root), reusing the resident handle while generation holds.
+
+    Returns (handle, entry_count, rebuilt); release with _close_search_index().
+    """
+    slot = _resident_slot(memory_root)
+    key = (open_index.__module__, generation)
+    if slot is not None and generation is not None:
+        cached = slot.get("index")
+        if cached is not None and cached[0] == key:
+            return cached[1], cached[2], False
+        if cached is not None:
+            slot.pop("index")[1].close()
+    handle, count, rebuilt = open_index(memory_root, timings=timings)
+    if slot is not None and generation is not None:
+        slot["index"] = (key, handle, count)
+    return handle, count, rebuilt
+
+
+def _close_search_index(memory_root: Path, handle) -> None:
+    """Close a search handle unless the resident state owns it."""
+    slot = _resident_slot(memory_root)
+    if slot is None or slot.get("index", (None, None))[1] is not handle:
+        handle.close()
+
+
+def _index_entries(index_path: Path) -> list[dict]:
+    """load_index_entries(), reused by the resident server while index.md is unchanged."""
+    slot = _resident_slot(index_path.parent)
+    generation = index_generation(index_path) if slot is not None else None
+    if generation is not None:
+        cached = slot.get("entries")
+        if cached is not None and cached[0] == generation:
+            return cached[1]
+    entries = load_index_entries(index_path)
+    if generation is not None:
+        slot["entries"] = (generation, entries)
+    return entries
+
+
+def _peak_rss_kb() -> int | None:
+    """Peak resident set size of this process so far, in KiB (None if unknown)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak  # macOS reports bytes
+
+
+def _record_phases(phases: dict, timings: dict) -> None:
+    """Add {name: ms} timings to phases with the current peak RSS."""
+    rss = _peak_rss_kb()
+    for name, ms in timings.items():
+        phases[name] = {"ms": round(ms, 2), "peak_rss_kb": rss}
+
+
+def _emit_timing(phases: dict, cache_status: str, index_rebuilt: bool, start_time: float,
+                 session_id: str, memory_root: Path, config: dict) -> None:
+    """Emit the debug retrieval.timing event (per-phase ms + peak RSS)."""
+    emit_event("retrieval.timing", {
+        "phases": phases,
+        "cache": cache_status,
+        "index_rebuilt": index_rebuilt,
+        "peak_rss_kb": _peak_rss_kb(),
+    }, level="debug", hook="UserPromptSubmit", script="memory_retrieve.py",
+       session_id=session_id,
+       duration_ms=round((time.perf_counter() - start_time) * 1000, 2),
+       memory_root=str(memory_root), config=config)
 
 
 def _emit_search_hint(reason: str = "no_match") -> None:
@@ -431,8 +597,7 @@ def main():
     config_path = memory_root / "memory-config.json"
     if config_path.exists():
         try:
-            with open(config_path, "r", encoding="utf-8") as f:
-                _raw_config = json.load(f)
+            _raw_config = load_config(memory_root)
         except (json.JSONDecodeError, OSError) as exc:
             emit_error("retrieval.error", exc,
                        hook="UserPromptSubmit", script="memory_retrieve.py",
@@ -555,6 +720,8 @@ def main():
     category_descriptions: dict[str, str] = {}
     judge_cfg: dict = {}
     judge_enabled = False
+    query_cache_enabled = True
+    query_cache_max = DEFAULT_QUERY_CACHE_ENTRIES
     if _raw_config:
         try:
             retrieval = _raw_config.get("retrieval", {})
@@ -590,6 +757,13 @@ def main():
             # Config key exists for future activation; parsed but unused.
             # Future: if enabled, compute cluster_count via pre-truncation counting.
             _cluster_detection_enabled = bool(retrieval.get("cluster_detection_enabled", False))
+            # Query result cache (LRU keyed by index generation + token set)
+            cache_cfg = retrieval.get("query_cache", {})
+            if isinstance(cache_cfg, dict):
+                query_cache_enabled = cache_cfg.get("enabled", True) is not False
+                raw_cache_max = cache_cfg.get("max_entries", DEFAULT_QUERY_CACHE_ENTRIES)
+                if isinstance(raw_cache_max, int) and not isinstance(raw_cache_max, bool):
+                    query_cache_max = max(1, min(10000, raw_cache_max))
             # LLM judge config
             try:
                 judge_cfg = retrieval.get("judge", {})
@@ -621,50 +795,97 @@ def main():
                    config=_raw_config)
         sys.exit(0)
 
-    # Parse index entries once (L1 fix: eliminates double-read of index.md)
+    # FTS5 path: open the persistent on-disk index (rebuilt only when index.md
+    # changes). Without FTS5, the NumPy BM25 engine stands in for the FTS5
+    # connection when NumPy is importable. Legacy path: parse index entries
+    # once (L1 fix: no double-read).
+    bm25_engine = None
+    if not HAS_FTS5 and match_strategy == "fts5_bm25":
+        bm25_engine = load_numpy_bm25()
+    use_fts = (HAS_FTS5 or bm25_engine is not None) and match_strategy == "fts5_bm25"
+    search_engine = "fts5_bm25" if bm25_engine is None else "numpy_bm25"
+    conn = None
     entries = []
+    # Per-phase wall time + peak RSS, reported in the debug retrieval.timing event
+    _phases: dict[str, dict] = {}
     try:
-        with open(index_path, "r", encoding="utf-8") as f:
-            for line in f:
-                parsed = parse_index_line(line)
-                if parsed:
-                    entries.append(parsed)
+        if use_fts:
+            # Stat before opening: a cache entry must never be keyed to a
+            # generation newer than the index it was computed from.
+            _index_gen = index_generation(index_path)
+            _load_t0 = time.perf_counter()
+            _open_timings: dict[str, float] = {}
+            open_index = open_fts_index if bm25_engine is None else bm25_engine.open_bm25_index
+            conn, entry_count, _fts_rebuilt = _open_search_index(
+                memory_root, open_index, _index_gen, _open_timings)
+            _open_timings["index_load"] = (time.perf_counter() - _load_t0) * 1000
+            _record_phases(_phases, _open_timings)
+        else:
+            entries = _index_entries(index_path)
+            entry_count = len(entries)
     except OSError:
         sys.exit(0)
 
-    if not entries:
+    if not entry_count:
+        if conn is not None:
+            _close_search_index(memory_root, conn)
         emit_event("retrieval.skip", {"reason": "empty_index"},
                    hook="UserPromptSubmit", script="memory_retrieve.py",
                    session_id=_session_id, memory_root=str(memory_root),
                    config=_raw_config)
         sys.exit(0)
 
+    if bm25_engine is not None:
+        emit_event("retrieval.fallback", {
+            "engine": "numpy_bm25",
+            "reason": "fts5_unavailable",
+        }, hook="UserPromptSubmit", script="memory_retrieve.py",
+           session_id=_session_id, memory_root=str(memory_root), config=_raw_config)
+
     # Pipeline timer start
     _pipeline_t0 = time.perf_counter()
 
     # -----------------------------------------------------------------------
     # FTS5 BM25 path (default when FTS5 is available)
     # -----------------------------------------------------------------------
-    if HAS_FTS5 and match_strategy == "fts5_bm25":
+    if use_fts:
         prompt_tokens = list(tokenize(user_prompt))  # compound tokenizer (legacy=False)
         fts_query = build_fts_query(prompt_tokens)
-        if fts_query:
-            # L1/L2 fix: build FTS5 index from already-parsed entries (no re-read)
-            conn = build_fts_index(entries)
+        if not fts_query:
+            _close_search_index(memory_root, conn)
+        else:
             # When judge is enabled, fetch more candidates (pool_size) so the judge
             # can evaluate a wider set before filtering down to max_inject.
             judge_pool_size = judge_cfg.get("candidate_pool_size", 15) if judge_enabled else 0
             effective_inject = max(max_inject, judge_pool_size) if judge_enabled else max_inject
             _search_t0 = time.perf_counter()
+            top_k_paths = max(10, effective_inject)
+            results = None
+            _cache_status = "disabled"
+            _cache_key = None
+            if query_cache_enabled and _index_gen:
+                _cache_key = query_cache_key(_index_gen, prompt_tokens,
+                                             top_k_paths, effective_inject, "auto",
+                                             search_engine)
+                results = query_cache_get(memory_root, _cache_key)
+                _cache_status = "miss" if results is None else "hit"
+                _record_phases(_phases, {"cache_lookup": (time.perf_counter() - _search_t0) * 1000})
             try:
-                # INVARIANT: top_k_paths (1st numeric arg) >= effective_inject (max_inject kwarg)
-                # ensures all entries returned by apply_threshold() have had body analysis
-                # attempted. Do not violate this or body_bonus values become unreliable.
-                results = score_with_body(conn, fts_query, user_prompt,
-                                          max(10, effective_inject), memory_root, "auto",
-                                          max_inject=effective_inject)
+                if results is None:
+                    # INVARIANT: top_k_paths (1st numeric arg) >= effective_inject (max_inject kwarg)
+                    # ensures all entries returned by apply_threshold() have had body analysis
+                    # attempted. Do not violate this or body_bonus values become unreliable.
+                    _score_timings: dict[str, float] = {}
+                    results = score_with_body(conn, fts_query, user_prompt,
+                                              top_k_paths, memory_root, "auto",
+                                              max_inject=effective_inject,
+                                              timings=_score_timings)
+                    _record_phases(_phases, _score_timings)
+                    if _cache_key is not None:
+                        query_cache_put(memory_root, _cache_key, _index_gen, results,
+                                        max_entries=query_cache_max)
             finally:
-                conn.close()
+                _close_search_index(memory_root, conn)
             _search_ms = (time.perf_counter() - _search_t0) * 1000
 
             # Logging Point 1: FTS5 search results
@@ -672,7 +893,9 @@ def main():
             _best_score = abs(results[0]["score"]) if results else 0
             emit_event("retrieval.search", {
                 "query_tokens": prompt_tokens,
-                "engine": "fts5_bm25",
+                "engine": search_engine,
+                "index_rebuilt": _fts_rebuilt,
+                "cache": _cache_status,
                 "candidates_found": _candidates_post_threshold,
                 "candidates_post_threshold": _candidates_post_threshold,
                 "results": [
@@ -746,15 +969,23 @@ def main():
                    session_id=_session_id, duration_ms=round(_pipeline_ms, 2),
                    memory_root=str(memory_root), config=_raw_config)
 
+                _output_t0 = time.perf_counter()
                 _output_results(top, category_descriptions,
                                output_mode=output_mode, abs_floor=abs_floor)
+                _record_phases(_phases, {"output": (time.perf_counter() - _output_t0) * 1000})
+                _emit_timing(_phases, _cache_status, _fts_rebuilt, _start_time,
+                             _session_id, memory_root, _raw_config)
                 return
             # Valid query but no results -- hint at manual search
             emit_event("retrieval.skip", {"reason": "no_fts5_results", "query_tokens": prompt_tokens},
                        hook="UserPromptSubmit", script="memory_retrieve.py",
                        session_id=_session_id, memory_root=str(memory_root),
                        config=_raw_config)
+            _output_t0 = time.perf_counter()
             _emit_search_hint("no_match")
+            _record_phases(_phases, {"output": (time.perf_counter() - _output_t0) * 1000})
+            _emit_timing(_phases, _cache_status, _fts_rebuilt, _start_time,
+                         _session_id, memory_root, _raw_config)
         # No valid query tokens (all stop-words) -- exit silently without hint
         sys.exit(0)
 
@@ -837,13 +1068,18 @@ def main():
     project_root = memory_root.parent.parent
     memory_root_resolved = memory_root.resolve()
     final = []
+    deep_meta = load_memory_meta(
+        memory_root,
+        [e["path"] for _, _, e in scored[:_DEEP_CHECK_LIMIT]
+         if _check_path_containment(project_root / e["path"], memory_root_resolved)],
+    )
     for text_score, priority, entry in scored[:_DEEP_CHECK_LIMIT]:
         file_path = project_root / entry["path"]
         # A2: Containment check - prevent path traversal via crafted index entries.
         # Note: absolute entry["path"] values are also caught (Path('/x') / '/abs' == Path('/abs')).
         if not _check_path_containment(file_path, memory_root_resolved):
             continue
-        is_retired, is_recent = check_recency(file_path)
+        is_retired, is_recent = check_recency(file_path, deep_meta.get(entry["path"]))
 
         # Defensive: skip retired entries even if they somehow remain in index
         if is_retired:
@@ -876,8 +1112,7 @@ def main():
     # Attach score to each entry for confidence labeling
     top_list = []
     for score, _, entry in top_entries:
-        entry["score"] = score
-        top_list.append(entry)
+        top_list.append({**entry, "score": score})
 
     # Logging Point 3: Final injection (legacy path)
     _pipeline_ms = (time.perf_counter() - _pipeline_t0) * 1000
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""UserPromptSubmit entry point for claude-memory retrieval.
+
+By default this simply runs memory_retrieve.main() in-process. When
+retrieval.resident_server.enabled is true in memory-config.json, the hook
+input is answered by memory_retrieve_server.py over a per-user Unix socket;
+the server keeps the retrieval modules, config, index entries and search
+handle warm between prompts.
+
+Fail-open: if the server is absent, slow, declines (resident mode is off
+for this project), or sends an unusable reply, the prompt is answered
+in-process. An absent server is spawned in the background when the project
+enables it, so the next prompt can use it.
+
+Everything imported here is paid on every prompt, so the fast path uses
+only os, sys and _socket (no json, no socket module) and hooks.json starts
+it with ``python3 -S``. Only -S: site-packages, the user site and
+PYTHONPATH are restored by enable_site() before retrieval runs, so an
+optional NumPy (BM25 fallback) is found there and in the server, which is
+started with the same INTERPRETER_FLAGS. Project config is only parsed
+when no server answers. No external dependencies (stdlib only).
+
+Wire format (request, then reply on the same stream):
+    request  cwd NUL [KEY=VALUE NUL ...] NUL <hook stdin bytes>
+    ack      "off" NUL  (resident mode off; connection closes)
+             | <response timeout seconds> NUL
+    reply    <exit code> NUL <len(stderr)> NUL <stderr bytes> <stdout bytes>
+"""
+
+import os
+import sys
+
+import _socket
+
+_SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+if _SCRIPT_DIR not in sys.path:
+    sys.path.insert(0, _SCRIPT_DIR)
+
+# Connect plus ack; a busy or wedged server costs at most this before fallback
+CONNECT_TIMEOUT_SECONDS = 0.1
+DEFAULT_RESPONSE_TIMEOUT_SECONDS = 4.0
+DEFAULT_IDLE_TIMEOUT_SECONDS = 900
+
+# UserPromptSubmit timeout in hooks/hooks.json. A timed-out request is answered
+# in-process, which may itself spend up to 10 s rebuilding a missing index.md,
+# so the server gets what is left.
+HOOK_TIMEOUT_SECONDS = 15
+_FALLBACK_BUDGET_SECONDS = 10
+MAX_RESPONSE_TIMEOUT_SECONDS = HOOK_TIMEOUT_SECONDS - _FALLBACK_BUDGET_SECONDS
+
+# The only environment retrieval reads: the judge's API key, HOME for its
+# transcript path check, and what urllib needs to reach the API.
+FORWARDED_ENV_KEYS = (
+    "ANTHROPIC_API_KEY", "HOME",
+    "HTTPS_PROXY", "https_proxy", "HTTP_PROXY", "http_proxy",
+    "ALL_PROXY", "all_proxy", "NO_PROXY", "no_proxy",
+    "SSL_CERT_FILE", "SSL_CERT_DIR",
+)
+
+_RECV_CHUNK = 65536
+
+# Interpreter flags of the hook command (hooks/hooks.json) and the server
+INTERPRETER_FLAGS = ("-S",)
+
+
+def _number(value, default: float) -> float:
+    """Positive number from config, else default (bools rejected)."""
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+        return default
+    return value
+
+
+def response_timeout(resident: dict) -> float:
+    """retrieval.resident_server.response_timeout_seconds, clamped to the hook budget."""
+    return min(_number(resident.get("response_timeout_seconds"),
+                       DEFAULT_RESPONSE_TIMEOUT_SECONDS),
+               MAX_RESPONSE_TIMEOUT_SECONDS)
+
+
+def _resident_config(raw: bytes) -> dict:
+    """Return retrieval.resident_server from the project config, or {}."""
+    import json
+    try:
+        hook_input = json.loads(raw)
+        cwd = hook_input.get("cwd") or os.getcwd()
+        config_path = os.path.join(cwd, ".claude", "memory", "memory-config.json")
+        with open(config_path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+        resident = config.get("retrieval", {}).get("resident_server", {})
+        return resident if isinstance(resident, dict) else {}
+    except Exception:
+        return {}
+
+
+def enable_site() -> None:
+    """Run the site setup that -S skipped (site-packages and user site).
+
+    Without -I, PYTHONPATH is on sys.path already and the user site is
+    added unless -s or PYTHONNOUSERSITE asks otherwise, as in a plain
+    python3 start.
+    """
+    if sys.flags.no_site:
+        import site
+        site.main()
+
+
+def spawn_server(sock_path: str, idle_timeout: float) -> None:
+    """Start memory_retrieve_server.py detached from this hook process."""
+    import subprocess
+    try:
+        subprocess.Popen(
+            [sys.executable, *INTERPRETER_FLAGS,
+             os.path.join(_SCRIPT_DIR, "memory_retrieve_server.py"),
+             "--socket", sock_path, "--idle-timeout", str(idle_timeout)],
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL, start_new_session=True, close_fds=True,
+        )
+    except OSError:
+        pass
+
+
+def encode_request(raw: bytes) -> bytes:
+    """Frame hook stdin with this process's cwd and forwarded env keys."""
+    try:
+        cwd = os.getcwd()
+    except OSError:
+        cwd = ""
+    fields = [cwd] + [f"{key}={os.environ[key]}" for key in FORWARDED_ENV_KEYS
+                      if key in os.environ]
+    return "\0".join(fields).encode("utf-8", "surrogateescape") + b"\0\0" + raw
+
+
+def forward(sock_path: str, raw: bytes,
+            connect_timeout: float = CONNECT_TIMEOUT_SECONDS) -> dict | None:
+    """Send one request to the server.
+
+    Returns {"stdout", "stderr" (bytes), "exit_code"} or None when the server
+    declines or replies garbage. Raises FileNotFoundError/ConnectionRefusedError
+    when no server is listening, so the caller can spawn one, and other
+    OSErrors (timeouts) when it is too slow.
+    """
+    sock = _socket.socket(_socket.AF_UNIX, _socket.SOCK_STREAM)
+    try:
+        sock.settimeout(connect_timeout)
+        sock.connect(sock_path)
+        sock.sendall(encode_request(raw))
+        sock.shutdown(_socket.SHUT_WR)
+        data = b""
+        while b"\0" not in data:
+            chunk = sock.recv(_RECV_CHUNK)
+            if not chunk:
+                return None
+            data += chunk
+        ack, _, data = data.partition(b"\0")
+        try:
+            timeout = min(float(ack), MAX_RESPONSE_TIMEOUT_SECONDS)
+        except ValueError:
+            return None  # "off": resident mode is disabled for this project
+        sock.settimeout(timeout)
+        chunks = [data]
+        while True:
+            chunk = sock.recv(_RECV_CHUNK)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    finally:
+        sock.close()
+    code, _, rest = b"".join(chunks).partition(b"\0")
+    err_len, _, rest = rest.partition(b"\0")
+    try:
+        exit_code, err_len = int(code), int(err_len)
+    except ValueError:
+        return None
+    if not 0 <= err_len <= len(rest):
+        return None
+    return {"stdout": rest[err_len:], "stderr": rest[:err_len], "exit_code": exit_code}
+
+
+def _run_in_process(raw: bytes) -> None:
+    import io
+    enable_site()  # The NumPy BM25 fallback may live in site-packages
+    sys.stdin = io.StringIO(raw.decode("utf-8", "surrogateescape"))
+    import memory_retrieve
+    memory_retrieve.main()
+
+
+def main():
+    try:
+        raw = sys.stdin.buffer.read()
+    except (OSError, ValueError):
+        raw = b""
+    if not raw.strip():
+        sys.exit(0)  # Same as memory_retrieve.main() on empty input
+
+    reply = None
+    try:
+        from memory_staging_utils import get_retrieve_socket_path
+        sock_path = get_retrieve_socket_path()
+    except Exception:
+        sock_path = None
+    if sock_path:
+        try:
+            reply = forward(sock_path, raw)
+        except (FileNotFoundError, ConnectionRefusedError):
+            resident = _resident_config(raw)
+            if resident.get("enabled") is True:
+                spawn_server(sock_path, _number(resident.get("idle_timeout_seconds"),
+                                                DEFAULT_IDLE_TIMEOUT_SECONDS))
+        except OSError:
+            pass  # Timeout or broken pipe -- answer in-process
+    if reply is not None:
+        sys.stdout.buffer.write(reply["stdout"])
+        sys.stderr.buffer.write(reply["stderr"])
+        sys.stdout.flush()
+        sys.exit(reply["exit_code"])
+
+    _run_in_process(raw)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""Resident retrieval server for claude-memory (opt-in).
+
+Spawned on demand by memory_retrieve_client.py when
+retrieval.resident_server.enabled is true. The server imports the
+retrieval modules once, listens on a per-user Unix socket, and answers
+each request in-process with memory_retrieve.main(). Per memory root it
+keeps the parsed config, the index entries and the open FTS5 (or NumPy
+BM25) handle, reused until the config file or the index generation
+changes (memory_retrieve.enable_resident_state()).
+
+Requests are served one at a time. Only the client's forwarded env keys
+are swapped in for a request and restored after it; cwd is never changed
+(the hook input's cwd is filled in from the client's when missing). A
+project whose config does not enable resident mode is declined, so its
+client answers in-process. A request queued behind a slow one (LLM judge)
+misses its ack and the client answers in-process too.
+
+The server exits after --idle-timeout seconds without a request, or as
+soon as one of its source files changes (plugin update), so a stale server
+never answers. Only one server runs per socket; extra spawns exit at once.
+
+Usage:
+    python3 memory_retrieve_server.py [--socket PATH] [--idle-timeout SECONDS]
+
+No external dependencies (stdlib only). POSIX only (AF_UNIX).
+"""
+
+import argparse
+import fcntl
+import io
+import json
+import os
+import socket
+import sys
+import traceback
+from pathlib import Path
+
+_SCRIPT_DIR = Path(__file__).resolve().parent
+if str(_SCRIPT_DIR) not in sys.path:
+    sys.path.insert(0, str(_SCRIPT_DIR))
+
+from memory_retrieve_client import (  # noqa: E402
+    FORWARDED_ENV_KEYS,
+    enable_site,
+    response_timeout,
+)
+
+DEFAULT_IDLE_TIMEOUT_SECONDS = 900
+_REQUEST_TIMEOUT_SECONDS = 5.0
+_RECV_CHUNK = 65536
+
+# Modules whose change must retire a running server.
+_WATCHED_SOURCES = (
+    "memory_retrieve_server.py",
+    "memory_retrieve_client.py",
+    "memory_retrieve.py",
+    "memory_search_engine.py",
+    "memory_bm25_numpy.py",
+    "memory_judge.py",
+    "memory_logger.py",
+    "memory_staging_utils.py",
+)
+
+
+def _source_stamp() -> tuple:
+    """(name, mtime_ns, size) for each watched source file."""
+    stamp = []
+    for name in _WATCHED_SOURCES:
+        try:
+            st = os.stat(_SCRIPT_DIR / name)
+            stamp.append((name, st.st_mtime_ns, st.st_size))
+        except OSError:
+            stamp.append((name, None, None))
+    return tuple(stamp)
+
+
+def _read_request(conn: socket.socket) -> bytes:
+    conn.settimeout(_REQUEST_TIMEOUT_SECONDS)
+    chunks = []
+    while True:
+        chunk = conn.recv(_RECV_CHUNK)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def parse_request(data: bytes) -> tuple[str, dict[str, str], str]:
+    """Split a client request into (cwd, env, hook stdin). Raises ValueError.
+
+    See memory_retrieve_client for the wire format.
+    """
+    header, sep, stdin = data.partition(b"\0\0")
+    if not sep:
+        raise ValueError("unterminated request header")
+    cwd, *pairs = header.decode("utf-8", "surrogateescape").split("\0")
+    env = {}
+    for pair in pairs:
+        key, eq, value = pair.partition("=")
+        if not eq or key not in FORWARDED_ENV_KEYS:
+            raise ValueError(f"unexpected env field: {key!r}")
+        env[key] = value
+    return cwd, env, stdin.decode("utf-8", "surrogateescape")
+
+
+def _resolve_hook_input(cwd: str, stdin: str) -> tuple[str, dict]:
+    """Pin the hook input's cwd (absolute) and read the project's resident config.
+
+    Returns (stdin for memory_retrieve.main(), retrieval.resident_server).
+    Undecodable input gets {} (declined; the client reports it in-process).
+    """
+    import memory_retrieve
+
+    try:
+        hook_input = json.loads(stdin)
+    except ValueError:
+        return stdin, {}
+    if not isinstance(hook_input, dict):
+        return stdin, {}
+    project = str(hook_input.get("cwd") or cwd)
+    if cwd and not os.path.isabs(project):
+        project = os.path.join(cwd, project)
+    if not os.path.isabs(project):
+        return stdin, {}
+    if hook_input.get("cwd") != project:
+        hook_input["cwd"] = project
+        stdin = json.dumps(hook_input)
+    try:
+        config = memory_retrieve.load_config(Path(project) / ".claude" / "memory")
+        resident = config.get("retrieval", {}).get("resident_server", {})
+    except (OSError, ValueError, AttributeError):
+        resident = {}
+    return stdin, resident if isinstance(resident, dict) else {}
+
+
+def run_request(stdin: str, env: dict[str, str]) -> dict:
+    """Run memory_retrieve.main() in this process and capture its output.
+
+    The forwarded env keys are set from env (unset when absent) for the
+    call and restored afterwards.
+    """
+    import memory_retrieve
+
+    saved_env = {key: os.environ.get(key) for key in FORWARDED_ENV_KEYS}
+    for key in FORWARDED_ENV_KEYS:
+        if key in env:
+            os.environ[key] = env[key]
+        else:
+            os.environ.pop(key, None)
+    out, err = io.StringIO(), io.StringIO()
+    sys.stdin = io.StringIO(stdin)
+    sys.stdout, sys.stderr = out, err
+    exit_code = 0
+    try:
+        memory_retrieve.main()
+    except SystemExit as e:
+        if e.code is None:
+            exit_code = 0
+        elif isinstance(e.code, int):
+            exit_code = e.code
+        else:
+            err.write(f"{e.code}\n")
+            exit_code = 1
+    except BaseException:
+        traceback.print_exc(file=err)
+        exit_code = 1
+    finally:
+        sys.stdin = sys.__stdin__
+        sys.stdout, sys.stderr = sys.__stdout__, sys.__stderr__
+        for key, value in saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+    return {"stdout": out.getvalue(), "stderr": err.getvalue(), "exit_code": exit_code}
+
+
+def _handle_connection(conn: socket.socket) -> None:
+    try:
+        cwd, env, stdin = parse_request(_read_request(conn))
+        stdin, resident = _resolve_hook_input(cwd, stdin)
+    except Exception:
+        return  # Malformed request: close without reply; client falls back
+    try:
+        if resident.get("enabled") is not True:
+            conn.sendall(b"off\0")
+            return
+        conn.sendall(f"{response_timeout(resident)}\0".encode("ascii"))
+        reply = run_request(stdin, env)
+        stdout = reply["stdout"].encode("utf-8", "surrogateescape")
+        stderr = reply["stderr"].encode("utf-8", "surrogateescape")
+        conn.sendall(b"%d\0%d\0" % (reply["exit_code"], len(stderr)) + stderr + stdout)
+    except OSError:
+        pass  # Client gave up (timeout) and answered in-process
+
+
+def serve(sock_path: str, idle_timeout: float = DEFAULT_IDLE_TIMEOUT_SECONDS) -> int:
+    """Listen on sock_path until idle or outdated. Returns exit code."""
+    lock_fd = os.open(sock_path + ".lock", os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(lock_fd)
+        return 0  # Another server owns this socket
+
+    import memory_retrieve
+    memory_retrieve.enable_resident_state()
+
+    stamp = _source_stamp()
+    try:
+        os.unlink(sock_path)  # Stale socket from a dead server (we hold the lock)
+    except FileNotFoundError:
+        pass
+    srv = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    old_umask = os.umask(0o177)
+    try:
+        srv.bind(sock_path)
+    finally:
+        os.umask(old_umask)
+    srv.listen(16)
+    srv.settimeout(idle_timeout)
+
+    try:
+        while True:
+            try:
+                conn, _ = srv.accept()
+            except socket.timeout:
+                break
+            except InterruptedError:
+                continue
+            if _source_stamp() != stamp:
+                conn.close()  # Client falls back; next prompt spawns a fresh server
+                break
+            try:
+                _handle_connection(conn)
+            finally:
+                conn.close()
+    finally:
+        srv.close()
+        try:
+            os.unlink(sock_path)
+        except OSError:
+            pass
+        os.close(lock_fd)
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Resident retrieval server for claude-memory (opt-in)."
+    )
+    parser.add_argument("--socket", default=None,
+                        help="Unix socket path (default: per-user path from memory_staging_utils)")
+    parser.add_argument("--idle-timeout", type=float, default=DEFAULT_IDLE_TIMEOUT_SECONDS,
+                        help=f"Exit after this many idle seconds (default: {DEFAULT_IDLE_TIMEOUT_SECONDS})")
+    args = parser.parse_args()
+    # Spawned with the client's -S: same sys.path, so the same search engine
+    enable_site()
+
+    sock_path = args.socket
+    if not sock_path:
+        from memory_staging_utils import get_retrieve_socket_path
+        sock_path = get_retrieve_socket_path()
+    if args.idle_timeout <= 0:
+        print("ERROR: --idle-timeout must be > 0", file=sys.stderr)
+        sys.exit(1)
+    sys.exit(serve(sock_path, args.idle_timeout))
+
+
+if __name__ == "__main__":
+    main()
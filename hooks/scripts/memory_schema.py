@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""Stdlib-only fast-path validator for memory records.
+
+Compiles the JSON schemas in assets/schemas/ into plain Python checks,
+cached per category, so the common case (a valid record) is accepted
+without importing pydantic or building a model. The check answers only
+"definitely valid"; anything it does not accept is handed to the
+pydantic models in memory_write.py, which remain the source of truth
+and produce the detailed error message.
+
+The compiled checks are deliberately never looser than the pydantic
+models:
+  - every object is closed (all models use extra="forbid"), even where
+    the JSON schema omits additionalProperties;
+  - types are matched exactly (no int->float coercion of bools, no
+    numeric strings), and length/pattern-constrained strings must be
+    encodable (pydantic rejects lone surrogates there);
+  - patterns must match the whole string;
+  - an optional property accepts null (pydantic Optional[...] = None)
+    unless the schema gives it a default (record_status, times_updated).
+Schema-only extras such as maxItems or retired_reason's maxLength only
+make the fast path stricter, which costs a pydantic call, never a wrong
+answer. No pydantic import here.
+"""
+
+import json
+import math
+import os
+import re
+
+SCHEMA_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "..", "assets", "schemas"
+)
+
+# Keywords that carry no validation meaning for the fast path
+_ANNOTATIONS = frozenset({
+    "$schema", "$id", "title", "description", "format", "default",
+})
+
+_ARRAY_KEYWORDS = frozenset({"items", "minItems", "maxItems"})
+_OBJECT_KEYWORDS = frozenset({"required", "additionalProperties"})
+
+_SURROGATE = re.compile("[\ud800-\udfff]")
+
+_compiled = {}
+
+
+def _encodable(value):
+    """No lone surrogates: pydantic rejects those in constrained strings."""
+    return value.isascii() or not _SURROGATE.search(value)
+
+
+def _is_text(value):
+    return type(value) is str
+
+
+def _never(value):
+    return False
+
+
+def _any(value):
+    return True
+
+
+def _compile(schema):
+    """Compile one schema node into a predicate. Unknown keywords -> _never."""
+    if not isinstance(schema, dict):
+        return _never
+    if not (set(schema) - _ANNOTATIONS):
+        return _any
+    kind = schema.get("type")
+    structural = (_ARRAY_KEYWORDS if kind == "array" else
+                  _OBJECT_KEYWORDS if "properties" in schema else ())
+    checks = []
+    for key, spec in schema.items():
+        if key in _ANNOTATIONS or key in structural:
+            continue
+        if key == "type":
+            checks.append(_type_check(schema))
+        elif key == "const":
+            checks.append(_enum_check([spec]))
+        elif key == "enum":
+            checks.append(_enum_check(spec))
+        elif key == "pattern":
+            checks.append(_pattern_check(spec))
+        elif key in ("maxLength", "minimum", "maximum"):
+            checks.append(_bound_check(key, spec))
+        elif key == "properties":
+            checks.append(_object_check(schema))
+        else:
+            return _never
+    if not checks:
+        return _never
+    if len(checks) == 1:
+        return checks[0]
+
+    def check(value):
+        for c in checks:
+            if not c(value):
+                return False
+        return True
+    return check
+
+
+def _type_check(schema):
+    kind = schema["type"]
+    if kind == "string":
+        return _is_text
+    if kind == "boolean":
+        return lambda v: type(v) is bool
+    if kind == "integer":
+        return lambda v: type(v) is int
+    if kind == "number":
+        return lambda v: (type(v) is int) or (type(v) is float and math.isfinite(v))
+    if kind == "object":
+        # Without properties the object is open; pydantic models never are
+        if "properties" not in schema:
+            return _never
+        return lambda v: type(v) is dict
+    if kind == "array":
+        return _array_check(schema)
+    return _never
+
+
+def _array_check(schema):
+    item = _compile(schema["items"]) if "items" in schema else _any
+    lo = schema.get("minItems", 0)
+    hi = schema.get("maxItems")
+
+    if item is _is_text and hi is None:
+        return lambda v: (type(v) is list and len(v) >= lo
+                          and all(type(x) is str for x in v))
+
+    def check(value):
+        if type(value) is not list or len(value) < lo:
+            return False
+        if hi is not None and len(value) > hi:
+            return False
+        for v in value:
+            if not item(v):
+                return False
+        return True
+    return check
+
+
+def _enum_check(values):
+    if all(type(v) is str for v in values):
+        strings = frozenset(values)
+        return lambda v: type(v) is str and v in strings
+    allowed = {(type(v), v) for v in values}
+    return lambda v: (type(v), v) in allowed if isinstance(v, (str, int, float, bool)) else False
+
+
+def _pattern_check(pattern):
+    rx = re.compile(pattern)
+    return lambda v: type(v) is str and rx.fullmatch(v) is not None and _encodable(v)
+
+
+def _bound_check(key, limit):
+    if key == "maxLength":
+        return lambda v: type(v) is str and len(v) <= limit and _encodable(v)
+    if key == "minimum":
+        return lambda v: type(v) in (int, float) and v >= limit
+    return lambda v: type(v) in (int, float) and v <= limit
+
+
+def _object_check(schema):
+    required = frozenset(schema.get("required", ()))
+    props = {}
+    for name, sub in schema["properties"].items():
+        check = _compile(sub)
+        if name not in required and not (isinstance(sub, dict) and "default" in sub):
+            check = _nullable(check)
+        props[name] = check
+
+    def check(value):
+        if type(value) is not dict:
+            return False
+        if not required <= value.keys():
+            return False
+        for name, v in value.items():
+            c = props.get(name)
+            if c is None or not c(v):
+                return False
+        return True
+    return check
+
+
+def _nullable(check):
+    return lambda v: v is None or check(v)
+
+
+def schema_path(category):
+    """Return the category schema file, e.g. tech_debt -> tech-debt.schema.json."""
+    return os.path.join(SCHEMA_DIR, category.replace("_", "-") + ".schema.json")
+
+
+def compile_category(category):
+    """Return the cached predicate for *category*, or None if no schema is available."""
+    if not isinstance(category, str):
+        return None
+    if category in _compiled:
+        return _compiled[category]
+    check = None
+    if re.fullmatch(r"[a-z_]+", category):
+        try:
+            with open(schema_path(category), "r", encoding="utf-8") as f:
+                check = _compile(json.load(f))
+        except (OSError, ValueError):
+            check = None
+    _compiled[category] = check
+    return check
+
+
+def fast_validate(data, category):
+    """True when *data* is certainly a valid *category* record.
+
+    False means "not proven valid": the caller must run the pydantic
+    model for the verdict and error message.
+    """
+    check = compile_category(category)
+    if check is None:
+        return False
+    try:
+        return bool(check(data))
+    except (TypeError, ValueError, RecursionError):
+        return False
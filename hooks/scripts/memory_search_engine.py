@@ -13,6 +13,7 @@ No external dependencies (stdlib + sqlite3 only).
 """
 
 import argparse
+import hashlib
 import json
 import os
 import re
@@ -100,6 +101,19 @@ except Exception:
     HAS_FTS5 = False
 
 
+def load_numpy_bm25():
+    """Return the memory_bm25_numpy module if NumPy is importable, else None.
+
+    Imported lazily: NumPy is only worth its import cost when FTS5 is
+    missing, and it is never a hard dependency.
+    """
+    try:
+        import memory_bm25_numpy
+    except ImportError:
+        return None
+    return memory_bm25_numpy
+
+
 # ---------------------------------------------------------------------------
 # Tokenization
 # ---------------------------------------------------------------------------
@@ -179,6 +193,13 @@ def build_fts_index(entries: list[dict], include_body: bool = False) -> "sqlite3
     Returns the sqlite3 connection (caller must close).
     """
     conn = sqlite3.connect(":memory:")
+    _populate_fts(conn, entries, include_body=include_body)
+    return conn
+
+
+def _populate_fts(conn: "sqlite3.Connection", entries: list[dict],
+                  include_body: bool = False) -> None:
+    """Create the `memories` FTS5 table on conn and insert entries."""
     if include_body:
         conn.execute("""CREATE VIRTUAL TABLE memories USING fts5(
             title, tags, body, path UNINDEXED, category UNINDEXED
@@ -206,9 +227,754 @@ def build_fts_index(entries: list[dict], include_body: bool = False) -> "sqlite3
                 e["category"],
             ))
         conn.executemany("INSERT INTO memories VALUES (?, ?, ?, ?)", rows)
+
+
+# ---------------------------------------------------------------------------
+# Persistent FTS5 Index (on-disk, keyed to index.md generation)
+# ---------------------------------------------------------------------------
+
+# Derived artifact next to index.md; safe to delete or .gitignore.
+FTS_DB_FILENAME = ".index-fts.sqlite3"
+
+# Bump when the on-disk table layout changes so stale files are rebuilt.
+_FTS_DB_SCHEMA_VERSION = "1"
+
+
+def index_generation(index_path: Path) -> str | None:
+    """Return a cheap fingerprint of index.md + its delta log (stat only, no read).
+
+    The FTS table is a pure projection of the merged index, and every memory
+    mutation either rewrites index.md or appends to the delta log
+    (memory_write.py / memory_index.py), so (mtime_ns, size, inode) of both
+    is enough to detect staleness. Returns None if index.md cannot be stat'ed.
+    """
+    try:
+        delta_st = os.stat(index_delta_path(index_path))
+        delta = f"+{delta_st.st_mtime_ns}:{delta_st.st_size}:{delta_st.st_ino}"
+    except OSError:
+        delta = ""
+    try:
+        st = os.stat(index_path)
+    except OSError:
+        return None
+    return f"{st.st_mtime_ns}:{st.st_size}:{st.st_ino}{delta}"
+
+
+def load_index_entries(index_path: Path) -> list[dict]:
+    """Read the merged index and return parsed entries. Raises OSError on read failure."""
+    entries = []
+    for line in read_index_lines(index_path):
+        parsed = parse_index_line(line)
+        if parsed:
+            entries.append(parsed)
+    return entries
+
+
+# ---------------------------------------------------------------------------
+# Index Delta Log (append-only mutations, merged on read)
+# ---------------------------------------------------------------------------
+
+# memory_write.py appends one record per index mutation instead of rewriting
+# and re-sorting index.md. Records: "+ <index line>" (upsert by path) or
+# "- <path>" (remove). Readers apply them on top of index.md; compaction
+# folds them in and rewrites index.md as a sorted, human-readable export.
+INDEX_DELTA_FILENAME = ".index-delta.log"
+
+# Compact once the log outgrows this fraction of index.md, so the rewrite
+# cost is amortized over many appends (small stores compact almost every
+# write, large ones rarely) ...
+INDEX_DELTA_COMPACT_RATIO = 0.25
+# ... but never let merge-on-read cost grow past this.
+INDEX_DELTA_MAX_BYTES = 256 * 1024
+
+_INDEX_HEADER_LINES = [
+    "# Memory Index", "",
+    "<!-- Auto-generated by memory_index.py. Do not edit manually. -->", "",
+]
+
+
+def index_delta_path(index_path: Path) -> Path:
+    return Path(index_path).parent / INDEX_DELTA_FILENAME
+
+
+def index_line_path(line: str) -> str | None:
+    """Project-relative path of an index entry line ("... -> path #tags:...")."""
+    if not line.startswith("- [") or " -> " not in line:
+        return None
+    return line.split(" -> ", 1)[1].split(" #tags:")[0].strip()
+
+
+def _delta_stamp(st: os.stat_result) -> tuple[int, int]:
+    return (st.st_ino, st.st_size)
+
+
+def _read_index_delta(index_path: Path) -> list[tuple[str, str]]:
+    """Complete (op, value) records from the delta log; [] if absent.
+
+    A trailing record without its newline is a torn append and is ignored.
+    """
+    return _read_index_delta_stamped(index_path)[1]
+
+
+def _read_index_delta_stamped(index_path: Path) -> tuple[tuple | None, list[tuple[str, str]]]:
+    """(stamp of the log file read, its records); (None, []) if absent."""
+    try:
+        with open(index_delta_path(index_path), "r", encoding="utf-8") as f:
+            stamp = _delta_stamp(os.fstat(f.fileno()))
+            text = f.read()
+    except FileNotFoundError:
+        return None, []
+    records = []
+    for raw in text.split("\n")[:-1]:
+        op, _, value = raw.partition(" ")
+        if op in ("+", "-") and value:
+            records.append((op, value))
+    return stamp, records
+
+
+def _delta_still_there(index_path: Path, stamp: tuple) -> bool:
+    """Whether the log read with *stamp* is still in place (appends allowed)."""
+    try:
+        ino, size = _delta_stamp(os.stat(index_delta_path(index_path)))
+    except FileNotFoundError:
+        return False
+    return ino == stamp[0] and size >= stamp[1]
+
+
+# Reads retried when a writer replaced index.md between the two reads
+_INDEX_READ_ATTEMPTS = 5
+
+
+def read_index_lines(index_path: Path, missing_ok: bool = False) -> list[str]:
+    """Lines of index.md with the delta log applied (merge-on-read).
+
+    Lock-free. The delta is read before index.md, and the read is retried
+    when the log was removed or replaced in between, so the records are
+    never replayed onto an index.md rewritten after them. Writers remove
+    the log only after folding it into index.md (_replace_index), and
+    rewrite_index_paths compacts before renaming. So a reader that sees
+    the log still there has an index.md that is either the one the log
+    applies to or that log's own compaction, where replaying is a no-op.
+    Appends that land after the delta read are simply not seen yet.
+
+    If index.md is missing, raises OSError unless missing_ok (then the
+    standard header is used as the base).
+    """
+    for _ in range(_INDEX_READ_ATTEMPTS):
+        stamp, records = _read_index_delta_stamped(index_path)
+        try:
+            with open(index_path, "r", encoding="utf-8") as f:
+                lines = [l.rstrip("\n") for l in f]
+        except FileNotFoundError:
+            if not missing_ok:
+                raise
+            lines = list(_INDEX_HEADER_LINES)
+        if stamp is None or _delta_still_there(index_path, stamp):
+            break
+    if not records:
+        return lines
+
+    header = []
+    entries: dict[str, str] = {}
+    for line in lines:
+        path = index_line_path(line)
+        if path is None:
+            if line.startswith("- ["):
+                entries[line] = line  # Unparseable entry: keep as-is
+            else:
+                header.append(line)
+        else:
+            entries[path] = line
+    for op, value in records:
+        if op == "+":
+            path = index_line_path(value)
+            if path is not None:
+                entries[path] = value
+        else:
+            entries.pop(value, None)
+    return header + sorted(entries.values(), key=str.lower)
+
+
+def append_index_delta(index_path: Path, records: list[tuple[str, str]]) -> int:
+    """Append ("+", line) / ("-", path) records; returns the log size in bytes.
+
+    Caller must hold the index lock (FlockIndex). One O_APPEND write per
+    call, so a crash leaves at most a torn final record, which readers skip.
+    """
+    data = "".join(f"{op} {value.replace(chr(10), ' ')}\n" for op, value in records)
+    fd = os.open(index_delta_path(index_path), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, data.encode("utf-8"))
+        return os.fstat(fd).st_size
+    finally:
+        os.close(fd)
+
+
+def index_delta_needs_compaction(index_path: Path, delta_size: int) -> bool:
+    """True once the delta log outgrows INDEX_DELTA_COMPACT_RATIO of index.md."""
+    try:
+        base_size = os.stat(index_path).st_size
+    except OSError:
+        return True  # No index.md yet: materialize it now
+    return delta_size >= min(INDEX_DELTA_MAX_BYTES, base_size * INDEX_DELTA_COMPACT_RATIO)
+
+
+def compact_index(index_path: Path) -> int:
+    """Fold the delta log into index.md; returns the number of records merged.
+
+    Caller must hold the index lock. index.md is replaced atomically before
+    the log is removed (see read_index_lines for why that order is safe).
+    """
+    records = _read_index_delta(index_path)
+    if not records and not index_delta_path(index_path).exists():
+        return 0
+    _replace_index(index_path, read_index_lines(index_path, missing_ok=True))
+    return len(records)
+
+
+def rewrite_index_paths(index_path: Path, renames: dict[str, str]) -> int:
+    """Point index entries at new paths; returns the number of entries rewritten.
+
+    Caller must hold the index lock. A pending delta log is compacted
+    first, so the renaming replace never has a log next to it that a
+    reader could replay onto the new paths (see read_index_lines).
+    Readers see either all old paths or all new ones.
+    """
+    if not Path(index_path).exists() and not index_delta_path(index_path).exists():
+        return 0
+    compact_index(index_path)
+    lines = []
+    rewritten = 0
+    for line in read_index_lines(index_path, missing_ok=True):
+        path = index_line_path(line)
+        if path in renames:
+            line = line.replace(f" -> {path}", f" -> {renames[path]}", 1)
+            rewritten += 1
+        lines.append(line)
+    _replace_index(index_path, lines)
+    return rewritten
+
+
+def _replace_index(index_path: Path, lines: list[str]) -> None:
+    """Atomically replace index.md with *lines*, then drop the delta log.
+
+    index.md is replaced before the log is removed (see read_index_lines
+    for why that order is safe).
+    """
+    content = "\n".join(lines)
+    if not content.endswith("\n"):
+        content += "\n"
+    import tempfile
+    fd, tmp_path = tempfile.mkstemp(dir=str(Path(index_path).parent), suffix=".tmp", prefix=".mw-")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp_path, index_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    try:
+        index_delta_path(index_path).unlink()
+    except FileNotFoundError:
+        pass
+
+
+def _open_fts_db_readonly(db_path: Path) -> "sqlite3.Connection":
+    """Open the persistent FTS db read-only.
+
+    immutable=1 is accurate here: the file is only ever replaced via
+    os.replace(), never modified in place, so SQLite can skip locking.
+    """
+    uri = db_path.resolve().as_uri() + "?mode=ro&immutable=1"
+    return sqlite3.connect(uri, uri=True)
+
+
+def _read_fts_meta(conn: "sqlite3.Connection") -> dict[str, str]:
+    return dict(conn.execute("SELECT key, value FROM meta"))
+
+
+def rebuild_fts_db(memory_root: Path, entries: list[dict], generation: str) -> Path:
+    """Write a fresh on-disk FTS5 db for entries and atomically swap it in.
+
+    Concurrent rebuilders each write their own tmp file; the last
+    os.replace() wins and every candidate is a complete database.
+    """
+    db_path = memory_root / FTS_DB_FILENAME
+    tmp_path = memory_root / f"{FTS_DB_FILENAME}.{os.getpid()}.tmp"
+    try:
+        tmp_path.unlink()
+    except OSError:
+        pass
+    try:
+        conn = sqlite3.connect(str(tmp_path))
+        try:
+            conn.execute("PRAGMA journal_mode=OFF")
+            conn.execute("PRAGMA synchronous=OFF")
+            _populate_fts(conn, entries)
+            conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+            conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+                ("schema_version", _FTS_DB_SCHEMA_VERSION),
+                ("generation", generation),
+                ("entry_count", str(len(entries))),
+            ])
+            conn.commit()
+        finally:
+            conn.close()
+        os.replace(tmp_path, db_path)
+    except BaseException:
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+        raise
+    return db_path
+
+
+def open_fts_index(memory_root: Path,
+                   timings: dict | None = None) -> tuple["sqlite3.Connection", int, bool]:
+    """Return an FTS5 connection over memory_root/index.md.
+
+    Uses the persistent db when its generation matches index.md, rebuilding
+    it first when stale or missing. Falls back to an in-memory index if the
+    db cannot be written or opened (read-only checkout, corrupt file, ...).
+
+    If timings is given, the ms spent in "index_parse" and "fts_build" are
+    recorded there when a rebuild happens.
+
+    Returns (conn, entry_count, rebuilt). Caller must close conn.
+    Raises OSError if index.md itself cannot be read.
+    """
+    index_path = memory_root / "index.md"
+    db_path = memory_root / FTS_DB_FILENAME
+    generation = index_generation(index_path)
+
+    if generation is not None and db_path.exists():
+        try:
+            conn = _open_fts_db_readonly(db_path)
+            try:
+                meta = _read_fts_meta(conn)
+            except sqlite3.Error:
+                conn.close()
+                raise
+            if (meta.get("generation") == generation
+                    and meta.get("schema_version") == _FTS_DB_SCHEMA_VERSION):
+                return conn, int(meta.get("entry_count", "0")), False
+            conn.close()
+        except (sqlite3.Error, OSError, ValueError):
+            pass  # Stale or unreadable -- rebuild below
+
+    t0 = time.perf_counter()
+    entries = load_index_entries(index_path)
+    t1 = time.perf_counter()
+    if timings is not None:
+        timings["index_parse"] = (t1 - t0) * 1000
+    conn = None
+    if generation is not None:
+        try:
+            rebuild_fts_db(memory_root, entries, generation)
+            conn = _open_fts_db_readonly(db_path)
+        except (sqlite3.Error, OSError):
+            conn = None  # Fail-open: in-memory index below
+    if conn is None:
+        conn = build_fts_index(entries)
+    if timings is not None:
+        timings["fts_build"] = (time.perf_counter() - t1) * 1000
+    return conn, len(entries), True
+
+
+# ---------------------------------------------------------------------------
+# Metadata Sidecar (per-file status, timestamps, body tokens)
+# ---------------------------------------------------------------------------
+
+# Written by memory_write.py (per file) and memory_index.py --rebuild (whole
+# store) so retrieval can filter and rank without opening memory JSON files.
+# Derived artifact; safe to delete.
+META_DB_FILENAME = ".index-meta.sqlite3"
+
+_META_TABLE_SQL = (
+    "CREATE TABLE IF NOT EXISTS memory_meta ("
+    "path TEXT PRIMARY KEY, status TEXT NOT NULL, created_at TEXT, updated_at TEXT, "
+    "mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL, ino INTEGER NOT NULL, "
+    "body_tokens TEXT NOT NULL)"
+)
+
+
+def _meta_row(rel_path: str, data: dict, st: os.stat_result) -> tuple:
+    """Build a memory_meta row from parsed JSON and the file's stat."""
+    return (
+        rel_path,
+        data.get("record_status", "active"),
+        data.get("created_at"),
+        data.get("updated_at"),
+        st.st_mtime_ns,
+        st.st_size,
+        st.st_ino,
+        " ".join(sorted(tokenize(extract_body_text(data)))),
+    )
+
+
+def _meta_rel_path(memory_root: Path, file_path: Path) -> str:
+    """Project-relative path (the form index.md uses) for a memory file."""
+    project_root = Path(os.path.abspath(memory_root)).parent.parent
+    return Path(os.path.abspath(file_path)).relative_to(project_root).as_posix()
+
+
+def record_memory_meta(memory_root: Path, file_path: Path, data: dict) -> bool:
+    """Upsert the sidecar row for a memory file that was just written.
+
+    Fail-open: returns False instead of raising. A missing or stale row only
+    costs retrieval a JSON read for that file.
+    """
+    try:
+        row = _meta_row(_meta_rel_path(memory_root, file_path), data, os.stat(file_path))
+        conn = sqlite3.connect(str(memory_root / META_DB_FILENAME), timeout=5)
+        try:
+            conn.execute(_META_TABLE_SQL)
+            conn.execute("INSERT OR REPLACE INTO memory_meta VALUES (?, ?, ?, ?, ?, ?, ?, ?)", row)
+            conn.commit()
+        finally:
+            conn.close()
+        return True
+    except (sqlite3.Error, OSError, ValueError):
+        return False
+
+
+def record_memory_meta_many(memory_root: Path, records: list[tuple[Path, dict]]) -> bool:
+    """Upsert sidecar rows for several just-written files in one transaction.
+
+    Batch form of record_memory_meta(); later records for the same path win.
+    Fail-open like record_memory_meta().
+    """
+    try:
+        update_memory_meta(memory_root, records)
+        return True
+    except (sqlite3.Error, OSError):
+        return False
+
+
+def rebuild_memory_meta(memory_root: Path, records: list[tuple[Path, dict]]) -> Path:
+    """Write a fresh sidecar for (file_path, data) records and swap it in.
+
+    Raises sqlite3.Error/OSError on failure; callers decide whether to warn.
+    """
+    db_path = memory_root / META_DB_FILENAME
+    tmp_path = memory_root / f"{META_DB_FILENAME}.{os.getpid()}.tmp"
+    rows = []
+    for file_path, data in records:
+        try:
+            rows.append(_meta_row(_meta_rel_path(memory_root, file_path), data, os.stat(file_path)))
+        except (OSError, ValueError):
+            continue
+    try:
+        tmp_path.unlink()
+    except OSError:
+        pass
+    try:
+        conn = sqlite3.connect(str(tmp_path))
+        try:
+            conn.execute(_META_TABLE_SQL)
+            conn.executemany("INSERT OR REPLACE INTO memory_meta VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            conn.commit()
+        finally:
+            conn.close()
+        os.replace(tmp_path, db_path)
+    except BaseException:
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+        raise
+    return db_path
+
+
+def update_memory_meta(memory_root: Path, records: list[tuple[Path, dict]],
+                       removed: list[str] = ()) -> Path:
+    """Upsert rows for changed (file_path, data) records and drop removed paths.
+
+    Used by incremental rebuilds: rows for unchanged files are kept as-is.
+    Raises sqlite3.Error/OSError on failure; callers decide whether to warn.
+    """
+    db_path = memory_root / META_DB_FILENAME
+    rows = []
+    for file_path, data in records:
+        try:
+            rows.append(_meta_row(_meta_rel_path(memory_root, file_path), data, os.stat(file_path)))
+        except (OSError, ValueError):
+            continue
+    conn = sqlite3.connect(str(db_path), timeout=5)
+    try:
+        conn.execute(_META_TABLE_SQL)
+        conn.executemany("DELETE FROM memory_meta WHERE path = ?", [(p,) for p in removed])
+        conn.executemany("INSERT OR REPLACE INTO memory_meta VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        conn.commit()
+    finally:
+        conn.close()
+    return db_path
+
+
+def load_memory_meta(memory_root: Path, rel_paths: list[str]) -> dict[str, dict]:
+    """Return sidecar metadata for rel_paths whose file is unchanged on disk.
+
+    A row is used only when the file's current (mtime_ns, size, inode) match
+    what was recorded; anything else (no row, edited by hand, deleted, no
+    sidecar at all) is omitted so the caller falls back to reading the JSON.
+
+    Returns {rel_path: {"status", "created_at", "updated_at", "body_tokens"}}
+    where body_tokens is a set equal to tokenize(extract_body_text(data)).
+    """
+    db_path = memory_root / META_DB_FILENAME
+    if not rel_paths or not db_path.exists():
+        return {}
+    project_root = memory_root.parent.parent
+    fresh = {}
+    try:
+        conn = sqlite3.connect(db_path.resolve().as_uri() + "?mode=ro", uri=True)
+        try:
+            unique = list(dict.fromkeys(rel_paths))
+            rows = []
+            # Chunked to stay under SQLITE_MAX_VARIABLE_NUMBER on old builds
+            for i in range(0, len(unique), 500):
+                chunk = unique[i:i + 500]
+                rows.extend(conn.execute(
+                    "SELECT path, status, created_at, updated_at, mtime_ns, size, ino, body_tokens "
+                    f"FROM memory_meta WHERE path IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                ))
+        finally:
+            conn.close()
+    except (sqlite3.Error, OSError):
+        return {}
+
+    for path, status, created_at, updated_at, mtime_ns, size, ino, body_tokens in rows:
+        try:
+            st = os.stat(project_root / path)
+        except OSError:
+            continue
+        if (st.st_mtime_ns, st.st_size, st.st_ino) != (mtime_ns, size, ino):
+            continue
+        fresh[path] = {
+            "status": status,
+            "created_at": created_at,
+            "updated_at": updated_at,
+            "body_tokens": set(body_tokens.split()),
+        }
+    return fresh
+
+
+# Fan-out bucket directory name (same rule as memory_layout.is_bucket)
+_FANOUT_BUCKET_RE = re.compile(r"^[0-9a-f]{2}$")
+
+
+def list_active_by_age(memory_root: Path, folder: str) -> list[dict] | None:
+    """Sidecar rows of active memories in one category folder, oldest first.
+
+    The sort key is updated_at (created_at when missing), then path. The
+    sidecar only holds rows for files written since it was created, so
+    this is not a complete listing: callers list the folder and use these
+    rows for timestamps (memory_enforce._active_by_age()). Each row is
+    checked against the file's current stat like load_memory_meta():
+    "fresh" is False when the file changed or vanished since the row was
+    written, and the caller must read the JSON to know its real state.
+
+    Returns [{"path", "created_at", "updated_at", "fresh"}], or None when
+    there is no readable sidecar (the caller falls back to a folder scan).
+    """
+    db_path = memory_root / META_DB_FILENAME
+    if not db_path.exists():
+        return None
+    project_root = memory_root.parent.parent
+    prefix = _meta_rel_path(memory_root, memory_root / folder) + "/"
+    try:
+        conn = sqlite3.connect(db_path.resolve().as_uri() + "?mode=ro", uri=True)
+        try:
+            rows = conn.execute(
+                "SELECT path, created_at, updated_at, mtime_ns, size, ino FROM memory_meta "
+                "WHERE status = 'active' AND substr(path, 1, ?) = ? "
+                "ORDER BY COALESCE(updated_at, created_at, ''), path",
+                (len(prefix), prefix),
+            ).fetchall()
+        finally:
+            conn.close()
+    except (sqlite3.Error, OSError):
+        return None
+
+    result = []
+    for path, created_at, updated_at, mtime_ns, size, ino in rows:
+        rest = path[len(prefix):].split("/")
+        if len(rest) > 2 or (len(rest) == 2 and not _FANOUT_BUCKET_RE.match(rest[0])):
+            continue  # Not in the category folder or one of its fan-out buckets
+        try:
+            st = os.stat(project_root / path)
+            fresh = (st.st_mtime_ns, st.st_size, st.st_ino) == (mtime_ns, size, ino)
+        except OSError:
+            fresh = False
+        result.append({"path": path, "created_at": created_at,
+                       "updated_at": updated_at, "fresh": fresh})
+    return result
+
+
+# ---------------------------------------------------------------------------
+# OCC tokens (cheap change detection for memory_write.py --hash)
+# ---------------------------------------------------------------------------
+
+OCC_TOKEN_PREFIX = "occ2:"
+
+# A rewrite this soon after the stat can keep the same mtime on coarse
+# timestamp filesystems, so such tokens are flagged racy and checked
+# against their MD5 even when the stat still matches.
+OCC_RACY_NS = 2_000_000_000
+
+# MD5 field of a token whose stat fields alone identify the version
+OCC_NO_MD5 = "-"
+
+
+def occ_generation(data) -> int:
+    """times_updated of a parsed memory file (0 when missing or not an int)."""
+    gen = data.get("times_updated") if isinstance(data, dict) else None
+    return gen if type(gen) is int else 0
+
+
+def occ_token(st: os.stat_result, data, raw: bytes, now_ns: int | None = None) -> str:
+    """Build an OCC token for a memory file that was just read.
+
+    Format: occ2:<mtime_ns>:<size>:<inode>:<times_updated>:<racy>:<md5>.
+    *st* must describe the same open file as *raw* (fstat), and *data* is
+    its parsed JSON. racy is 1 when the mtime is within OCC_RACY_NS of now.
+    *raw* is only hashed when the stat cannot tell versions apart: racy, or
+    no inode number (st_ino 0 on some filesystems). Otherwise the MD5 field
+    is OCC_NO_MD5.
+    """
+    if now_ns is None:
+        now_ns = time.time_ns()
+    racy = int(now_ns - st.st_mtime_ns < OCC_RACY_NS)
+    md5 = hashlib.md5(raw).hexdigest() if racy or not st.st_ino else OCC_NO_MD5
+    return (f"{OCC_TOKEN_PREFIX}{st.st_mtime_ns}:{st.st_size}:{st.st_ino}:"
+            f"{occ_generation(data)}:{racy}:{md5}")
+
+
+def read_occ_token(path) -> tuple[dict, str] | None:
+    """Read and parse a memory file once; return (data, occ_token) or None."""
+    try:
+        with open(path, "rb") as f:
+            st = os.fstat(f.fileno())
+            raw = f.read()
+        data = json.loads(raw)
+    except (OSError, ValueError):
+        return None
+    return data, occ_token(st, data, raw)
+
+
+def parse_occ_token(token: str) -> dict | None:
+    """Split an occ2 token into its fields; None for anything else (e.g. an MD5).
+
+    "md5" is None for a stat-only token (OCC_NO_MD5).
+    """
+    if not isinstance(token, str) or not token.startswith(OCC_TOKEN_PREFIX):
+        return None
+    parts = token[len(OCC_TOKEN_PREFIX):].split(":")
+    if len(parts) != 6 or parts[4] not in ("0", "1") or not parts[5]:
+        return None
+    try:
+        mtime_ns, size, ino, gen = (int(p) for p in parts[:4])
+    except ValueError:
+        return None
+    return {"stat": (mtime_ns, size, ino), "gen": gen,
+            "racy": parts[4] == "1", "md5": None if parts[5] == OCC_NO_MD5 else parts[5]}
+
+
+# ---------------------------------------------------------------------------
+# Query Result Cache (LRU, keyed by index generation + token set)
+# ---------------------------------------------------------------------------
+
+# Derived artifact; safe to delete.
+QUERY_CACHE_FILENAME = ".retrieval-cache.sqlite3"
+DEFAULT_QUERY_CACHE_ENTRIES = 128
+
+_QUERY_CACHE_TABLE_SQL = (
+    "CREATE TABLE IF NOT EXISTS query_cache ("
+    "key TEXT PRIMARY KEY, generation TEXT NOT NULL, "
+    "results TEXT NOT NULL, last_used INTEGER NOT NULL)"
+)
+
+
+def query_cache_key(generation: str, tokens, *params) -> str:
+    """Cache key for a ranked result list.
+
+    tokens is normalized to a sorted set, so prompts that tokenize the same
+    share an entry. params carries anything else that shapes the result
+    (candidate counts, threshold mode).
+    """
+    payload = json.dumps([generation, sorted(set(tokens)), list(params)])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _open_query_cache(memory_root: Path) -> "sqlite3.Connection":
+    conn = sqlite3.connect(str(memory_root / QUERY_CACHE_FILENAME), timeout=0.2)
+    conn.execute(_QUERY_CACHE_TABLE_SQL)
     return conn
 
 
+def query_cache_get(memory_root: Path, key: str) -> list[dict] | None:
+    """Return cached results for key (possibly []), or None on miss/error.
+
+    A hit refreshes the entry's LRU position.
+    """
+    if not (memory_root / QUERY_CACHE_FILENAME).exists():
+        return None
+    try:
+        conn = _open_query_cache(memory_root)
+        try:
+            row = conn.execute(
+                "SELECT results FROM query_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE query_cache SET last_used = ? WHERE key = ?",
+                         (time.time_ns(), key))
+            conn.commit()
+        finally:
+            conn.close()
+        results = json.loads(row[0])
+        for r in results:
+            r["tags"] = set(r.get("tags") or ())
+        return results
+    except (sqlite3.Error, OSError, ValueError, TypeError, AttributeError):
+        return None
+
+
+def query_cache_put(memory_root: Path, key: str, generation: str, results: list[dict],
+                    max_entries: int = DEFAULT_QUERY_CACHE_ENTRIES) -> bool:
+    """Store results (an empty list is a valid negative entry).
+
+    Drops entries from other index generations and trims to max_entries by
+    least-recent use. Fail-open: returns False instead of raising.
+    """
+    try:
+        payload = json.dumps([
+            {k: (sorted(v) if k == "tags" else v) for k, v in r.items() if not k.startswith("_")}
+            for r in results
+        ])
+        conn = _open_query_cache(memory_root)
+        try:
+            conn.execute("DELETE FROM query_cache WHERE generation != ?", (generation,))
+            conn.execute("INSERT OR REPLACE INTO query_cache VALUES (?, ?, ?, ?)",
+                         (key, generation, payload, time.time_ns()))
+            conn.execute(
+                "DELETE FROM query_cache WHERE key NOT IN "
+                "(SELECT key FROM query_cache ORDER BY last_used DESC LIMIT ?)",
+                (max(1, max_entries),),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        return True
+    except (sqlite3.Error, OSError, TypeError, ValueError):
+        return False
+
+
 # ---------------------------------------------------------------------------
 # FTS5 Query Construction
 # ---------------------------------------------------------------------------
@@ -246,7 +1012,13 @@ def query_fts(conn: "sqlite3.Connection", fts_query: str, limit: int = 15) -> li
 
     Returns list of dicts with keys: title, tags (as set), path, category, score.
     Score is the BM25 rank value (more negative = better match).
+
+    conn may also be a NumpyBM25Index (FTS5-less fallback); its search()
+    returns the same shape.
     """
+    search = getattr(conn, "search", None)
+    if search is not None:
+        return search(fts_query, limit)
     cursor = conn.execute(
         "SELECT title, tags, path, category, rank FROM memories "
         "WHERE memories MATCH ? ORDER BY rank LIMIT ?",
@@ -342,7 +1114,7 @@ def _cli_load_entries(memory_root: Path, mode: str,
     memory_root_resolved = memory_root.resolve()
 
     entries = []
-    for line in index_path.read_text(encoding="utf-8").splitlines():
+    for line in read_index_lines(index_path):
         parsed = parse_index_line(line)
         if not parsed:
             continue
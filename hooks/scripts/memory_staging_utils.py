@@ -13,12 +13,14 @@ No external dependencies (stdlib only).
 
 from __future__ import annotations
 
-import hashlib
 import os
-import secrets
 import stat
 import sys
 import time
+import zlib
+
+# hashlib and secrets are imported where used: the retrieval hook client
+# imports this module on every prompt for get_retrieve_socket_path() only.
 
 
 # Resolve /tmp for legacy compatibility checks.
@@ -124,10 +126,28 @@ def get_staging_dir(cwd: str = "") -> str:
     # Hash formula: UID:realpath(cwd) for per-user isolation.
     # Changed from realpath(cwd)-only in v5.1.0.
     # Orphaned dirs from old formula are harmless (cleaned by OS on reboot).
+    import hashlib
     project_hash = hashlib.sha256(f"{os.geteuid()}:{os.path.realpath(cwd)}".encode()).hexdigest()[:12]
     return f"{STAGING_DIR_PREFIX}{project_hash}"
 
 
+def get_retrieve_socket_path() -> str:
+    """Get the per-user Unix socket path for the resident retrieval server.
+
+    Lives in the same per-user base as staging dirs (0700, owned by euid).
+    Keyed by UID and the real path of the plugin's scripts directory, so two
+    installed plugin versions never talk to each other's server. The key is
+    a CRC-32 rather than SHA-256: the base is already private to the user,
+    and hashlib would dominate the hook client's import time.
+
+    Returns:
+        Absolute path to the socket (may not exist yet).
+    """
+    script_dir = os.path.dirname(os.path.realpath(__file__))
+    plugin_hash = f"{zlib.crc32(f'{os.geteuid()}:{script_dir}'.encode()):08x}"
+    return f"{_STAGING_BASE}/.claude-memory-retrieve-{plugin_hash}.sock"
+
+
 def _cleanup_stale_staging(staging_dir: str) -> None:
     """Remove sibling staging dirs older than 7 days (for persistent storage only).
 
@@ -487,6 +507,8 @@ class PinnedStagingDir:
         if isinstance(content, str):
             content = content.encode("utf-8")
 
+        import secrets
+
         # Create temp file with O_EXCL — retry with new random suffix on collision.
         tmp_name = ""
         fd = -1
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""Shared tail reader for Claude Code session transcripts (JSONL).
+
+Used by memory_triage.py (Stop hook scoring) and memory_judge.py
+(conversation context). Both want only the last few conversation
+messages, i.e. records whose top-level "type" is user, human or
+assistant. A long session's transcript is hundreds of MB, mostly
+progress events, system records and tool results, so
+read_transcript_tail():
+
+- reads the file backwards from EOF in blocks and stops once it has
+  max_messages messages;
+- checks each raw line for a ``"type": "user|human|assistant"`` marker
+  before decoding it, so records that cannot qualify never reach
+  json.loads (the marker is necessary, not sufficient: a nested match
+  still gets decoded and then rejected by the top-level check);
+- skips lines longer than max_line_bytes without joining or decoding them.
+
+Blank, corrupt, torn and non-UTF-8 lines are skipped.
+
+read_new_messages() resumes from a cursor (byte offset plus identity and
+content digests of the file at that offset) returned by a previous call,
+so a caller that keeps its own message window only decodes what was
+appended since. A cursor is rejected, and the whole tail read again,
+when the file was replaced, truncated or rewritten before the offset.
+
+Stdlib only.
+"""
+
+import hashlib
+import json
+import os
+import re
+
+MESSAGE_TYPES = ("user", "human", "assistant")
+
+# Transcripts are read backwards in blocks of this size
+TAIL_BLOCK_BYTES = 1 << 20  # 1 MiB
+
+# Longer lines are skipped undecoded (multi-MB tool output, pasted dumps)
+MAX_LINE_BYTES = 4 << 20  # 4 MiB
+
+# Bytes hashed at the start of the file and before a cursor's offset
+CURSOR_DIGEST_BYTES = 4096
+
+_MESSAGE_MARKER_RE = re.compile(rb'"type"\s*:\s*"(?:user|human|assistant)"')
+
+
+def _iter_lines_reversed(
+    f,
+    block_size: int = TAIL_BLOCK_BYTES,
+    max_line_bytes: int = 0,
+    start: int = 0,
+    end: int | None = None,
+):
+    """Yield the lines of a binary file, last line first, without their b"\n".
+
+    Reads fixed-size blocks backwards from *end* (default EOF) down to
+    *start*, which must be a line start. A line that spans blocks is kept
+    as a list of pieces and joined once its start is found, so a single
+    huge line is copied once, not once per block. With max_line_bytes > 0,
+    a longer line is yielded as None and its pieces are dropped as soon as
+    it outgrows the limit.
+    """
+    pos = f.seek(0, os.SEEK_END) if end is None else end
+    pending: list[bytes] = []  # Pieces of the current line, latest first
+    pending_len = 0
+    while pos > start:
+        size = min(block_size, pos - start)
+        pos -= size
+        f.seek(pos)
+        block = f.read(size)
+        stop = len(block)
+        nl = block.rfind(b"\n", 0, stop)
+        while nl != -1:
+            if max_line_bytes and pending_len + stop - nl - 1 > max_line_bytes:
+                yield None
+            elif pending:
+                pending.append(block[nl + 1:stop])
+                pending.reverse()
+                yield b"".join(pending)
+            else:
+                yield block[nl + 1:stop]
+            pending = []
+            pending_len = 0
+            stop = nl
+            nl = block.rfind(b"\n", 0, stop)
+        pending_len += stop
+        if max_line_bytes and pending_len > max_line_bytes:
+            pending = []
+        else:
+            pending.append(block[:stop])
+    if max_line_bytes and pending_len > max_line_bytes:
+        yield None
+    else:
+        pending.reverse()
+        yield b"".join(pending)
+
+
+def _read_messages_reversed(
+    f,
+    max_messages: int,
+    start: int,
+    end: int,
+    block_size: int,
+    max_line_bytes: int,
+) -> list[dict]:
+    """Last max_messages messages between byte offsets start and end, oldest first."""
+    messages: list[dict] = []
+    for line in _iter_lines_reversed(f, block_size, max_line_bytes, start, end):
+        if line is None or not _MESSAGE_MARKER_RE.search(line):
+            continue
+        try:
+            msg = json.loads(line)
+        except ValueError:  # Corrupt JSON or invalid UTF-8
+            continue
+        if isinstance(msg, dict) and msg.get("type", "") in MESSAGE_TYPES:
+            messages.append(msg)
+            if len(messages) == max_messages:
+                break
+    messages.reverse()
+    return messages
+
+
+def read_transcript_tail(
+    transcript_path: str,
+    max_messages: int,
+    block_size: int = TAIL_BLOCK_BYTES,
+    max_line_bytes: int = MAX_LINE_BYTES,
+) -> list[dict]:
+    """Last max_messages user/human/assistant records of a transcript, oldest first.
+
+    max_messages <= 0 returns every message; max_line_bytes <= 0 disables
+    the line length cap. A missing or unreadable file gives [].
+    """
+    try:
+        with open(transcript_path, "rb") as f:
+            end = f.seek(0, os.SEEK_END)
+            return _read_messages_reversed(f, max_messages, 0, end, block_size, max_line_bytes)
+    except OSError:
+        return []
+
+
+def _byte_at(f, pos: int) -> bytes:
+    f.seek(pos)
+    return f.read(1)
+
+
+def _digest(f, start: int, end: int) -> str:
+    f.seek(start)
+    return hashlib.blake2b(f.read(end - start), digest_size=16).hexdigest()
+
+
+def _make_cursor(f, st: os.stat_result, offset: int) -> dict:
+    return {
+        "dev": st.st_dev,
+        "ino": st.st_ino,
+        "offset": offset,
+        "head": _digest(f, 0, min(offset, CURSOR_DIGEST_BYTES)),
+        "tail": _digest(f, max(0, offset - CURSOR_DIGEST_BYTES), offset),
+    }
+
+
+def _cursor_valid(f, st: os.stat_result, cursor) -> bool:
+    """Same file, not shorter than the cursor, same bytes at both digest spots."""
+    try:
+        offset = cursor["offset"]
+        if (cursor["dev"], cursor["ino"]) != (st.st_dev, st.st_ino):
+            return False
+        if not isinstance(offset, int) or not 0 <= offset <= st.st_size:
+            return False
+        return _make_cursor(f, st, offset) == cursor
+    except (KeyError, TypeError):
+        return False
+
+
+def read_new_messages(
+    transcript_path: str,
+    max_messages: int,
+    cursor: dict | None = None,
+    block_size: int = TAIL_BLOCK_BYTES,
+    max_line_bytes: int = MAX_LINE_BYTES,
+) -> tuple[list[dict], dict | None, bool]:
+    """Messages appended since *cursor*: (messages, new_cursor, resumed).
+
+    resumed is True when the cursor was valid: messages are then the last
+    max_messages messages written after it, to be appended to the caller's
+    window. Otherwise messages are the last max_messages of the whole file
+    and replace the window. new_cursor is None when the file does not end
+    on a line boundary (a record is still being written) or on errors; the
+    next call then reads the tail again. Missing file -> ([], None, False).
+    """
+    try:
+        with open(transcript_path, "rb") as f:
+            st = os.fstat(f.fileno())
+            end = st.st_size
+            resumed = cursor is not None and _cursor_valid(f, st, cursor)
+            start = cursor["offset"] if resumed else 0
+            messages = _read_messages_reversed(f, max_messages, start, end,
+                                               block_size, max_line_bytes)
+            new_cursor = None
+            if end == 0 or _byte_at(f, end - 1) == b"\n":
+                new_cursor = _make_cursor(f, st, end)
+            return messages, new_cursor, resumed
+    except OSError:
+        return [], None, False
@@ -15,7 +15,7 @@ No external dependencies (stdlib only).
 
 from __future__ import annotations
 
-import collections
+import hashlib
 import json
 import math
 import os
@@ -24,9 +24,19 @@ import select
 import stat as stat_mod
 import sys
 import time
+from itertools import accumulate
 from pathlib import Path
 from typing import Optional
 
+# Private sre modules, read by the literal prefilter (_required_literals).
+# _compile_rules self-checks each pattern's literals, so a layout change
+# only turns the prefilter off.
+try:  # Python 3.11+
+    from re import _constants as _sre_constants, _parser as _sre_parse
+except ImportError:
+    import sre_constants as _sre_constants
+    import sre_parse as _sre_parse
+
 # Lazy import: staging utilities
 try:
     from memory_staging_utils import get_staging_dir, ensure_staging_dir, PinnedStagingDir
@@ -38,6 +48,15 @@ except ImportError:
         return ""
     PinnedStagingDir = None
 
+# Lazy import: transcript reader; degrade to an empty transcript on partial deploy
+try:
+    from memory_transcript import read_new_messages, read_transcript_tail
+except ImportError:
+    def read_new_messages(*args, **kwargs):
+        return [], None, False
+    def read_transcript_tail(*args, **kwargs):
+        return []
+
 # Lazy import: logging module may not exist during partial deployments
 try:
     from memory_logger import emit_event, emit_error, get_session_id, parse_logging_config
@@ -67,6 +86,11 @@ STOP_FLAG_TTL = 300  # 5 minutes
 # Co-occurrence sliding window: check N lines before/after a primary match
 CO_OCCURRENCE_WINDOW = 4
 
+# Novelty check: share of the triage snippets' word 3-shingles that must
+# already appear in the best existing memory for the category to be dropped
+DEFAULT_NOVELTY_THRESHOLD = 0.8
+NOVELTY_SHINGLE_SIZE = 3
+
 # Default per-category thresholds
 DEFAULT_THRESHOLDS: dict[str, float] = {
     "DECISION": 0.4,
@@ -301,26 +325,35 @@ def parse_transcript(transcript_path: str, max_messages: int) -> list[dict]:
 
     Returns list of message dicts (most recent last).
     Handles missing files, empty files, and corrupt JSONL lines gracefully.
+
+    Reads the file backwards and decodes only lines that carry a
+    user/assistant type marker (memory_transcript.read_transcript_tail),
+    so the cost depends on the size of the tail, not of the whole
+    transcript. max_messages <= 0 reads every message.
     """
-    maxlen = max_messages if max_messages > 0 else None
-    messages: collections.deque[dict] = collections.deque(maxlen=maxlen)
-    try:
-        with open(transcript_path, "r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    msg = json.loads(line)
-                    if isinstance(msg, dict):
-                        msg_type = msg.get("type", "")
-                        if msg_type in ("user", "human", "assistant"):
-                            messages.append(msg)
-                except json.JSONDecodeError:
-                    continue
-    except (OSError, IOError):
-        return []
-    return list(messages)
+    return read_transcript_tail(transcript_path, max_messages)
+
+
+def _message_text_parts(msg: dict) -> list[str]:
+    """Text blocks of one message, before code stripping."""
+    parts: list[str] = []
+    # Try nested path first (real transcripts), fall back to flat (test fixtures)
+    content = msg.get("message", {}).get("content", "") or msg.get("content", "")
+    if isinstance(content, list):
+        for block in content:
+            if isinstance(block, dict) and block.get("type") == "text":
+                parts.append(block.get("text", ""))
+            elif isinstance(block, str):
+                parts.append(block)
+    elif isinstance(content, str):
+        parts.append(content)
+    return parts
+
+
+def _strip_code(text: str) -> str:
+    """Strip fenced code blocks first, then inline code."""
+    text = _CODE_FENCE_RE.sub("", text)
+    return _INLINE_CODE_RE.sub("", text)
 
 
 def extract_text_content(messages: list[dict]) -> str:
@@ -331,25 +364,21 @@ def extract_text_content(messages: list[dict]) -> str:
     """
     parts: list[str] = []
     for msg in messages:
-        msg_type = msg.get("type", "")
-        if msg_type not in ("user", "human", "assistant"):
-            continue
-        # Try nested path first (real transcripts), fall back to flat (test fixtures)
-        content = msg.get("message", {}).get("content", "") or msg.get("content", "")
-        if isinstance(content, list):
-            for block in content:
-                if isinstance(block, dict) and block.get("type") == "text":
-                    parts.append(block.get("text", ""))
-                elif isinstance(block, str):
-                    parts.append(block)
-        elif isinstance(content, str):
-            parts.append(content)
-
-    text = "\n".join(parts)
-    # Strip fenced code blocks first, then inline code
-    text = _CODE_FENCE_RE.sub("", text)
-    text = _INLINE_CODE_RE.sub("", text)
-    return text
+        if msg.get("type", "") in ("user", "human", "assistant"):
+            parts.extend(_message_text_parts(msg))
+    return _strip_code("\n".join(parts))
+
+
+def _message_tool_names(msg: dict) -> list:
+    """Names of an assistant message's nested tool_use blocks ("" if unnamed)."""
+    content = msg.get("message", {}).get("content", [])
+    if not isinstance(content, list):
+        return []
+    return [
+        block.get("name", "")
+        for block in content
+        if isinstance(block, dict) and block.get("type") == "tool_use"
+    ]
 
 
 def extract_activity_metrics(messages: list[dict]) -> dict[str, int]:
@@ -373,14 +402,9 @@ def extract_activity_metrics(messages: list[dict]) -> dict[str, int]:
             exchanges += 1
             # For assistant messages, inspect nested content for tool_use blocks
             if msg_type == "assistant":
-                content = msg.get("message", {}).get("content", [])
-                if isinstance(content, list):
-                    for block in content:
-                        if isinstance(block, dict) and block.get("type") == "tool_use":
-                            tool_uses += 1
-                            name = block.get("name", "")
-                            if name:
-                                tool_names.add(name)
+                names = _message_tool_names(msg)
+                tool_uses += len(names)
+                tool_names.update(name for name in names if name)
 
     return {
         "tool_uses": tool_uses,
@@ -393,42 +417,256 @@ def extract_activity_metrics(messages: list[dict]) -> dict[str, int]:
 # Heuristic scoring
 # ---------------------------------------------------------------------------
 
-def _has_pattern_in_window(
-    lines: list[str],
-    center_idx: int,
-    patterns: list[re.Pattern],
-    window: int,
-) -> bool:
-    """Check if any of the given patterns match within a window around center_idx.
-
-    Includes the center line itself -- co-occurring keywords on the same line
-    are the strongest signal (e.g., "decided ... because" on one line).
+# Per-line regex features: three bits per text category, in
+# CATEGORY_PATTERNS order. Scores are computed from these bits alone, so
+# the features of transcript messages can be cached across Stop fires.
+_FEATURE_NEGATIVE = 1
+_FEATURE_PRIMARY = 2
+_FEATURE_BOOSTER = 4
+_FEATURE_SHIFT: dict[str, int] = {
+    category: 3 * i for i, category in enumerate(CATEGORY_PATTERNS)
+}
+_ANY_PRIMARY = sum(_FEATURE_PRIMARY << shift for shift in _FEATURE_SHIFT.values())
+
+SNIPPET_MAX_CHARS = 120
+
+
+# Case folding for the literal prefilter. IGNORECASE also matches dotted
+# and dotless i, long s and the Kelvin sign to ASCII letters; map them
+# before lower() so folded literals still match.
+_FOLD_TABLE = str.maketrans({"\u0130": "i", "\u0131": "i", "\u017f": "s", "\u212a": "k"})
+
+_ZERO_WIDTH_OPS = (_sre_constants.AT, _sre_constants.ASSERT, _sre_constants.ASSERT_NOT)
+_REPEAT_OPS = (_sre_constants.MAX_REPEAT, _sre_constants.MIN_REPEAT)
+_SPACE_CLASS = [(_sre_constants.CATEGORY, _sre_constants.CATEGORY_SPACE)]
+_CLASS_SAMPLES = {
+    _sre_constants.CATEGORY_SPACE: " ",
+    _sre_constants.CATEGORY_DIGIT: "0",
+    _sre_constants.CATEGORY_WORD: "a",
+}
+_MAX_SAMPLES = 64
+
+
+def _fold(text: str) -> str:
+    """Lowercase *text* with every whitespace run collapsed to one space."""
+    return " ".join(text.translate(_FOLD_TABLE).lower().split())
+
+
+def _required_literals(items) -> Optional[set[str]]:
+    """Literals one of which occurs (folded) in every line a pattern matches.
+
+    Reads the parsed pattern from its first consuming item: leading
+    zero-width assertions are skipped, literal characters and \\s+ (as one
+    space) are collected, a leading group or alternation yields one
+    literal per branch. None when some match need not contain a literal.
+    """
+    literal = ""
+    for op, av in items:
+        if op in _ZERO_WIDTH_OPS:
+            continue
+        if op == _sre_constants.LITERAL:
+            literal += chr(av)
+            continue
+        if op in _REPEAT_OPS and av[0] >= 1 and len(av[2]) == 1:
+            sub_op, sub_av = av[2][0]
+            if sub_op == _sre_constants.IN and sub_av == _SPACE_CLASS:
+                literal += " "
+                continue
+            if sub_op == _sre_constants.LITERAL:
+                literal += chr(sub_av)
+                break
+        if literal:
+            break
+        if op == _sre_constants.SUBPATTERN:
+            return _required_literals(av[-1])
+        if op == _sre_constants.BRANCH:
+            found: set[str] = set()
+            for branch in av[1]:
+                branch_literals = _required_literals(branch)
+                if branch_literals is None:
+                    return None
+                found |= branch_literals
+            return found
+        if op == _sre_constants.IN and av and all(
+            item_op == _sre_constants.LITERAL for item_op, _ in av
+        ):
+            return {chr(code) for _, code in av}
+        return None
+    return {literal} if literal.strip() else None
+
+
+def _samples(items) -> list[str]:
+    """Short strings built from a parsed pattern, one per alternative.
+
+    Branches and literal character classes are expanded (up to
+    _MAX_SAMPLES), repeats emit their minimum count and zero-width
+    assertions are skipped. Not every sample need match the pattern.
     """
-    start = max(0, center_idx - window)
-    end = min(len(lines), center_idx + window + 1)
-    for i in range(start, end):
-        for pat in patterns:
-            if pat.search(lines[i]):
-                return True
+    samples = [""]
+    for op, av in items:
+        if op in _ZERO_WIDTH_OPS:
+            continue
+        if op == _sre_constants.LITERAL:
+            options = [chr(av)]
+        elif op == _sre_constants.ANY:
+            options = ["a"]
+        elif op == _sre_constants.IN:
+            options = []
+            for item_op, item_av in av:
+                if item_op == _sre_constants.LITERAL:
+                    options.append(chr(item_av))
+                elif item_op == _sre_constants.RANGE:
+                    options.append(chr(item_av[0]))
+                elif item_op == _sre_constants.CATEGORY and item_av in _CLASS_SAMPLES:
+                    options.append(_CLASS_SAMPLES[item_av])
+                else:
+                    return []
+        elif op in _REPEAT_OPS:
+            sub = _samples(av[2])
+            if not sub:
+                return []
+            options = [sub[0] * av[0]]
+        elif op == _sre_constants.SUBPATTERN:
+            options = _samples(av[-1])
+        elif op == _sre_constants.BRANCH:
+            options = [sample for branch in av[1] for sample in _samples(branch)]
+        else:
+            return []
+        if not options:
+            return []
+        samples = [head + tail for head in samples for tail in options][:_MAX_SAMPLES]
+    return samples
+
+
+def _literals_hold(pat: re.Pattern, parsed, literals: set[str]) -> bool:
+    """Self-check of the literals read off the private sre parse tree.
+
+    Probes built from the pattern's own parse must back every literal:
+    each one occurs in some probe the pattern matches, and every probe it
+    matches contains one. A parse layout this module does not expect
+    fails the check, and the pattern then runs without the prefilter.
+    """
+    witnessed: set[str] = set()
+    for sample in _samples(parsed):
+        if not pat.search(sample):
+            continue
+        found = {lit for lit in literals if lit in _fold(sample)}
+        if not found:
+            return False
+        witnessed |= found
+    return witnessed == literals
+
+
+def _compile_rules(patterns) -> tuple:
+    """(pattern, folded literals or None) for each pattern of one role."""
+    rules = []
+    for pat in patterns:
+        try:
+            parsed = _sre_parse.parse(pat.pattern, pat.flags)
+            literals = _required_literals(parsed)
+            if literals:
+                literals = {_fold(lit) for lit in literals}
+                if ("" in literals or not all(lit.isascii() for lit in literals)
+                        or not _literals_hold(pat, parsed, literals)):
+                    literals = None
+        except Exception:  # Unparseable here: always run the regex
+            literals = None
+        rules.append((pat, tuple(sorted(literals)) if literals else None))
+    return tuple(rules)
+
+
+# category -> (negative rules, primary rules, booster rules)
+_FEATURE_RULES: dict[str, tuple] = {
+    category: tuple(_compile_rules(cfg.get(role, ())) for role in ("negative", "primary", "boosters"))
+    for category, cfg in CATEGORY_PATTERNS.items()
+}
+
+
+def _rules_match(rules: tuple, line: str, folded: str) -> bool:
+    """Whether any rule's pattern matches *line* (*folded* = _fold(line))."""
+    for pat, literals in rules:
+        if literals is not None:
+            for literal in literals:
+                if literal in folded:
+                    break
+            else:
+                continue
+        if pat.search(line):
+            return True
     return False
 
 
-def score_text_category(
+def _line_features(
     lines: list[str],
+    categories=None,
+    edge: int = 0,
+) -> tuple[list[int], dict[int, str]]:
+    """Regex features of each line for the given (default: all) text categories.
+
+    Returns (masks, snippets): masks[i] holds line i's negative / primary /
+    booster bits per category; snippets maps each line with a primary
+    match to its stripped, truncated text. Booster bits are only computed
+    where _score_features reads them: within CO_OCCURRENCE_WINDOW lines of
+    a primary match, and in the first and last *edge* lines (features of
+    one message, later scored next to its neighbours).
+
+    One pass over the lines covers every category. A pattern is only run
+    on lines that contain one of its required literals (_FEATURE_RULES),
+    which most lines do not.
+    """
+    n = len(lines)
+    masks = [0] * n
+    folded = [_fold(line) for line in lines]
+    rules = [(_FEATURE_SHIFT[category], *_FEATURE_RULES[category])
+             for category in categories or CATEGORY_PATTERNS]
+    primary_lines: list[list[int]] = [[] for _ in rules]
+
+    for idx, line in enumerate(lines):
+        mask = 0
+        for hits, (shift, negative_rules, primary_rules, _) in zip(primary_lines, rules):
+            if negative_rules and _rules_match(negative_rules, line, folded[idx]):
+                mask |= _FEATURE_NEGATIVE << shift
+            if _rules_match(primary_rules, line, folded[idx]):
+                mask |= _FEATURE_PRIMARY << shift
+                hits.append(idx)
+        masks[idx] = mask
+
+    for hits, (shift, _, _, booster_rules) in zip(primary_lines, rules):
+        booster_lines = set(range(min(edge, n))) | set(range(max(0, n - edge), n))
+        for idx in hits:
+            booster_lines.update(range(max(0, idx - CO_OCCURRENCE_WINDOW),
+                                       min(n, idx + CO_OCCURRENCE_WINDOW + 1)))
+        for idx in booster_lines:
+            if _rules_match(booster_rules, lines[idx], folded[idx]):
+                masks[idx] |= _FEATURE_BOOSTER << shift
+
+    snippets = {
+        idx: lines[idx].strip()[:SNIPPET_MAX_CHARS]
+        for idx, mask in enumerate(masks)
+        if mask & _ANY_PRIMARY
+    }
+    return masks, snippets
+
+
+def _score_features(
+    masks: list[int],
+    snippets: dict[int, str],
     category: str,
 ) -> tuple[float, list[str], int, int]:
-    """Score a text-based category using primary patterns + co-occurrence boosters.
-
-    Returns (normalized_score, list_of_matched_context_snippets,
-             primary_hit_count, boosted_hit_count).
+    """Score a text-based category from per-line features (see _line_features).
+
+    Lines with a negative match are skipped (instructional text filter).
+    A primary match with a booster within CO_OCCURRENCE_WINDOW lines
+    (including its own line) counts as boosted, otherwise as primary,
+    each up to its cap. Only one primary match is counted per line.
+    Booster lines are counted with a prefix sum, built at the first
+    primary line, so each window test is two lookups.
     """
     cfg = CATEGORY_PATTERNS.get(category)
     if not cfg:
         return 0.0, [], 0, 0
 
-    primary_pats: list[re.Pattern] = cfg["primary"]
-    booster_pats: list[re.Pattern] = cfg["boosters"]
-    negative_pats: list[re.Pattern] = cfg.get("negative", [])
+    shift = _FEATURE_SHIFT[category]
     primary_weight: float = cfg["primary_weight"]
     boosted_weight: float = cfg["boosted_weight"]
     max_primary: int = cfg["max_primary"]
@@ -438,37 +676,48 @@ def score_text_category(
     raw_score = 0.0
     primary_count = 0
     boosted_count = 0
-    snippets: list[str] = []
+    found: list[str] = []
+    n = len(masks)
+    boosters_before: list[int] = []  # [i]: booster lines in masks[:i]
 
-    for idx, line in enumerate(lines):
-        # Skip lines matching negative patterns (instructional text filter)
-        if negative_pats and any(np.search(line) for np in negative_pats):
+    for idx, mask in enumerate(masks):
+        bits = mask >> shift
+        if bits & _FEATURE_NEGATIVE or not bits & _FEATURE_PRIMARY:
             continue
-
-        for pat in primary_pats:
-            if pat.search(line):
-                # Check for co-occurrence booster in window
-                has_booster = _has_pattern_in_window(
-                    lines, idx, booster_pats, CO_OCCURRENCE_WINDOW
-                )
-                if has_booster and boosted_count < max_boosted:
-                    raw_score += boosted_weight
-                    boosted_count += 1
-                    snippet = line.strip()[:120]
-                    if snippet and snippet not in snippets:
-                        snippets.append(snippet)
-                elif primary_count < max_primary:
-                    raw_score += primary_weight
-                    primary_count += 1
-                    snippet = line.strip()[:120]
-                    if snippet and snippet not in snippets:
-                        snippets.append(snippet)
-
-                # Only count one primary pattern match per line
-                break
+        if not boosters_before:
+            boosters_before = [0, *accumulate(
+                bool((m >> shift) & _FEATURE_BOOSTER) for m in masks)]
+        has_booster = (boosters_before[min(n, idx + CO_OCCURRENCE_WINDOW + 1)]
+                       > boosters_before[max(0, idx - CO_OCCURRENCE_WINDOW)])
+        if has_booster and boosted_count < max_boosted:
+            raw_score += boosted_weight
+            boosted_count += 1
+        elif primary_count < max_primary:
+            raw_score += primary_weight
+            primary_count += 1
+        else:
+            continue
+        snippet = snippets.get(idx, "")
+        if snippet and snippet not in found:
+            found.append(snippet)
 
     normalized = min(1.0, raw_score / denominator) if denominator > 0 else 0.0
-    return normalized, snippets, primary_count, boosted_count
+    return normalized, found, primary_count, boosted_count
+
+
+def score_text_category(
+    lines: list[str],
+    category: str,
+) -> tuple[float, list[str], int, int]:
+    """Score a text-based category using primary patterns + co-occurrence boosters.
+
+    Returns (normalized_score, list_of_matched_context_snippets,
+             primary_hit_count, boosted_hit_count).
+    """
+    if category not in CATEGORY_PATTERNS:
+        return 0.0, [], 0, 0
+    masks, snippets = _line_features(lines, (category,))
+    return _score_features(masks, snippets, category)
 
 
 def score_session_summary(metrics: dict[str, int]) -> tuple[float, list[str]]:
@@ -502,34 +751,51 @@ def _score_all_raw(
     """Compute scores + snippets for ALL 6 categories (shared core).
 
     Returns list of dicts for every category:
-      [{"category": "DECISION", "score": 0.72, "snippets": ["..."]}]
+      [{"category": "DECISION", "score": 0.72, "snippets": ["..."],
+        "primary_hits": 2, "booster_hits": 1, "match_lines": [4, 17]}]
+
+    match_lines are the indices into text.split("\n") of the lines with a
+    primary match, whether or not they scored; write_context_files()
+    builds its excerpts around them.
 
     Used by both ``run_triage()`` (threshold-filtered) and
     ``score_all_categories()`` (all scores, no snippets).
-    Single evaluation avoids duplicate regex execution.
     """
+    masks, snippets = _line_features(text.split("\n"))
+    return _scores_from_features(masks, snippets, metrics)
+
+
+def _scores_from_features(
+    masks: list[int],
+    snippets: dict[int, str],
+    metrics: dict[str, int],
+) -> list[dict]:
+    """_score_all_raw() output from precomputed line features."""
     all_raw: list[dict] = []
-    lines = text.split("\n")
 
     # Text-based categories
     for category in CATEGORY_PATTERNS:
-        score, snippets, p_hits, b_hits = score_text_category(lines, category)
+        score, found, p_hits, b_hits = _score_features(masks, snippets, category)
+        primary = _FEATURE_PRIMARY << _FEATURE_SHIFT[category]
         all_raw.append({
             "category": category,
             "score": score,
-            "snippets": snippets,
+            "snippets": found,
             "primary_hits": p_hits,
             "booster_hits": b_hits,
+            # Lines with a primary match (snippets holds every such line)
+            "match_lines": sorted(idx for idx in snippets if masks[idx] & primary),
         })
 
     # Activity-based: SESSION_SUMMARY
-    score, snippets = score_session_summary(metrics)
+    score, found = score_session_summary(metrics)
     all_raw.append({
         "category": "SESSION_SUMMARY",
         "score": score,
-        "snippets": snippets,
+        "snippets": found,
         "primary_hits": 0,
         "booster_hits": 0,
+        "match_lines": [],
     })
 
     return all_raw
@@ -539,13 +805,18 @@ def run_triage(
     text: str,
     metrics: dict[str, int],
     thresholds: dict[str, float],
+    all_raw: Optional[list[dict]] = None,
 ) -> list[dict]:
     """Run heuristic triage across all 6 categories.
 
     Returns list of dicts for categories that exceed their threshold:
       [{"category": "DECISION", "score": 0.72, "snippets": ["..."]}]
+
+    Pass *all_raw* (from _score_all_raw or _window_scores) to filter
+    existing scores instead of scoring *text* again.
     """
-    all_raw = _score_all_raw(text, metrics)
+    if all_raw is None:
+        all_raw = _score_all_raw(text, metrics)
     results: list[dict] = []
     for entry in all_raw:
         threshold = thresholds.get(entry["category"], 0.5)
@@ -559,17 +830,20 @@ def run_triage(
 def score_all_categories(
     text: str,
     metrics: dict[str, int],
+    all_raw: Optional[list[dict]] = None,
 ) -> list[dict]:
     """Score ALL 6 categories and return their scores (for logging/analytics).
 
     Unlike ``run_triage()`` which filters by threshold, this returns every
     category with its computed score. Snippets are intentionally excluded
     to keep log payloads compact and avoid leaking transcript content.
+    *all_raw* works as in ``run_triage()``.
 
     Returns:
         [{"category": "DECISION", "score": 0.32, "primary_hits": 3, "booster_hits": 1}, ...]
     """
-    all_raw = _score_all_raw(text, metrics)
+    if all_raw is None:
+        all_raw = _score_all_raw(text, metrics)
     return [
         {
             "category": entry["category"],
@@ -581,6 +855,308 @@ def score_all_categories(
     ]
 
 
+# ---------------------------------------------------------------------------
+# Incremental triage checkpoint (repeated Stop fires in one session)
+# ---------------------------------------------------------------------------
+
+TRIAGE_CHECKPOINT_NAME = ".triage-checkpoint.json"
+TRIAGE_CHECKPOINT_VERSION = 1
+
+# Larger checkpoints (huge pasted messages) are not written
+TRIAGE_CHECKPOINT_MAX_BYTES = 4 << 20  # 4 MiB
+
+
+def _message_state(msg: dict) -> dict:
+    """Triage view of one transcript message, as kept in the checkpoint.
+
+    "text" is its text blocks joined (None if it has none), "tools" its
+    tool_use names. If stripping code from the text alone leaves no
+    backtick, no code span can pair with a neighbouring message, so the
+    message's line features are cached ("masks", "snippets"); otherwise
+    they are None and windows holding it are rescored from the full text.
+    """
+    parts = _message_text_parts(msg)
+    msg_type = msg.get("type", "")
+    state = {
+        "type": msg_type,
+        "text": "\n".join(parts) if parts else None,
+        "tools": _message_tool_names(msg) if msg_type == "assistant" else [],
+        "masks": [],
+        "snippets": {},
+    }
+    if parts:
+        stripped = _strip_code(state["text"])
+        if "`" in stripped:
+            state["masks"] = state["snippets"] = None
+        else:
+            masks, snippets = _line_features(stripped.split("\n"), edge=CO_OCCURRENCE_WINDOW)
+            state["masks"] = masks
+            state["snippets"] = {str(idx): snippet for idx, snippet in snippets.items()}
+    return state
+
+
+def _window_text(window: list[dict]) -> str:
+    """extract_text_content() of the window's messages."""
+    return _strip_code("\n".join(m["text"] for m in window if m["text"] is not None))
+
+
+def _window_metrics(window: list[dict]) -> dict[str, int]:
+    """extract_activity_metrics() of the window's messages."""
+    names = [name for m in window for name in m["tools"]]
+    return {
+        "tool_uses": len(names),
+        "distinct_tools": len({name for name in names if name}),
+        "exchanges": len(window),
+    }
+
+
+def _window_scores(window: list[dict], text: str, metrics: dict[str, int]) -> list[dict]:
+    """_score_all_raw(text, metrics) for a window, from cached features when possible."""
+    if any(m["masks"] is None for m in window):
+        return _score_all_raw(text, metrics)
+    masks: list[int] = []
+    snippets: dict[int, str] = {}
+    for m in window:
+        if m["text"] is None:
+            continue
+        base = len(masks)
+        masks.extend(m["masks"])
+        snippets.update((base + int(idx), snippet) for idx, snippet in m["snippets"].items())
+    return _scores_from_features(masks, snippets, metrics)
+
+
+def _features_fingerprint() -> str:
+    """Digest of everything cached line features depend on."""
+    spec: list = [TRIAGE_CHECKPOINT_VERSION, SNIPPET_MAX_CHARS, CO_OCCURRENCE_WINDOW,
+                  _CODE_FENCE_RE.pattern, _INLINE_CODE_RE.pattern]
+    for category, cfg in CATEGORY_PATTERNS.items():
+        spec.append(category)
+        for key in ("negative", "primary", "boosters"):
+            spec.extend([key, pat.pattern, pat.flags] for pat in cfg.get(key, ()))
+    return hashlib.blake2b(json.dumps(spec).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _valid_message_state(state) -> bool:
+    if not isinstance(state, dict) or not isinstance(state.get("tools"), list):
+        return False
+    text, masks, snippets = state.get("text"), state.get("masks"), state.get("snippets")
+    if text is not None and not isinstance(text, str):
+        return False
+    if masks is None:
+        return snippets is None
+    return (isinstance(masks, list) and isinstance(snippets, dict)
+            and all(isinstance(mask, int) for mask in masks))
+
+
+def _load_triage_checkpoint(
+    pinned, session_id: str, transcript_path: str, max_messages: int,
+) -> Optional[dict]:
+    """The stored checkpoint if it belongs to this session, transcript and config."""
+    if pinned is None:
+        return None
+    try:
+        raw = pinned.read_file(TRIAGE_CHECKPOINT_NAME, max_bytes=TRIAGE_CHECKPOINT_MAX_BYTES + 1)
+        if len(raw) > TRIAGE_CHECKPOINT_MAX_BYTES:
+            return None
+        checkpoint = json.loads(raw)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(checkpoint, dict) or not isinstance(checkpoint.get("window"), list):
+        return None
+    if (checkpoint.get("session_id") != session_id
+            or checkpoint.get("transcript") != transcript_path
+            or checkpoint.get("max_messages") != max_messages
+            or checkpoint.get("features") != _features_fingerprint()
+            or not isinstance(checkpoint.get("cursor"), dict)):
+        return None
+    if not all(_valid_message_state(state) for state in checkpoint["window"]):
+        return None
+    return checkpoint
+
+
+def _save_triage_checkpoint(pinned, checkpoint: dict) -> None:
+    """Best-effort atomic write of the checkpoint (fail-open)."""
+    if pinned is None:
+        return
+    try:
+        content = json.dumps(checkpoint, separators=(",", ":"))
+        if len(content) > TRIAGE_CHECKPOINT_MAX_BYTES:
+            return
+        pinned.write_file(TRIAGE_CHECKPOINT_NAME, content)
+    except Exception:
+        pass
+
+
+def _read_triage_window(
+    transcript_path: str,
+    max_messages: int,
+    session_id: str,
+    *,
+    pinned=None,
+) -> tuple[list[dict], bool]:
+    """Message states of the last max_messages transcript messages.
+
+    With a pinned staging dir, resumes from the session's checkpoint: only
+    messages appended since the previous Stop fire are decoded and have
+    their line features computed. The checkpoint is dropped when the
+    transcript was replaced, truncated or rewritten before its offset
+    (memory_transcript.read_new_messages), or when the session, transcript,
+    max_messages or scoring patterns changed. Returns (window, resumed).
+    """
+    checkpoint = _load_triage_checkpoint(pinned, session_id, transcript_path, max_messages)
+    messages, cursor, resumed = read_new_messages(
+        transcript_path, max_messages, checkpoint["cursor"] if checkpoint else None,
+    )
+    window = checkpoint["window"] if resumed else []
+    window = window + [_message_state(msg) for msg in messages]
+    if max_messages > 0:
+        window = window[-max_messages:]
+    if cursor is not None:
+        _save_triage_checkpoint(pinned, {
+            "version": TRIAGE_CHECKPOINT_VERSION,
+            "session_id": session_id,
+            "transcript": transcript_path,
+            "max_messages": max_messages,
+            "features": _features_fingerprint(),
+            "cursor": cursor,
+            "window": window,
+        })
+    return window, resumed
+
+
+# ---------------------------------------------------------------------------
+# Novelty check (drop categories an existing memory already covers)
+# ---------------------------------------------------------------------------
+
+_SHINGLE_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def _shingles(text: str, size: int = NOVELTY_SHINGLE_SIZE) -> set[tuple[str, ...]]:
+    """Word n-gram shingles of lowercased alphanumeric words."""
+    words = _SHINGLE_WORD_RE.findall(text.lower())
+    return {tuple(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def _candidate_key_text(data: dict, category: str) -> str:
+    """Title, tags and the category's key content fields of a memory record."""
+    try:
+        from memory_candidate import CATEGORY_KEY_FIELDS
+    except ImportError:
+        CATEGORY_KEY_FIELDS = {}
+    parts = [str(data.get("title", ""))]
+    tags = data.get("tags")
+    if isinstance(tags, list):
+        parts.append(" ".join(str(t) for t in tags))
+    content = data.get("content")
+    if isinstance(content, dict):
+        for field in CATEGORY_KEY_FIELDS.get(category.lower(), []):
+            value = content.get(field)
+            if isinstance(value, list):
+                parts.extend(str(v) for v in value)
+            elif value is not None:
+                parts.append(str(value))
+    return "\n".join(parts)
+
+
+def check_novelty(
+    results: list[dict],
+    cwd: str,
+    threshold: float = DEFAULT_NOVELTY_THRESHOLD,
+) -> tuple[list[dict], list[dict]]:
+    """Split triggered categories into (kept, decisions) before any save work.
+
+    For each text category, the snippets are matched against index.md with
+    BM25 (the retrieval FTS5 index, or the NumPy BM25 engine when SQLite
+    lacks FTS5) to find the best existing memory of the same category.
+    They are then compared with that memory's key fields by shingle
+    containment. A category is dropped when at least *threshold* of its
+    snippet shingles already appear there. SESSION_SUMMARY is always kept.
+
+    *decisions* has one entry per checked category (for logging):
+    {category, decision: keep|drop, reason, candidate, bm25, overlap}.
+    Fail-open: any error keeps the category, and with no search engine at
+    all every category is kept with reason "no_engine".
+    """
+    memory_root = Path(cwd) / ".claude" / "memory"
+    checkable = [r for r in results if r["category"] != "SESSION_SUMMARY"]
+    if not checkable or not (memory_root / "index.md").is_file():
+        return results, []
+
+    def keep_all(reason: str) -> tuple[list[dict], list[dict]]:
+        return results, [{"category": r["category"], "decision": "keep", "reason": reason,
+                          "candidate": None, "bm25": None, "overlap": None}
+                         for r in checkable]
+
+    try:
+        from memory_search_engine import (
+            HAS_FTS5, build_fts_query, load_numpy_bm25, open_fts_index, query_fts,
+            tokenize as fts_tokenize,
+        )
+    except ImportError:
+        return keep_all("no_engine")
+    # Same engine choice as retrieval: NumPy BM25 stands in for FTS5
+    bm25_engine = None if HAS_FTS5 else load_numpy_bm25()
+    if not HAS_FTS5 and bm25_engine is None:
+        return keep_all("no_engine")
+    open_index = open_fts_index if bm25_engine is None else bm25_engine.open_bm25_index
+    try:
+        conn, _, _ = open_index(memory_root)
+    except Exception:
+        return keep_all("error")
+
+    kept: list[dict] = []
+    decisions: list[dict] = []
+    root_resolved = memory_root.resolve()
+    try:
+        for entry in results:
+            category = entry["category"]
+            if category == "SESSION_SUMMARY":
+                kept.append(entry)
+                continue
+            decision = {"category": category, "decision": "keep", "reason": "",
+                        "candidate": None, "bm25": None, "overlap": None}
+            decisions.append(decision)
+            try:
+                snippet_text = "\n".join(entry.get("snippets", []))
+                wanted = _shingles(snippet_text)
+                fts_query = build_fts_query(sorted(fts_tokenize(snippet_text)))
+                if not wanted or not fts_query:
+                    decision["reason"] = "too_short"
+                    kept.append(entry)
+                    continue
+                hits = [h for h in query_fts(conn, fts_query, limit=30)
+                        if h["category"] == category]
+                if not hits:
+                    decision["reason"] = "no_match"
+                    kept.append(entry)
+                    continue
+                top = hits[0]
+                decision["candidate"] = top["path"]
+                decision["bm25"] = round(top["score"], 4)
+                path = (Path(cwd) / top["path"]).resolve()
+                path.relative_to(root_resolved)
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("record_status", "active") != "active":
+                    decision["reason"] = "candidate_inactive"
+                    kept.append(entry)
+                    continue
+                have = _shingles(_candidate_key_text(data, category))
+                overlap = len(wanted & have) / len(wanted)
+                decision["overlap"] = round(overlap, 4)
+                if overlap >= threshold:
+                    decision["decision"] = "drop"
+                    decision["reason"] = "redundant"
+                    continue
+                decision["reason"] = "novel"
+            except Exception:
+                decision["reason"] = "error"
+            kept.append(entry)
+    finally:
+        conn.close()
+    return kept, decisions
+
+
 # ---------------------------------------------------------------------------
 # Stop hook active flag (with TTL)
 # ---------------------------------------------------------------------------
@@ -1071,12 +1647,14 @@ def load_config(cwd: str) -> dict:
     """Load triage configuration from memory-config.json.
 
     Returns a dict with keys: enabled, max_messages, thresholds, parallel,
-    category_descriptions.
+    category_descriptions, novelty_check, novelty_threshold.
     Falls back to defaults on any error.
     """
     config: dict = {
         "enabled": True,
         "max_messages": DEFAULT_MAX_MESSAGES,
+        "novelty_check": True,
+        "novelty_threshold": DEFAULT_NOVELTY_THRESHOLD,
         "thresholds": dict(DEFAULT_THRESHOLDS),
         "parallel": _deep_copy_parallel_defaults(),
         "category_descriptions": {},
@@ -1108,6 +1686,17 @@ def load_config(cwd: str) -> dict:
         except (ValueError, TypeError):
             pass
 
+    # novelty check (drop triggered categories an existing memory covers)
+    if isinstance(triage.get("novelty_check"), bool):
+        config["novelty_check"] = triage["novelty_check"]
+    if "novelty_threshold" in triage and not isinstance(triage["novelty_threshold"], bool):
+        try:
+            val = float(triage["novelty_threshold"])
+            if not (math.isnan(val) or math.isinf(val)):
+                config["novelty_threshold"] = max(0.0, min(1.0, val))
+        except (ValueError, TypeError):
+            pass
+
     # thresholds (case-insensitive key matching: accept both UPPERCASE and lowercase)
     if "thresholds" in triage and isinstance(triage["thresholds"], dict):
         # Normalize user keys to UPPERCASE for matching against DEFAULT_THRESHOLDS
@@ -1224,20 +1813,12 @@ def _find_match_line_indices(lines: list[str], category: str) -> list[int]:
     return indices
 
 
-def _extract_context_excerpt(
+def _excerpt_ranges(
     lines: list[str],
     match_indices: list[int],
     window: int = CONTEXT_WINDOW_LINES,
-) -> str:
-    """Extract merged context windows around match indices.
-
-    Returns a single string with non-overlapping excerpts separated by
-    '---' markers. Each excerpt includes +/- window lines around the match.
-    """
-    if not match_indices or not lines:
-        return ""
-
-    # Build merged ranges (avoid overlapping excerpts)
+) -> list[tuple[int, int]]:
+    """Merged [start, end) line ranges of +/- window lines around each match."""
     ranges: list[tuple[int, int]] = []
     for idx in sorted(set(match_indices)):
         start = max(0, idx - window)
@@ -1247,12 +1828,25 @@ def _extract_context_excerpt(
             ranges[-1] = (ranges[-1][0], end)
         else:
             ranges.append((start, end))
+    return ranges
 
-    parts: list[str] = []
-    for start, end in ranges:
-        parts.append("\n".join(lines[start:end]))
 
-    return "\n---\n".join(parts)
+def _extract_context_excerpt(
+    lines: list[str],
+    match_indices: list[int],
+    window: int = CONTEXT_WINDOW_LINES,
+) -> str:
+    """Extract merged context windows around match indices.
+
+    Returns a single string with non-overlapping excerpts separated by
+    '---' markers. Each excerpt includes +/- window lines around the match.
+    """
+    if not match_indices or not lines:
+        return ""
+    return "\n---\n".join(
+        "\n".join(lines[start:end])
+        for start, end in _excerpt_ranges(lines, match_indices, window)
+    )
 
 
 def write_context_files(
@@ -1268,7 +1862,12 @@ def write_context_files(
 
     Returns a dict mapping category name -> context file path.
     For text-based categories, includes generous transcript excerpts
-    around keyword matches. For SESSION_SUMMARY, includes activity metrics.
+    around keyword matches: the result's "match_lines" from scoring, or a
+    fresh primary-pattern scan for results without them. For
+    SESSION_SUMMARY, includes activity metrics.
+
+    Each file is assembled as one list of lines, encoded once and written
+    with a single write.
 
     Files are written to /tmp/.claude-memory-staging-<hash>/context-{cat}.txt.
     Returns empty dict if staging dir creation fails (no fallback to
@@ -1329,23 +1928,27 @@ def write_context_files(
                     if total <= SESSION_SUMMARY_HEAD_LINES + SESSION_SUMMARY_TAIL_LINES:
                         parts.append("Transcript (full):")
                         parts.append("")
-                        parts.append("\n".join(lines))
+                        parts.extend(lines)
                     else:
                         parts.append("Transcript (opening excerpt):")
                         parts.append("")
-                        parts.append("\n".join(lines[:SESSION_SUMMARY_HEAD_LINES]))
+                        parts.extend(lines[:SESSION_SUMMARY_HEAD_LINES])
                         parts.append("\n---\n")
                         parts.append("Transcript (closing excerpt):")
                         parts.append("")
-                        parts.append("\n".join(lines[-SESSION_SUMMARY_TAIL_LINES:]))
+                        parts.extend(lines[-SESSION_SUMMARY_TAIL_LINES:])
             else:
                 # Text-based category: include generous context excerpts
-                match_indices = _find_match_line_indices(lines, category)
-                excerpt = _extract_context_excerpt(lines, match_indices)
-                if excerpt:
+                match_indices = r.get("match_lines")
+                if match_indices is None:
+                    match_indices = _find_match_line_indices(lines, category)
+                if match_indices and lines:
                     parts.append("Relevant transcript excerpts:")
                     parts.append("")
-                    parts.append(excerpt)
+                    for i, (start, end) in enumerate(_excerpt_ranges(lines, match_indices)):
+                        if i:
+                            parts.append("---")
+                        parts.extend(lines[start:end])
             parts.append("</transcript_data>")
 
             if snippets:
@@ -1354,16 +1957,17 @@ def write_context_files(
                 for s in snippets:
                     parts.append(f"  - {s}")
 
-            content = "\n".join(parts)
+            content = "\n".join(parts).encode("utf-8")
 
             # Truncate if exceeds max size (prevents oversized subagent prompts)
-            content_bytes = content.encode("utf-8")
-            if len(content_bytes) > MAX_CONTEXT_FILE_BYTES:
+            if len(content) > MAX_CONTEXT_FILE_BYTES:
                 # Truncate at byte boundary, decode safely
-                truncated = content_bytes[:MAX_CONTEXT_FILE_BYTES].decode(
+                truncated = content[:MAX_CONTEXT_FILE_BYTES].decode(
                     "utf-8", errors="ignore"
                 )
-                content = truncated + "\n</transcript_data>\n[Truncated: context exceeded 50KB]"
+                content = (
+                    truncated + "\n</transcript_data>\n[Truncated: context exceeded 50KB]"
+                ).encode("utf-8")
 
             # Use pinned dir_fd for TOCTOU-safe write if available
             if pinned is not None:
@@ -1376,7 +1980,7 @@ def write_context_files(
                     0o600,
                 )
                 try:
-                    with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    with os.fdopen(fd, "wb") as f:
                         f.write(content)
                 except Exception:
                     try:
@@ -1691,22 +2295,25 @@ def _run_triage() -> int:
             if not (resolved.startswith(_resolved_tmp_pfx) or resolved.startswith(home + "/")):
                 return 0
 
-            messages = parse_transcript(resolved, config["max_messages"])
-            if not messages:
+            _read_start = time.perf_counter()
+            window, resumed = _read_triage_window(
+                resolved, config["max_messages"], session_id, pinned=_pinned,
+            )
+            if not window:
                 return 0
 
             # 7. Extract text and activity metrics
-            text = extract_text_content(messages)
-            metrics = extract_activity_metrics(messages)
-
-            # 8. Run heuristic triage (single scoring pass via shared _score_all_raw)
-            results = run_triage(text, metrics, config["thresholds"])
-
-            # All category scores for logging. Note: this re-evaluates _score_all_raw
-            # (duplicate regex pass). Acceptable since triage runs once per session stop
-            # and total overhead is <100ms. The shared _score_all_raw ensures both
-            # functions stay in sync when categories are added/changed.
-            all_scores = score_all_categories(text, metrics)
+            _extract_start = time.perf_counter()
+            text = _window_text(window)
+            metrics = _window_metrics(window)
+
+            # 8. Run heuristic triage: one scoring pass, reusing the line
+            #    features of messages an earlier Stop fire already scored
+            _score_start = time.perf_counter()
+            all_raw = _window_scores(window, text, metrics)
+            results = run_triage(text, metrics, config["thresholds"], all_raw=all_raw)
+            all_scores = score_all_categories(text, metrics, all_raw=all_raw)
+            _score_end = time.perf_counter()
 
             # Structured logging via emit_event
             emit_event("triage.score", {
@@ -1714,6 +2321,15 @@ def _run_triage() -> int:
                 "exchanges": metrics.get("exchanges", 0),
                 "tool_uses": metrics.get("tool_uses", 0),
                 "fire_count": _fire_count,
+                "resumed": resumed,
+                # Wall time of each phase up to this event (ms); setup covers
+                # config loading, idempotency guards and the triage lock
+                "phase_ms": {
+                    "setup": round((_read_start - _triage_start) * 1000, 2),
+                    "read": round((_extract_start - _read_start) * 1000, 2),
+                    "extract": round((_score_start - _extract_start) * 1000, 2),
+                    "score": round((_score_end - _score_start) * 1000, 2),
+                },
                 "triggered": [
                     {"category": r["category"], "score": round(r["score"], 4)}
                     for r in results
@@ -1724,6 +2340,24 @@ def _run_triage() -> int:
                duration_ms=round((time.perf_counter() - _triage_start) * 1000, 2),
                memory_root=_memory_root_str, config=_triage_raw_config)
 
+            # 8b. Novelty check: drop categories an existing memory already
+            #     covers, before any context files or subagents are scheduled
+            if results and config.get("novelty_check", True):
+                _novelty_start = time.perf_counter()
+                results, novelty = check_novelty(
+                    results, cwd,
+                    config.get("novelty_threshold", DEFAULT_NOVELTY_THRESHOLD),
+                )
+                if novelty:
+                    emit_event("triage.novelty", {
+                        "threshold": config.get("novelty_threshold", DEFAULT_NOVELTY_THRESHOLD),
+                        "dropped": [d["category"] for d in novelty if d["decision"] == "drop"],
+                        "checked": novelty,
+                    }, hook="Stop", script="memory_triage.py",
+                       session_id=session_id,
+                       duration_ms=round((time.perf_counter() - _novelty_start) * 1000, 2),
+                       memory_root=_memory_root_str, config=_triage_raw_config)
+
             # 9. Output decision
             if results:
                 # Block stop: create flag and write sentinel
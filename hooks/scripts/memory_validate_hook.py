@@ -2,11 +2,13 @@
 """PostToolUse guardrail: validates writes to memory JSON files.
 
 Detection-only fallback that catches cases where the PreToolUse guard
-did not fire. Runs Pydantic schema validation on any file written
-under the memory storage directory. Invalid files are quarantined
-(renamed with .invalid.<timestamp> suffix) to preserve evidence.
+did not fire. Runs schema validation on any file written under the
+memory storage directory. Invalid files are quarantined (renamed with
+.invalid.<timestamp> suffix) to preserve evidence.
 
-Requires Pydantic v2 (bootstrapped from plugin venv).
+Valid records pass the stdlib check in memory_schema.py without
+loading Pydantic; only records it rejects are re-checked with the
+Pydantic models (Pydantic v2, bootstrapped from plugin venv).
 """
 
 import json
@@ -123,9 +125,25 @@ def quarantine(file_path):
     return quarantine_path
 
 
+def _fast_validate(data, category):
+    """Stdlib schema check; True only for records that are certainly valid."""
+    try:
+        scripts_dir = os.path.dirname(os.path.abspath(__file__))
+        if scripts_dir not in sys.path:
+            sys.path.insert(0, scripts_dir)
+        from memory_schema import fast_validate
+        return fast_validate(data, category)
+    except Exception:
+        return False
+
+
 def validate_file(file_path):
-    """Validate a memory JSON file. Returns (is_valid, error_message)."""
-    _ensure_pydantic()
+    """Validate a memory JSON file. Returns (is_valid, error_message).
+
+    Valid records are accepted by the stdlib schema check without
+    importing pydantic; failures go to the pydantic models for the
+    verdict and error message.
+    """
     try:
         with open(file_path, "r", encoding="utf-8") as f:
             data = json.load(f)
@@ -140,6 +158,11 @@ def validate_file(file_path):
     if not category:
         return False, "Cannot determine category from path or file content"
 
+    if _fast_validate(data, category):
+        return True, ""
+
+    _ensure_pydantic()
+
     # Only attempt Pydantic validation if pydantic is available.
     # memory_write.py uses os.execv() to re-exec under the venv python when
     # pydantic is missing, which would replace our entire process and lose
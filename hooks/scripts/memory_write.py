@@ -3,7 +3,7 @@
 
 Handles CREATE, UPDATE, RETIRE, ARCHIVE, UNARCHIVE, and RESTORE operations
 with Pydantic validation, mechanical merge protections, OCC, atomic writes,
-and index management.
+and index management. --action batch applies many of them under one lock.
 
 Usage:
   python3 memory_write.py --action create --category decision \
@@ -17,6 +17,9 @@ Usage:
   python3 memory_write.py --action retire \
     --target .claude/memory/decisions/use-jwt.json \
     --reason "Decision reversed"
+
+  python3 memory_write.py --action batch \
+    --manifest /tmp/.claude-memory-staging-<hash>/write-batch.json
 """
 
 import sys
@@ -35,7 +38,9 @@ if os.path.isfile(_venv_python) and os.path.realpath(sys.executable) != os.path.
         os.execv(_venv_python, [_venv_python] + sys.argv)
 
 import argparse
+import contextlib
 import hashlib
+import io
 import json
 import re
 import time
@@ -64,6 +69,59 @@ except ImportError:
     _LEGACY_STAGING_PREFIX = _STAGING_PREFIX  # same as _STAGING_PREFIX when in /tmp/
     _RESOLVED_TMP_PREFIX = _RESOLVED_TMP + "/"
 
+# Metadata sidecar read by retrieval. Optional: without it retrieval just
+# reads the memory JSON files directly.
+try:
+    from memory_search_engine import record_memory_meta, record_memory_meta_many
+except ImportError:
+    def record_memory_meta(*args, **kwargs): return False
+    def record_memory_meta_many(*args, **kwargs): return False
+
+# Cold storage packs (memory_index.py --pack-inactive): restore and unarchive
+# read packed records back. Without the module nothing can have been packed.
+try:
+    from memory_pack import drop_from_pack, read_packed
+except ImportError:
+    def read_packed(*args, **kwargs): return None
+    def drop_from_pack(*args, **kwargs): pass
+
+# Stdlib fast path for valid records; the pydantic models stay authoritative.
+try:
+    from memory_schema import fast_validate
+except ImportError:
+    def fast_validate(data, category): return False
+
+# Lazy import: logging module may not exist during partial deployments
+try:
+    from memory_logger import emit_event
+except (ImportError, SyntaxError) as e:
+    if isinstance(e, ImportError) and getattr(e, 'name', None) != 'memory_logger':
+        raise  # Transitive dependency failure -- fail-fast
+    def emit_event(*args, **kwargs): pass
+
+# Index lock (stdlib-only module, so memory_index.py can take it without pydantic)
+from memory_lock import FlockIndex  # noqa: E402
+
+# Index delta log: mutations append records that readers merge on load.
+from memory_search_engine import (  # noqa: E402
+    append_index_delta,
+    compact_index,
+    index_delta_needs_compaction,
+    index_line_path,
+    occ_generation,
+    occ_token,
+    parse_occ_token,
+)
+# Flat or hashed fan-out category folders (directory_fanout).
+from memory_layout import (  # noqa: E402
+    category_dir,
+    layout_path,
+    locate_memory_file,
+    other_layout_path,
+    read_fanout,
+    sibling_path,
+)
+
 
 # ---------------------------------------------------------------------------
 # Constants
@@ -391,7 +449,13 @@ def auto_fix(data: dict, action: str) -> dict:
 # ---------------------------------------------------------------------------
 
 def validate_memory(data: dict, category: str) -> tuple[bool, Optional[str]]:
-    """Validate data against the category model. Returns (ok, error_msg)."""
+    """Validate data against the category model. Returns (ok, error_msg).
+
+    Records the compiled schema check accepts skip the pydantic model;
+    everything else is validated (and explained) by pydantic.
+    """
+    if fast_validate(data, category):
+        return True, None
     Model = build_memory_model(category)
     try:
         Model.model_validate(data)
@@ -432,76 +496,77 @@ def build_index_line(data: dict, rel_path: str) -> str:
     return line
 
 
+# Set by _defer_index_writes() (batch mode): index_path -> pending records,
+# and memory_root -> (file_path, data) sidecar rows.
+_deferred_index_records: Optional[dict[Path, list[tuple[str, str]]]] = None
+_deferred_meta_records: Optional[dict[Path, list[tuple[Path, dict]]]] = None
+
+
+@contextlib.contextmanager
+def _defer_index_writes():
+    """Collect index records and sidecar rows and write each in one go on exit.
+
+    Index records become one delta-log append per index and sidecar rows
+    one SQLite transaction per memory root. Both are flushed even if the
+    body raises, so operations that already wrote their JSON file still
+    reach the index.
+    """
+    global _deferred_index_records, _deferred_meta_records
+    _deferred_index_records, _deferred_meta_records = {}, {}
+    try:
+        yield
+    finally:
+        pending, _deferred_index_records = _deferred_index_records, None
+        meta, _deferred_meta_records = _deferred_meta_records, None
+        for memory_root, records in meta.items():
+            record_memory_meta_many(memory_root, records)
+        for index_path, records in pending.items():
+            if records:
+                _append_index_records(index_path, records)
+
+
+def _record_meta(memory_root: Path, target_abs: Path, data: dict) -> None:
+    """Upsert the sidecar row for a written file (deferred in batch mode)."""
+    if _deferred_meta_records is not None:
+        _deferred_meta_records.setdefault(memory_root, []).append((target_abs, data))
+        return
+    record_memory_meta(memory_root, target_abs, data)
+
+
+def _append_index_records(index_path: Path, records: list[tuple[str, str]]) -> None:
+    """Append records to the index delta log; compact once it is large enough.
+
+    Replaces the old read/filter/sort/rewrite of index.md on every mutation:
+    an append is O(1), and the full rewrite is amortized over many writes.
+    """
+    if _deferred_index_records is not None:
+        _deferred_index_records.setdefault(index_path, []).extend(records)
+        return
+    size = append_index_delta(index_path, records)
+    if index_delta_needs_compaction(index_path, size):
+        compact_index(index_path)
+
+
 def add_to_index(index_path: Path, line: str) -> None:
-    """Add a line to index.md, maintaining sorted order.
+    """Add a line to the index (kept sorted on compaction).
 
-    C2 fix: deduplicates by rel_path before appending to prevent duplicate
-    entries from partial failure retries.
+    C2 fix: the delta record is an upsert keyed by rel_path, so partial
+    failure retries never produce duplicate entries.
     """
-    lines = _read_index_lines(index_path)
-    # Extract rel_path from new line for dedup (format: "... -> rel_path #tags:...")
-    new_rel_path = None
-    if " -> " in line:
-        new_rel_path = line.split(" -> ", 1)[1].split(" #tags:")[0].strip()
-    # Separate header and entry lines, removing any existing entry with same path
-    entries = []
-    header = []
-    for l in lines:
-        if l.startswith("- ["):
-            if new_rel_path and f"-> {new_rel_path}" in l:
-                continue  # C2: remove duplicate entry for same path
-            entries.append(l)
-        else:
-            header.append(l)
-    entries.append(line)
-    entries.sort(key=lambda x: x.lower())
-    all_lines = header + entries
-    content = "\n".join(all_lines)
-    if not content.endswith("\n"):
-        content += "\n"
-    atomic_write_text(str(index_path), content)
+    _append_index_records(index_path, [("+", line)])
 
 
 def remove_from_index(index_path: Path, target_path: str) -> None:
-    """Remove the entry matching target_path from index.md."""
-    lines = _read_index_lines(index_path)
-    filtered = [l for l in lines if not (l.startswith("- [") and f"-> {target_path}" in l)]
-    content = "\n".join(filtered)
-    if not content.endswith("\n"):
-        content += "\n"
-    atomic_write_text(str(index_path), content)
+    """Remove the entry matching target_path from the index."""
+    _append_index_records(index_path, [("-", target_path)])
 
 
 def update_index_entry(index_path: Path, old_path: str, new_line: str) -> None:
-    """Replace the index entry for old_path with new_line."""
-    lines = _read_index_lines(index_path)
-    new_lines = []
-    replaced = False
-    for l in lines:
-        if l.startswith("- [") and f"-> {old_path}" in l:
-            new_lines.append(new_line)
-            replaced = True
-        else:
-            new_lines.append(l)
-    if not replaced:
-        # Entry not found, add it
-        add_to_index(index_path, new_line)
-        return
-    content = "\n".join(new_lines)
-    if not content.endswith("\n"):
-        content += "\n"
-    atomic_write_text(str(index_path), content)
-
-
-def _read_index_lines(index_path: Path) -> list[str]:
-    """Read index.md lines, creating if missing."""
-    if not index_path.exists():
-        return [
-            "# Memory Index", "",
-            "<!-- Auto-generated by memory_index.py. Do not edit manually. -->", ""
-        ]
-    with open(index_path, "r", encoding="utf-8") as f:
-        return [l.rstrip("\n") for l in f.readlines()]
+    """Replace the index entry for old_path with new_line (added if missing)."""
+    records = [("+", new_line)]
+    if index_line_path(new_line) != old_path:
+        records.insert(0, ("-", old_path))
+    _append_index_records(index_path, records)
 
 
 # ---------------------------------------------------------------------------
@@ -517,6 +582,45 @@ def file_md5(path: str) -> Optional[str]:
         return None
 
 
+def occ_check(path: str, expected: str) -> tuple[bool, Optional[str]]:
+    """Compare an UPDATE --hash value with the file at *path*.
+
+    Returns (unchanged, current). *expected* is either a legacy MD5 of the
+    file or an occ2 token from candidate selection (see occ_token() in
+    memory_search_engine). A token whose (mtime_ns, size, inode) still
+    match is accepted from a stat alone, unless it is flagged racy. Else
+    the file is read: a different times_updated generation is a conflict,
+    and with the same generation the token's MD5 decides, so a rewrite
+    with identical bytes (new inode or mtime) is not a conflict. A
+    stat-only token (no MD5) whose stat moved is a conflict. Call inside
+    the index lock.
+    """
+    token = parse_occ_token(expected)
+    if token is None:
+        current = file_md5(path)
+        return current == expected, current
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return False, None
+    if not token["racy"] and (st.st_mtime_ns, st.st_size, st.st_ino) == token["stat"]:
+        return True, expected
+    try:
+        with open(path, "rb") as f:
+            st = os.fstat(f.fileno())
+            raw = f.read()
+    except FileNotFoundError:
+        return False, None
+    try:
+        data = json.loads(raw)
+    except ValueError:
+        data = None
+    current = occ_token(st, data, raw)
+    if occ_generation(data) != token["gen"] or token["md5"] is None:
+        return False, current
+    return hashlib.md5(raw).hexdigest() == token["md5"], current
+
+
 def atomic_write_text(target: str, content: str) -> None:
     """Write text atomically via unique tmp + rename."""
     import tempfile
@@ -551,6 +655,7 @@ _STAGING_CLEANUP_PATTERNS = [
     "input-*.json",
     "intent-*.json",
     "new-info-*.txt",
+    "write-batch.json",
     # NOTE: .triage-handled intentionally excluded — sentinel must survive
     # cleanup to prevent stop-hook re-fire loops. Session-scoped: overwritten
     # by new sessions, expired via FLAG_TTL_SECONDS safety net.
@@ -765,6 +870,41 @@ _SENTINEL_TRANSITIONS: dict[str, set[str]] = {
 _SENTINEL_VALID_STATES = frozenset({"saving", "saved", "failed"})
 
 
+def fill_session_id(staging_dir: str, result_json: str) -> str:
+    """Auto-populate session_id from the sentinel if the result lacks one.
+
+    Invalid JSON is returned unchanged for write_save_result() to reject.
+    """
+    try:
+        data = json.loads(result_json)
+        if isinstance(data, dict) and ("session_id" not in data or data["session_id"] is None):
+            sentinel_session_id = None
+            try:
+                sentinel_file = os.path.join(
+                    str(Path(staging_dir).resolve()), ".triage-handled"
+                )
+                sfd = os.open(sentinel_file, os.O_RDONLY | os.O_NOFOLLOW)
+                try:
+                    sraw = os.read(sfd, 4096).decode("utf-8", errors="replace")
+                finally:
+                    os.close(sfd)
+                sdata = json.loads(sraw)
+                if isinstance(sdata, dict):
+                    sid = sdata.get("session_id")
+                    if isinstance(sid, str) and sid:
+                        sentinel_session_id = sid
+            except (OSError, json.JSONDecodeError, UnicodeDecodeError):
+                pass
+            if sentinel_session_id:
+                data["session_id"] = sentinel_session_id
+            else:
+                data["session_id"] = None
+            result_json = json.dumps(data, ensure_ascii=False)
+    except (json.JSONDecodeError, TypeError):
+        pass  # Let write_save_result handle invalid JSON
+    return result_json
+
+
 def update_sentinel_state(staging_dir: str, target_state: str) -> dict:
     """Atomically advance the sentinel (.triage-handled) to a new state.
 
@@ -1026,7 +1166,15 @@ def do_create(args, memory_root: Path, index_path: Path) -> int:
         return 1
 
     target = Path(args.target)
-    target_abs = Path.cwd() / target if not target.is_absolute() else target
+    target_abs = _target_abs(args, target)
+
+    # Place the file by the configured folder layout, unless the slug
+    # already exists in the other one (its path stays stable until
+    # memory_index.py --migrate-layout moves it)
+    if category_dir(target_abs).name == CATEGORY_FOLDERS.get(args.category):
+        fanout = read_fanout(memory_root)
+        target, target_abs = layout_path(target, fanout), layout_path(target_abs, fanout)
+        target, target_abs = _locate_target(target, target_abs)
 
     # Path traversal check
     if _check_path_containment(target_abs, memory_root, "CREATE"):
@@ -1105,6 +1253,7 @@ def do_create(args, memory_root: Path, index_path: Path) -> int:
                     # else: idempotent replay — same content, allow overwrite
 
         atomic_write_json(str(target_abs), data)
+        _record_meta(memory_root, target_abs, data)
         index_line = build_index_line(data, rel_path)
         add_to_index(index_path, index_line)
 
@@ -1113,31 +1262,7 @@ def do_create(args, memory_root: Path, index_path: Path) -> int:
 
     # ── Mechanical enforcement: auto-enforce rolling window after session create ──
     if args.category == "session_summary" and not getattr(args, 'skip_auto_enforce', False):
-        try:
-            import subprocess
-            enforce_script = Path(__file__).resolve().parent / "memory_enforce.py"
-            if enforce_script.exists():
-                env = os.environ.copy()
-                if "CLAUDE_PROJECT_ROOT" not in env:
-                    env["CLAUDE_PROJECT_ROOT"] = str(memory_root.parent.parent)
-                proc = subprocess.run(
-                    [sys.executable, str(enforce_script),
-                     "--category", "session_summary"],
-                    capture_output=True, text=True, timeout=30,
-                    env=env,
-                )
-                if proc.returncode != 0 and proc.stderr:
-                    print(
-                        f"[WARN] Post-create enforcement returned rc={proc.returncode}: "
-                        f"{proc.stderr.strip()[:200]}",
-                        file=sys.stderr,
-                    )
-        except Exception as e:
-            print(
-                f"[WARN] Post-create enforcement failed: {e}. "
-                f"Sessions may exceed max_retained until next enforcement.",
-                file=sys.stderr,
-            )
+        _run_auto_enforce(memory_root)
 
     # Success output
     result = {
@@ -1150,10 +1275,40 @@ def do_create(args, memory_root: Path, index_path: Path) -> int:
     return 0
 
 
+def _run_auto_enforce(memory_root: Path) -> None:
+    """Enforce the session rolling window in a subprocess (fail-open)."""
+    try:
+        import subprocess
+        enforce_script = Path(__file__).resolve().parent / "memory_enforce.py"
+        if enforce_script.exists():
+            env = os.environ.copy()
+            if "CLAUDE_PROJECT_ROOT" not in env:
+                env["CLAUDE_PROJECT_ROOT"] = str(memory_root.parent.parent)
+            proc = subprocess.run(
+                [sys.executable, str(enforce_script),
+                 "--category", "session_summary"],
+                capture_output=True, text=True, timeout=30,
+                env=env,
+            )
+            if proc.returncode != 0 and proc.stderr:
+                print(
+                    f"[WARN] Post-create enforcement returned rc={proc.returncode}: "
+                    f"{proc.stderr.strip()[:200]}",
+                    file=sys.stderr,
+                )
+    except Exception as e:
+        print(
+            f"[WARN] Post-create enforcement failed: {e}. "
+            f"Sessions may exceed max_retained until next enforcement.",
+            file=sys.stderr,
+        )
+
+
 def do_update(args, memory_root: Path, index_path: Path) -> int:
     """Handle --action update."""
     target = Path(args.target)
-    target_abs = Path.cwd() / target if not target.is_absolute() else target
+    target_abs = _target_abs(args, target)
+    target, target_abs = _locate_target(target, target_abs)
 
     # Path traversal check
     if _check_path_containment(target_abs, memory_root, "UPDATE"):
@@ -1240,7 +1395,7 @@ def do_update(args, memory_root: Path, index_path: Path) -> int:
             and word_difference_ratio(old_title, new_title) > 0.5):
         new_slug = slugify(new_title)
         if new_slug and new_slug != target_abs.stem:
-            new_file = target_abs.parent / f"{new_slug}.json"
+            new_file = sibling_path(target_abs, new_slug)
             if new_file.exists():
                 print(
                     f"[WARN] Slug rename collision: {new_file} exists. "
@@ -1251,8 +1406,7 @@ def do_update(args, memory_root: Path, index_path: Path) -> int:
                 rename_needed = True
                 new_target_abs = new_file
                 # Recompute relative path
-                parent_rel = str(target).rsplit("/", 1)[0]
-                new_rel_path = f"{parent_rel}/{new_slug}.json"
+                new_rel_path = str(sibling_path(target, new_slug))
                 new_data["id"] = new_slug
 
     # Re-validate after all changes
@@ -1265,10 +1419,10 @@ def do_update(args, memory_root: Path, index_path: Path) -> int:
 
     # OCC: flock on index for atomic transaction
     with FlockIndex(index_path):
-        # OCC hash check inside flock to prevent TOCTOU
+        # OCC check inside flock to prevent TOCTOU
         if args.hash:
-            current_hash = file_md5(str(target_abs))
-            if current_hash != args.hash:
+            unchanged, current_hash = occ_check(str(target_abs), args.hash)
+            if not unchanged:
                 print(
                     f"OCC_CONFLICT\ntarget: {args.target}\n"
                     f"expected_hash: {args.hash}\n"
@@ -1280,7 +1434,9 @@ def do_update(args, memory_root: Path, index_path: Path) -> int:
 
         if rename_needed:
             # Rename flow: write new, update index, delete old
+            new_target_abs.parent.mkdir(parents=True, exist_ok=True)
             atomic_write_json(str(new_target_abs), new_data)
+            _record_meta(memory_root, new_target_abs, new_data)
             new_index_line = build_index_line(new_data, new_rel_path)
             remove_from_index(index_path, rel_path)
             add_to_index(index_path, new_index_line)
@@ -1290,6 +1446,7 @@ def do_update(args, memory_root: Path, index_path: Path) -> int:
                 pass
         else:
             atomic_write_json(str(target_abs), new_data)
+            _record_meta(memory_root, target_abs, new_data)
             index_line = build_index_line(new_data, rel_path)
             update_index_entry(index_path, rel_path, index_line)
 
@@ -1367,6 +1524,7 @@ def retire_record(target_abs: Path, reason: str, memory_root: Path, index_path:
     rel_path = str(target_abs.relative_to(project_root))
 
     atomic_write_json(str(target_abs), data)
+    _record_meta(memory_root, target_abs, data)
     remove_from_index(index_path, rel_path)
 
     return {
@@ -1376,10 +1534,40 @@ def retire_record(target_abs: Path, reason: str, memory_root: Path, index_path:
     }
 
 
+def retire_records(victims: list[tuple[Path, str]], memory_root: Path,
+                   index_path: Path) -> list[tuple[Path, object]]:
+    """Retire several records with one index append. Caller MUST hold FlockIndex.
+
+    victims is [(target_abs, reason), ...]. Each victim gets the same
+    treatment as retire_record(), but the index removals are written in a
+    single delta-log append after the last one.
+
+    Public API: used by memory_enforce.py.
+
+    Returns [(target_abs, outcome), ...] in victim order, where outcome is
+    retire_record()'s result dict or the exception it raised. A missing
+    file (FileNotFoundError) is recorded and skipped; any other exception
+    is recorded and ends the batch, so later victims are not attempted.
+    Removals for records already retired are still flushed.
+    """
+    outcomes = []
+    with _defer_index_writes():
+        for target_abs, reason in victims:
+            try:
+                outcomes.append((target_abs, retire_record(target_abs, reason, memory_root, index_path)))
+            except FileNotFoundError as e:
+                outcomes.append((target_abs, e))
+            except Exception as e:
+                outcomes.append((target_abs, e))
+                break
+    return outcomes
+
+
 def do_retire(args, memory_root: Path, index_path: Path) -> int:
     """Handle --action retire (soft retire)."""
     target = Path(args.target)
-    target_abs = Path.cwd() / target if not target.is_absolute() else target
+    target_abs = _target_abs(args, target)
+    target, target_abs = _locate_target(target, target_abs)
 
     # Path traversal check
     if _check_path_containment(target_abs, memory_root, "RETIRE"):
@@ -1413,7 +1601,8 @@ def do_retire(args, memory_root: Path, index_path: Path) -> int:
 def do_archive(args, memory_root: Path, index_path: Path) -> int:
     """Handle --action archive."""
     target = Path(args.target)
-    target_abs = Path.cwd() / target if not target.is_absolute() else target
+    target_abs = _target_abs(args, target)
+    target, target_abs = _locate_target(target, target_abs)
 
     # Path traversal check
     if _check_path_containment(target_abs, memory_root, "ARCHIVE"):
@@ -1473,6 +1662,7 @@ def do_archive(args, memory_root: Path, index_path: Path) -> int:
     # flock on index
     with FlockIndex(index_path):
         atomic_write_json(str(target_abs), data)
+        _record_meta(memory_root, target_abs, data)
         remove_from_index(index_path, rel_path)
 
     result = {
@@ -1484,25 +1674,55 @@ def do_archive(args, memory_root: Path, index_path: Path) -> int:
     return 0
 
 
+def _locate_target(target: Path, target_abs: Path) -> tuple[Path, Path]:
+    """(target, target_abs) in the other folder layout if only that file exists."""
+    found = locate_memory_file(target_abs)
+    if found == target_abs:
+        return target, target_abs
+    return other_layout_path(target), found
+
+
+def _read_inactive_target(target: str, target_abs: Path, memory_root: Path,
+                          label: str) -> tuple[Optional[dict], Optional[str]]:
+    """Read an unarchive/restore target from its file or its cold pack.
+
+    Returns (data, packed_rel): packed_rel is the pack key when the record
+    came from a pack (the caller drops it there once the hot file is
+    written), else None. Returns (None, None) after printing the error.
+    """
+    if not target_abs.exists():
+        project_root = Path(os.path.abspath(memory_root)).parent.parent
+        packed_rel = Path(os.path.abspath(target_abs)).relative_to(project_root).as_posix()
+        data = read_packed(memory_root, packed_rel)
+        if data is None:
+            # Target given in the other folder layout
+            packed_rel = other_layout_path(Path(packed_rel)).as_posix()
+            data = read_packed(memory_root, packed_rel)
+        if data is None:
+            print(f"{label}_ERROR\ntarget: {target}\nfix: File does not exist.")
+            return None, None
+        return data, packed_rel
+    try:
+        with open(target_abs, "r", encoding="utf-8") as f:
+            return json.load(f), None
+    except (json.JSONDecodeError, OSError) as e:
+        print(f"READ_ERROR\ntarget: {target}\nerror: {e}")
+        return None, None
+
+
 def do_unarchive(args, memory_root: Path, index_path: Path) -> int:
     """Handle --action unarchive."""
     target = Path(args.target)
-    target_abs = Path.cwd() / target if not target.is_absolute() else target
+    target_abs = _target_abs(args, target)
+    target, target_abs = _locate_target(target, target_abs)
 
     # Path traversal check
     if _check_path_containment(target_abs, memory_root, "UNARCHIVE"):
         return 1
 
-    if not target_abs.exists():
-        print(f"UNARCHIVE_ERROR\ntarget: {args.target}\nfix: File does not exist.")
-        return 1
-
-    # Read existing
-    try:
-        with open(target_abs, "r", encoding="utf-8") as f:
-            data = json.load(f)
-    except (json.JSONDecodeError, OSError) as e:
-        print(f"READ_ERROR\ntarget: {args.target}\nerror: {e}")
+    # Read existing (from the cold pack if it was packed)
+    data, packed_rel = _read_inactive_target(args.target, target_abs, memory_root, "UNARCHIVE")
+    if data is None:
         return 1
 
     # Only archived memories can be unarchived
@@ -1538,9 +1758,14 @@ def do_unarchive(args, memory_root: Path, index_path: Path) -> int:
 
     # flock on index
     with FlockIndex(index_path):
+        if packed_rel:
+            target_abs.parent.mkdir(parents=True, exist_ok=True)  # Bucket may be gone
         atomic_write_json(str(target_abs), data)
+        _record_meta(memory_root, target_abs, data)
         index_line = build_index_line(data, rel_path)
         add_to_index(index_path, index_line)
+        if packed_rel:
+            drop_from_pack(memory_root, packed_rel)
 
     result = {
         "status": "unarchived",
@@ -1553,22 +1778,16 @@ def do_unarchive(args, memory_root: Path, index_path: Path) -> int:
 def do_restore(args, memory_root: Path, index_path: Path) -> int:
     """Handle --action restore (retired -> active)."""
     target = Path(args.target)
-    target_abs = Path.cwd() / target if not target.is_absolute() else target
+    target_abs = _target_abs(args, target)
+    target, target_abs = _locate_target(target, target_abs)
 
     # Path traversal check
     if _check_path_containment(target_abs, memory_root, "RESTORE"):
         return 1
 
-    if not target_abs.exists():
-        print(f"RESTORE_ERROR\ntarget: {args.target}\nfix: File does not exist.")
-        return 1
-
-    # Read existing
-    try:
-        with open(target_abs, "r", encoding="utf-8") as f:
-            data = json.load(f)
-    except (json.JSONDecodeError, OSError) as e:
-        print(f"READ_ERROR\ntarget: {args.target}\nerror: {e}")
+    # Read existing (from the cold pack if it was packed)
+    data, packed_rel = _read_inactive_target(args.target, target_abs, memory_root, "RESTORE")
+    if data is None:
         return 1
 
     # Already active? Idempotent success
@@ -1611,9 +1830,14 @@ def do_restore(args, memory_root: Path, index_path: Path) -> int:
 
     # flock on index
     with FlockIndex(index_path):
+        if packed_rel:
+            target_abs.parent.mkdir(parents=True, exist_ok=True)  # Bucket may be gone
         atomic_write_json(str(target_abs), data)
+        _record_meta(memory_root, target_abs, data)
         index_line = build_index_line(data, rel_path)
         add_to_index(index_path, index_line)
+        if packed_rel:
+            drop_from_pack(memory_root, packed_rel)
 
     result = {
         "status": "restored",
@@ -1623,6 +1847,387 @@ def do_restore(args, memory_root: Path, index_path: Path) -> int:
     return 0
 
 
+# ---------------------------------------------------------------------------
+# Batch mode
+# ---------------------------------------------------------------------------
+
+BATCH_ACTIONS = {
+    "create": do_create,
+    "update": do_update,
+    "retire": do_retire,
+    "archive": do_archive,
+    "unarchive": do_unarchive,
+    "restore": do_restore,
+}
+
+
+def _anchor_path(path: Optional[str], base: Optional[str]) -> Optional[str]:
+    """*path* joined onto *base* if it is relative (base None: unchanged)."""
+    if base is None or not path or os.path.isabs(path):
+        return path
+    return os.path.join(base, path)
+
+
+def _batch_op_args(op: dict, base: Optional[str] = None) -> argparse.Namespace:
+    """Build the single-op argparse namespace for a batch manifest entry.
+
+    Relative target and input paths are taken relative to *base* (default:
+    the process cwd). The target string itself is kept: it is the index key.
+    """
+    return argparse.Namespace(
+        action=op.get("action"),
+        category=op.get("category"),
+        target=op.get("target"),
+        base=base,
+        input=_anchor_path(op.get("input"), base),
+        hash=op.get("hash"),
+        reason=op.get("reason"),
+        skip_auto_enforce=True,  # Batch runs enforcement once, after the lock
+    )
+
+
+def _check_batch_op(op) -> Optional[str]:
+    """Return an error message if a manifest entry is malformed, else None."""
+    if not isinstance(op, dict):
+        return "BATCH_ERROR\nfix: Each operation must be a JSON object."
+    action = op.get("action")
+    if action not in BATCH_ACTIONS:
+        return (f"BATCH_ERROR\naction: {action}\n"
+                f"fix: action must be one of {', '.join(BATCH_ACTIONS)}.")
+    for field in ("target", "input", "category", "hash", "reason"):
+        if op.get(field) is not None and not isinstance(op[field], str):
+            return f"BATCH_ERROR\nfield: {field}\nfix: {field} must be a string."
+    if not op.get("target"):
+        return "BATCH_ERROR\nfield: target\nfix: target is required."
+    if action in ("create", "update") and not op.get("input"):
+        return "BATCH_ERROR\nfield: input\nfix: input is required for create and update."
+    if action == "create" and op.get("category") not in CATEGORY_FOLDERS:
+        return (f"BATCH_ERROR\nfield: category\n"
+                f"fix: category must be one of {', '.join(CATEGORY_FOLDERS)}.")
+    return None
+
+
+def _run_batch_op(op: dict, memory_root: Path, index_path: Path,
+                  base: Optional[str] = None) -> tuple[bool, str]:
+    """Run one operation with its stdout captured. Returns (ok, output)."""
+    handler = BATCH_ACTIONS[op["action"]]
+    buf = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(buf):
+            rc = handler(_batch_op_args(op, base), memory_root, index_path)
+    except Exception as e:
+        return False, f"{buf.getvalue()}UNEXPECTED_ERROR\nerror: {type(e).__name__}: {e}"
+    return rc == 0, buf.getvalue()
+
+
+def do_batch(args) -> int:
+    """Handle --action batch: apply many operations under one index lock.
+
+    The manifest is {"operations": [{"action", "target", ...}, ...]} where
+    each entry takes the same fields as the single-op CLI (category, input,
+    hash, reason) plus an optional caller-defined "id" echoed in its result.
+    All targets must share one memory root. Operations run in order and
+    independently: a failure is reported in its result and does not roll
+    back earlier ones. Index records from all operations are written in one
+    append after the last operation.
+
+    With --queue the manifest goes through the project's write queue
+    (see run_queued_batch()), so concurrent sessions share one writer.
+
+    Prints {"status": "ok" | "partial_failure" | "failed", "succeeded": n,
+    "failed": n, "results": [...]}; exits 0 only if every operation succeeded.
+    """
+    manifest = _read_input(args.manifest)
+    if manifest is None:
+        return 1
+    ops = manifest.get("operations") if isinstance(manifest, dict) else None
+    if not isinstance(ops, list):
+        print("BATCH_ERROR\nfield: operations\nfix: Manifest must be an object with an 'operations' list.")
+        return 1
+
+    runner = run_queued_batch if getattr(args, "queue", False) else run_batch
+    summary = runner(ops, auto_enforce=not args.skip_auto_enforce)
+    print(json.dumps(summary))
+    return 0 if not summary["failed"] else 1
+
+
+def run_batch(ops: list, auto_enforce: bool = True) -> dict:
+    """Apply batch operations in-process and return the do_batch() summary.
+
+    Library entry point for callers that already run in a Python process
+    (memory_orchestrate.py in-process mode); do_batch() is the CLI wrapper.
+    """
+    results, runnable, memory_root, index_path = _plan_batch(ops)
+    enforce = False
+    if runnable:
+        with FlockIndex(index_path), _defer_index_writes():
+            enforce = _apply_batch(runnable, memory_root, index_path)
+
+    if enforce and auto_enforce:
+        _run_auto_enforce(memory_root)
+    return _batch_summary(results)
+
+
+def _plan_batch(ops: list, base: Optional[str] = None
+                ) -> tuple[list, list, Optional[Path], Optional[Path]]:
+    """Check batch operations and resolve their shared memory root.
+
+    Relative targets are taken relative to *base* (default: the process
+    cwd). Returns (results, runnable, memory_root, index_path): one result
+    dict per operation (failed entries already filled in) and the
+    (result, op) pairs that can run.
+    """
+    results = []
+    runnable = []
+    memory_root = index_path = None
+    for i, op in enumerate(ops):
+        result = {"index": i}
+        if isinstance(op, dict):
+            result.update({k: op.get(k) for k in ("id", "action", "target") if k in op})
+        results.append(result)
+        err = _check_batch_op(op)
+        if err is None:
+            buf = io.StringIO()
+            try:
+                with contextlib.redirect_stdout(buf):
+                    op_root, op_index = _resolve_memory_root(
+                        _anchor_path(op["target"], base))
+            except SystemExit:
+                err = buf.getvalue().strip()
+            else:
+                if memory_root is None:
+                    memory_root, index_path = op_root, op_index
+                elif op_root != memory_root:
+                    err = (f"BATCH_ERROR\ntarget: {op['target']}\n"
+                           f"fix: All batch targets must be under {memory_root}.")
+        if err is not None:
+            result.update({"ok": False, "error": err})
+        else:
+            runnable.append((result, op))
+    return results, runnable, memory_root, index_path
+
+
+def _apply_batch(runnable: list, memory_root: Path, index_path: Path,
+                 base: Optional[str] = None) -> bool:
+    """Run planned operations; the caller holds the index lock.
+
+    Fills in each result and returns True if a session summary was created
+    (the rolling window needs enforcing).
+    """
+    enforce = False
+    for result, op in runnable:
+        ok, output = _run_batch_op(op, memory_root, index_path, base)
+        result["ok"] = ok
+        if not ok:
+            result["error"] = output.strip()
+            continue
+        try:
+            result["result"] = json.loads(output.strip().splitlines()[-1])
+        except (json.JSONDecodeError, IndexError):
+            result["result"] = {"output": output.strip()}
+        if op["action"] == "create" and op.get("category") == "session_summary":
+            enforce = True
+    return enforce
+
+
+def _batch_summary(results: list) -> dict:
+    failed = sum(1 for r in results if not r["ok"])
+    succeeded = len(results) - failed
+    status = "ok" if not failed else ("partial_failure" if succeeded else "failed")
+    return {
+        "status": status,
+        "succeeded": succeeded,
+        "failed": failed,
+        "results": results,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Write queue (several sessions saving into one project)
+# ---------------------------------------------------------------------------
+#
+# <memory_root>/.write-queue/ holds one <id>.pending file per submitted
+# batch: {"cwd", "operations"}. A submitter does not run its own batch;
+# it takes the index lock and drains every pending entry, so whichever
+# session gets the lock first applies all of them in one pass (one lock
+# hold, one index append) and the others find their results waiting.
+# A drainer claims entries by renaming them to <id>.claimed, writes
+# <id>.result with the entry's batch summary, then deletes the claim.
+# Delivery is at most once: if a drainer dies between claim and result,
+# the submitter reports QUEUE_ERROR instead of re-applying the batch.
+
+WRITE_QUEUE_DIR = ".write-queue"
+_QUEUE_WAIT_TIMEOUT = 60.0   # Max seconds a submitter waits for its result
+_QUEUE_ENTRY_RE = re.compile(r"^[0-9]{20}-[0-9]+-[0-9a-f]{8}$")
+
+
+def _queue_entry_path(queue_dir: Path, entry_id: str, state: str) -> Path:
+    return queue_dir / f"{entry_id}.{state}"
+
+
+def submit_to_queue(ops: list, memory_root: Path) -> str:
+    """Spool a batch for the next queue drain. Returns the entry id."""
+    queue_dir = memory_root / WRITE_QUEUE_DIR
+    queue_dir.mkdir(mode=0o700, exist_ok=True)
+    entry_id = f"{time.time_ns():020d}-{os.getpid()}-{os.urandom(4).hex()}"
+    tmp = _queue_entry_path(queue_dir, entry_id, "tmp")
+    tmp.write_text(json.dumps({"cwd": os.getcwd(), "operations": ops},
+                              ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, _queue_entry_path(queue_dir, entry_id, "pending"))
+    return entry_id
+
+
+def drain_queue(memory_root: Path, index_path: Path) -> dict:
+    """Apply every pending queue entry in submission order.
+
+    The caller must hold the exclusive index lock. Index records from all
+    entries are written in one append. Each entry's summary goes to its
+    <id>.result file. Returns {"entries": n, "operations": n,
+    "enforce": bool}.
+    """
+    queue_dir = memory_root / WRITE_QUEUE_DIR
+    try:
+        names = sorted(os.listdir(queue_dir))
+    except OSError:
+        return {"entries": 0, "operations": 0, "enforce": False}
+    claimed = []
+    for name in names:
+        entry_id, _, state = name.rpartition(".")
+        if state != "pending" or not _QUEUE_ENTRY_RE.match(entry_id):
+            continue
+        claim = _queue_entry_path(queue_dir, entry_id, "claimed")
+        try:
+            os.replace(queue_dir / name, claim)
+        except OSError:
+            continue  # Reclaimed by its submitter after a wait timeout
+        claimed.append((entry_id, claim))
+
+    enforce = False
+    operations = 0
+    summaries = []
+    with _defer_index_writes():
+        for entry_id, claim in claimed:
+            try:
+                entry = json.loads(claim.read_text(encoding="utf-8"))
+                ops, cwd = entry["operations"], entry["cwd"]
+                if not isinstance(ops, list) or not isinstance(cwd, str):
+                    raise ValueError("malformed entry")
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                summaries.append((entry_id, claim, {
+                    "status": "failed", "succeeded": 0, "failed": 0, "results": [],
+                    "error": f"QUEUE_ERROR\nerror: unreadable queue entry: {e}"}))
+                continue
+            operations += len(ops)
+            try:
+                # Targets are relative to the submitting session's cwd
+                results, runnable, op_root, op_index = _plan_batch(ops, cwd)
+                if runnable and op_root != memory_root:
+                    for result, op in runnable:
+                        result.update({"ok": False, "error": (
+                            f"QUEUE_ERROR\ntarget: {op['target']}\n"
+                            f"fix: Queued targets must be under {memory_root}.")})
+                    runnable = []
+                if runnable:
+                    enforce = _apply_batch(runnable, memory_root, index_path, cwd) or enforce
+            except OSError as e:
+                results = [{"index": i, "ok": False,
+                            "error": f"QUEUE_ERROR\nerror: {e}"} for i in range(len(ops))]
+            summaries.append((entry_id, claim, _batch_summary(results)))
+
+    # Results are published after the index append, so a submitter that
+    # sees its result also sees its index records.
+    for entry_id, claim, summary in summaries:
+        try:
+            atomic_write_json(str(_queue_entry_path(queue_dir, entry_id, "result")), summary)
+        finally:
+            try:
+                claim.unlink()
+            except OSError:
+                pass
+    return {"entries": len(claimed), "operations": operations, "enforce": enforce}
+
+
+def _take_queue_result(queue_dir: Path, entry_id: str) -> Optional[dict]:
+    path = _queue_entry_path(queue_dir, entry_id, "result")
+    try:
+        summary = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    try:
+        path.unlink()
+    except OSError:
+        pass
+    return summary
+
+
+def run_queued_batch(ops: list, auto_enforce: bool = True,
+                     timeout: float = _QUEUE_WAIT_TIMEOUT) -> dict:
+    """run_batch() through the project's write queue.
+
+    Spools *ops*, then drains the queue under the index lock (applying
+    this and any other session's pending batches) or picks up the result
+    left by the session that drained first. Returns the run_batch()
+    summary plus "queue": {"drained_by": "self" | "other", "entries",
+    "wait_ms"}, where entries counts the batches applied in this
+    process's drain (0 if another process applied ours).
+    """
+    _, runnable, memory_root, index_path = _plan_batch(ops)
+    if not runnable:
+        return run_batch(ops, auto_enforce=auto_enforce)
+    queue_dir = memory_root / WRITE_QUEUE_DIR
+    start = time.monotonic()
+    try:
+        entry_id = submit_to_queue(ops, memory_root)
+    except OSError as e:
+        print(f"[WARN] Write queue unavailable ({e}); writing directly", file=sys.stderr)
+        return run_batch(ops, auto_enforce=auto_enforce)
+
+    drained_by, entries = "other", 0
+    summary = None
+    while summary is None:
+        with FlockIndex(index_path) as lock:
+            if lock.acquired:
+                if _queue_entry_path(queue_dir, entry_id, "pending").exists():
+                    stats = drain_queue(memory_root, index_path)
+                    drained_by, entries = "self", stats["entries"]
+                summary = _take_queue_result(queue_dir, entry_id)
+                if summary is None and _queue_entry_path(queue_dir, entry_id, "claimed").exists():
+                    # Claimed by a drainer that is gone (we hold the lock now)
+                    summary = _queue_failure(ops, "queue writer exited before reporting")
+        if summary is None:
+            summary = _take_queue_result(queue_dir, entry_id)
+        if summary is None and time.monotonic() - start > timeout:
+            pending = _queue_entry_path(queue_dir, entry_id, "pending")
+            try:
+                pending.unlink()
+            except OSError:
+                summary = _queue_failure(ops, f"no result after {timeout:.0f}s")
+            else:
+                print("[WARN] Write queue timeout; writing directly", file=sys.stderr)
+                return run_batch(ops, auto_enforce=auto_enforce)
+
+    if auto_enforce and any(
+        r.get("ok") and isinstance(op, dict) and op.get("action") == "create"
+        and op.get("category") == "session_summary"
+        for r, op in zip(summary.get("results", []), ops)
+    ):
+        _run_auto_enforce(memory_root)
+    summary["queue"] = {
+        "drained_by": drained_by,
+        "entries": entries,
+        "wait_ms": round((time.monotonic() - start) * 1000, 2),
+    }
+    return summary
+
+
+def _queue_failure(ops: list, reason: str) -> dict:
+    return _batch_summary([
+        {"index": i, "ok": False, "error": f"QUEUE_ERROR\nerror: {reason}\n"
+                                           f"fix: Check the target and retry the save."}
+        for i in range(len(ops))
+    ])
+
+
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
@@ -1687,6 +2292,13 @@ def _cleanup_input(input_path: str) -> None:
         pass
 
 
+def _target_abs(args, target: Path) -> Path:
+    """*target* made absolute against args.base (batch ops) or the cwd."""
+    if target.is_absolute():
+        return target
+    return Path(getattr(args, "base", None) or Path.cwd()) / target
+
+
 def _check_path_containment(target_abs: Path, memory_root: Path, action_label: str) -> int:
     """Verify target_abs is within memory_root. Returns 0 if ok, 1 if not."""
     try:
@@ -1725,84 +2337,6 @@ def _check_dir_components(target_abs: Path, memory_root: Path) -> int:
     return 0
 
 
-class FlockIndex:
-    """Portable lock for index mutations. Uses mkdir (atomic on all FS including NFS).
-
-    Public API: imported by memory_enforce.py.
-    """
-
-    _LOCK_TIMEOUT = 15.0   # Max seconds to wait for lock
-    _STALE_AGE = 60.0      # Seconds before a lock is considered stale
-    _POLL_INTERVAL = 0.05   # Seconds between retry attempts
-
-    def __init__(self, index_path: Path):
-        self.lock_dir = index_path.parent / ".index.lockdir"
-        self.acquired = False
-
-    def __enter__(self):
-        deadline = time.monotonic() + self._LOCK_TIMEOUT
-        while True:
-            try:
-                os.mkdir(self.lock_dir)
-                self.acquired = True
-                return self
-            except FileExistsError:
-                # Lock held by another process -- check for stale
-                try:
-                    mtime = self.lock_dir.stat().st_mtime
-                    if (time.time() - mtime) > self._STALE_AGE:
-                        # Stale lock -- break it with warning
-                        try:
-                            os.rmdir(self.lock_dir)
-                        except OSError:
-                            pass
-                        print(
-                            "[WARN] Broke stale index lock (older than 60s)",
-                            file=sys.stderr,
-                        )
-                        continue
-                except OSError:
-                    pass  # Lock dir disappeared between check and stat -- retry
-
-                if time.monotonic() >= deadline:
-                    print(
-                        "[WARN] Index lock timeout; proceeding without lock",
-                        file=sys.stderr,
-                    )
-                    return self
-                time.sleep(self._POLL_INTERVAL)
-            except OSError:
-                # mkdir failed for non-existence reason (permissions, etc.)
-                # Proceed without lock rather than failing the write
-                print(
-                    "[WARN] Could not create lock directory; proceeding without lock",
-                    file=sys.stderr,
-                )
-                return self
-
-    def __exit__(self, *args):
-        if self.acquired:
-            try:
-                os.rmdir(self.lock_dir)
-            except OSError:
-                pass
-
-    def require_acquired(self) -> None:
-        """Raise TimeoutError if the lock was not acquired.
-
-        Call this inside a `with` block when strict lock enforcement is needed.
-        Existing callers (do_create, etc.) do NOT call this -- they continue
-        with the legacy "proceed without lock" behavior.
-
-        Public API: used by memory_enforce.py.
-        """
-        if not self.acquired:
-            raise TimeoutError(
-                "LOCK_TIMEOUT_ERROR: Index lock not acquired. "
-                "Another process may hold the lock. Retry later."
-            )
-
-
 def _resolve_memory_root(target: str) -> tuple[Path, Path]:
     """Derive memory_root and index_path from the target path.
 
@@ -1850,6 +2384,7 @@ def main():
         "--action", required=True,
         choices=[
             "create", "update", "retire", "archive", "unarchive", "restore",
+            "batch",
             "cleanup-staging", "cleanup-intents",
             "write-save-result",
             "update-sentinel-state",
@@ -1860,9 +2395,19 @@ def main():
         "--target", help="Relative path to memory file (required for CRUD actions)"
     )
     parser.add_argument("--input", help="Path to temp JSON input file")
+    parser.add_argument(
+        "--manifest",
+        help="Path to JSON batch manifest in the staging directory (batch only)",
+    )
+    parser.add_argument(
+        "--queue",
+        action="store_true",
+        default=False,
+        help="Apply the batch through the project's write queue (batch only)",
+    )
     parser.add_argument(
         "--hash",
-        help="MD5 hash of existing file for OCC (update only)",
+        help="OCC token from candidate selection, or MD5 of the existing file (update only)",
     )
     parser.add_argument("--reason", help="Reason for retirement or archival (retire/archive)")
     parser.add_argument(
@@ -1937,38 +2482,17 @@ def main():
         if not result_json:
             print("ERROR: --result-json or --result-file is required for write-save-result.")
             return 1
-        # Auto-populate session_id from sentinel if not provided
-        try:
-            data = json.loads(result_json)
-            if isinstance(data, dict) and ("session_id" not in data or data["session_id"] is None):
-                sentinel_session_id = None
-                try:
-                    sentinel_file = os.path.join(
-                        str(Path(args.staging_dir).resolve()), ".triage-handled"
-                    )
-                    sfd = os.open(sentinel_file, os.O_RDONLY | os.O_NOFOLLOW)
-                    try:
-                        sraw = os.read(sfd, 4096).decode("utf-8", errors="replace")
-                    finally:
-                        os.close(sfd)
-                    sdata = json.loads(sraw)
-                    if isinstance(sdata, dict):
-                        sid = sdata.get("session_id")
-                        if isinstance(sid, str) and sid:
-                            sentinel_session_id = sid
-                except (OSError, json.JSONDecodeError, UnicodeDecodeError):
-                    pass
-                if sentinel_session_id:
-                    data["session_id"] = sentinel_session_id
-                else:
-                    data["session_id"] = None
-                result_json = json.dumps(data, ensure_ascii=False)
-        except (json.JSONDecodeError, TypeError):
-            pass  # Let write_save_result handle invalid JSON
+        result_json = fill_session_id(args.staging_dir, result_json)
         result = write_save_result(args.staging_dir, result_json)
         print(json.dumps(result))
         return 0 if result["status"] == "ok" else 1
 
+    if args.action == "batch":
+        if not args.manifest:
+            print("ERROR: --manifest is required for batch action.")
+            return 1
+        return do_batch(args)
+
     # --- CRUD actions (require --target) ---
     if not args.target:
         print("ERROR: --target is required for this action.")
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""Retrieval scaling benchmark for claude-memory.
+
+Generates synthetic .claude/memory trees (JSON files + index.md + metadata
+sidecar, built with memory_index.rebuild_index) at the requested sizes and
+runs the real UserPromptSubmit entry point (memory_retrieve_client.py) as a
+subprocess with representative prompts. Per-phase wall time and peak RSS are
+read from the debug-level ``retrieval.timing`` event each run emits.
+
+Two modes are measured per size:
+  * warm -- persistent FTS index already built (the common case)
+  * cold -- .index-fts.sqlite3 deleted before each run (index parse + FTS build)
+
+The query cache is disabled so every run exercises the full pipeline.
+
+Usage:
+    python3 tests/bench_retrieval_scaling.py --sizes 100,1000,10000 \\
+        --iterations 5 --out baseline.json
+    python3 tests/bench_retrieval_scaling.py --compare baseline.json \\
+        --fail-on-regression
+
+No external dependencies beyond the test suite's (conftest imports pytest).
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+TESTS_DIR = Path(__file__).resolve().parent
+SCRIPTS_DIR = TESTS_DIR.parent / "hooks" / "scripts"
+for _p in (str(TESTS_DIR), str(SCRIPTS_DIR)):
+    if _p not in sys.path:
+        sys.path.insert(0, _p)
+
+from conftest import make_bulk_memory, write_memory_file  # noqa: E402
+
+HOOK_SCRIPT = str(SCRIPTS_DIR / "memory_retrieve_client.py")
+SCHEMA_VERSION = 1
+DEFAULT_SIZES = (100, 1_000, 10_000, 100_000)
+DEFAULT_REGRESSION_RATIO = 1.25
+# Sub-millisecond phases jitter by more than 25%; ignore absolute deltas below this.
+MIN_REGRESSION_DELTA_MS = 1.0
+PERCENTILES = (50, 95, 99)
+
+# Representative prompts: single-topic, multi-category compound, no match.
+PROMPTS = (
+    "How does the authentication caching layer talk to the database?",
+    "We hit a deadlock timeout during failover, what is the rollback runbook?",
+    "Remind me of our python formatting and linting preferences",
+    "kubernetes helm chart rollout strategy for the marketing site",
+)
+
+BENCH_CONFIG = {
+    "logging": {"enabled": True, "level": "debug"},
+    "retrieval": {
+        "query_cache": {"enabled": False},
+        "resident_server": {"enabled": False},
+    },
+}
+
+
+def generate_corpus(project: Path, count: int) -> Path:
+    """Build a .claude/memory tree with ``count`` memories under ``project``.
+
+    Memories cycle through all six categories with keyword titles/tags
+    (conftest.make_bulk_memory, as in the bulk_memories fixture). Returns
+    the memory root.
+    """
+    import memory_index
+
+    root = project / ".claude" / "memory"
+    for folder in ["sessions", "decisions", "runbooks", "constraints", "tech-debt", "preferences"]:
+        (root / folder).mkdir(parents=True, exist_ok=True)
+    for i in range(count):
+        write_memory_file(root, make_bulk_memory(i, id_width=6))
+    (root / "memory-config.json").write_text(json.dumps(BENCH_CONFIG), encoding="utf-8")
+    # rebuild_index prints a summary line; keep benchmark output clean
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, "w")
+    try:
+        memory_index.rebuild_index(root)
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+    return root
+
+
+def _read_timing_event(root: Path) -> dict | None:
+    for f in (root / "logs").rglob("*.jsonl"):
+        for line in f.read_text(encoding="utf-8").splitlines():
+            entry = json.loads(line)
+            if entry.get("event_type") == "retrieval.timing":
+                return entry
+    return None
+
+
+def run_hook(project: Path, root: Path, prompt: str) -> dict:
+    """Run the hook once; return {"phases": {name: {ms, peak_rss_kb}}, ...}."""
+    shutil.rmtree(root / "logs", ignore_errors=True)
+    env = os.environ.copy()
+    env.pop("ANTHROPIC_API_KEY", None)
+    t0 = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-S", HOOK_SCRIPT],
+        input=json.dumps({"prompt": prompt, "cwd": str(project)}),
+        capture_output=True, text=True, timeout=600, cwd=str(project), env=env,
+    )
+    wall_ms = (time.perf_counter() - t0) * 1000
+    if proc.returncode != 0:
+        raise RuntimeError(f"hook exited {proc.returncode}: {proc.stderr.strip()}")
+    event = _read_timing_event(root)
+    if event is None:
+        raise RuntimeError("hook emitted no retrieval.timing event")
+    phases = dict(event["data"]["phases"])
+    phases["total"] = {"ms": round(wall_ms, 2), "peak_rss_kb": event["data"].get("peak_rss_kb")}
+    return {"phases": phases, "index_rebuilt": event["data"].get("index_rebuilt")}
+
+
+def percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))  # ceil without math
+    return ordered[int(rank) - 1]
+
+
+def summarize(runs: list) -> dict:
+    """Aggregate per-run phases into {phase: {p50, p95, p99, peak_rss_kb, samples}}."""
+    samples: dict[str, list] = {}
+    rss: dict[str, int] = {}
+    for run in runs:
+        for name, phase in run["phases"].items():
+            samples.setdefault(name, []).append(phase["ms"])
+            if isinstance(phase.get("peak_rss_kb"), int):
+                rss[name] = max(rss.get(name, 0), phase["peak_rss_kb"])
+    summary = {}
+    for name, values in sorted(samples.items()):
+        stats = {f"p{p}": round(percentile(values, p), 2) for p in PERCENTILES}
+        stats["peak_rss_kb"] = rss.get(name)
+        stats["samples"] = len(values)
+        summary[name] = stats
+    return summary
+
+
+def bench_size(count: int, iterations: int, workdir: Path) -> dict:
+    """Benchmark one corpus size; returns {"warm": summary, "cold": summary}."""
+    project = workdir / f"project-{count}"
+    t0 = time.perf_counter()
+    root = generate_corpus(project, count)
+    generate_s = time.perf_counter() - t0
+
+    run_hook(project, root, PROMPTS[0])  # Build the persistent FTS index
+    warm = [run_hook(project, root, prompt)
+            for _ in range(iterations) for prompt in PROMPTS]
+    cold = []
+    for i in range(iterations):
+        try:
+            os.unlink(root / ".index-fts.sqlite3")
+        except FileNotFoundError:
+            pass
+        cold.append(run_hook(project, root, PROMPTS[i % len(PROMPTS)]))
+    shutil.rmtree(project, ignore_errors=True)
+    return {
+        "generate_seconds": round(generate_s, 2),
+        "warm": summarize(warm),
+        "cold": summarize(cold),
+    }
+
+
+def run_benchmark(sizes, iterations: int, workdir: Path | None = None) -> dict:
+    """Run all sizes and return the JSON-serializable report."""
+    own_dir = workdir is None
+    workdir = Path(tempfile.mkdtemp(prefix="cm-bench-")) if own_dir else workdir
+    try:
+        results = {str(n): bench_size(n, iterations, workdir) for n in sizes}
+    finally:
+        if own_dir:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        "schema": SCHEMA_VERSION,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "iterations": iterations,
+        "prompts": list(PROMPTS),
+        "sizes": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float = DEFAULT_REGRESSION_RATIO,
+            min_delta_ms: float = MIN_REGRESSION_DELTA_MS) -> list:
+    """Diff two reports on p50/p95 per size/mode/phase.
+
+    Returns rows {size, mode, phase, stat, baseline, current, ratio,
+    regression}; only entries present in both reports are compared. A stat
+    regresses when it is over ``threshold`` times and ``min_delta_ms`` slower.
+    """
+    rows = []
+    for size, modes in current.get("sizes", {}).items():
+        old_modes = baseline.get("sizes", {}).get(size)
+        if not old_modes:
+            continue
+        for mode in ("warm", "cold"):
+            for phase, stats in modes.get(mode, {}).items():
+                old = old_modes.get(mode, {}).get(phase)
+                if not old:
+                    continue
+                for stat in ("p50", "p95"):
+                    before, after = old.get(stat), stats.get(stat)
+                    if not before or after is None:
+                        continue
+                    ratio = after / before
+                    rows.append({
+                        "size": size, "mode": mode, "phase": phase, "stat": stat,
+                        "baseline": before, "current": after, "ratio": round(ratio, 3),
+                        "regression": ratio > threshold and after - before >= min_delta_ms,
+                    })
+    return rows
+
+
+def format_report(report: dict) -> str:
+    lines = []
+    for size, modes in report["sizes"].items():
+        for mode in ("warm", "cold"):
+            lines.append(f"[{size} memories, {mode}]")
+            for phase, s in modes[mode].items():
+                rss = f"{s['peak_rss_kb'] / 1024:.1f}MB" if s.get("peak_rss_kb") else "n/a"
+                lines.append(f"  {phase:<14} p50 {s['p50']:>9.2f}ms  p95 {s['p95']:>9.2f}ms  "
+                             f"p99 {s['p99']:>9.2f}ms  rss {rss:>8}  (n={s['samples']})")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retrieval scaling benchmark for claude-memory.")
+    parser.add_argument("--sizes", default=",".join(str(n) for n in DEFAULT_SIZES),
+                        help="Comma-separated corpus sizes (default: 100,1000,10000,100000)")
+    parser.add_argument("--iterations", type=int, default=5,
+                        help="Runs per prompt per size (default: 5)")
+    parser.add_argument("--out", help="Write the JSON report to this path")
+    parser.add_argument("--compare", help="Baseline JSON report to diff against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_RATIO,
+                        help=f"Ratio that counts as a regression (default: {DEFAULT_REGRESSION_RATIO})")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="Exit 1 if any compared stat exceeds --threshold")
+    args = parser.parse_args()
+
+    try:
+        sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    except ValueError:
+        print("ERROR: --sizes must be comma-separated integers", file=sys.stderr)
+        sys.exit(2)
+    if not sizes or min(sizes) <= 0 or args.iterations <= 0:
+        print("ERROR: sizes and --iterations must be positive", file=sys.stderr)
+        sys.exit(2)
+
+    report = run_benchmark(sizes, args.iterations)
+    print(format_report(report))
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        print(f"\nWrote {args.out}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        rows = compare(report, baseline, args.threshold)
+        regressions = [r for r in rows if r["regression"]]
+        print(f"\nCompared {len(rows)} stats against {args.compare}: "
+              f"{len(regressions)} regression(s) over {args.threshold}x")
+        for r in regressions:
+            print(f"  {r['size']} {r['mode']} {r['phase']} {r['stat']}: "
+                  f"{r['baseline']}ms -> {r['current']}ms ({r['ratio']}x)")
+        if regressions and args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
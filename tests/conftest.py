@@ -417,18 +417,48 @@ def bulk_memories():
     Returns a list of 500 memory dicts with unique ids, titles, and tags.
     Titles contain realistic keywords suitable for FTS5 benchmarking.
     """
+    return [make_bulk_memory(i) for i in range(500)]
+
+
+def make_bulk_memory(i, id_width=4):
+    """The ``i``-th bulk memory: categories in turn, keyword title and tags.
+
+    Same pools as make_bulk_index_lines; ``id_width`` zero-pads the number
+    in the id (bulk-<category>-<i>).
+    """
     categories = list(_BULK_FACTORIES.keys())
-    memories = []
-    for i in range(500):
+    cat = categories[i % len(categories)]
+    keywords = _BULK_KEYWORDS[cat]
+    kw = keywords[i % len(keywords)]
+    kw2 = keywords[(i * 3 + 7) % len(keywords)]
+    return _BULK_FACTORIES[cat](
+        id_val=f"bulk-{cat}-{i:0{id_width}d}",
+        title=f"{kw} {kw2} item {i}",
+        tags=[kw, kw2, f"bulk{i}"],
+    )
+
+
+# Scale benchmarks beyond a few thousand entries are slow; opt in with
+# CLAUDE_MEMORY_BENCH=1.
+HEAVY_BENCH = os.environ.get("CLAUDE_MEMORY_BENCH") == "1"
+
+
+def make_bulk_index_lines(count):
+    """Generate ``count`` enriched index.md lines with bulk-style titles/tags.
+
+    Cheaper than bulk_memories for large scales: no memory dicts or JSON
+    files are produced, only the index lines retrieval parses.
+    """
+    categories = list(_BULK_KEYWORDS.keys())
+    lines = []
+    for i in range(count):
         cat = categories[i % len(categories)]
         keywords = _BULK_KEYWORDS[cat]
         kw = keywords[i % len(keywords)]
         kw2 = keywords[(i * 3 + 7) % len(keywords)]
-        factory = _BULK_FACTORIES[cat]
-        mem = factory(
-            id_val=f"bulk-{cat}-{i:04d}",
-            title=f"{kw} {kw2} item {i}",
-            tags=[kw, kw2, f"bulk{i}"],
+        lines.append(
+            f"- [{cat.upper()}] {kw} {kw2} item {i} -> "
+            f".claude/memory/{FOLDER_MAP[cat]}/bulk-{cat}-{i:06d}.json "
+            f"#tags:{kw},{kw2},bulk{i}"
         )
-        memories.append(mem)
-    return memories
+    return lines
@@ -535,9 +535,10 @@ class TestIssue4MkdirLock:
         with FlockIndex(index_path) as ctx:
             assert ctx is not None
 
-    def test_stale_lock_detection(self, tmp_path):
+    def test_stale_lock_detection(self, tmp_path, monkeypatch):
         """Stale lock (>60s old) should be broken and reacquired."""
         from memory_write import FlockIndex
+        monkeypatch.setattr(FlockIndex, "_BACKEND", "mkdir")
 
         index_path = tmp_path / "index.md"
         index_path.write_text("# Index")
@@ -555,9 +556,11 @@ class TestIssue4MkdirLock:
             if hasattr(lock, 'acquired'):
                 assert lock.acquired
 
-    def test_lock_timeout(self, tmp_path):
+    def test_lock_timeout(self, tmp_path, monkeypatch):
         """Lock held by another process should timeout after ~5s."""
         from memory_write import FlockIndex
+        # A pre-made lockdir only blocks the mkdir backend
+        monkeypatch.setattr(FlockIndex, "_BACKEND", "mkdir")
 
         index_path = tmp_path / "index.md"
         index_path.write_text("# Index")
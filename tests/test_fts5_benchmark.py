@@ -2,6 +2,10 @@
 
 Verifies that 500-doc FTS5 index build + query completes under 100ms.
 Uses the bulk_memories fixture from conftest.py.
+
+Also compares per-prompt cost of the in-memory rebuild path against the
+persistent on-disk index at 500 / 5k / 50k entries (50k requires
+CLAUDE_MEMORY_BENCH=1).
 """
 
 import sys
@@ -18,10 +22,12 @@ from memory_search_engine import (
     apply_threshold,
     build_fts_index,
     build_fts_query,
+    load_index_entries,
+    open_fts_index,
     query_fts,
     tokenize,
 )
-from conftest import FOLDER_MAP
+from conftest import FOLDER_MAP, HEAVY_BENCH, make_bulk_index_lines
 
 pytestmark = pytest.mark.skipif(not HAS_FTS5, reason="FTS5 not available")
 
@@ -143,3 +149,69 @@ class TestFTS5Benchmark:
             f"Full cycle with body took {elapsed_ms:.1f}ms, limit is {PERF_LIMIT_MS}ms"
         )
         assert len(results) > 0, "Body search should return results"
+
+
+def _best_of(fn, runs=5):
+    """Return the fastest wall time (ms) of ``runs`` calls to ``fn``."""
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return best
+
+
+class TestPersistentIndexBenchmark:
+    """In-memory rebuild per prompt vs. reusing the on-disk FTS5 index."""
+
+    QUERY = "authentication database migration"
+
+    def _rebuild_and_query(self, index_path):
+        entries = load_index_entries(index_path)
+        conn = build_fts_index(entries, include_body=False)
+        try:
+            return query_fts(conn, build_fts_query(list(tokenize(self.QUERY))))
+        finally:
+            conn.close()
+
+    def _persistent_query(self, memory_root):
+        conn, _, rebuilt = open_fts_index(memory_root)
+        try:
+            return rebuilt, query_fts(conn, build_fts_query(list(tokenize(self.QUERY))))
+        finally:
+            conn.close()
+
+    @pytest.mark.parametrize("count", [
+        500,
+        5_000,
+        pytest.param(50_000, marks=pytest.mark.skipif(
+            not HEAVY_BENCH, reason="set CLAUDE_MEMORY_BENCH=1")),
+    ])
+    def test_persistent_index_scaling(self, tmp_path, count):
+        memory_root = tmp_path / ".claude" / "memory"
+        memory_root.mkdir(parents=True)
+        index_path = memory_root / "index.md"
+        index_path.write_text(
+            "# Memory Index\n\n" + "\n".join(make_bulk_index_lines(count)) + "\n",
+            encoding="utf-8",
+        )
+
+        # First open pays the build once.
+        rebuilt, _ = self._persistent_query(memory_root)
+        assert rebuilt is True
+
+        rebuild_ms = _best_of(lambda: self._rebuild_and_query(index_path))
+        persistent_ms = _best_of(lambda: self._persistent_query(memory_root))
+        print(f"\n[{count} entries] rebuild+query {rebuild_ms:.1f}ms, "
+              f"persistent query {persistent_ms:.1f}ms")
+
+        rebuilt, results = self._persistent_query(memory_root)
+        assert rebuilt is False
+        expected = self._rebuild_and_query(index_path)
+        assert [r["path"] for r in results] == [r["path"] for r in expected]
+        assert persistent_ms < PERF_LIMIT_MS
+        if count >= 5_000:
+            assert persistent_ms < rebuild_ms, (
+                f"persistent {persistent_ms:.1f}ms not faster than "
+                f"rebuild {rebuild_ms:.1f}ms at {count} entries"
+            )
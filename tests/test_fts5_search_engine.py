@@ -11,14 +11,18 @@ sys.path.insert(0, str(SCRIPTS_DIR))
 
 from memory_search_engine import (
     BODY_FIELDS,
+    FTS_DB_FILENAME,
     HAS_FTS5,
     build_fts_index,
     build_fts_query,
     extract_body_text,
+    index_generation,
+    open_fts_index,
     query_fts,
     tokenize,
 )
 from conftest import (
+    write_index,
     make_constraint_memory,
     make_decision_memory,
     make_preference_memory,
@@ -293,3 +297,92 @@ class TestFTS5Fallback:
         assert result.returncode == 0
         # Legacy path should still find the JWT entry
         assert "use-jwt" in result.stdout or "<memory-context" in result.stdout
+
+
+# ============================================================================
+# Persistent on-disk FTS5 index
+# ============================================================================
+
+class TestPersistentFTSIndex:
+    """open_fts_index(): reuse the on-disk db until index.md changes."""
+
+    def _query(self, conn, text):
+        return query_fts(conn, build_fts_query(list(tokenize(text))))
+
+    def test_first_open_builds_db(self, memory_root):
+        write_index(memory_root, make_decision_memory())
+        conn, count, rebuilt = open_fts_index(memory_root)
+        try:
+            assert rebuilt is True
+            assert count == 1
+            assert (memory_root / FTS_DB_FILENAME).exists()
+            results = self._query(conn, "jwt authentication")
+            assert [r["path"] for r in results] == [".claude/memory/decisions/use-jwt.json"]
+        finally:
+            conn.close()
+
+    def test_unchanged_index_reuses_db(self, memory_root):
+        write_index(memory_root, make_decision_memory())
+        conn, _, _ = open_fts_index(memory_root)
+        conn.close()
+        inode = (memory_root / FTS_DB_FILENAME).stat().st_ino
+
+        conn, count, rebuilt = open_fts_index(memory_root)
+        conn.close()
+        assert rebuilt is False
+        assert count == 1
+        assert (memory_root / FTS_DB_FILENAME).stat().st_ino == inode
+
+    def test_index_change_triggers_rebuild(self, memory_root):
+        write_index(memory_root, make_decision_memory())
+        conn, _, _ = open_fts_index(memory_root)
+        conn.close()
+
+        write_index(memory_root, make_decision_memory(), make_preference_memory())
+        conn, count, rebuilt = open_fts_index(memory_root)
+        try:
+            assert rebuilt is True
+            assert count == 2
+            assert self._query(conn, "typescript")
+        finally:
+            conn.close()
+
+    def test_persisted_connection_is_read_only(self, memory_root):
+        import sqlite3
+        write_index(memory_root, make_decision_memory())
+        open_fts_index(memory_root)[0].close()
+        conn, _, _ = open_fts_index(memory_root)
+        try:
+            with pytest.raises(sqlite3.OperationalError):
+                conn.execute("DELETE FROM memories")
+        finally:
+            conn.close()
+
+    def test_corrupt_db_is_rebuilt(self, memory_root):
+        write_index(memory_root, make_decision_memory())
+        (memory_root / FTS_DB_FILENAME).write_bytes(b"not a sqlite database")
+        conn, count, rebuilt = open_fts_index(memory_root)
+        try:
+            assert rebuilt is True
+            assert count == 1
+            assert self._query(conn, "jwt")
+        finally:
+            conn.close()
+
+    def test_unwritable_root_falls_back_to_memory(self, memory_root):
+        write_index(memory_root, make_decision_memory())
+        with patch("memory_search_engine.rebuild_fts_db", side_effect=OSError("read-only")):
+            conn, count, rebuilt = open_fts_index(memory_root)
+        try:
+            assert count == 1
+            assert self._query(conn, "jwt")
+            assert not (memory_root / FTS_DB_FILENAME).exists()
+        finally:
+            conn.close()
+
+    def test_index_generation_missing_file(self, tmp_path):
+        assert index_generation(tmp_path / "index.md") is None
+
+    def test_missing_index_raises_oserror(self, memory_root):
+        with pytest.raises(OSError):
+            open_fts_index(memory_root)
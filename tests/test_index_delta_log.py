@@ -0,0 +1,277 @@
+"""Tests for the index delta log (.index-delta.log).
+
+memory_write.py appends index mutations to the log instead of rewriting
+index.md; readers merge index.md + log, and compaction folds the log back
+into a sorted index.md (automatically past a size ratio, or via
+memory_index.py --compact).
+"""
+
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+import memory_search_engine
+
+SCRIPTS_DIR = Path(__file__).parent.parent / "hooks" / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from memory_search_engine import (
+    HAS_FTS5,
+    INDEX_DELTA_FILENAME,
+    append_index_delta,
+    build_fts_query,
+    compact_index,
+    index_generation,
+    load_index_entries,
+    open_fts_index,
+    query_fts,
+    read_index_lines,
+    rewrite_index_paths,
+    tokenize,
+)
+from memory_write import add_to_index, remove_from_index, update_index_entry
+from conftest import (
+    make_bulk_index_lines,
+    make_decision_memory,
+    make_preference_memory,
+    write_index,
+    write_memory_file,
+)
+
+PYTHON = sys.executable
+INDEX_SCRIPT = str(SCRIPTS_DIR / "memory_index.py")
+
+HEADER = "# Memory Index\n\n<!-- Auto-generated by memory_index.py. Do not edit manually. -->\n\n"
+A = "- [DECISION] Alpha choice -> .claude/memory/decisions/alpha.json #tags:a"
+B = "- [DECISION] Beta choice -> .claude/memory/decisions/beta.json #tags:b"
+C = "- [CONSTRAINT] Gamma limit -> .claude/memory/constraints/gamma.json"
+
+
+def _write_base(index_path, *lines):
+    index_path.write_text(HEADER + "".join(l + "\n" for l in lines), encoding="utf-8")
+
+
+def _legacy_add(index_path, line):
+    """Old add_to_index(): read, dedup, sort, rewrite the whole file."""
+    new_path = line.split(" -> ", 1)[1].split(" #tags:")[0].strip()
+    lines = index_path.read_text(encoding="utf-8").splitlines()
+    header = [l for l in lines if not l.startswith("- [")]
+    entries = [l for l in lines if l.startswith("- [") and f"-> {new_path}" not in l]
+    entries.append(line)
+    entries.sort(key=lambda x: x.lower())
+    index_path.write_text("\n".join(header + entries) + "\n", encoding="utf-8")
+
+
+class TestMergeOnRead:
+
+    def test_no_delta_returns_index_unchanged(self, tmp_path):
+        index_path = tmp_path / "index.md"
+        _write_base(index_path, B, A)  # Unsorted base is left alone
+        assert read_index_lines(index_path)[-2:] == [B, A]
+
+    def test_upsert_remove_and_sort(self, tmp_path):
+        index_path = tmp_path / "index.md"
+        _write_base(index_path, A, B)
+        renamed_a = A.replace("Alpha choice", "Alpha revised")
+        append_index_delta(index_path, [("+", C), ("+", renamed_a), ("-", ".claude/memory/decisions/beta.json")])
+        lines = read_index_lines(index_path)
+        assert lines[:4] == HEADER.splitlines()
+        assert lines[4:] == [C, renamed_a]
+
+    def test_torn_trailing_record_ignored(self, tmp_path):
+        index_path = tmp_path / "index.md"
+        _write_base(index_path, A)
+        append_index_delta(index_path, [("+", B)])
+        with open(tmp_path / INDEX_DELTA_FILENAME, "a", encoding="utf-8") as f:
+            f.write("- .claude/memory/decisions/alp")  # Crash mid-append
+        assert read_index_lines(index_path)[4:] == [A, B]
+
+    def test_missing_index(self, tmp_path):
+        index_path = tmp_path / "index.md"
+        with pytest.raises(OSError):
+            read_index_lines(index_path)
+        assert read_index_lines(index_path, missing_ok=True) == HEADER.splitlines()
+
+    def test_generation_folds_in_delta(self, tmp_path):
+        index_path = tmp_path / "index.md"
+        _write_base(index_path, A)
+        before = index_generation(index_path)
+        append_index_delta(index_path, [("+", B)])
+        after = index_generation(index_path)
+        assert after != before
+        assert after.startswith(before)
+        compact_index(index_path)
+        assert index_generation(index_path) not in (before, after)
+
+
+class TestCompaction:
+
+    def test_compacted_index_matches_full_rewrite(self, tmp_path):
+        legacy = tmp_path / "legacy" / "index.md"
+        delta = tmp_path / "delta" / "index.md"
+        for p in (legacy, delta):
+            p.parent.mkdir()
+            _write_base(p, A)
+        for line in (C, B, A.replace("#tags:a", "#tags:a,z")):
+            _legacy_add(legacy, line)
+            append_index_delta(delta, [("+", line)])
+        assert compact_index(delta) == 3
+        assert delta.read_text() == legacy.read_text()
+        assert not (delta.parent / INDEX_DELTA_FILENAME).exists()
+
+    def test_replay_after_interrupted_compaction_is_noop(self, tmp_path):
+        index_path = tmp_path / "index.md"
+        _write_base(index_path, A, B)
+        append_index_delta(index_path, [("-", ".claude/memory/decisions/alpha.json"), ("+", C), ("+", A)])
+        merged = read_index_lines(index_path)
+        # Crash after index.md was rewritten but before the log was removed
+        index_path.write_text("\n".join(merged) + "\n", encoding="utf-8")
+        assert read_index_lines(index_path) == merged
+
+    def test_path_rewrite_between_reads_is_not_replayed(self, tmp_path):
+        index_path = tmp_path / "index.md"
+        _write_base(index_path, B)
+        append_index_delta(index_path, [("+", A)])
+        old, new = ".claude/memory/decisions/alpha.json", ".claude/memory/decisions/ab/alpha.json"
+        real_read = memory_search_engine._read_index_delta_stamped
+        calls = []
+
+        def read_then_migrate(path):
+            result = real_read(path)
+            calls.append(1)
+            if len(calls) == 1:  # A writer renames between the delta and index.md reads
+                rewrite_index_paths(index_path, {old: new})
+            return result
+
+        with patch.object(memory_search_engine, "_read_index_delta_stamped",
+                          side_effect=read_then_migrate):
+            lines = read_index_lines(index_path)
+        assert lines[4:] == [A.replace(old, new), B]
+
+    def test_compact_without_delta_is_noop(self, tmp_path):
+        index_path = tmp_path / "index.md"
+        _write_base(index_path, A)
+        st = os.stat(index_path)
+        assert compact_index(index_path) == 0
+        assert os.stat(index_path).st_ino == st.st_ino
+
+
+class TestWriterAppends:
+
+    def test_large_index_not_rewritten_per_mutation(self, tmp_path):
+        index_path = tmp_path / "index.md"
+        _write_base(index_path, *make_bulk_index_lines(1_000))
+        st = os.stat(index_path)
+        add_to_index(index_path, A)
+        update_index_entry(index_path, ".claude/memory/decisions/alpha.json", B)
+        remove_from_index(index_path, ".claude/memory/decisions/bulk-decision-000000.json")
+        assert (os.stat(index_path).st_ino, os.stat(index_path).st_mtime_ns) == (st.st_ino, st.st_mtime_ns)
+        paths = [e["path"] for e in load_index_entries(index_path)]
+        assert ".claude/memory/decisions/beta.json" in paths
+        assert ".claude/memory/decisions/alpha.json" not in paths
+        assert ".claude/memory/decisions/bulk-decision-000000.json" not in paths
+        assert len(paths) == 1_000
+
+    def test_auto_compacts_past_ratio(self, tmp_path):
+        index_path = tmp_path / "index.md"
+        _write_base(index_path, *make_bulk_index_lines(40))
+        base_size = index_path.stat().st_size
+        delta = tmp_path / INDEX_DELTA_FILENAME
+        compacted = False
+        for i in range(40):
+            add_to_index(index_path, f"- [DECISION] Extra {i} -> .claude/memory/decisions/extra-{i}.json")
+            if not delta.exists():
+                compacted = True
+                break
+            assert delta.stat().st_size < base_size * 0.25
+        assert compacted
+        assert "Extra" in index_path.read_text()
+
+    def test_first_write_materializes_index(self, tmp_path):
+        index_path = tmp_path / "index.md"
+        add_to_index(index_path, A)
+        assert index_path.read_text() == HEADER + A + "\n"
+        assert not (tmp_path / INDEX_DELTA_FILENAME).exists()
+
+
+class TestReaders:
+
+    def _project(self, memory_project):
+        root = memory_project / ".claude" / "memory"
+        mems = [make_decision_memory(), make_preference_memory()]
+        for m in mems:
+            write_memory_file(root, m)
+        write_index(root, *mems)
+        return root
+
+    @pytest.mark.skipif(not HAS_FTS5, reason="FTS5 not available")
+    def test_fts_index_sees_delta_records(self, memory_project):
+        root = self._project(memory_project)
+        index_path = root / "index.md"
+        conn, _, _ = open_fts_index(root)
+        conn.close()
+        remove_from_index(index_path, ".claude/memory/decisions/use-jwt.json")
+        conn, count, rebuilt = open_fts_index(root)
+        try:
+            assert (count, rebuilt) == (1, True)
+            assert query_fts(conn, build_fts_query(list(tokenize("jwt authentication")))) == []
+        finally:
+            conn.close()
+
+    def test_validate_compact_and_rebuild_cli(self, memory_project):
+        root = self._project(memory_project)
+        index_path = root / "index.md"
+        delta = root / INDEX_DELTA_FILENAME
+        index_path.write_text(index_path.read_text() + "\n" * 400)  # Keep the ratio from compacting
+        remove_from_index(index_path, ".claude/memory/preferences/prefer-typescript.json")
+        assert delta.exists()
+
+        def run(*args):
+            return subprocess.run([PYTHON, INDEX_SCRIPT, *args, "--root", str(root)],
+                                  capture_output=True, text=True, timeout=30)
+
+        # The preference file is still active, so the merged index is missing it
+        assert run("--validate").returncode == 1
+        result = run("--compact")
+        assert result.returncode == 0, result.stderr
+        assert "Compacted 1 delta record(s)" in result.stdout
+        assert not delta.exists()
+        assert "prefer-typescript" not in index_path.read_text()
+
+        append_index_delta(index_path, [("-", ".claude/memory/decisions/use-jwt.json")])
+        assert run("--rebuild").returncode == 0
+        assert not delta.exists()
+        assert run("--validate").returncode == 0
+
+
+class TestDeltaLogBenchmark:
+    """Per-mutation index cost on a 5k-entry store: append vs. full rewrite."""
+
+    def test_5k_index_mutations(self, tmp_path):
+        legacy = tmp_path / "legacy" / "index.md"
+        delta = tmp_path / "delta" / "index.md"
+        for p in (legacy, delta):
+            p.parent.mkdir()
+            _write_base(p, *make_bulk_index_lines(5_000))
+        lines = [f"- [DECISION] New decision {i} -> .claude/memory/decisions/new-{i}.json #tags:x"
+                 for i in range(100)]
+
+        t0 = time.perf_counter()
+        for line in lines:
+            _legacy_add(legacy, line)
+        legacy_ms = (time.perf_counter() - t0) * 1000 / len(lines)
+
+        t0 = time.perf_counter()
+        for line in lines:
+            add_to_index(delta, line)
+        delta_ms = (time.perf_counter() - t0) * 1000 / len(lines)
+
+        print(f"\n[5000 entries] full rewrite {legacy_ms:.2f}ms/mutation, "
+              f"delta log {delta_ms:.3f}ms/mutation")
+        assert read_index_lines(delta) == legacy.read_text().splitlines()
+        assert delta_ms < legacy_ms
@@ -0,0 +1,290 @@
+"""Tests for the FlockIndex lock backends, shared mode and lock-wait logging.
+
+The flock backend blocks in the kernel and is released when its holder
+exits; the mkdir backend (tested in test_arch_fixes / test_rolling_window)
+remains the fallback where fcntl or flock is unavailable.
+"""
+
+import json
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+SCRIPTS_DIR = Path(__file__).parent.parent / "hooks" / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+import memory_lock
+from memory_index import health_report, rebuild_index, validate_index
+from memory_write import FlockIndex
+from conftest import make_decision_memory, write_index, write_memory_file
+
+pytestmark = pytest.mark.skipif(memory_lock.fcntl is None, reason="fcntl not available")
+
+PYTHON = sys.executable
+
+
+def _hold(index_path, seconds, shared=False, started=None, released=None):
+    """Hold the lock on a background thread (a separate flock holder)."""
+    def run():
+        with FlockIndex(index_path, shared=shared) as lock:
+            assert lock.acquired
+            if started:
+                started.set()
+            time.sleep(seconds)
+            if released is not None:
+                released.append(time.monotonic())
+    t = threading.Thread(target=run)
+    t.start()
+    return t
+
+
+def _timed(index_path, shared=False, timeout=None):
+    lock = FlockIndex(index_path, shared=shared)
+    if timeout is not None:
+        lock._LOCK_TIMEOUT = timeout
+    start = time.monotonic()
+    with lock:
+        waited = time.monotonic() - start
+        acquired_at = time.monotonic()
+    return lock, waited, acquired_at
+
+
+def _lock_events(root):
+    return [e for f in sorted((root / "logs").rglob("*.jsonl"))
+            for e in map(json.loads, f.read_text().splitlines())
+            if e["event_type"] == "index.lock"]
+
+
+class TestFlockBackend:
+
+    def test_exclusive_blocks_until_release(self, tmp_path):
+        index_path = tmp_path / "index.md"
+        started = threading.Event()
+        holder = _hold(index_path, 0.3, started=started)
+        started.wait()
+        lock, waited, _ = _timed(index_path)
+        holder.join()
+        assert lock.acquired and lock.backend == "flock"
+        assert waited >= 0.2
+        assert (tmp_path / ".index.lock").exists()
+        assert not (tmp_path / ".index.lockdir").exists()
+
+    def test_shared_holders_do_not_wait_for_each_other(self, tmp_path):
+        index_path = tmp_path / "index.md"
+        started = threading.Event()
+        holder = _hold(index_path, 0.5, shared=True, started=started)
+        started.wait()
+        lock, waited, _ = _timed(index_path, shared=True)
+        assert lock.acquired and waited < 0.2
+        # A writer still waits for the reader
+        lock, waited, _ = _timed(index_path)
+        holder.join()
+        assert lock.acquired and waited >= 0.1
+
+    def test_shared_waits_for_exclusive(self, tmp_path):
+        index_path = tmp_path / "index.md"
+        started = threading.Event()
+        holder = _hold(index_path, 0.3, started=started)
+        started.wait()
+        lock, waited, _ = _timed(index_path, shared=True)
+        holder.join()
+        assert lock.acquired and waited >= 0.2
+
+    def test_timeout_proceeds_without_lock_and_does_not_leak(self, tmp_path, capsys):
+        index_path = tmp_path / "index.md"
+        started = threading.Event()
+        holder = _hold(index_path, 0.6, started=started)
+        started.wait()
+        lock, waited, _ = _timed(index_path, timeout=0.1)
+        assert lock.acquired is False
+        assert waited < 0.5
+        with pytest.raises(TimeoutError, match="LOCK_TIMEOUT_ERROR"):
+            lock.require_acquired()
+        assert "Index lock timeout" in capsys.readouterr().err
+        holder.join()
+        # The abandoned waiter drops the lock as soon as it is granted it
+        lock, waited, _ = _timed(index_path, timeout=2.0)
+        assert lock.acquired
+
+    def test_released_when_holder_process_dies(self, tmp_path):
+        index_path = tmp_path / "index.md"
+        holder = subprocess.Popen(
+            [PYTHON, "-c",
+             "import sys; sys.path.insert(0, sys.argv[1]);"
+             "from pathlib import Path; from memory_write import FlockIndex;"
+             "lock = FlockIndex(Path(sys.argv[2])); lock.__enter__();"
+             "print(lock.acquired, flush=True); import time; time.sleep(60)",
+             str(SCRIPTS_DIR), str(index_path)],
+            stdout=subprocess.PIPE, text=True)
+        try:
+            assert holder.stdout.readline().strip() == "True"
+            holder.kill()
+            holder.wait()
+            # No stale-age wait: the kernel dropped the dead holder's lock
+            lock, waited, _ = _timed(index_path, timeout=5.0)
+            assert lock.acquired and waited < 1.0
+        finally:
+            if holder.poll() is None:
+                holder.kill()
+            holder.stdout.close()
+
+    def test_nested_hold_with_relative_and_absolute_paths(self, tmp_path, monkeypatch):
+        (tmp_path / "mem").mkdir()
+        monkeypatch.chdir(tmp_path)
+        with FlockIndex(Path("mem/index.md")) as outer:
+            inner = FlockIndex(tmp_path / "mem" / "index.md", shared=True)
+            inner._LOCK_TIMEOUT = 0.5
+            start = time.monotonic()
+            with inner:
+                assert inner.acquired
+            assert time.monotonic() - start < 0.2
+        assert outer.acquired
+        assert FlockIndex._held == {}
+
+    def test_falls_back_to_mkdir_when_flock_unsupported(self, tmp_path, monkeypatch):
+        def no_flock(fd, op):
+            raise OSError(37, "No locks available")
+        monkeypatch.setattr(memory_lock.fcntl, "flock", no_flock)
+        index_path = tmp_path / "index.md"
+        with FlockIndex(index_path) as lock:
+            assert lock.acquired and lock.backend == "mkdir"
+            assert (tmp_path / ".index.lockdir").exists()
+        assert not (tmp_path / ".index.lockdir").exists()
+
+
+class TestLockLogging:
+
+    def _root(self, tmp_path, level="debug"):
+        (tmp_path / "memory-config.json").write_text(json.dumps(
+            {"logging": {"enabled": True, "level": level}}))
+        return tmp_path
+
+    def test_wait_and_hold_logged_once_per_outer_hold(self, tmp_path):
+        root = self._root(tmp_path)
+        started = threading.Event()
+        holder = _hold(root / "index.md", 0.2, started=started)
+        started.wait()
+        with FlockIndex(root / "index.md"):
+            with FlockIndex(root / "index.md", shared=True):
+                time.sleep(0.05)
+        holder.join()
+        events = _lock_events(root)
+        assert len(events) == 2  # Background holder + this one; not the nested hold
+        mine = max(events, key=lambda e: e["data"]["wait_ms"])
+        assert mine["level"] == "debug"
+        assert mine["data"]["mode"] == "exclusive"
+        assert mine["data"]["backend"] == "flock"
+        assert mine["data"]["acquired"] is True
+        assert mine["data"]["wait_ms"] >= 100
+        assert mine["data"]["hold_ms"] >= 40
+
+    def test_timeout_logged_as_warning(self, tmp_path):
+        root = self._root(tmp_path, level="warning")
+        started = threading.Event()
+        holder = _hold(root / "index.md", 0.4, started=started)
+        started.wait()
+        lock, _, _ = _timed(root / "index.md", shared=True, timeout=0.05)
+        holder.join()
+        events = _lock_events(root)
+        assert [e["level"] for e in events] == ["warning"]
+        assert events[0]["data"]["acquired"] is False
+        assert events[0]["data"]["mode"] == "shared"
+        assert events[0]["data"]["hold_ms"] == 0
+
+    def test_config_parsed_once_per_version(self, tmp_path, monkeypatch):
+        root = self._root(tmp_path)
+        loads = []
+        real_load = memory_lock.json.load
+        monkeypatch.setattr(memory_lock.json, "load", lambda f: loads.append(1) or real_load(f))
+        for _ in range(3):
+            with FlockIndex(root / "index.md"):
+                pass
+        assert len(loads) == 1
+        (root / "memory-config.json").write_text(json.dumps({"logging": {"enabled": False}}))
+        with FlockIndex(root / "index.md"):
+            pass
+        assert len(loads) == 2
+        assert len(_lock_events(root)) == 3
+
+    def test_no_config_no_log(self, tmp_path):
+        with FlockIndex(tmp_path / "index.md"):
+            pass
+        assert not (tmp_path / "logs").exists()
+
+
+class TestIndexReaders:
+
+    def _project(self, memory_project):
+        root = memory_project / ".claude" / "memory"
+        mem = make_decision_memory()
+        write_memory_file(root, mem)
+        write_index(root, mem)
+        return root
+
+    def test_validate_waits_for_writer(self, memory_project, capsys):
+        root = self._project(memory_project)
+        started = threading.Event()
+        holder = _hold(root / "index.md", 0.3, started=started)
+        started.wait()
+        start = time.monotonic()
+        assert validate_index(root) is True
+        waited = time.monotonic() - start
+        holder.join()
+        assert waited >= 0.2
+
+    def test_readers_share_the_lock(self, memory_project, capsys):
+        root = self._project(memory_project)
+        started = threading.Event()
+        holder = _hold(root / "index.md", 1.0, shared=True, started=started)
+        started.wait()
+        start = time.monotonic()
+        assert validate_index(root) is True
+        health_report(root)
+        waited = time.monotonic() - start
+        holder.join()
+        assert waited < 0.8
+        assert "Index is in sync (1 entries)" in capsys.readouterr().out
+
+    def test_rebuild_waits_for_writer(self, memory_project, capsys):
+        root = self._project(memory_project)
+        started = threading.Event()
+
+        def write_late():
+            with FlockIndex(root / "index.md"):
+                started.set()
+                time.sleep(0.3)
+                write_memory_file(root, make_decision_memory(id_val="late-decision",
+                                                             title="Late decision"))
+        writer = threading.Thread(target=write_late)
+        writer.start()
+        started.wait()
+        rebuild_index(root)
+        writer.join()
+        assert "late-decision.json" in (root / "index.md").read_text()
+        assert not list(root.glob(".mw-*.tmp"))
+
+
+def test_lock_handoff_latency_benchmark(tmp_path, monkeypatch):
+    """Delay between a holder's release and the next waiter's acquisition."""
+    index_path = tmp_path / "index.md"
+    latencies = {}
+    for backend in ("mkdir", "flock"):
+        monkeypatch.setattr(FlockIndex, "_BACKEND", backend)
+        samples = []
+        for _ in range(10):
+            started, released = threading.Event(), []
+            holder = _hold(index_path, 0.03, started=started, released=released)
+            started.wait()
+            _, _, acquired_at = _timed(index_path)
+            holder.join()
+            samples.append((acquired_at - released[0]) * 1000)
+        latencies[backend] = statistics.median(samples)
+
+    print(f"\n[lock handoff] mkdir poll {latencies['mkdir']:.2f}ms, "
+          f"flock {latencies['flock']:.2f}ms (median of 10)")
+    assert latencies["flock"] < latencies["mkdir"]
@@ -0,0 +1,164 @@
+"""Tests for memory_index.py --rebuild --incremental and the parallel scanner.
+
+The incremental path must produce byte-identical index.md output to a full
+rebuild; it only changes which files get re-parsed.
+"""
+
+import json
+import sqlite3
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+SCRIPTS_DIR = Path(__file__).parent.parent / "hooks" / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+import memory_index
+from memory_index import MANIFEST_FILENAME, rebuild_incremental, rebuild_index, scan_memories
+from memory_search_engine import load_memory_meta
+from bench_retrieval_scaling import generate_corpus
+from conftest import HEAVY_BENCH, make_decision_memory, write_memory_file
+
+PYTHON = sys.executable
+INDEX_SCRIPT = str(SCRIPTS_DIR / "memory_index.py")
+
+
+def _rel(root, path):
+    return path.relative_to(root.parent.parent).as_posix()
+
+
+def _edit(path, **changes):
+    data = json.loads(path.read_text(encoding="utf-8"))
+    data.update(changes)
+    path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+
+
+def _full_index(root, capsys):
+    """index.md as a fresh full rebuild would write it, leaving the store untouched."""
+    artifacts = [root / name for name in ("index.md", MANIFEST_FILENAME, ".index-meta.sqlite3")]
+    saved = {p: p.read_bytes() for p in artifacts if p.exists()}
+    rebuild_index(root)
+    expected = (root / "index.md").read_text()
+    for p in artifacts:
+        if p in saved:
+            p.write_bytes(saved[p])
+        else:
+            p.unlink()
+    capsys.readouterr()
+    return expected
+
+
+class TestParallelScan:
+
+    def test_parallel_matches_serial(self, tmp_path, monkeypatch):
+        root = generate_corpus(tmp_path / "proj", 150)
+        (root / "decisions" / "broken.json").write_text("{not json", encoding="utf-8")
+        parallel = scan_memories(root, include_inactive=True)
+        monkeypatch.setattr(memory_index, "_SCAN_PARALLEL_MIN_FILES", 10**9)
+        serial = scan_memories(root, include_inactive=True)
+        assert len(parallel) == 150
+        assert [(m["path"], m["data"]) for m in parallel] == [(m["path"], m["data"]) for m in serial]
+
+    def test_bad_json_warns_and_is_skipped(self, tmp_path, capsys):
+        root = generate_corpus(tmp_path / "proj", 80)
+        (root / "runbooks" / "broken.json").write_text("{not json", encoding="utf-8")
+        assert len(scan_memories(root)) == 80
+        assert "Could not parse" in capsys.readouterr().err
+
+
+class TestIncrementalRebuild:
+
+    def test_changes_match_full_rebuild(self, tmp_path, capsys):
+        root = generate_corpus(tmp_path / "proj", 90)
+        files = sorted((root / "decisions").glob("*.json"))
+        _edit(files[0], title="Completely renamed decision", tags=["renamed"])
+        _edit(files[1], record_status="retired", retired_at="2026-01-01T00:00:00Z")
+        files[2].unlink()
+        new = make_decision_memory(id_val="brand-new", title="Brand new decision")
+        write_memory_file(root, new)
+        expected = _full_index(root, capsys)
+
+        rebuild_incremental(root)
+        out = capsys.readouterr().out
+        assert "3 changed, 1 removed, 87 unchanged" in out
+        assert (root / "index.md").read_text() == expected
+
+        # Sidecar rows follow the changes; the deleted file's row is gone
+        meta = load_memory_meta(root, [_rel(root, files[0]), _rel(root, files[1])])
+        assert meta[_rel(root, files[1])]["status"] == "retired"
+        conn = sqlite3.connect(root / ".index-meta.sqlite3")
+        try:
+            paths = {p for (p,) in conn.execute("SELECT path FROM memory_meta")}
+        finally:
+            conn.close()
+        assert _rel(root, files[2]) not in paths
+        assert ".claude/memory/decisions/brand-new.json" in paths
+
+        rebuild_incremental(root)
+        assert "0 changed, 0 removed, 90 unchanged" in capsys.readouterr().out
+        assert (root / "index.md").read_text() == expected
+
+    def test_clears_delta_log(self, tmp_path, capsys):
+        root = generate_corpus(tmp_path / "proj", 10)
+        (root / ".index-delta.log").write_text("- .claude/memory/decisions/x.json\n")
+        rebuild_incremental(root)
+        assert not (root / ".index-delta.log").exists()
+
+    @pytest.mark.parametrize("junk", [None, b"", b"not a database"])
+    def test_missing_or_corrupt_manifest_falls_back_to_full(self, tmp_path, capsys, junk):
+        root = generate_corpus(tmp_path / "proj", 12)
+        manifest = root / MANIFEST_FILENAME
+        if junk is None:
+            manifest.unlink()
+        else:
+            manifest.write_bytes(junk)
+        expected = _full_index(root, capsys)
+        (root / "index.md").unlink()
+        rebuild_incremental(root)
+        assert "doing a full rebuild" in capsys.readouterr().out
+        assert (root / "index.md").read_text() == expected
+        rebuild_incremental(root)
+        assert "0 changed" in capsys.readouterr().out
+
+    def test_cli(self, tmp_path):
+        root = generate_corpus(tmp_path / "proj", 5)
+        result = subprocess.run([PYTHON, INDEX_SCRIPT, "--rebuild", "--incremental", "--root", str(root)],
+                                capture_output=True, text=True, timeout=30)
+        assert result.returncode == 0, result.stderr
+        assert "0 changed, 0 removed, 5 unchanged" in result.stdout
+        result = subprocess.run([PYTHON, INDEX_SCRIPT, "--validate", "--incremental", "--root", str(root)],
+                                capture_output=True, text=True, timeout=30)
+        assert result.returncode == 2
+        assert "--incremental requires --rebuild" in result.stderr
+
+
+@pytest.mark.parametrize("size", [
+    2_000,
+    pytest.param(50_000, marks=pytest.mark.skipif(not HEAVY_BENCH, reason="set CLAUDE_MEMORY_BENCH=1")),
+])
+def test_incremental_rebuild_benchmark(size, tmp_path, capsys):
+    """Rebuild time with 1% of files changed: full scan vs. incremental."""
+    root = generate_corpus(tmp_path / "proj", size)
+    files = sorted(p for folder in memory_index.CATEGORY_FOLDERS.values()
+                   for p in (root / folder).glob("*.json"))
+    for path in files[::100]:
+        _edit(path, title=f"Edited {path.stem}")
+
+    t0 = time.perf_counter()
+    rebuild_incremental(root)
+    incremental_s = time.perf_counter() - t0
+    incremental = (root / "index.md").read_text()
+
+    t0 = time.perf_counter()
+    rebuild_index(root)
+    full_s = time.perf_counter() - t0
+    capsys.readouterr()
+
+    with capsys.disabled():
+        print(f"\n[{size} files, {len(files[::100])} changed] full rebuild {full_s:.2f}s, "
+              f"incremental {incremental_s:.2f}s")
+    assert incremental == (root / "index.md").read_text()
+    assert incremental_s < full_s
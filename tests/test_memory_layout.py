@@ -0,0 +1,232 @@
+"""Tests for the hashed directory fan-out (memory_layout.py, --migrate-layout).
+
+With "directory_fanout": true new memory files go to
+<folder>/<bucket>/<slug>.json, bucket = first two hex digits of md5(slug).
+Readers accept both layouts; memory_index.py --migrate-layout moves the
+existing files, index paths, sidecar rows and cold pack keys to the
+configured layout.
+"""
+
+import json
+import os
+import sys
+from pathlib import Path, PurePosixPath
+
+from conftest import make_decision_memory, write_index, write_memory_file
+from test_memory_index import run_index_cmd
+from test_memory_write import run_write, write_input_file
+
+SCRIPTS_DIR = Path(__file__).parent.parent / "hooks" / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from memory_enforce import _scan_active  # noqa: E402
+from memory_index import pack_inactive, scan_memories  # noqa: E402
+from memory_layout import (  # noqa: E402
+    bucket_for,
+    layout_path,
+    list_memory_names,
+    locate_memory_file,
+    read_fanout,
+    sibling_path,
+)
+from memory_pack import load_pack_table  # noqa: E402
+from memory_search_engine import (  # noqa: E402
+    list_active_by_age,
+    load_memory_meta,
+    read_index_lines,
+    rebuild_memory_meta,
+)
+
+REL = ".claude/memory/decisions"
+
+
+def _fanout(root, enabled=True):
+    (root / "memory-config.json").write_text(json.dumps({"directory_fanout": enabled}))
+
+
+def _fanned(slug):
+    return f"{REL}/{bucket_for(slug)}/{slug}.json"
+
+
+def _store(memory_project, ids=("use-jwt", "use-redis"), retired=()):
+    """Flat-layout decisions with index.md and sidecar; *retired* ids are retired."""
+    root = memory_project / ".claude" / "memory"
+    mems = [make_decision_memory(id_val=i, title=f"Decision {i}") for i in ids]
+    mems += [make_decision_memory(id_val=i, title=f"Retired {i}", record_status="retired",
+                                  retired_at="2026-10-01T00:00:00Z", retired_reason="Old")
+             for i in retired]
+    for mem in mems:
+        write_memory_file(root, mem)
+    write_index(root, *[m for m in mems if m["record_status"] == "active"])
+    rebuild_memory_meta(root, [(root / "decisions" / f"{m['id']}.json", m) for m in mems])
+    return root
+
+
+def _index_paths(root):
+    return sorted(line.split(" -> ", 1)[1].split(" #tags:")[0]
+                  for line in read_index_lines(root / "index.md") if line.startswith("- ["))
+
+
+class TestLayoutHelpers:
+
+    def test_paths(self):
+        flat = PurePosixPath(f"{REL}/use-jwt.json")
+        fanned = layout_path(flat, True)
+        assert fanned.as_posix() == _fanned("use-jwt")
+        assert len(bucket_for("use-jwt")) == 2
+        assert layout_path(fanned, True) == fanned
+        assert layout_path(fanned, False) == flat
+        assert sibling_path(fanned, "use-redis").as_posix() == _fanned("use-redis")
+        assert sibling_path(flat, "use-redis").as_posix() == f"{REL}/use-redis.json"
+
+    def test_listing_covers_both_layouts(self, tmp_path):
+        folder = tmp_path / "decisions"
+        (folder / "ab").mkdir(parents=True)
+        (folder / "notes").mkdir()  # Not a bucket: ignored
+        for rel in ("b.json", "ab/a.json", "ab/c.json", "notes/d.json", "x.txt"):
+            (folder / rel).write_text("{}")
+        assert list_memory_names(folder) == ["ab/a.json", "b.json", "ab/c.json"]
+        assert list_memory_names(tmp_path / "missing") == []
+
+    def test_locate_and_config(self, tmp_path):
+        fanned = tmp_path / "decisions" / bucket_for("a") / "a.json"
+        fanned.parent.mkdir(parents=True)
+        fanned.write_text("{}")
+        assert locate_memory_file(tmp_path / "decisions" / "a.json") == fanned
+        assert read_fanout(tmp_path) is False
+        _fanout(tmp_path)
+        assert read_fanout(tmp_path) is True
+        (tmp_path / "memory-config.json").write_text('{"directory_fanout": "yes"}')
+        assert read_fanout(tmp_path) is False
+
+
+class TestWrites:
+
+    def test_create_uses_configured_layout(self, memory_project):
+        root = memory_project / ".claude" / "memory"
+        _fanout(root)
+        rc, out, err = run_write("create", "decision", f"{REL}/use-jwt.json",
+                                 write_input_file(memory_project, make_decision_memory()),
+                                 cwd=str(memory_project))
+        assert rc == 0, out + err
+        assert (memory_project / _fanned("use-jwt")).exists()
+        assert not (root / "decisions" / "use-jwt.json").exists()
+        assert _index_paths(root) == [_fanned("use-jwt")]
+        out, _, rc = run_index_cmd(root, "--validate")
+        assert rc == 0, out
+
+    def test_create_sees_slug_in_flat_layout(self, memory_project):
+        # No second copy in a bucket: the existing flat file is the target
+        root = _store(memory_project, ids=["use-jwt"])
+        _fanout(root)
+        rc, out, _ = run_write("create", "decision", f"{REL}/use-jwt.json",
+                               write_input_file(memory_project, make_decision_memory()),
+                               cwd=str(memory_project))
+        assert rc == 1
+        assert "CREATE_OVERWRITE_ERROR" in out
+        assert not (memory_project / _fanned("use-jwt")).exists()
+
+    def test_actions_find_the_other_layout(self, memory_project):
+        root = _store(memory_project)
+        _fanout(root)
+        assert run_index_cmd(root, "--migrate-layout")[2] == 0
+        # A flat target still reaches the fanned-out file
+        rc, out, err = run_write("retire", target=f"{REL}/use-jwt.json", reason="Old",
+                                 cwd=str(memory_project))
+        assert rc == 0, out + err
+        data = json.loads((memory_project / _fanned("use-jwt")).read_text())
+        assert data["record_status"] == "retired"
+        assert _index_paths(root) == [_fanned("use-redis")]
+
+    def test_rename_stays_in_layout(self, memory_project):
+        root = _store(memory_project, ids=["use-jwt"])
+        _fanout(root)
+        run_index_cmd(root, "--migrate-layout")
+        mem = make_decision_memory(id_val="use-jwt", title="Adopt Postgres row level security")
+        mem["changes"] = [{"date": "2026-10-18T00:00:00Z", "summary": "Retitled"}]
+        rc, out, err = run_write("update", "decision", _fanned("use-jwt"),
+                                 write_input_file(memory_project, mem),
+                                 cwd=str(memory_project))
+        assert rc == 0, out + err
+        slug = "adopt-postgres-row-level-security"
+        assert (memory_project / _fanned(slug)).exists()
+        assert _index_paths(root) == [_fanned(slug)]
+
+
+class TestReaders:
+
+    def test_scans_see_fanned_files(self, memory_project):
+        root = _store(memory_project)
+        _fanout(root)
+        run_index_cmd(root, "--migrate-layout")
+        assert sorted(m["path"] for m in scan_memories(root)) == [
+            _fanned("use-jwt"), _fanned("use-redis")]
+        assert sorted(s["id"] for s in _scan_active(root / "decisions")) == [
+            "use-jwt", "use-redis"]
+        assert sorted(r["path"] for r in list_active_by_age(root, "decisions")) == [
+            _fanned("use-jwt"), _fanned("use-redis")]
+
+
+class TestMigrate:
+
+    def test_round_trip(self, memory_project):
+        root = _store(memory_project, retired=["old-cache"])
+        pack_inactive(root)
+        _fanout(root)
+        out, _, rc = run_index_cmd(root, "--migrate-layout")
+        assert rc == 0, out
+        assert "Migrated 2 memory file(s) and 1 packed record(s)" in out
+        assert list((root / "decisions").glob("*.json")) == []
+        assert _index_paths(root) == [_fanned("use-jwt"), _fanned("use-redis")]
+        assert list(load_memory_meta(root, [_fanned("use-jwt"), f"{REL}/use-jwt.json"])) == [
+            _fanned("use-jwt")]
+        assert list(load_pack_table(root, "decisions")) == [_fanned("old-cache")]
+        assert run_index_cmd(root, "--validate")[2] == 0
+
+        out, _, rc = run_index_cmd(root, "--migrate-layout")
+        assert "Nothing to migrate" in out
+
+        # Restore reads the renamed pack entry
+        rc, out, err = run_write("restore", target=_fanned("old-cache"), cwd=str(memory_project))
+        assert rc == 0, out + err
+
+        _fanout(root, False)
+        out, _, rc = run_index_cmd(root, "--migrate-layout")
+        assert rc == 0, out
+        assert sorted(p.name for p in (root / "decisions").iterdir()) == [
+            "old-cache.json", "use-jwt.json", "use-redis.json"]
+        assert run_index_cmd(root, "--validate")[2] == 0
+
+    def test_delta_log_folded_in(self, memory_project):
+        root = _store(memory_project, ids=["use-jwt"])
+        run_write("create", "decision", f"{REL}/use-redis.json",
+                  write_input_file(memory_project, make_decision_memory(
+                      id_val="use-redis", title="Use Redis")),
+                  cwd=str(memory_project))
+        _fanout(root)
+        run_index_cmd(root, "--migrate-layout")
+        assert not (root / ".index-delta.log").exists()
+        assert _index_paths(root) == [_fanned("use-jwt"), _fanned("use-redis")]
+
+    def test_interrupted_run_is_finished(self, memory_project):
+        root = _store(memory_project, ids=["use-jwt"])
+        dest = memory_project / _fanned("use-jwt")
+        dest.parent.mkdir()
+        os.link(root / "decisions" / "use-jwt.json", dest)  # Linked, then crashed
+        _fanout(root)
+        out, _, rc = run_index_cmd(root, "--migrate-layout")
+        assert rc == 0, out
+        assert not (root / "decisions" / "use-jwt.json").exists()
+        assert _index_paths(root) == [_fanned("use-jwt")]
+
+    def test_conflict_left_in_place(self, memory_project):
+        root = _store(memory_project, ids=["use-jwt"])
+        dest = memory_project / _fanned("use-jwt")
+        dest.parent.mkdir()
+        dest.write_text('{"id": "something-else"}')
+        _fanout(root)
+        out, _, rc = run_index_cmd(root, "--migrate-layout")
+        assert rc == 1
+        assert "CONFLICT" in out
+        assert (root / "decisions" / "use-jwt.json").exists()
+        assert _index_paths(root) == [f"{REL}/use-jwt.json"]
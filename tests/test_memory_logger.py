@@ -1604,6 +1604,7 @@ _E2E_KNOWN_EVENT_TYPES = frozenset({
     "retrieval.inject",
     "retrieval.judge_result",  # debug-only, judge must be enabled
     "retrieval.fallback",      # warning-only, FTS5 must be unavailable
+    "retrieval.timing",        # debug-only, per-phase ms + peak RSS
 })
 
 # Required keys for each event type's data dict
@@ -1614,6 +1615,7 @@ _E2E_EVENT_DATA_KEYS = {
     "retrieval.inject": {"injected_count", "results"},
     "retrieval.judge_result": {"candidates_post_judge", "judge_active"},
     "retrieval.fallback": {"engine", "reason"},
+    "retrieval.timing": {"phases", "cache", "index_rebuilt", "peak_rss_kb"},
 }
 
 
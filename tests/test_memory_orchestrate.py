@@ -1107,10 +1107,11 @@ class TestExecuteSavesUnit:
         enforce_cmd = enforce_calls[0][0][0]
         assert "--category" in enforce_cmd
         assert "session_summary" in enforce_cmd
+        assert "--retention" in enforce_cmd
 
     @patch("memory_orchestrate.subprocess.run")
-    def test_non_session_summary_no_enforce(self, mock_run, tmp_path):
-        """Non-session_summary categories do NOT trigger enforce."""
+    def test_non_session_summary_retention_only(self, mock_run, tmp_path):
+        """Non-session_summary saves run the retention sweep, not the rolling window."""
         staging = str(tmp_path / "staging")
         os.makedirs(staging, exist_ok=True)
         scripts_dir = str(SCRIPTS_DIR)
@@ -1137,7 +1138,10 @@ class TestExecuteSavesUnit:
             c for c in mock_run.call_args_list
             if "memory_enforce.py" in str(c)
         ]
-        assert len(enforce_calls) == 0
+        assert len(enforce_calls) == 1
+        enforce_cmd = enforce_calls[0][0][0]
+        assert "--retention" in enforce_cmd
+        assert "--category" not in enforce_cmd
 
     @patch("memory_orchestrate.subprocess.run")
     def test_subprocess_timeout_recorded_as_error(self, mock_run, tmp_path):
@@ -0,0 +1,266 @@
+"""Tests for cold storage packs (memory_pack.py, memory_index.py --pack-inactive).
+
+Retired and archived records move out of the hot category folders into
+an append-only gzip pack per category with an offset table. Restore,
+unarchive, --list-archived, --gc and --health read them from the pack;
+folder scans only see active files.
+"""
+
+import gzip
+import json
+import subprocess
+import sys
+import timeit
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from conftest import make_decision_memory, write_index, write_memory_file
+from test_memory_index import run_index_cmd
+from test_memory_write import run_write
+
+SCRIPTS_DIR = Path(__file__).parent.parent / "hooks" / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from memory_enforce import _scan_active  # noqa: E402
+from memory_index import pack_inactive, scan_memories  # noqa: E402
+from memory_pack import (  # noqa: E402
+    append_to_pack,
+    load_pack_table,
+    pack_paths,
+    read_packed,
+    repack,
+)
+from memory_search_engine import load_memory_meta, rebuild_memory_meta  # noqa: E402
+
+REL = ".claude/memory/decisions"
+
+
+def _ago(days):
+    return (datetime.now(timezone.utc) - timedelta(days=days)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _store(memory_project, active=1, retired=(), archived=()):
+    """Decisions: *active* active ones, one retired per age in *retired*, *archived* ids."""
+    root = memory_project / ".claude" / "memory"
+    mems = [make_decision_memory(id_val=f"active-{i}", title=f"Active decision {i}")
+            for i in range(active)]
+    mems += [make_decision_memory(id_val=f"retired-{i}", title=f"Retired decision {i}",
+                                  record_status="retired", retired_at=_ago(age),
+                                  retired_reason="Superseded")
+             for i, age in enumerate(retired)]
+    for mem_id in archived:
+        mem = make_decision_memory(id_val=mem_id, title=f"Archived {mem_id}",
+                                   record_status="archived")
+        mem["archived_at"], mem["archived_reason"] = _ago(3), "Keep for reference"
+        mems.append(mem)
+    for mem in mems:
+        write_memory_file(root, mem)
+    write_index(root, *[m for m in mems if m["record_status"] == "active"])
+    rebuild_memory_meta(root, [(root / "decisions" / f"{m['id']}.json", m) for m in mems])
+    return root
+
+
+class TestPackInactive:
+
+    def test_hot_folder_keeps_only_active(self, memory_project):
+        root = _store(memory_project, active=2, retired=[1], archived=["old-notes"])
+        assert pack_inactive(root) is True
+        assert sorted(p.name for p in (root / "decisions").iterdir()) == [
+            "active-0.json", "active-1.json"]
+        table = load_pack_table(root, "decisions")
+        assert set(table) == {f"{REL}/retired-0.json", f"{REL}/old-notes.json"}
+        assert table[f"{REL}/old-notes.json"]["archived_reason"] == "Keep for reference"
+        assert read_packed(root, f"{REL}/retired-0.json")["retired_reason"] == "Superseded"
+
+        # Sidecar rows for packed paths are gone; index untouched
+        meta = load_memory_meta(root, [f"{REL}/retired-0.json", f"{REL}/active-0.json"])
+        assert list(meta) == [f"{REL}/active-0.json"]
+        out, _, rc = run_index_cmd(root, "--validate")
+        assert rc == 0, out
+
+    def test_repeat_appends(self, memory_project):
+        root = _store(memory_project, retired=[1])
+        pack_inactive(root)
+        mem = make_decision_memory(id_val="retired-late", record_status="retired",
+                                   retired_at=_ago(0), retired_reason="Late")
+        write_memory_file(root, mem)
+        size = pack_paths(root, "decisions")[0].stat().st_size
+        pack_inactive(root)
+        assert pack_paths(root, "decisions")[0].stat().st_size > size
+        assert len(load_pack_table(root, "decisions")) == 2
+
+    def test_nothing_to_pack(self, memory_project):
+        root = _store(memory_project)
+        out, _, rc = run_index_cmd(root, "--pack-inactive")
+        assert rc == 0
+        assert "No retired or archived memories to pack." in out
+        assert not (root / ".cold").exists()
+
+    def test_runs_without_pydantic(self, memory_project):
+        root = _store(memory_project, retired=[1])
+        # Importing pydantic raises ImportError; memory_write.py would exit
+        blocked = ("import os, runpy, sys; sys.modules['pydantic'] = None; sys.argv.pop(0);"
+                   "sys.path.insert(0, os.path.dirname(sys.argv[0]));"
+                   "runpy.run_path(sys.argv[0], run_name='__main__')")
+        result = subprocess.run(
+            [sys.executable, "-c", blocked, str(SCRIPTS_DIR / "memory_index.py"),
+             "--root", str(root), "--pack-inactive"],
+            capture_output=True, text=True, timeout=15)
+        assert result.returncode == 0, result.stdout + result.stderr
+        assert f"{REL}/retired-0.json" in load_pack_table(root, "decisions")
+
+
+class TestPackFormat:
+
+    def test_members_are_plain_gzip_json_lines(self, tmp_path):
+        append_to_pack(tmp_path, "decisions", [(f"{REL}/a.json", {"id": "a"}),
+                                               (f"{REL}/a.json", None)])
+        with gzip.open(pack_paths(tmp_path, "decisions")[0], "rt") as f:
+            lines = [json.loads(line) for line in f.read().splitlines()]
+        assert lines == [{"path": f"{REL}/a.json", "data": {"id": "a"}},
+                         {"path": f"{REL}/a.json", "data": None}]
+        assert load_pack_table(tmp_path, "decisions") == {}
+
+    def test_table_rebuilt_when_missing_or_stale(self, tmp_path):
+        append_to_pack(tmp_path, "decisions", [(f"{REL}/a.json", {"id": "a", "title": "A"}),
+                                               (f"{REL}/b.json", {"id": "b"})])
+        pack, table_path = pack_paths(tmp_path, "decisions")
+        expected = load_pack_table(tmp_path, "decisions")
+        table_path.unlink()
+        assert load_pack_table(tmp_path, "decisions") == expected
+        table_path.write_text(json.dumps({"pack_size": 1, "records": {}}))
+        assert load_pack_table(tmp_path, "decisions") == expected
+
+    def test_torn_tail_ignored(self, tmp_path):
+        append_to_pack(tmp_path, "decisions", [(f"{REL}/a.json", {"id": "a"})])
+        pack, table_path = pack_paths(tmp_path, "decisions")
+        blob = gzip.compress(json.dumps({"path": f"{REL}/b.json", "data": {}}).encode())
+        with open(pack, "ab") as f:
+            f.write(blob[:len(blob) // 2])
+        assert list(load_pack_table(tmp_path, "decisions")) == [f"{REL}/a.json"]
+
+    def test_append_after_torn_tail_keeps_every_record(self, tmp_path):
+        append_to_pack(tmp_path, "decisions", [(f"{REL}/a.json", {"id": "a"})])
+        pack, table_path = pack_paths(tmp_path, "decisions")
+        torn = gzip.compress(json.dumps({"path": f"{REL}/x.json", "data": {}}).encode())
+        with open(pack, "ab") as f:
+            f.write(torn[:len(torn) // 2])
+        append_to_pack(tmp_path, "decisions", [(f"{REL}/b.json", {"id": "b"})])
+        table_path.unlink()
+        assert sorted(load_pack_table(tmp_path, "decisions")) == [
+            f"{REL}/a.json", f"{REL}/b.json"]
+        assert read_packed(tmp_path, f"{REL}/b.json") == {"id": "b"}
+        with gzip.open(pack, "rt") as f:  # Torn bytes were truncated away
+            assert len(f.read().splitlines()) == 2
+
+    def test_scan_resyncs_past_torn_member(self, tmp_path):
+        pack, _ = pack_paths(tmp_path, "decisions")
+        pack.parent.mkdir(parents=True)
+        blobs = [gzip.compress(json.dumps({"path": f"{REL}/{n}.json", "data": {"id": n}})
+                               .encode()) for n in "axb"]
+        pack.write_bytes(blobs[0] + blobs[1][:len(blobs[1]) // 2] + blobs[2])
+        assert sorted(load_pack_table(tmp_path, "decisions")) == [
+            f"{REL}/a.json", f"{REL}/b.json"]
+        assert read_packed(tmp_path, f"{REL}/b.json") == {"id": "b"}
+
+    def test_repack_drops_and_reclaims(self, tmp_path):
+        members = [(f"{REL}/{n}.json", {"id": n}) for n in "abc"]
+        append_to_pack(tmp_path, "decisions", members + [(f"{REL}/a.json", None)])
+        pack = pack_paths(tmp_path, "decisions")[0]
+        before = pack.stat().st_size
+        assert repack(tmp_path, "decisions", drop={f"{REL}/b.json"}) == 1
+        assert pack.stat().st_size < before
+        assert read_packed(tmp_path, f"{REL}/c.json") == {"id": "c"}
+        assert repack(tmp_path, "decisions", drop={f"{REL}/c.json"}) == 0
+        assert not pack.exists()
+
+
+class TestReadBack:
+
+    def test_restore_from_pack(self, memory_project):
+        root = _store(memory_project, retired=[2])
+        pack_inactive(root)
+        rc, out, err = run_write("restore", target=f"{REL}/retired-0.json",
+                                 cwd=str(memory_project))
+        assert rc == 0, out + err
+        assert json.loads(out)["status"] == "restored"
+        data = json.loads((root / "decisions" / "retired-0.json").read_text())
+        assert data["record_status"] == "active"
+        assert "retired_at" not in data
+        assert load_pack_table(root, "decisions") == {}
+        out, _, rc = run_index_cmd(root, "--validate")
+        assert rc == 0, out
+
+    def test_unarchive_and_list_archived(self, memory_project):
+        root = _store(memory_project, archived=["old-notes", "older-notes"])
+        pack_inactive(root)
+        out, _, rc = run_index_cmd(root, "--list-archived")
+        assert rc == 0
+        assert "Archived memories (2):" in out
+        assert "(old-notes) (packed)" in out and "reason: Keep for reference" in out
+
+        rc, out, err = run_write("unarchive", target=f"{REL}/old-notes.json",
+                                 cwd=str(memory_project))
+        assert rc == 0, out + err
+        assert json.loads((root / "decisions" / "old-notes.json").read_text())[
+            "record_status"] == "active"
+        out, _, rc = run_index_cmd(root, "--list-archived")
+        assert "Archived memories (1):" in out and "older-notes" in out
+
+    def test_wrong_lifecycle_action_leaves_pack_alone(self, memory_project):
+        root = _store(memory_project, archived=["old-notes"])
+        pack_inactive(root)
+        rc, out, _ = run_write("restore", target=f"{REL}/old-notes.json",
+                               cwd=str(memory_project))
+        assert rc == 1
+        assert "Use --action unarchive" in out
+        assert not (root / "decisions" / "old-notes.json").exists()
+        assert f"{REL}/old-notes.json" in load_pack_table(root, "decisions")
+
+    def test_missing_everywhere(self, memory_project):
+        _store(memory_project)
+        rc, out, _ = run_write("restore", target=f"{REL}/nope.json", cwd=str(memory_project))
+        assert rc == 1
+        assert "RESTORE_ERROR" in out
+
+    def test_gc_drops_expired_packed_records(self, memory_project):
+        root = _store(memory_project, retired=[45, 2])
+        pack_inactive(root)
+        out, _, rc = run_index_cmd(root, "--gc")
+        assert rc == 0
+        assert "DELETED retired-0.json (packed)" in out
+        assert list(load_pack_table(root, "decisions")) == [f"{REL}/retired-1.json"]
+
+    def test_health_counts_packed(self, memory_project):
+        root = _store(memory_project, active=1, retired=[1], archived=["old-notes"])
+        pack_inactive(root)
+        out, _, rc = run_index_cmd(root, "--health")
+        assert "Retired: 1" in out and "Archived: 1" in out
+        assert "Packed (cold storage): 2" in out
+        assert "Retired decision 0 (1 day(s) ago)" in out
+        assert "Index is in sync (1 entries)." in out
+
+
+def test_benchmark_hot_scans_after_packing(memory_project):
+    """Folder scans on a store where 95% of records are inactive."""
+    root = memory_project / ".claude" / "memory"
+    for i in range(1000):
+        mem = make_decision_memory(id_val=f"decision-{i:04d}", title=f"Decision {i}")
+        if i % 20:
+            mem.update(record_status="retired", retired_at=_ago(1), retired_reason="Old")
+        write_memory_file(root, mem)
+    folder = root / "decisions"
+
+    def scans():
+        scan_memories(root, include_inactive=True)
+        _scan_active(folder)
+
+    n = 3
+    before = min(timeit.repeat(scans, number=1, repeat=n))
+    assert pack_inactive(root)
+    after = min(timeit.repeat(scans, number=1, repeat=n))
+    assert len(scan_memories(root, include_inactive=True)) == len(_scan_active(folder)) == 50
+    print(f"\n[scan_memories + _scan_active, 1000 decisions, 950 inactive, best of {n}] "
+          f"hot folder {before * 1000:.1f}ms, after --pack-inactive {after * 1000:.1f}ms "
+          f"({before / after:.1f}x)")
+    assert after < before
@@ -42,9 +42,9 @@ def _get_staging_dir_subprocess(proj_path: str) -> Path:
         capture_output=True, text=True, timeout=5,
     )
     return Path(result.stdout.strip())
+from memory_search_engine import parse_index_line
 from memory_retrieve import (
     tokenize,
-    parse_index_line,
     score_entry,
     check_recency,
     confidence_label,
@@ -0,0 +1,273 @@
+"""Tests for memory_schema.py -- stdlib fast-path record validator.
+
+The fast path may only ever accept records the pydantic models accept.
+Parity is checked on the conftest memory factories, the adversarial
+strings from test_adversarial_descriptions.py placed in every string
+slot of a record, and type-confusion mutations. The two validators
+must agree exactly, except for the few lax-mode coercions pydantic
+performs (listed in PYDANTIC_ONLY), which the fast path hands back.
+"""
+
+import copy
+import json
+import math
+import subprocess
+import sys
+import timeit
+from pathlib import Path
+
+import pytest
+
+import test_adversarial_descriptions as adversarial
+from conftest import (
+    make_constraint_memory,
+    make_decision_memory,
+    make_preference_memory,
+    make_runbook_memory,
+    make_session_memory,
+    make_tech_debt_memory,
+)
+
+SCRIPTS_DIR = Path(__file__).parent.parent / "hooks" / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+import memory_schema  # noqa: E402
+from memory_schema import compile_category, fast_validate  # noqa: E402
+from memory_write import build_memory_model, validate_memory  # noqa: E402
+
+FACTORIES = {
+    "decision": make_decision_memory,
+    "preference": make_preference_memory,
+    "tech_debt": make_tech_debt_memory,
+    "session_summary": make_session_memory,
+    "runbook": make_runbook_memory,
+    "constraint": make_constraint_memory,
+}
+
+ADVERSARIAL_STRINGS = sorted(
+    set(adversarial.TestMaliciousDescriptions.MALICIOUS_DESCRIPTIONS.values())
+    | {s for s, _ in adversarial.TestSanitizationConsistency.DANGEROUS_PATTERNS}
+    | set(adversarial.TestJsonRoundTrip.TRICKY_JSON_VALUES)
+    | {"", " ", "lone \ud800 surrogate", "x" * 120, "x" * 121, "use-jwt\n", "-use-jwt"}
+)
+
+
+def _pydantic_ok(data, category):
+    try:
+        build_memory_model(category).model_validate(data)
+        return True
+    except Exception:
+        return False
+
+
+def _string_slots(data, path=()):
+    """Yield the path of every string value in a record."""
+    if isinstance(data, dict):
+        for k, v in data.items():
+            yield from _string_slots(v, path + (k,))
+    elif isinstance(data, list):
+        for i, v in enumerate(data):
+            yield from _string_slots(v, path + (i,))
+    elif isinstance(data, str):
+        yield path
+
+
+def _set(data, path, value):
+    data = copy.deepcopy(data)
+    node = data
+    for key in path[:-1]:
+        node = node[key]
+    node[path[-1]] = value
+    return data
+
+
+def _adversarial_cases():
+    for cat, factory in FACTORIES.items():
+        base = factory()
+        for path in _string_slots(base):
+            for s in ADVERSARIAL_STRINGS:
+                yield cat, _set(base, path, s)
+
+
+MUTATIONS = [
+    # (label, category, mutate)
+    ("related_files null", "decision", lambda d: d.update(related_files=None)),
+    ("confidence null", "decision", lambda d: d.update(confidence=None)),
+    ("confidence int", "decision", lambda d: d.update(confidence=1)),
+    ("confidence above range", "decision", lambda d: d.update(confidence=1.5)),
+    ("confidence NaN", "decision", lambda d: d.update(confidence=math.nan)),
+    ("confidence inf", "decision", lambda d: d.update(confidence=math.inf)),
+    ("confidence bool", "decision", lambda d: d.update(confidence=True)),
+    ("record_status null", "decision", lambda d: d.update(record_status=None)),
+    ("record_status bad", "decision", lambda d: d.update(record_status="deleted")),
+    ("times_updated null", "decision", lambda d: d.update(times_updated=None)),
+    ("times_updated float", "decision", lambda d: d.update(times_updated=2.0)),
+    ("times_updated string", "decision", lambda d: d.update(times_updated="2")),
+    ("times_updated bool", "decision", lambda d: d.update(times_updated=True)),
+    ("schema_version 2", "decision", lambda d: d.update(schema_version="2.0")),
+    ("schema_version float", "decision", lambda d: d.update(schema_version=1.0)),
+    ("category mismatch", "decision", lambda d: d.update(category="runbook")),
+    ("id uppercase", "decision", lambda d: d.update(id="Use-JWT")),
+    ("id int", "decision", lambda d: d.update(id=7)),
+    ("title 121 chars", "decision", lambda d: d.update(title="t" * 121)),
+    ("tags empty", "decision", lambda d: d.update(tags=[])),
+    ("tags string", "decision", lambda d: d.update(tags="auth")),
+    ("tags null item", "decision", lambda d: d.update(tags=["auth", None])),
+    ("extra top-level", "decision", lambda d: d.update(extra=1)),
+    ("missing title", "decision", lambda d: d.pop("title")),
+    ("missing content", "decision", lambda d: d.pop("content")),
+    ("content list", "decision", lambda d: d.update(content=[])),
+    ("extra content key", "decision", lambda d: d["content"].update(unknown="x")),
+    ("rationale empty", "decision", lambda d: d["content"].update(rationale=[])),
+    ("alternatives null", "decision", lambda d: d["content"].update(alternatives=None)),
+    ("alternative extra key", "decision",
+     lambda d: d["content"]["alternatives"][0].update(extra="x")),
+    ("change entry ok", "decision",
+     lambda d: d.update(changes=[{"date": "2026-01-01T00:00:00Z", "summary": "s",
+                                  "old_value": {"a": [1]}, "new_value": None}])),
+    ("change entry extra key", "decision",
+     lambda d: d.update(changes=[{"date": "d", "summary": "s", "who": "x"}])),
+    ("change summary 301", "decision",
+     lambda d: d.update(changes=[{"date": "d", "summary": "s" * 301}])),
+    ("changes null", "decision", lambda d: d.update(changes=None)),
+    ("retired_at null", "decision", lambda d: d.update(retired_at=None)),
+    ("retired_reason long", "decision", lambda d: d.update(retired_reason="r" * 301)),
+    ("active string", "constraint", lambda d: d["content"].update(active="true")),
+    ("active int", "constraint", lambda d: d["content"].update(active=1)),
+    ("active null", "constraint", lambda d: d["content"].update(active=None)),
+    ("expires null", "constraint", lambda d: d["content"].update(expires=None)),
+    ("examples null", "preference", lambda d: d["content"].update(examples=None)),
+    ("examples extra", "preference", lambda d: d["content"]["examples"].update(x=[])),
+    ("strength bad", "preference", lambda d: d["content"].update(strength="moderate")),
+    ("steps empty", "runbook", lambda d: d["content"].update(steps=[])),
+    ("completed null", "session_summary", lambda d: d["content"].update(completed=None)),
+    ("outcome bad", "session_summary", lambda d: d["content"].update(outcome="great")),
+    ("priority bad", "tech_debt", lambda d: d["content"].update(priority="urgent")),
+]
+
+# Accepted by pydantic lax mode or looser model fields; the fast path
+# declines them and validate_memory() defers to pydantic.
+PYDANTIC_ONLY = {
+    "times_updated float", "times_updated string", "times_updated bool",
+    "confidence bool", "active string", "active int", "retired_reason long",
+}
+
+
+class TestParity:
+
+    @pytest.mark.parametrize("category", list(FACTORIES))
+    def test_factories_take_fast_path(self, category):
+        data = FACTORIES[category]()
+        assert fast_validate(data, category) is True
+        assert _pydantic_ok(data, category) is True
+
+    def test_adversarial_strings_agree(self):
+        cases = disagreements = 0
+        for category, data in _adversarial_cases():
+            cases += 1
+            fast, slow = fast_validate(data, category), _pydantic_ok(data, category)
+            if fast != slow:
+                disagreements += 1
+                assert not fast, f"fast path accepted invalid {category}: {data}"
+        assert cases > 1000
+        assert disagreements == 0
+
+    @pytest.mark.parametrize("label,category,mutate", MUTATIONS, ids=[m[0] for m in MUTATIONS])
+    def test_mutations_agree(self, label, category, mutate):
+        data = FACTORIES[category]()
+        mutate(data)
+        fast, slow = fast_validate(data, category), _pydantic_ok(data, category)
+        if label in PYDANTIC_ONLY:
+            assert (fast, slow) == (False, True)
+        else:
+            assert fast == slow
+        assert validate_memory(data, category)[0] is slow
+
+    def test_every_category_rejects_other_categories(self):
+        for category in FACTORIES:
+            for other, factory in FACTORIES.items():
+                if other != category:
+                    assert fast_validate(factory(), category) is False
+
+
+class TestFallback:
+
+    def test_unknown_category_defers(self):
+        assert fast_validate(make_decision_memory(), "base") is False
+        assert fast_validate(make_decision_memory(), "../decision") is False
+        assert fast_validate(make_decision_memory(), ["decision"]) is False
+
+    def test_missing_schema_dir_defers(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(memory_schema, "SCHEMA_DIR", str(tmp_path))
+        monkeypatch.setattr(memory_schema, "_compiled", {})
+        assert fast_validate(make_decision_memory(), "decision") is False
+        assert validate_memory(make_decision_memory(), "decision") == (True, None)
+
+    def test_unsupported_keyword_never_accepts(self, monkeypatch, tmp_path):
+        schema = {"type": "object", "properties": {"a": {"type": "string"}},
+                  "oneOf": [{"required": ["a"]}]}
+        (tmp_path / "decision.schema.json").write_text(json.dumps(schema))
+        monkeypatch.setattr(memory_schema, "SCHEMA_DIR", str(tmp_path))
+        monkeypatch.setattr(memory_schema, "_compiled", {})
+        assert fast_validate({"a": "x"}, "decision") is False
+
+    def test_compiled_once(self):
+        assert compile_category("runbook") is compile_category("runbook")
+
+    def test_invalid_record_still_gets_pydantic_error(self):
+        data = make_decision_memory(content_overrides={"status": "banana"})
+        ok, err = validate_memory(data, "decision")
+        assert ok is False
+        assert "field: content.status" in err
+
+
+def test_validate_hook_skips_pydantic_for_valid_record(tmp_path):
+    folder = tmp_path / ".claude" / "memory" / "decisions"
+    folder.mkdir(parents=True)
+    path = folder / "use-jwt.json"
+    path.write_text(json.dumps(make_decision_memory()))
+    code = (
+        "import sys; sys.path.insert(0, sys.argv[1])\n"
+        "from memory_validate_hook import validate_file\n"
+        "print(validate_file(sys.argv[2])[0], 'pydantic' in sys.modules)\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code, str(SCRIPTS_DIR), str(path)],
+                            capture_output=True, text=True, timeout=30)
+    assert result.stdout.split() == ["True", "False"], result.stderr
+
+
+_COLD = (
+    "import sys, time; sys.path[:0] = sys.argv[1:3]\n"
+    "from conftest import make_decision_memory\n"
+    "data = make_decision_memory()\n"
+    "t = time.perf_counter()\n"
+    "from {module} import {func}\n"
+    "ok = {func}(data, 'decision')\n"
+    "ok = ok if isinstance(ok, bool) else ok[0]\n"
+    "print(time.perf_counter() - t, ok)\n"
+)
+
+
+def _cold_seconds(module, func):
+    code = _COLD.format(module=module, func=func)
+    result = subprocess.run(
+        [sys.executable, "-c", code, str(SCRIPTS_DIR), str(Path(__file__).parent)],
+        capture_output=True, text=True, timeout=60,
+    )
+    elapsed, ok = result.stdout.split()
+    assert ok == "True", result.stderr
+    return float(elapsed)
+
+
+def test_benchmark_cold_process_validation():
+    """First validation in a fresh process: import + compile + check."""
+    runs = 3
+    fast = min(_cold_seconds("memory_schema", "fast_validate") for _ in range(runs))
+    slow = min(_cold_seconds("memory_write", "validate_memory") for _ in range(runs))
+    data = make_decision_memory()
+    n = 2000
+    warm = timeit.timeit(lambda: fast_validate(data, "decision"), number=n) / n
+    print(f"\n[cold process, valid decision record, best of {runs}] "
+          f"fast path {fast * 1000:.1f}ms, memory_write+pydantic {slow * 1000:.1f}ms; "
+          f"warm fast path {warm * 1e6:.1f}us/record")
+    assert fast < slow
@@ -43,6 +43,7 @@ from memory_triage import (
     CATEGORY_PATTERNS,
     FLAG_TTL_SECONDS,
     _deep_copy_parallel_defaults,
+    _find_match_line_indices,
 )
 from memory_staging_utils import get_staging_dir, STAGING_DIR_PREFIX
 
@@ -1228,6 +1229,50 @@ class TestStagingPaths:
         assert perms == 0o600, f"Expected 0o600 permissions, got {oct(perms)}"
 
 
+class TestContextExcerptReuse:
+    """Context excerpts come from the scoring pass's match_lines."""
+
+    TEXT = "\n".join([
+        "We decided to use PostgreSQL because of JSONB support.",
+        "filler line",
+        "## Error Handling",
+        "The deploy failed with a timeout error.",
+        "It was fixed by raising the pool size.",
+    ] + ["unrelated chatter"] * 30 + [
+        "Later we chose Redis over memcached.",
+        "TODO: this retry is a hack, tech debt for now.",
+    ])
+    METRICS = {"tool_uses": 4, "distinct_tools": 2, "exchanges": 6}
+
+    def _write(self, tmp_path, results, name):
+        paths = write_context_files(self.TEXT, self.METRICS, results, cwd=str(tmp_path / name))
+        return {cat: Path(path).read_bytes() for cat, path in paths.items()}
+
+    def test_match_lines_equal_primary_scan(self):
+        lines = self.TEXT.split("\n")
+        all_raw = run_triage(self.TEXT, self.METRICS, {cat: 0.0 for cat in DEFAULT_THRESHOLDS})
+        for entry in all_raw:
+            if entry["category"] == "SESSION_SUMMARY":
+                assert entry["match_lines"] == []
+            else:
+                assert entry["match_lines"] == _find_match_line_indices(lines, entry["category"])
+
+    def test_context_files_reuse_match_lines(self, tmp_path):
+        results = run_triage(self.TEXT, self.METRICS, {cat: 0.0 for cat in DEFAULT_THRESHOLDS})
+        legacy = [{k: v for k, v in r.items() if k != "match_lines"} for r in results]
+        expected = self._write(tmp_path, legacy, "legacy")
+        assert set(expected) == {r["category"].lower() for r in results}
+
+        def no_rescan(*args):
+            raise AssertionError("primary patterns re-run")
+
+        with mock.patch.dict(write_context_files.__globals__,
+                             {"_find_match_line_indices": no_rescan}):
+            assert self._write(tmp_path, results, "reused") == expected
+        # Two separate windows around the DECISION matches on lines 0 and 35
+        assert expected["decision"].count(b"\n---\n") == 1
+
+
 # ---------------------------------------------------------------------------
 # R3: Sentinel idempotency tests
 # ---------------------------------------------------------------------------
@@ -0,0 +1,343 @@
+"""Tests for memory_write.py --action batch and its use by the orchestrator."""
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+SCRIPTS_DIR = Path(__file__).parent.parent / "hooks" / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+import memory_lock
+import memory_write
+from memory_write import FlockIndex, do_batch
+from memory_search_engine import read_index_lines
+from memory_orchestrate import execute_saves
+from conftest import (
+    make_constraint_memory,
+    make_decision_memory,
+    make_preference_memory,
+    make_session_memory,
+    write_index,
+    write_memory_file,
+)
+
+WRITE_SCRIPT = str(SCRIPTS_DIR / "memory_write.py")
+PYTHON = sys.executable
+
+
+def _staging(memory_project):
+    staging = memory_project / ".claude" / "memory" / ".staging"
+    staging.mkdir(parents=True, exist_ok=True)
+    return staging
+
+
+def _input(memory_project, name, data):
+    fp = _staging(memory_project) / f"input-{name}.json"
+    fp.write_text(json.dumps(data))
+    return str(fp)
+
+
+def _manifest(memory_project, operations):
+    fp = _staging(memory_project) / "write-batch.json"
+    fp.write_text(json.dumps({"operations": operations}))
+    return str(fp)
+
+
+def _run_batch(memory_project, manifest_path):
+    result = subprocess.run(
+        [PYTHON, WRITE_SCRIPT, "--action", "batch", "--manifest", manifest_path],
+        capture_output=True, text=True, timeout=30, cwd=str(memory_project),
+    )
+    return result.returncode, result.stdout, result.stderr
+
+
+def _seed(memory_project):
+    """Existing store: one decision to update, one constraint to retire."""
+    root = memory_project / ".claude" / "memory"
+    existing = [make_decision_memory(id_val="old-choice", title="Old choice"),
+                make_constraint_memory()]
+    for m in existing:
+        write_memory_file(root, m)
+    write_index(root, *existing)
+    return root
+
+
+class TestBatchCLI:
+
+    def test_mixed_operations_partial_failure(self, memory_project):
+        root = _seed(memory_project)
+        old_path = root / "decisions" / "old-choice.json"
+        old_hash = hashlib.md5(old_path.read_bytes()).hexdigest()
+        updated = json.loads(old_path.read_text())
+        updated["title"] = "Old choice"
+        updated["changes"] = (updated.get("changes") or []) + [
+            {"date": "2026-01-01T00:00:00Z", "summary": "Clarified"}]
+        constraint = next((root / "constraints").glob("*.json"))
+
+        ops = [
+            {"id": "decision", "action": "create", "category": "decision",
+             "target": ".claude/memory/decisions/use-jwt.json",
+             "input": _input(memory_project, "decision", make_decision_memory())},
+            {"id": "preference", "action": "create", "category": "preference",
+             "target": ".claude/memory/preferences/prefer-typescript.json",
+             "input": _input(memory_project, "preference", make_preference_memory())},
+            {"id": "stale", "action": "update", "hash": "0" * 32,
+             "target": ".claude/memory/decisions/old-choice.json",
+             "input": _input(memory_project, "stale", updated)},
+            {"id": "update", "action": "update", "hash": old_hash,
+             "target": ".claude/memory/decisions/old-choice.json",
+             "input": _input(memory_project, "update", updated)},
+            {"id": "retire", "action": "retire", "reason": "Lifted",
+             "target": f".claude/memory/constraints/{constraint.name}"},
+            {"id": "bogus", "action": "delete", "target": ".claude/memory/decisions/x.json"},
+            {"id": "outside", "action": "retire", "target": "elsewhere/x.json"},
+        ]
+        rc, stdout, stderr = _run_batch(memory_project, _manifest(memory_project, ops))
+        assert rc == 1, stderr
+        out = json.loads(stdout)
+        assert (out["status"], out["succeeded"], out["failed"]) == ("partial_failure", 4, 3)
+        by_id = {r["id"]: r for r in out["results"]}
+        assert [r["index"] for r in out["results"]] == list(range(len(ops)))
+
+        assert by_id["decision"]["result"]["status"] == "created"
+        assert by_id["preference"]["result"]["status"] == "created"
+        assert "OCC_CONFLICT" in by_id["stale"]["error"]
+        assert by_id["update"]["result"]["times_updated"] == 1
+        assert by_id["retire"]["result"]["status"] == "retired"
+        assert "BATCH_ERROR" in by_id["bogus"]["error"]
+        assert "PATH_ERROR" in by_id["outside"]["error"]
+
+        paths = {l.split(" -> ")[1].split(" #tags:")[0]
+                 for l in read_index_lines(root / "index.md") if l.startswith("- [")}
+        assert paths == {".claude/memory/decisions/use-jwt.json",
+                         ".claude/memory/preferences/prefer-typescript.json",
+                         ".claude/memory/decisions/old-choice.json"}
+        assert not (root / ".index.lockdir").exists()
+
+    def test_all_ok(self, memory_project):
+        ops = [{"action": "create", "category": "decision",
+                "target": ".claude/memory/decisions/use-jwt.json",
+                "input": _input(memory_project, "d", make_decision_memory())}]
+        rc, stdout, _ = _run_batch(memory_project, _manifest(memory_project, ops))
+        assert rc == 0
+        assert json.loads(stdout)["status"] == "ok"
+
+    def test_empty_operations(self, memory_project):
+        rc, stdout, _ = _run_batch(memory_project, _manifest(memory_project, []))
+        assert rc == 0
+        assert json.loads(stdout) == {"status": "ok", "succeeded": 0, "failed": 0, "results": []}
+
+    @pytest.mark.parametrize("content", ['{"ops": []}', "[1, 2]"])
+    def test_malformed_manifest(self, memory_project, content):
+        fp = _staging(memory_project) / "write-batch.json"
+        fp.write_text(content)
+        rc, stdout, _ = _run_batch(memory_project, str(fp))
+        assert rc == 1
+        assert "BATCH_ERROR" in stdout
+
+    def test_manifest_outside_staging_rejected(self, memory_project, tmp_path):
+        fp = tmp_path / "batch.json"
+        fp.write_text(json.dumps({"operations": []}))
+        rc, stdout, _ = _run_batch(memory_project, str(fp))
+        assert rc == 1
+        assert "SECURITY_ERROR" in stdout
+
+
+class TestBatchInProcess:
+
+    def _args(self, manifest_path, skip_auto_enforce=False):
+        return argparse.Namespace(manifest=manifest_path, skip_auto_enforce=skip_auto_enforce)
+
+    def test_one_lock_and_one_index_append(self, memory_project, monkeypatch, capsys):
+        _seed(memory_project)
+        monkeypatch.chdir(memory_project)
+        appends, acquires = [], []
+        real_append = memory_write.append_index_delta
+        real_acquire = FlockIndex._acquire
+        monkeypatch.setattr(memory_write, "append_index_delta",
+                            lambda p, recs: appends.append(list(recs)) or real_append(p, recs))
+        monkeypatch.setattr(FlockIndex, "_acquire",
+                            lambda self: acquires.append(1) or real_acquire(self))
+        ops = [{"action": "create", "category": "decision",
+                "target": f".claude/memory/decisions/choice-{i}.json",
+                "input": _input(memory_project, str(i),
+                                make_decision_memory(id_val=f"choice-{i}", title=f"Choice {i}"))}
+               for i in range(5)]
+        assert do_batch(self._args(_manifest(memory_project, ops))) == 0
+        capsys.readouterr()
+        assert len(acquires) == 1
+        assert len(appends) == 1
+        assert [op for op, _ in appends[0]] == ["+"] * 5
+
+    def test_session_create_enforces_once_after_lock(self, memory_project, monkeypatch, capsys):
+        _seed(memory_project)
+        monkeypatch.chdir(memory_project)
+        calls = []
+        monkeypatch.setattr(memory_write, "_run_auto_enforce",
+                            lambda root: calls.append(bool(FlockIndex._held)))
+        ops = [{"action": "create", "category": "session_summary",
+                "target": f".claude/memory/sessions/s-{i}.json",
+                "input": _input(memory_project, f"s{i}",
+                                make_session_memory(id_val=f"s-{i}", title=f"Session {i}"))}
+               for i in range(2)]
+        manifest = _manifest(memory_project, ops)
+        assert do_batch(self._args(manifest)) == 0
+        assert calls == [False]
+
+        ops = [{"action": "create", "category": "session_summary",
+                "target": ".claude/memory/sessions/s-9.json",
+                "input": _input(memory_project, "s9",
+                                make_session_memory(id_val="s-9", title="Session 9"))}]
+        assert do_batch(self._args(_manifest(memory_project, ops), skip_auto_enforce=True)) == 0
+        assert calls == [False]
+        capsys.readouterr()
+
+    def test_index_flushed_when_an_operation_raises(self, memory_project, monkeypatch, capsys):
+        _seed(memory_project)
+        monkeypatch.chdir(memory_project)
+
+        def boom(args, memory_root, index_path):
+            raise RuntimeError("disk on fire")
+        monkeypatch.setitem(memory_write.BATCH_ACTIONS, "archive", boom)
+        ops = [
+            {"action": "create", "category": "decision",
+             "target": ".claude/memory/decisions/use-jwt.json",
+             "input": _input(memory_project, "d", make_decision_memory())},
+            {"action": "archive", "target": ".claude/memory/decisions/old-choice.json"},
+        ]
+        assert do_batch(self._args(_manifest(memory_project, ops))) == 1
+        out = json.loads(capsys.readouterr().out)
+        assert out["results"][0]["ok"] is True
+        assert "UNEXPECTED_ERROR" in out["results"][1]["error"]
+        index = "\n".join(read_index_lines(memory_project / ".claude" / "memory" / "index.md"))
+        assert "use-jwt" in index
+
+
+class TestFlockIndexReentry:
+
+    @pytest.mark.parametrize("backend", ["flock", "mkdir"])
+    def test_nested_lock_is_reentrant(self, tmp_path, monkeypatch, backend):
+        if backend == "flock" and memory_lock.fcntl is None:
+            pytest.skip("fcntl not available")
+        monkeypatch.setattr(FlockIndex, "_BACKEND", backend)
+        index_path = tmp_path / "index.md"
+        lock_dir = tmp_path / ".index.lockdir"
+        with FlockIndex(index_path) as outer:
+            assert outer.acquired
+            with FlockIndex(index_path) as inner:
+                assert inner.acquired
+                inner.require_acquired()
+            assert FlockIndex._held
+            assert lock_dir.exists() == (backend == "mkdir")
+        assert not FlockIndex._held
+        assert not lock_dir.exists()
+
+    @pytest.mark.parametrize("backend", ["flock", "mkdir"])
+    def test_exclusive_inside_shared(self, tmp_path, monkeypatch, backend):
+        if backend == "flock" and memory_lock.fcntl is None:
+            pytest.skip("fcntl not available")
+        monkeypatch.setattr(FlockIndex, "_BACKEND", backend)
+        index_path = tmp_path / "index.md"
+        with FlockIndex(index_path, shared=True) as outer:
+            assert outer.acquired
+            with FlockIndex(index_path, shared=True) as reader:
+                assert reader.acquired
+            if backend == "flock":
+                # Only LOCK_SH is held: an exclusive hold must not be granted
+                with pytest.raises(RuntimeError, match="LOCK_MODE_ERROR"):
+                    with FlockIndex(index_path):
+                        pass
+            else:
+                # mkdir locks are always exclusive
+                with FlockIndex(index_path) as writer:
+                    assert writer.acquired
+            assert FlockIndex._held[outer._key][0] == 1
+        assert not FlockIndex._held
+        # Shared inside exclusive is fine
+        with FlockIndex(index_path):
+            with FlockIndex(index_path, shared=True) as reader:
+                assert reader.acquired
+
+    def test_nested_inherits_unacquired_state(self, tmp_path, monkeypatch):
+        index_path = tmp_path / "index.md"
+        monkeypatch.setattr(FlockIndex, "_acquire", lambda self: None)
+        with FlockIndex(index_path):
+            with FlockIndex(index_path) as inner:
+                with pytest.raises(TimeoutError):
+                    inner.require_acquired()
+
+
+class TestOrchestratorBatch:
+
+    def _manifest(self, staging):
+        return {
+            "status": "actionable",
+            "categories": {
+                "decision": {"action": "CREATE", "draft_path": os.path.join(staging, "draft-decision.json"),
+                             "target_path": ".claude/memory/decisions/new.json"},
+                "preference": {"action": "UPDATE", "draft_path": os.path.join(staging, "draft-preference.json"),
+                               "candidate_path": ".claude/memory/preferences/old.json",
+                               "occ_hash": "abc"},
+                "constraint": {"action": "DELETE", "candidate_path": ".claude/memory/constraints/c.json"},
+            },
+        }
+
+    def _batch_calls(self, mock_run):
+        return [c[0][0] for c in mock_run.call_args_list if "batch" in c[0][0]]
+
+    @patch("memory_orchestrate.subprocess.run")
+    def test_single_batch_process(self, mock_run, tmp_path):
+        staging = str(tmp_path)
+        mock_run.return_value = MagicMock(returncode=1, stderr="", stdout=json.dumps({
+            "status": "partial_failure", "succeeded": 2, "failed": 1, "results": [
+                {"index": 0, "ok": True, "result": {"status": "created", "title": "New decision"}},
+                {"index": 1, "ok": False, "error": "OCC_CONFLICT\ntarget: x"},
+                {"index": 2, "ok": True, "result": {"status": "retired"}},
+            ]}))
+        result = execute_saves(self._manifest(staging), staging, ".claude/memory",
+                               str(SCRIPTS_DIR), PYTHON, batch=True)
+
+        calls = self._batch_calls(mock_run)
+        assert len(calls) == 1
+        assert "--skip-auto-enforce" in calls[0]
+        assert not [c for c in mock_run.call_args_list if "create" in c[0][0]]
+        ops = json.loads(Path(staging, "write-batch.json").read_text())["operations"]
+        assert [op["action"] for op in ops] == ["create", "update", "retire"]
+        assert ops[1]["hash"] == "abc"
+
+        assert result["status"] == "partial_failure"
+        assert [(s["category"], s["title"]) for s in result["saved"]] == [
+            ("decision", "New decision"), ("constraint", "constraint")]
+        assert result["errors"][0]["category"] == "preference"
+        assert "OCC_CONFLICT" in result["errors"][0]["error"]
+
+    @patch("memory_orchestrate.subprocess.run")
+    def test_unparseable_batch_output_fails_every_category(self, mock_run, tmp_path):
+        staging = str(tmp_path)
+        mock_run.return_value = MagicMock(returncode=1, stdout="", stderr="Traceback: boom")
+        result = execute_saves(self._manifest(staging), staging, ".claude/memory",
+                               str(SCRIPTS_DIR), PYTHON, batch=True)
+        assert result["status"] == "total_failure"
+        assert {e["category"] for e in result["errors"]} == {"decision", "preference", "constraint"}
+        assert all("boom" in e["error"] for e in result["errors"])
+
+    @patch("memory_orchestrate.subprocess.run")
+    def test_batch_timeout(self, mock_run, tmp_path):
+        staging = str(tmp_path)
+
+        def run(cmd, **kwargs):
+            if "batch" in cmd:
+                raise subprocess.TimeoutExpired(cmd, kwargs["timeout"])
+            return MagicMock(returncode=0, stdout="", stderr="")
+        mock_run.side_effect = run
+        result = execute_saves(self._manifest(staging), staging, ".claude/memory",
+                               str(SCRIPTS_DIR), PYTHON, batch=True)
+        assert result["status"] == "total_failure"
+        assert all("timed out after 90s" in e["error"] for e in result["errors"])
@@ -0,0 +1,221 @@
+"""Tests for the retrieval metadata sidecar (.index-meta.sqlite3).
+
+Covers the writers (memory_write.py, memory_index.py --rebuild), staleness
+detection in load_memory_meta(), and that score_with_body()/check_recency()
+use fresh sidecar records instead of opening memory JSON files.
+"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SCRIPTS_DIR = Path(__file__).parent.parent / "hooks" / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from memory_search_engine import (
+    HAS_FTS5,
+    META_DB_FILENAME,
+    build_fts_index,
+    build_fts_query,
+    extract_body_text,
+    load_memory_meta,
+    record_memory_meta,
+    rebuild_memory_meta,
+    tokenize,
+)
+from memory_retrieve import check_recency, score_with_body
+from conftest import (
+    make_decision_memory,
+    make_tech_debt_memory,
+    write_memory_file,
+)
+
+PYTHON = sys.executable
+WRITE_SCRIPT = str(SCRIPTS_DIR / "memory_write.py")
+INDEX_SCRIPT = str(SCRIPTS_DIR / "memory_index.py")
+
+DECISION_PATH = ".claude/memory/decisions/use-jwt.json"
+
+
+def _mem_root(memory_project):
+    return memory_project / ".claude" / "memory"
+
+
+def _corrupt_keeping_stat(file_path):
+    """Overwrite a file in place with invalid JSON of the same size and mtime.
+
+    A reader that trusts the sidecar never notices; one that opens the file
+    fails to parse it.
+    """
+    st = os.stat(file_path)
+    with open(file_path, "r+b") as f:
+        f.write(b"!" * st.st_size)
+    os.utime(file_path, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+
+class TestLoadMemoryMeta:
+
+    def test_record_then_load(self, memory_project):
+        root = _mem_root(memory_project)
+        mem = make_decision_memory()
+        fp = write_memory_file(root, mem)
+        assert record_memory_meta(root, fp, mem) is True
+
+        meta = load_memory_meta(root, [DECISION_PATH])
+        rec = meta[DECISION_PATH]
+        assert rec["status"] == "active"
+        assert rec["updated_at"] == mem["updated_at"]
+        assert rec["created_at"] == mem["created_at"]
+        assert rec["body_tokens"] == tokenize(extract_body_text(mem))
+
+    def test_modified_file_is_stale(self, memory_project):
+        root = _mem_root(memory_project)
+        mem = make_decision_memory()
+        fp = write_memory_file(root, mem)
+        record_memory_meta(root, fp, mem)
+
+        mem["title"] = "Use JWT tokens for stateless authentication everywhere"
+        fp.write_text(json.dumps(mem, indent=2))
+        assert load_memory_meta(root, [DECISION_PATH]) == {}
+
+    def test_deleted_file_is_omitted(self, memory_project):
+        root = _mem_root(memory_project)
+        mem = make_decision_memory()
+        fp = write_memory_file(root, mem)
+        record_memory_meta(root, fp, mem)
+        fp.unlink()
+        assert load_memory_meta(root, [DECISION_PATH]) == {}
+
+    def test_missing_sidecar_returns_empty(self, memory_project):
+        root = _mem_root(memory_project)
+        write_memory_file(root, make_decision_memory())
+        assert load_memory_meta(root, [DECISION_PATH]) == {}
+
+    def test_corrupt_sidecar_returns_empty(self, memory_project):
+        root = _mem_root(memory_project)
+        write_memory_file(root, make_decision_memory())
+        (root / META_DB_FILENAME).write_bytes(b"garbage")
+        assert load_memory_meta(root, [DECISION_PATH]) == {}
+
+    def test_record_fail_open(self, tmp_path):
+        missing_root = tmp_path / "nope" / ".claude" / "memory"
+        assert record_memory_meta(missing_root, missing_root / "decisions" / "x.json", {}) is False
+
+    def test_rebuild_replaces_sidecar(self, memory_project):
+        root = _mem_root(memory_project)
+        active = make_decision_memory()
+        retired = make_tech_debt_memory(record_status="retired", retired_at="2026-01-01T00:00:00Z")
+        records = [(write_memory_file(root, m), m) for m in (active, retired)]
+        rebuild_memory_meta(root, records)
+
+        retired_path = ".claude/memory/tech-debt/legacy-api-v1.json"
+        meta = load_memory_meta(root, [DECISION_PATH, retired_path])
+        assert meta[DECISION_PATH]["status"] == "active"
+        assert meta[retired_path]["status"] == "retired"
+
+
+class TestSidecarWriters:
+
+    def test_memory_write_create_and_retire(self, memory_project):
+        root = _mem_root(memory_project)
+        staging = root / ".staging"
+        staging.mkdir()
+        input_file = staging / "input.json"
+        input_file.write_text(json.dumps(make_decision_memory()))
+
+        subprocess.run(
+            [PYTHON, WRITE_SCRIPT, "--action", "create", "--category", "decision",
+             "--target", DECISION_PATH, "--input", str(input_file)],
+            capture_output=True, text=True, timeout=15, cwd=str(memory_project), check=True,
+        )
+        assert load_memory_meta(root, [DECISION_PATH])[DECISION_PATH]["status"] == "active"
+
+        subprocess.run(
+            [PYTHON, WRITE_SCRIPT, "--action", "retire", "--target", DECISION_PATH,
+             "--reason", "superseded"],
+            capture_output=True, text=True, timeout=15, cwd=str(memory_project), check=True,
+        )
+        assert load_memory_meta(root, [DECISION_PATH])[DECISION_PATH]["status"] == "retired"
+
+    def test_memory_index_rebuild_writes_sidecar(self, memory_project):
+        root = _mem_root(memory_project)
+        write_memory_file(root, make_decision_memory())
+        write_memory_file(root, make_tech_debt_memory(
+            record_status="retired", retired_at="2026-01-01T00:00:00Z"))
+
+        subprocess.run(
+            [PYTHON, INDEX_SCRIPT, "--rebuild", "--root", str(root)],
+            capture_output=True, text=True, timeout=15, check=True,
+        )
+        retired_path = ".claude/memory/tech-debt/legacy-api-v1.json"
+        meta = load_memory_meta(root, [DECISION_PATH, retired_path])
+        assert set(meta) == {DECISION_PATH, retired_path}
+        assert meta[retired_path]["status"] == "retired"
+        assert "legacy-api-v1" not in (root / "index.md").read_text()
+
+
+@pytest.mark.skipif(not HAS_FTS5, reason="FTS5 not available")
+class TestRetrievalUsesSidecar:
+
+    def _score(self, root, prompt):
+        entries = [{
+            "title": "Use JWT for authentication",
+            "tags": {"auth", "jwt"},
+            "path": DECISION_PATH,
+            "category": "DECISION",
+        }]
+        conn = build_fts_index(entries)
+        try:
+            q = build_fts_query(list(tokenize("jwt authentication")))
+            return score_with_body(conn, q, prompt, 10, root, "auto", max_inject=10)
+        finally:
+            conn.close()
+
+    def test_fresh_record_skips_json_read(self, memory_project):
+        root = _mem_root(memory_project)
+        mem = make_decision_memory()
+        fp = write_memory_file(root, mem)
+        record_memory_meta(root, fp, mem)
+        _corrupt_keeping_stat(fp)
+
+        results = self._score(root, "jwt authentication stateless tokens")
+        assert len(results) == 1
+        # Body bonus computed from sidecar tokens even though the JSON is unreadable
+        assert results[0]["body_bonus"] > 0
+
+    def test_retired_in_sidecar_is_excluded(self, memory_project):
+        root = _mem_root(memory_project)
+        mem = make_decision_memory(record_status="retired")
+        fp = write_memory_file(root, mem)
+        record_memory_meta(root, fp, mem)
+        _corrupt_keeping_stat(fp)
+
+        assert self._score(root, "jwt authentication") == []
+
+    def test_stale_record_falls_back_to_json(self, memory_project):
+        root = _mem_root(memory_project)
+        mem = make_decision_memory()
+        fp = write_memory_file(root, mem)
+        record_memory_meta(root, fp, mem)
+
+        # Retired by hand after the sidecar was written
+        mem["record_status"] = "retired"
+        fp.write_text(json.dumps(mem, indent=2))
+        assert self._score(root, "jwt authentication") == []
+
+    def test_check_recency_uses_meta(self, memory_project):
+        root = _mem_root(memory_project)
+        mem = make_decision_memory()
+        fp = write_memory_file(root, mem)
+        record_memory_meta(root, fp, mem)
+        _corrupt_keeping_stat(fp)
+
+        rec = load_memory_meta(root, [DECISION_PATH])[DECISION_PATH]
+        assert check_recency(fp) == (False, False)  # unreadable JSON
+        assert check_recency(fp, rec) == check_recency(
+            fp, {"status": "active", "updated_at": mem["updated_at"]})
+        assert check_recency(fp, {**rec, "status": "archived"}) == (True, False)
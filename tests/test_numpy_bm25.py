@@ -0,0 +1,258 @@
+"""Tests for the NumPy BM25 fallback engine (memory_bm25_numpy.py).
+
+The engine only runs when SQLite lacks FTS5, so parity tests compare it
+against FTS5 directly, and retrieval tests patch HAS_FTS5 to False.
+"""
+
+import io
+import json
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("numpy")
+
+SCRIPTS_DIR = Path(__file__).parent.parent / "hooks" / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+import memory_bm25_numpy
+import memory_retrieve
+from memory_bm25_numpy import BM25_INDEX_FILENAME, open_bm25_index
+from memory_search_engine import (
+    HAS_FTS5,
+    apply_threshold,
+    build_fts_query,
+    load_numpy_bm25,
+    open_fts_index,
+    parse_index_line,
+    query_fts,
+    tokenize,
+)
+from conftest import (
+    make_bulk_index_lines,
+    make_decision_memory,
+    make_preference_memory,
+    write_index,
+    write_memory_file,
+)
+
+JWT_PATH = ".claude/memory/decisions/use-jwt.json"
+
+
+def _write_bulk_index(root, count, extra=()):
+    lines = make_bulk_index_lines(count) + list(extra)
+    (root / "index.md").write_text("# Memory Index\n\n" + "\n".join(lines) + "\n",
+                                   encoding="utf-8")
+
+
+def _search(index, text, limit=15):
+    return query_fts(index, build_fts_query(list(tokenize(text))), limit)
+
+
+class TestNumpyBM25Index:
+
+    def test_result_shape_matches_query_fts(self, memory_root):
+        write_index(memory_root, make_decision_memory(), make_preference_memory())
+        index, count, rebuilt = open_bm25_index(memory_root)
+        assert (count, rebuilt) == (2, True)
+        results = _search(index, "jwt authentication")
+        assert [r["path"] for r in results] == [JWT_PATH]
+        r = results[0]
+        assert set(r) == {"title", "tags", "path", "category", "score"}
+        assert r["category"] == "DECISION"
+        assert r["tags"] == {"auth", "jwt", "security"}
+        assert r["score"] < 0
+
+    def test_prefix_and_compound_tokens(self, memory_root):
+        _write_bulk_index(memory_root, 0, [
+            "- [DECISION] Rename user_id column -> .claude/memory/decisions/a.json #tags:schema",
+            "- [DECISION] User model field -> .claude/memory/decisions/b.json #tags:id",
+            "- [RUNBOOK] Authenticator outage -> .claude/memory/runbooks/c.json #tags:oncall",
+        ])
+        index, _, _ = open_bm25_index(memory_root)
+        # "auth"* matches authenticator; "user_id" needs both tokens in one column
+        assert [r["path"][-6:] for r in _search(index, "auth")] == ["c.json"]
+        assert [r["path"][-6:] for r in _search(index, "user_id")] == ["a.json"]
+        assert _search(index, "kubernetes") == []
+
+    def test_limit_and_tie_order_are_deterministic(self, memory_root):
+        _write_bulk_index(memory_root, 600)
+        index, _, _ = open_bm25_index(memory_root)
+        first = _search(index, "authentication", limit=7)
+        assert len(first) == 7
+        assert first == _search(index, "authentication", limit=7)
+        scores = [r["score"] for r in first]
+        assert scores == sorted(scores)
+
+    def test_score_with_body_and_threshold_unchanged(self, memory_project):
+        root = memory_project / ".claude" / "memory"
+        mems = [make_decision_memory(), make_preference_memory()]
+        for m in mems:
+            write_memory_file(root, m)
+        write_index(root, *mems)
+        index, _, _ = open_bm25_index(root)
+        prompt = "JWT authentication token expiry"
+        results = memory_retrieve.score_with_body(
+            index, build_fts_query(list(tokenize(prompt))), prompt, 10, root, "auto")
+        assert [r["path"] for r in results] == [JWT_PATH]
+        assert results[0]["body_bonus"] > 0
+        assert apply_threshold(list(results)) == results
+
+
+@pytest.mark.skipif(not HAS_FTS5, reason="FTS5 not available for parity check")
+class TestFTS5Parity:
+
+    PROMPTS = [
+        "authentication database migration",
+        "deadlock timeout failover",
+        "bulk12 python",
+        "item 42 legacy",
+        "user_id auth-flow",
+        "auth data",
+        "zzz nothing matches",
+    ]
+
+    def test_same_ranking_and_scores_as_fts5(self, memory_root):
+        _write_bulk_index(memory_root, 3_000, [
+            "- [DECISION] user_id auth-flow rewrite -> .claude/memory/decisions/x.json #tags:user_id",
+        ])
+        index, _, _ = open_bm25_index(memory_root)
+        conn, _, _ = open_fts_index(memory_root)
+        try:
+            for prompt in self.PROMPTS:
+                expected = _search(conn, prompt, limit=30)
+                actual = _search(index, prompt, limit=30)
+                assert [r["path"] for r in actual] == [r["path"] for r in expected], prompt
+                assert [r["score"] for r in actual] == pytest.approx(
+                    [r["score"] for r in expected], rel=1e-6), prompt
+        finally:
+            conn.close()
+
+
+class TestPersistence:
+
+    def test_reused_until_index_changes(self, memory_root):
+        write_index(memory_root, make_decision_memory())
+        assert open_bm25_index(memory_root)[2] is True
+        assert (memory_root / BM25_INDEX_FILENAME).exists()
+        assert open_bm25_index(memory_root)[2] is False
+
+        write_index(memory_root, make_decision_memory(), make_preference_memory())
+        index, count, rebuilt = open_bm25_index(memory_root)
+        assert (count, rebuilt) == (2, True)
+        assert [r["path"] for r in _search(index, "typescript")] == [
+            ".claude/memory/preferences/prefer-typescript.json"]
+
+    def test_corrupt_file_is_rebuilt(self, memory_root):
+        write_index(memory_root, make_decision_memory())
+        for junk in (b"", b"CMBM25\x00\n\x01", b"not an index at all"):
+            (memory_root / BM25_INDEX_FILENAME).write_bytes(junk)
+            index, count, rebuilt = open_bm25_index(memory_root)
+            assert (count, rebuilt) == (1, True)
+            assert [r["path"] for r in _search(index, "jwt")] == [JWT_PATH]
+
+    def test_write_failure_falls_back_to_memory(self, memory_root, monkeypatch):
+        write_index(memory_root, make_decision_memory())
+
+        def fail(*args, **kwargs):
+            raise OSError("read-only")
+        monkeypatch.setattr(memory_bm25_numpy, "write_bm25_file", fail)
+        index, count, rebuilt = open_bm25_index(memory_root)
+        assert (count, rebuilt) == (1, True)
+        assert not (memory_root / BM25_INDEX_FILENAME).exists()
+        assert [r["path"] for r in _search(index, "jwt")] == [JWT_PATH]
+
+    def test_empty_index(self, memory_root):
+        (memory_root / "index.md").write_text("# Memory Index\n", encoding="utf-8")
+        index, count, _ = open_bm25_index(memory_root)
+        assert count == 0
+        assert _search(index, "anything") == []
+        assert open_bm25_index(memory_root)[1:] == (0, False)
+
+    def test_timings_recorded_on_rebuild(self, memory_root):
+        write_index(memory_root, make_decision_memory())
+        timings = {}
+        open_bm25_index(memory_root, timings=timings)
+        assert set(timings) == {"index_parse", "fts_build"}
+
+
+class TestRetrievalFallback:
+
+    def _run_main(self, memory_project, monkeypatch, capsys, prompt):
+        monkeypatch.setattr(memory_retrieve, "HAS_FTS5", False)
+        monkeypatch.setattr(sys, "stdin", io.StringIO(json.dumps(
+            {"prompt": prompt, "cwd": str(memory_project)})))
+        monkeypatch.delenv("ANTHROPIC_API_KEY", raising=False)
+        try:
+            memory_retrieve.main()
+        except SystemExit:
+            pass
+        return capsys.readouterr()
+
+    def _setup(self, memory_project):
+        root = memory_project / ".claude" / "memory"
+        mems = [make_decision_memory(), make_preference_memory()]
+        for m in mems:
+            write_memory_file(root, m)
+        write_index(root, *mems)
+        (root / "memory-config.json").write_text(json.dumps(
+            {"logging": {"enabled": True, "level": "debug"}}))
+        return root
+
+    def _events(self, root, event_type):
+        return [e["data"] for f in sorted((root / "logs").rglob("*.jsonl"))
+                for e in map(json.loads, f.read_text().splitlines())
+                if e["event_type"] == event_type]
+
+    def test_main_uses_numpy_engine_without_fts5(self, memory_project, monkeypatch, capsys):
+        root = self._setup(memory_project)
+        out = self._run_main(memory_project, monkeypatch, capsys,
+                             "How does JWT authentication work in this project?")
+        assert "use-jwt" in out.out
+        assert "[WARN] FTS5 unavailable" not in out.err
+        assert (root / BM25_INDEX_FILENAME).exists()
+        assert [e["engine"] for e in self._events(root, "retrieval.search")] == ["numpy_bm25"]
+        assert self._events(root, "retrieval.fallback") == [
+            {"engine": "numpy_bm25", "reason": "fts5_unavailable"}]
+
+    def test_legacy_path_when_numpy_missing(self, memory_project, monkeypatch, capsys):
+        root = self._setup(memory_project)
+        monkeypatch.setattr(memory_retrieve, "load_numpy_bm25", lambda: None)
+        out = self._run_main(memory_project, monkeypatch, capsys,
+                             "How does JWT authentication work in this project?")
+        assert "use-jwt" in out.out
+        assert "[WARN] FTS5 unavailable" in out.err
+        assert not (root / BM25_INDEX_FILENAME).exists()
+
+    def test_load_numpy_bm25_without_numpy(self, monkeypatch):
+        monkeypatch.setitem(sys.modules, "numpy", None)
+        monkeypatch.delitem(sys.modules, "memory_bm25_numpy")
+        assert load_numpy_bm25() is None
+
+
+class TestNumpyBM25Benchmark:
+    """Per-query cost vs. the legacy keyword loop it replaces."""
+
+    def test_5k_query_faster_than_legacy_loop(self, memory_root):
+        _write_bulk_index(memory_root, 5_000)
+        index, _, _ = open_bm25_index(memory_root)
+        entries = [e for e in map(parse_index_line, make_bulk_index_lines(5_000)) if e]
+        prompt = "authentication database migration plan"
+        fts_query = build_fts_query(list(tokenize(prompt)))
+        words = tokenize(prompt, legacy=True)
+
+        t0 = time.perf_counter()
+        for _ in range(20):
+            query_fts(index, fts_query, 30)
+        numpy_ms = (time.perf_counter() - t0) * 1000 / 20
+
+        t0 = time.perf_counter()
+        for _ in range(20):
+            [e for e in entries if memory_retrieve.score_entry(words, e) > 0]
+        legacy_ms = (time.perf_counter() - t0) * 1000 / 20
+
+        print(f"\n[5000 entries] numpy bm25 {numpy_ms:.2f}ms/query, "
+              f"legacy loop {legacy_ms:.2f}ms/query")
+        assert numpy_ms < legacy_ms
@@ -0,0 +1,239 @@
+"""Tests for stat-based OCC tokens (memory_write.py --hash).
+
+Candidate selection reports
+occ2:<mtime_ns>:<size>:<inode>:<times_updated>:<racy>:<md5> from the read
+it already does; the MD5 is only computed when the token is racy (file
+modified within OCC_RACY_NS of the read) or the file has no inode number.
+memory_write.occ_check() accepts an unchanged non-racy token from a stat
+alone; otherwise it reads the file and compares the generation, then the
+MD5 (a stat-only token whose stat moved is a conflict). Legacy MD5 values
+for --hash keep working.
+"""
+
+import builtins
+import hashlib
+import json
+import os
+import sys
+import time
+import timeit
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from conftest import make_decision_memory, write_index, write_memory_file
+from test_memory_write import file_md5, run_write, write_input_file
+
+SCRIPTS_DIR = Path(__file__).parent.parent / "hooks" / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+import memory_candidate  # noqa: E402
+from memory_orchestrate import _attach_file_hash  # noqa: E402
+from memory_search_engine import (  # noqa: E402
+    OCC_RACY_NS,
+    occ_token,
+    parse_occ_token,
+    read_occ_token,
+)
+from memory_write import occ_check  # noqa: E402
+
+
+def _age(path, seconds=60):
+    """Backdate a file so tokens taken now are outside the racy window."""
+    old = time.time() - seconds
+    os.utime(path, (old, old))
+
+
+@pytest.fixture
+def record(tmp_path):
+    path = tmp_path / "use-jwt.json"
+    path.write_text(json.dumps(make_decision_memory(times_updated=3), indent=2))
+    _age(path)
+    return path
+
+
+class TestToken:
+
+    def test_fields(self, record):
+        data, token = read_occ_token(record)
+        st = os.stat(record)
+        parsed = parse_occ_token(token)
+        assert parsed == {"stat": (st.st_mtime_ns, st.st_size, st.st_ino), "gen": 3,
+                          "racy": False, "md5": None}
+        assert token.endswith(":0:-")
+        assert data["id"] == "use-jwt"
+
+    def test_md5_only_when_stat_is_ambiguous(self, record):
+        raw = record.read_bytes()
+        md5 = hashlib.md5(raw).hexdigest()
+        st = os.stat(record)
+        with patch("memory_search_engine.hashlib.md5", side_effect=AssertionError("hashed")):
+            assert parse_occ_token(occ_token(st, {}, raw))["md5"] is None
+        racy = occ_token(st, {}, raw, now_ns=st.st_mtime_ns)
+        assert parse_occ_token(racy)["md5"] == md5
+        no_inode = SimpleNamespace(st_mtime_ns=st.st_mtime_ns, st_size=st.st_size, st_ino=0)
+        assert parse_occ_token(occ_token(no_inode, {}, raw))["md5"] == md5
+
+    def test_racy_flag(self, record):
+        raw = record.read_bytes()
+        st = os.stat(record)
+        token = occ_token(st, {"times_updated": 3}, raw, now_ns=st.st_mtime_ns + 1)
+        assert parse_occ_token(token)["racy"] is True
+        token = occ_token(st, {"times_updated": 3}, raw, now_ns=st.st_mtime_ns + OCC_RACY_NS)
+        assert parse_occ_token(token)["racy"] is False
+
+    def test_missing_generation_is_zero(self, record):
+        st = os.stat(record)
+        assert parse_occ_token(occ_token(st, [], b"[]"))["gen"] == 0
+        assert parse_occ_token(occ_token(st, {"times_updated": True}, b"{}"))["gen"] == 0
+
+    @pytest.mark.parametrize("value", [
+        None, "", "d41d8cd98f00b204e9800998ecf8427e", "occ2:1:2:3:4:0", "occ2:a:2:3:4:0:md5",
+        "occ2:1:2:3:4:2:md5", "occ2:1:2:3:4:0:", "occ2:1:2:3:4:0:md5:extra",
+        "occ1:1:2:3:4",
+    ])
+    def test_parse_rejects_non_tokens(self, value):
+        assert parse_occ_token(value) is None
+
+    def test_unreadable_file(self, tmp_path):
+        assert read_occ_token(tmp_path / "missing.json") is None
+        bad = tmp_path / "bad.json"
+        bad.write_text("{not json")
+        assert read_occ_token(bad) is None
+
+
+class TestOccCheck:
+
+    def test_unchanged_is_a_stat_only(self, record):
+        _, token = read_occ_token(record)
+        with patch.object(builtins, "open", side_effect=AssertionError("file was read")):
+            assert occ_check(str(record), token) == (True, token)
+
+    def test_replaced_file_conflicts(self, record):
+        _, token = read_occ_token(record)
+        record.write_text(json.dumps(make_decision_memory(times_updated=4), indent=2))
+        ok, current = occ_check(str(record), token)
+        assert ok is False
+        assert parse_occ_token(current)["gen"] == 4
+
+    def test_stat_only_token_new_stat_conflicts(self, record):
+        # Touched: a token without an MD5 cannot tell it from an edit
+        _, token = read_occ_token(record)
+        os.utime(record)
+        ok, current = occ_check(str(record), token)
+        assert ok is False
+        assert parse_occ_token(current)["racy"] is True
+        assert occ_check(str(record), current)[0] is True
+
+    def test_same_generation_new_bytes_conflicts(self, record):
+        # Hand edit that does not bump times_updated
+        _, token = read_occ_token(record)
+        data = json.loads(record.read_text())
+        data["title"] = "Edited by hand"
+        record.write_text(json.dumps(data, indent=2))
+        ok, current = occ_check(str(record), token)
+        assert ok is False
+        assert parse_occ_token(current)["gen"] == parse_occ_token(token)["gen"]
+
+    def test_generation_mismatch_conflicts(self, record):
+        # Stat moved and times_updated differs: conflict even if the MD5 were equal
+        _, token = read_occ_token(record)
+        fields = token.split(":")
+        fields[4] = "2"
+        os.utime(record)
+        assert occ_check(str(record), ":".join(fields))[0] is False
+
+    def test_racy_token_same_bytes_passes(self, record):
+        raw = record.read_bytes()
+        st = os.stat(record)
+        token = occ_token(st, json.loads(raw), raw, now_ns=st.st_mtime_ns)
+        os.utime(record)
+        assert occ_check(str(record), token)[0] is True
+
+    def test_racy_token_same_stat_new_bytes_conflicts(self, record):
+        # In-place rewrite inside one timestamp tick: stat identical, bytes differ
+        raw = record.read_bytes()
+        st = os.stat(record)
+        token = occ_token(st, json.loads(raw), raw, now_ns=st.st_mtime_ns)
+        with open(record, "r+b") as f:
+            f.write(raw.replace(b"use-jwt", b"use-jwx", 1))
+        os.utime(record, ns=(st.st_atime_ns, st.st_mtime_ns))
+        assert os.stat(record).st_size == st.st_size
+        assert occ_check(str(record), token)[0] is False
+
+    def test_deleted_file_conflicts(self, record):
+        _, token = read_occ_token(record)
+        record.unlink()
+        assert occ_check(str(record), token) == (False, None)
+
+    def test_legacy_md5(self, record):
+        md5 = file_md5(str(record))
+        assert occ_check(str(record), md5) == (True, md5)
+        assert occ_check(str(record), "wrong_hash") == (False, md5)
+
+
+class TestPipeline:
+
+    def test_candidate_reports_token(self, memory_project, monkeypatch):
+        root = memory_project / ".claude" / "memory"
+        mem = make_decision_memory()
+        path = write_memory_file(root, mem)
+        write_index(root, mem)
+        monkeypatch.chdir(memory_project)
+        cand = memory_candidate.select_candidate(
+            "decision", "JWT authentication token expiry changed", root)
+        token = cand["candidate"]["occ_token"]
+        assert parse_occ_token(token)["stat"][2] == os.stat(path).st_ino
+        assert cand["candidate"]["excerpt"]["title"] == mem["title"]
+
+    def test_orchestrator_uses_token_without_reading(self):
+        cand = {"candidate": {"path": "/nonexistent/x.json", "occ_token": "occ2:1:2:3:0:0:md5"}}
+        assert _attach_file_hash(cand)["file_hash"] == "occ2:1:2:3:0:0:md5"
+
+    def test_orchestrator_falls_back_to_md5(self, record):
+        cand = _attach_file_hash({"candidate": {"path": str(record)}})
+        assert cand["file_hash"] == file_md5(str(record))
+
+    def test_cli_update_with_token(self, memory_project):
+        root = memory_project / ".claude" / "memory"
+        mem = make_decision_memory()
+        path = write_memory_file(root, mem)
+        write_index(root, mem)
+        _age(path)
+        _, stale = read_occ_token(path)
+        target = ".claude/memory/decisions/use-jwt.json"
+        update = make_decision_memory(content_overrides={"status": "deprecated"},
+                                      tags=["auth", "jwt", "security", "deprecated"])
+
+        # Another session rewrites the file after the token was taken
+        path.write_text(json.dumps(make_decision_memory(times_updated=1), indent=2))
+        rc, stdout, _ = run_write("update", "decision", target,
+                                  write_input_file(memory_project, update),
+                                  hash_val=stale, cwd=str(memory_project))
+        assert rc == 1
+        assert "OCC_CONFLICT" in stdout
+        assert "current_hash: occ2:" in stdout
+
+        _, fresh = read_occ_token(path)
+        rc, stdout, stderr = run_write("update", "decision", target,
+                                       write_input_file(memory_project, update),
+                                       hash_val=fresh, cwd=str(memory_project))
+        assert rc == 0, stdout + stderr
+        assert json.loads(stdout)["times_updated"] == 2
+
+
+def test_benchmark_occ_check_vs_md5(tmp_path):
+    path = tmp_path / "big.json"
+    path.write_text(json.dumps(make_decision_memory(
+        changes=[{"date": "2026-01-01T00:00:00Z", "summary": "x" * 290}] * 50)))
+    _age(path)
+    _, token = read_occ_token(path)
+    md5 = file_md5(str(path))
+    n = 2000
+    stat = timeit.timeit(lambda: occ_check(str(path), token), number=n) / n
+    full = timeit.timeit(lambda: occ_check(str(path), md5), number=n) / n
+    print(f"\n[OCC check, {path.stat().st_size // 1024}KB record] "
+          f"token {stat * 1e6:.1f}us, md5 {full * 1e6:.1f}us")
+    assert stat < full
@@ -0,0 +1,198 @@
+"""Tests for concurrent per-category candidate/draft steps in memory_orchestrate.py.
+
+In subprocess mode, memory_candidate.py and memory_draft.py run for up to
+--concurrency / triage.orchestrate_concurrency categories at once. Each
+child has its own timeout. Results join before CUD resolution, in intent
+order.
+"""
+
+import json
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from test_memory_orchestrate import make_save_intent
+from test_orchestrate_inprocess import ALL_CATEGORIES, _project, _run, _shape
+
+SCRIPTS_DIR = Path(__file__).parent.parent / "hooks" / "scripts"
+PYTHON = sys.executable
+
+sys.path.insert(0, str(SCRIPTS_DIR))
+from memory_orchestrate import (  # noqa: E402
+    DEFAULT_CATEGORY_TIMEOUT,
+    DEFAULT_CONCURRENCY,
+    _run_per_category,
+    _triage_int,
+    execute_drafts,
+    run_candidate_selection,
+)
+
+
+class _SlowRun:
+    """subprocess.run stand-in that records peak parallelism and timeouts."""
+
+    def __init__(self, delay=0.05, stdout=None, timeout_for=()):
+        self.delay = delay
+        self.stdout = stdout
+        self.timeout_for = set(timeout_for)
+        self.lock = threading.Lock()
+        self.active = self.peak = 0
+        self.timeouts = []
+
+    def __call__(self, cmd, **kwargs):
+        cat = cmd[cmd.index("--category") + 1]
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            self.timeouts.append(kwargs.get("timeout"))
+        try:
+            time.sleep(self.delay)
+            if cat in self.timeout_for:
+                raise subprocess.TimeoutExpired(cmd, kwargs["timeout"])
+            return MagicMock(returncode=0, stderr="", stdout=self.stdout(cat))
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+def _intents():
+    return {cat: make_save_intent(cat) for cat in ALL_CATEGORIES}
+
+
+def _candidate_stdout(cat):
+    return json.dumps({"category": cat, "candidate": None, "pre_action": "CREATE",
+                       "structural_cud": "CREATE", "vetoes": [], "hints": []})
+
+
+class TestRunPerCategory:
+
+    def test_results_keep_job_order(self):
+        # Later jobs finish first
+        jobs = [(f"c{i}", lambda i=i: time.sleep(0.01 * (5 - i)) or i) for i in range(5)]
+        result = _run_per_category(jobs, 5)
+        assert list(result) == ["c0", "c1", "c2", "c3", "c4"]
+        assert list(result.values()) == [0, 1, 2, 3, 4]
+
+    def test_concurrency_one_runs_inline(self):
+        threads = set()
+        jobs = [(c, lambda: threads.add(threading.get_ident())) for c in "abc"]
+        _run_per_category(jobs, 1)
+        assert threads == {threading.get_ident()}
+
+
+class TestCandidateFanOut:
+
+    def test_bounded_parallelism_and_order(self, tmp_path):
+        fake = _SlowRun(stdout=_candidate_stdout)
+        with patch("memory_orchestrate.subprocess.run", side_effect=fake):
+            candidates = run_candidate_selection(
+                _intents(), str(tmp_path), str(SCRIPTS_DIR), PYTHON,
+                concurrency=3, timeout=12,
+            )
+        assert fake.peak == 3
+        assert list(candidates) == ALL_CATEGORIES
+        assert all(c["pre_action"] == "CREATE" for c in candidates.values())
+        assert set(fake.timeouts) == {12}
+
+    def test_sequential_by_default(self, tmp_path):
+        fake = _SlowRun(delay=0.01, stdout=_candidate_stdout)
+        with patch("memory_orchestrate.subprocess.run", side_effect=fake):
+            run_candidate_selection(_intents(), str(tmp_path), str(SCRIPTS_DIR), PYTHON)
+        assert fake.peak == 1
+        assert set(fake.timeouts) == {DEFAULT_CATEGORY_TIMEOUT}
+
+    def test_timeout_only_fails_its_category(self, tmp_path):
+        fake = _SlowRun(stdout=_candidate_stdout, timeout_for={"runbook"})
+        with patch("memory_orchestrate.subprocess.run", side_effect=fake):
+            candidates = run_candidate_selection(
+                _intents(), str(tmp_path), str(SCRIPTS_DIR), PYTHON, concurrency=6,
+            )
+        assert candidates["runbook"] is None
+        assert sum(c is not None for c in candidates.values()) == len(ALL_CATEGORIES) - 1
+
+
+class TestDraftFanOut:
+
+    def test_parallel_drafts_and_per_category_timeout(self, tmp_path):
+        intents = _intents()
+        resolved = {cat: {"action": "CREATE"} for cat in ALL_CATEGORIES}
+        fake = _SlowRun(
+            stdout=lambda cat: json.dumps({"draft_path": f"/tmp/draft-{cat}.json"}),
+            timeout_for={"decision"},
+        )
+        with patch("memory_orchestrate.subprocess.run", side_effect=fake):
+            execute_drafts(intents, resolved, str(tmp_path), str(SCRIPTS_DIR), PYTHON,
+                           memory_root=".claude/memory",
+                           slugify_fn=lambda t: t.lower().replace(" ", "-"),
+                           category_folders={c: c for c in ALL_CATEGORIES},
+                           concurrency=4, timeout=7)
+        assert fake.peak == 4
+        assert set(fake.timeouts) == {7}
+        assert resolved["decision"]["action"] == "SKIP"
+        assert resolved["decision"]["reason"].startswith("draft_error:")
+        assert "target_path" not in resolved["decision"]
+        assert resolved["runbook"]["draft_path"] == "/tmp/draft-runbook.json"
+        assert resolved["runbook"]["target_path"].endswith("runbook/test-memory.json")
+
+
+class TestConfig:
+
+    def test_triage_int_clamps_and_falls_back(self, tmp_path):
+        cfg = tmp_path / "memory-config.json"
+
+        def read(value):
+            cfg.write_text(json.dumps({"triage": {"orchestrate_concurrency": value}}))
+            return _triage_int(str(tmp_path), "orchestrate_concurrency", DEFAULT_CONCURRENCY, 1, 8)
+
+        assert _triage_int(str(tmp_path / "missing"), "orchestrate_concurrency", 4, 1, 8) == 4
+        assert read(2) == 2
+        assert read(64) == 8
+        assert read(0) == 1
+        assert read(True) == DEFAULT_CONCURRENCY
+        assert read("6") == DEFAULT_CONCURRENCY
+        cfg.write_text('{"triage": {"orchestrate_concurrency": Infinity}}')
+        assert _triage_int(str(tmp_path), "orchestrate_concurrency", 4, 1, 8) == 4
+
+
+def test_inprocess_logs_concurrency_ignored(tmp_path):
+    proj, staging = _project(tmp_path)
+    root = proj / ".claude" / "memory"
+    (root / "memory-config.json").write_text(json.dumps({
+        "logging": {"enabled": True, "level": "info"},
+        "triage": {"orchestrate_concurrency": 6},
+    }))
+    result, _ = _run(proj, staging, "--action", "prepare")
+    assert result.returncode == 0, result.stderr
+    events = [json.loads(line) for f in sorted((root / "logs").rglob("*.jsonl"))
+              for line in f.read_text().splitlines()]
+    ignored = [e for e in events if e["event_type"] == "save.concurrency_ignored"]
+    assert [e["data"] for e in ignored] == [{"concurrency": 6, "reason": "inprocess"}]
+
+    proj, staging = _project(tmp_path / "sub")
+    root = proj / ".claude" / "memory"
+    (root / "memory-config.json").write_text(json.dumps({
+        "logging": {"enabled": True, "level": "info"},
+        "triage": {"orchestrate_concurrency": 6, "subprocess_isolation": True},
+    }))
+    result, _ = _run(proj, staging, "--action", "prepare")
+    assert result.returncode == 0, result.stderr
+    assert "save.concurrency_ignored" not in "".join(
+        f.read_text() for f in (root / "logs").rglob("*.jsonl"))
+
+
+def test_concurrent_manifest_matches_sequential(tmp_path):
+    proj_a, staging_a = _project(tmp_path / "a")
+    proj_b, staging_b = _project(tmp_path / "b")
+    seq, seq_s = _run(proj_a, staging_a, "--action", "prepare", "--subprocess", "--concurrency", "1")
+    par, par_s = _run(proj_b, staging_b, "--action", "prepare", "--subprocess", "--concurrency", "6")
+    assert seq.returncode == 0, seq.stderr
+    assert par.returncode == 0, par.stderr
+
+    a, b = json.loads(seq.stdout), json.loads(par.stdout)
+    assert list(a["categories"]) == list(b["categories"])
+    assert _shape(a) == _shape(b)
+    print(f"\n[orchestrate --action prepare --subprocess, 6 categories] "
+          f"concurrency 1 {seq_s * 1000:.0f}ms, concurrency 6 {par_s * 1000:.0f}ms")
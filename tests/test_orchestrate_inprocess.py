@@ -0,0 +1,208 @@
+"""Tests for in-process orchestration (memory_orchestrate.py default mode).
+
+Candidate selection, drafting and writes call memory_candidate /
+memory_draft / memory_write as libraries; --subprocess keeps one child
+process per step. Both modes must produce the same manifest and save
+result. Includes an end-to-end wall-time comparison of the two modes.
+"""
+
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+from conftest import make_decision_memory, write_index, write_memory_file
+from test_memory_orchestrate import make_save_intent, write_intent
+
+SCRIPTS_DIR = Path(__file__).parent.parent / "hooks" / "scripts"
+ORCHESTRATE_SCRIPT = str(SCRIPTS_DIR / "memory_orchestrate.py")
+PYTHON = sys.executable
+
+sys.path.insert(0, str(SCRIPTS_DIR))
+import memory_candidate  # noqa: E402
+from memory_orchestrate import (  # noqa: E402
+    _inprocess_enabled,
+    execute_drafts,
+    run_candidate_selection,
+)
+
+ALL_CATEGORIES = ["decision", "tech_debt", "constraint", "preference",
+                  "session_summary", "runbook"]
+TITLES = {
+    "decision": "Use JWT for authentication",
+    "tech_debt": "Legacy billing cron job",
+    "constraint": "Vendor API rate limit",
+    "preference": "Prefer ruff over flake8",
+    "session_summary": "Orchestrator refactor session",
+    "runbook": "Recover stuck migration lock",
+}
+
+
+def _project(tmp_path, categories=ALL_CATEGORIES):
+    """Project with one existing decision (UPDATE target) and intents for *categories*."""
+    proj = tmp_path / "project"
+    root = proj / ".claude" / "memory"
+    for folder in ["sessions", "decisions", "runbooks", "constraints", "tech-debt", "preferences"]:
+        (root / folder).mkdir(parents=True)
+    existing = make_decision_memory(id_val="use-jwt", title="Use JWT for authentication",
+                                    tags=["auth", "jwt", "security"])
+    write_memory_file(root, existing)
+    write_index(root, existing)
+
+    staging = root / ".staging"
+    staging.mkdir()
+    for cat in categories:
+        action = "update" if cat == "decision" else "create"
+        intent = make_save_intent(cat, title=TITLES[cat], intended_action=action)
+        if cat == "decision":
+            intent["new_info_summary"] = "JWT authentication token expiry changed to 2 hours"
+        if cat == "preference":
+            intent["partial_content"]["content"]["strength"] = "default"
+        write_intent(staging, cat, intent)
+    return proj, staging
+
+
+def _run(proj, staging, *extra):
+    t0 = time.perf_counter()
+    result = subprocess.run(
+        [PYTHON, ORCHESTRATE_SCRIPT, "--staging-dir", str(staging),
+         "--memory-root", ".claude/memory", *extra],
+        capture_output=True, text=True, timeout=120, cwd=str(proj),
+    )
+    return result, time.perf_counter() - t0
+
+
+def _shape(manifest):
+    """Mode-independent view of a manifest (drop draft file names and OCC tokens)."""
+    shape = {}
+    for cat, res in manifest["categories"].items():
+        res = {k: v for k, v in res.items() if k not in ("draft_path", "occ_hash")}
+        if res.get("candidate"):
+            res["candidate"] = {k: v for k, v in res["candidate"].items() if k != "occ_token"}
+        shape[cat] = res
+    return shape
+
+
+class TestModesAgree:
+
+    def test_prepare_manifests_match(self, tmp_path):
+        proj_a, staging_a = _project(tmp_path / "a")
+        proj_b, staging_b = _project(tmp_path / "b")
+        inproc, _ = _run(proj_a, staging_a, "--action", "prepare")
+        subproc, _ = _run(proj_b, staging_b, "--action", "prepare", "--subprocess")
+        assert inproc.returncode == 0, inproc.stderr
+        assert subproc.returncode == 0, subproc.stderr
+
+        a, b = json.loads(inproc.stdout), json.loads(subproc.stdout)
+        assert _shape(a) == _shape(b)
+        assert a["categories"]["decision"]["action"] == "UPDATE"
+        assert a["categories"]["decision"]["occ_hash"]
+        for cat, res in a["categories"].items():
+            draft = json.loads(Path(res["draft_path"]).read_text())
+            assert draft["category"] == cat
+
+    def test_run_saves_match(self, tmp_path):
+        proj_a, staging_a = _project(tmp_path / "a")
+        proj_b, staging_b = _project(tmp_path / "b")
+        inproc, _ = _run(proj_a, staging_a, "--action", "run")
+        subproc, _ = _run(proj_b, staging_b, "--action", "run", "--subprocess")
+        assert inproc.returncode == 0, inproc.stderr
+        assert subproc.returncode == 0, subproc.stderr
+
+        # stdout is the prepare manifest line followed by the commit result line
+        a = json.loads(inproc.stdout.strip().splitlines()[-1])
+        b = json.loads(subproc.stdout.strip().splitlines()[-1])
+        assert a["status"] == b["status"] == "success"
+        assert a["saved"] == b["saved"]
+        assert len(a["saved"]) == len(ALL_CATEGORIES)
+
+        for proj in (proj_a, proj_b):
+            root = proj / ".claude" / "memory"
+            jwt = json.loads((root / "decisions" / "use-jwt.json").read_text())
+            assert jwt["times_updated"] == 1
+            assert (root / "runbooks" / "recover-stuck-migration-lock.json").exists()
+
+    def test_config_opts_into_subprocess(self, tmp_path):
+        root = tmp_path / ".claude" / "memory"
+        root.mkdir(parents=True)
+        assert _inprocess_enabled(str(root)) is True
+        (root / "memory-config.json").write_text(
+            json.dumps({"triage": {"subprocess_isolation": True}}))
+        assert _inprocess_enabled(str(root)) is False
+        (root / "memory-config.json").write_text(
+            json.dumps({"triage": {"subprocess_isolation": "yes"}}))
+        assert _inprocess_enabled(str(root)) is True
+
+
+class TestInProcessSteps:
+
+    def test_candidate_index_read_once(self, tmp_path, monkeypatch):
+        proj, staging = _project(tmp_path)
+        monkeypatch.chdir(proj)
+        intents = {cat: json.loads((staging / f"intent-{cat}.json").read_text())
+                   for cat in ALL_CATEGORIES}
+        real = memory_candidate.read_index_lines
+        with patch.object(memory_candidate, "read_index_lines", side_effect=real) as spy, \
+                patch("memory_orchestrate.subprocess.run") as mock_run:
+            candidates = run_candidate_selection(
+                intents, str(staging), str(SCRIPTS_DIR), PYTHON,
+                memory_root=".claude/memory", inprocess=True,
+            )
+        assert spy.call_count == 1
+        mock_run.assert_not_called()
+        assert candidates["decision"]["structural_cud"] == "UPDATE"
+        assert candidates["decision"]["file_hash"]
+        assert candidates["runbook"]["pre_action"] == "CREATE"
+
+    def test_invalid_lifecycle_hint_fails_like_cli(self, tmp_path, monkeypatch):
+        proj, staging = _project(tmp_path, ["tech_debt"])
+        monkeypatch.chdir(proj)
+        intent = make_save_intent("tech_debt", title=TITLES["tech_debt"])
+        intent["lifecycle_hints"] = ["exploded"]
+        candidates = run_candidate_selection(
+            {"tech_debt": intent}, str(staging), str(SCRIPTS_DIR), PYTHON,
+            memory_root=".claude/memory", inprocess=True,
+        )
+        assert candidates == {"tech_debt": None}
+
+    def test_missing_index_fails_every_category(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        staging = tmp_path / "staging"
+        staging.mkdir()
+        intent = make_save_intent("decision")
+        candidates = run_candidate_selection(
+            {"decision": intent}, str(staging), str(SCRIPTS_DIR), PYTHON,
+            memory_root=str(tmp_path / "nowhere"), inprocess=True,
+        )
+        assert candidates == {"decision": None}
+
+    def test_draft_validation_error_becomes_skip(self, tmp_path):
+        staging = tmp_path / "staging"
+        staging.mkdir()
+        intent = make_save_intent("decision")
+        intent["partial_content"]["content"] = {"status": "not-a-status"}
+        resolved = {"decision": {"action": "CREATE"}}
+        execute_drafts({"decision": intent}, resolved, str(staging),
+                       str(SCRIPTS_DIR), PYTHON, inprocess=True)
+        assert resolved["decision"]["action"] == "SKIP"
+        assert resolved["decision"]["reason"].startswith("draft_failed: VALIDATION_ERROR")
+
+
+def test_benchmark_end_to_end_wall_time(tmp_path):
+    """Six-category --action run: one process per step vs in-process."""
+    runs = 3
+    timings = {"subprocess": [], "inprocess": []}
+    for i in range(runs):
+        for mode, extra in (("subprocess", ["--subprocess"]), ("inprocess", [])):
+            proj, staging = _project(tmp_path / f"{mode}-{i}")
+            result, elapsed = _run(proj, staging, "--action", "run", *extra)
+            assert result.returncode == 0, result.stderr
+            timings[mode].append(elapsed)
+
+    old, new = min(timings["subprocess"]), min(timings["inprocess"])
+    print(f"\n[orchestrate --action run, 6 categories, best of {runs}] "
+          f"subprocess {old * 1000:.0f}ms, in-process {new * 1000:.0f}ms "
+          f"({old / new:.1f}x)")
+    assert new < old
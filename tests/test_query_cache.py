@@ -0,0 +1,162 @@
+"""Tests for the retrieval query-result cache (.retrieval-cache.sqlite3).
+
+Unit tests cover key normalization, negative entries, generation
+invalidation and LRU trimming; integration tests run memory_retrieve.py
+and check hit/miss reporting in the retrieval.search event.
+"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SCRIPTS_DIR = Path(__file__).parent.parent / "hooks" / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from memory_search_engine import (
+    HAS_FTS5,
+    QUERY_CACHE_FILENAME,
+    query_cache_get,
+    query_cache_key,
+    query_cache_put,
+)
+from conftest import (
+    make_decision_memory,
+    make_preference_memory,
+    write_index,
+    write_memory_file,
+)
+
+PYTHON = sys.executable
+RETRIEVE_SCRIPT = str(SCRIPTS_DIR / "memory_retrieve.py")
+
+RESULT = {
+    "title": "Use JWT for authentication",
+    "tags": {"auth", "jwt"},
+    "path": ".claude/memory/decisions/use-jwt.json",
+    "category": "DECISION",
+    "score": -4.2,
+    "raw_bm25": -3.2,
+    "body_bonus": 1,
+}
+
+
+class TestQueryCacheKey:
+
+    def test_token_order_and_duplicates_ignored(self):
+        a = query_cache_key("g1", ["jwt", "auth", "jwt"], 10, 3)
+        b = query_cache_key("g1", ["auth", "jwt"], 10, 3)
+        assert a == b
+
+    def test_generation_and_params_change_key(self):
+        base = query_cache_key("g1", ["jwt"], 10, 3)
+        assert query_cache_key("g2", ["jwt"], 10, 3) != base
+        assert query_cache_key("g1", ["jwt"], 15, 15) != base
+        assert query_cache_key("g1", ["jwt", "auth"], 10, 3) != base
+
+
+class TestQueryCacheStore:
+
+    def test_miss_without_cache_file(self, memory_root):
+        assert query_cache_get(memory_root, "nope") is None
+
+    def test_roundtrip_restores_tag_sets(self, memory_root):
+        assert query_cache_put(memory_root, "k", "g1", [RESULT]) is True
+        assert query_cache_get(memory_root, "k") == [RESULT]
+
+    def test_negative_entry_is_a_hit(self, memory_root):
+        query_cache_put(memory_root, "empty", "g1", [])
+        assert query_cache_get(memory_root, "empty") == []
+
+    def test_new_generation_drops_old_entries(self, memory_root):
+        query_cache_put(memory_root, "old", "g1", [RESULT])
+        query_cache_put(memory_root, "new", "g2", [])
+        assert query_cache_get(memory_root, "old") is None
+        assert query_cache_get(memory_root, "new") == []
+
+    def test_lru_trim_keeps_recently_used(self, memory_root):
+        query_cache_put(memory_root, "a", "g1", [], max_entries=2)
+        query_cache_put(memory_root, "b", "g1", [], max_entries=2)
+        assert query_cache_get(memory_root, "a") == []  # refresh "a"
+        query_cache_put(memory_root, "c", "g1", [], max_entries=2)
+        assert query_cache_get(memory_root, "b") is None
+        assert query_cache_get(memory_root, "a") == []
+        assert query_cache_get(memory_root, "c") == []
+
+    def test_corrupt_cache_fails_open(self, memory_root):
+        (memory_root / QUERY_CACHE_FILENAME).write_bytes(b"not sqlite")
+        assert query_cache_get(memory_root, "k") is None
+        assert query_cache_put(memory_root, "k", "g1", [RESULT]) is False
+
+
+@pytest.mark.skipif(not HAS_FTS5, reason="FTS5 not available")
+class TestRetrievalCacheIntegration:
+
+    PROMPT = "How does JWT authentication work in this project?"
+
+    def _setup(self, memory_project, query_cache=None):
+        root = memory_project / ".claude" / "memory"
+        mems = [make_decision_memory(), make_preference_memory()]
+        for m in mems:
+            write_memory_file(root, m)
+        write_index(root, *mems)
+        config = {"logging": {"enabled": True, "level": "debug"}}
+        if query_cache is not None:
+            config["retrieval"] = {"query_cache": query_cache}
+        (root / "memory-config.json").write_text(json.dumps(config))
+        return root
+
+    def _run(self, memory_project, prompt=None):
+        env = os.environ.copy()
+        env.pop("ANTHROPIC_API_KEY", None)
+        return subprocess.run(
+            [PYTHON, RETRIEVE_SCRIPT],
+            input=json.dumps({"prompt": prompt or self.PROMPT, "cwd": str(memory_project)}),
+            capture_output=True, text=True, timeout=15, env=env,
+        )
+
+    def _search_events(self, root):
+        events = []
+        for f in sorted((root / "logs").rglob("*.jsonl")):
+            for line in f.read_text(encoding="utf-8").splitlines():
+                entry = json.loads(line)
+                if entry.get("event_type") == "retrieval.search":
+                    events.append(entry["data"])
+        return events
+
+    def test_hit_after_miss_with_identical_output(self, memory_project):
+        root = self._setup(memory_project)
+        first = self._run(memory_project)
+        # Same token set, different wording/order
+        second = self._run(memory_project, "jwt authentication: how does this project work?")
+        assert first.stdout == second.stdout
+        assert "use-jwt" in first.stdout
+        assert [e["cache"] for e in self._search_events(root)] == ["miss", "hit"]
+
+    def test_negative_result_cached(self, memory_project):
+        root = self._setup(memory_project)
+        prompt = "kubernetes helm chart rollout strategy"
+        self._run(memory_project, prompt)
+        self._run(memory_project, prompt)
+        events = self._search_events(root)
+        assert [e["cache"] for e in events] == ["miss", "hit"]
+        assert events[1]["candidates_found"] == 0
+
+    def test_index_write_invalidates(self, memory_project):
+        root = self._setup(memory_project)
+        self._run(memory_project)
+        # Any memory write rewrites index.md (new generation)
+        write_index(root, make_decision_memory(), make_preference_memory())
+        os.utime(root / "index.md", ns=(0, os.stat(root / "index.md").st_mtime_ns + 1_000_000))
+        self._run(memory_project)
+        assert [e["cache"] for e in self._search_events(root)] == ["miss", "miss"]
+
+    def test_disabled_by_config(self, memory_project):
+        root = self._setup(memory_project, {"enabled": False})
+        self._run(memory_project)
+        self._run(memory_project)
+        assert [e["cache"] for e in self._search_events(root)] == ["disabled", "disabled"]
+        assert not (root / QUERY_CACHE_FILENAME).exists()
@@ -0,0 +1,203 @@
+"""Tests for the retention sweep (memory_enforce.py --retention).
+
+Active memories whose updated_at is older than their category's
+retention_days are retired, then each category is capped at
+max_memories_per_category (least recently updated retired first). The
+candidates are the files in each category folder, with timestamps from
+the metadata sidecar where it has a fresh row (files without one are
+parsed and backfilled); without a sidecar the sweep falls back to
+scanning the folders.
+"""
+
+import json
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from unittest import mock
+
+from conftest import make_decision_memory, write_index, write_memory_file
+
+SCRIPTS_DIR = Path(__file__).parent.parent / "hooks" / "scripts"
+ENFORCE_SCRIPT = str(SCRIPTS_DIR / "memory_enforce.py")
+PYTHON = sys.executable
+
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from memory_enforce import _read_retention_config, enforce_retention  # noqa: E402
+from memory_search_engine import (  # noqa: E402
+    load_memory_meta,
+    read_index_lines,
+    rebuild_memory_meta,
+    record_memory_meta,
+)
+
+NOW = datetime(2026, 3, 1, tzinfo=timezone.utc)
+
+
+def _decisions(root, ages_days, sidecar=True):
+    """Write one decision per age (days before NOW); returns their ids."""
+    mems = []
+    for i, age in enumerate(ages_days):
+        mem = make_decision_memory(id_val=f"decision-{i}", title=f"Decision number {i}")
+        stamp = NOW.timestamp() - age * 86400
+        mem["updated_at"] = datetime.fromtimestamp(stamp, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        mem["created_at"] = mem["updated_at"]
+        write_memory_file(root, mem)
+        mems.append(mem)
+    write_index(root, *mems)
+    if sidecar:
+        rebuild_memory_meta(root, [(root / "decisions" / f"{m['id']}.json", m) for m in mems])
+    return [m["id"] for m in mems]
+
+
+def _config(root, retention_days=0, cap=100):
+    (root / "memory-config.json").write_text(json.dumps({
+        "categories": {"decision": {"retention_days": retention_days}},
+        "max_memories_per_category": cap,
+    }))
+
+
+def _status(root, mem_id):
+    return json.loads((root / "decisions" / f"{mem_id}.json").read_text())["record_status"]
+
+
+class TestSweep:
+
+    def test_expired_memories_retired(self, memory_project):
+        root = memory_project / ".claude" / "memory"
+        ids = _decisions(root, [400, 10, 200])
+        _config(root, retention_days=180)
+        result = enforce_retention(root, now=NOW)
+        assert result["retired"] == {"decision": ["decision-0", "decision-2"]}
+        assert result["expired"] == 2
+        assert result["source"] == "sidecar"
+        assert [_status(root, i) for i in ids] == ["retired", "active", "retired"]
+        index = "\n".join(read_index_lines(root / "index.md"))
+        assert "decision-0.json" not in index and "decision-1.json" in index
+
+    def test_cap_retires_least_recently_updated(self, memory_project):
+        root = memory_project / ".claude" / "memory"
+        _decisions(root, [5, 50, 1, 20])
+        _config(root, cap=2)
+        result = enforce_retention(root, now=NOW)
+        assert result["retired"] == {"decision": ["decision-1", "decision-3"]}
+        assert result["over_cap"] == 2
+        assert _status(root, "decision-0") == _status(root, "decision-2") == "active"
+
+    def test_expiry_counts_before_cap(self, memory_project):
+        root = memory_project / ".claude" / "memory"
+        _decisions(root, [400, 3, 2, 1])
+        _config(root, retention_days=30, cap=2)
+        result = enforce_retention(root, now=NOW)
+        assert result["retired"]["decision"] == ["decision-0", "decision-1"]
+        assert (result["expired"], result["over_cap"]) == (1, 1)
+
+    def test_permanent_and_uncapped_is_noop(self, memory_project):
+        root = memory_project / ".claude" / "memory"
+        _decisions(root, [4000])
+        _config(root, retention_days=0, cap=0)
+        assert enforce_retention(root, now=NOW)["retired"] == {}
+        assert _status(root, "decision-0") == "active"
+
+    def test_scan_fallback_without_sidecar(self, memory_project):
+        root = memory_project / ".claude" / "memory"
+        _decisions(root, [400, 10], sidecar=False)
+        _config(root, retention_days=180)
+        result = enforce_retention(root, now=NOW)
+        assert result["source"] == "scan"
+        assert result["retired"] == {"decision": ["decision-0"]}
+
+    def test_partial_sidecar_still_sweeps_older_memories(self, memory_project):
+        # Store from before the sidecar: the first save creates it with one row
+        root = memory_project / ".claude" / "memory"
+        _decisions(root, [400, 10, 300], sidecar=False)
+        fresh = make_decision_memory(id_val="decision-new", title="A new decision")
+        fresh["updated_at"] = fresh["created_at"] = "2026-02-28T00:00:00Z"
+        write_memory_file(root, fresh)
+        assert record_memory_meta(root, root / "decisions" / "decision-new.json", fresh)
+        _config(root, retention_days=180, cap=2)
+        result = enforce_retention(root, now=NOW)
+        assert result["source"] == "sidecar"
+        assert result["retired"] == {"decision": ["decision-0", "decision-2"]}
+        assert (result["expired"], result["over_cap"]) == (2, 0)
+        assert _status(root, "decision-1") == _status(root, "decision-new") == "active"
+
+    def test_parsed_files_are_backfilled_into_sidecar(self, memory_project):
+        root = memory_project / ".claude" / "memory"
+        _decisions(root, [10, 20, 30], sidecar=False)
+        seed = make_decision_memory(id_val="decision-new", title="A new decision")
+        write_memory_file(root, seed)
+        assert record_memory_meta(root, root / "decisions" / "decision-new.json", seed)
+        _config(root, retention_days=180)
+        rel = [f".claude/memory/decisions/decision-{i}.json" for i in range(3)]
+        assert load_memory_meta(root, rel) == {}
+
+        enforce_retention(root, dry_run=True, now=NOW)
+        assert load_memory_meta(root, rel) == {}  # Dry runs write nothing
+        enforce_retention(root, now=NOW)
+        assert set(load_memory_meta(root, rel)) == set(rel)
+
+        # The next sweep takes every timestamp from the sidecar
+        real_open = open
+        def no_json_reads(file, *args, **kwargs):
+            assert "/decisions/" not in str(file), file
+            return real_open(file, *args, **kwargs)
+        with mock.patch("builtins.open", no_json_reads):
+            assert enforce_retention(root, now=NOW)["retired"] == {}
+
+    def test_stale_sidecar_row_rechecked(self, memory_project):
+        # Edited after the sidecar was written: the file's own updated_at wins
+        root = memory_project / ".claude" / "memory"
+        _decisions(root, [400])
+        path = root / "decisions" / "decision-0.json"
+        data = json.loads(path.read_text())
+        data["updated_at"] = "2026-02-28T00:00:00Z"
+        path.write_text(json.dumps(data, indent=2))
+        _config(root, retention_days=180)
+        assert enforce_retention(root, now=NOW)["retired"] == {}
+        assert _status(root, "decision-0") == "active"
+
+    def test_dry_run_changes_nothing(self, memory_project):
+        root = memory_project / ".claude" / "memory"
+        _decisions(root, [400])
+        _config(root, retention_days=180)
+        result = enforce_retention(root, dry_run=True, now=NOW)
+        assert result["dry_run"] is True
+        assert result["retired"] == {"decision": ["decision-0"]}
+        assert _status(root, "decision-0") == "active"
+
+
+class TestConfig:
+
+    def test_defaults(self, tmp_path):
+        retention, cap = _read_retention_config(tmp_path)
+        assert set(retention.values()) == {0}
+        assert cap == 100
+
+    def test_invalid_values_fall_back(self, tmp_path, capsys):
+        (tmp_path / "memory-config.json").write_text(json.dumps({
+            "categories": {"decision": {"retention_days": -3},
+                           "runbook": {"retention_days": True},
+                           "constraint": {"retention_days": 30}},
+            "max_memories_per_category": "lots",
+        }))
+        retention, cap = _read_retention_config(tmp_path)
+        assert (retention["decision"], retention["runbook"], retention["constraint"]) == (0, 0, 30)
+        assert cap == 100
+        assert capsys.readouterr().err.count("[WARN]") == 3
+
+
+def test_cli_retention(memory_project):
+    root = memory_project / ".claude" / "memory"
+    _decisions(root, [5000, 0])
+    _config(root, retention_days=365)
+    result = subprocess.run([PYTHON, ENFORCE_SCRIPT, "--retention"], capture_output=True,
+                            text=True, timeout=30, cwd=str(memory_project))
+    assert result.returncode == 0, result.stderr
+    assert json.loads(result.stdout)["retired"] == {"decision": ["decision-0"]}
+    assert "[RETENTION] Retired decision-0" in result.stderr
+
+    missing = subprocess.run([PYTHON, ENFORCE_SCRIPT], capture_output=True, text=True,
+                             timeout=30, cwd=str(memory_project))
+    assert missing.returncode == 2
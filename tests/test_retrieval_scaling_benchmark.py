@@ -0,0 +1,98 @@
+"""Retrieval scaling benchmark (tests/bench_retrieval_scaling.py).
+
+Runs the real hook entry point against generated corpora. 100 and 1k
+memories run by default; 10k and 100k need CLAUDE_MEMORY_BENCH=1.
+"""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+TESTS_DIR = Path(__file__).parent
+sys.path.insert(0, str(TESTS_DIR.parent / "hooks" / "scripts"))
+
+from memory_search_engine import HAS_FTS5
+import bench_retrieval_scaling as bench
+from conftest import HEAVY_BENCH
+
+pytestmark = pytest.mark.skipif(not HAS_FTS5, reason="FTS5 not available")
+
+WARM_PHASES = {"index_load", "query", "body_scoring", "output", "total"}
+COLD_PHASES = WARM_PHASES | {"index_parse", "fts_build"}
+
+
+class TestCorpusGenerator:
+
+    def test_generates_indexed_tree(self, tmp_path):
+        root = bench.generate_corpus(tmp_path / "proj", 60)
+        assert len(list(root.rglob("*.json"))) == 60 + 1  # + memory-config.json
+        lines = [l for l in (root / "index.md").read_text().splitlines() if l.startswith("- [")]
+        assert len(lines) == 60
+        assert (root / ".index-meta.sqlite3").exists()
+
+
+class TestReport:
+
+    def test_percentile_nearest_rank(self):
+        values = list(range(1, 101))
+        assert bench.percentile(values, 50) == 50
+        assert bench.percentile(values, 99) == 99
+        assert bench.percentile([7.0], 95) == 7.0
+
+    def test_compare_flags_only_real_regressions(self):
+        def report(p50):
+            return {"sizes": {"100": {"warm": {
+                "query": {"p50": p50, "p95": p50},
+                "total": {"p50": p50 * 10, "p95": p50 * 10},
+            }, "cold": {}}}}
+        rows = bench.compare(report(2.0), report(1.0))
+        flagged = {(r["phase"], r["stat"]) for r in rows if r["regression"]}
+        assert flagged == {("query", "p50"), ("query", "p95"),
+                           ("total", "p50"), ("total", "p95")}
+        # 0.2ms -> 0.4ms is 2x but below the absolute noise floor
+        rows = bench.compare(report(0.04), report(0.02))
+        assert [r for r in rows if r["phase"] == "query" and r["regression"]] == []
+        assert bench.compare(report(1.0), {"sizes": {}}) == []
+
+    def test_cli_writes_baseline_and_compares(self, tmp_path):
+        out = tmp_path / "baseline.json"
+        script = str(TESTS_DIR / "bench_retrieval_scaling.py")
+        first = subprocess.run(
+            [sys.executable, script, "--sizes", "50", "--iterations", "1", "--out", str(out)],
+            capture_output=True, text=True, timeout=120,
+        )
+        assert first.returncode == 0, first.stderr
+        report = json.loads(out.read_text())
+        assert report["schema"] == bench.SCHEMA_VERSION
+        assert set(report["sizes"]) == {"50"}
+
+        second = subprocess.run(
+            [sys.executable, script, "--sizes", "50", "--iterations", "1",
+             "--compare", str(out), "--threshold", "1000"],
+            capture_output=True, text=True, timeout=120,
+        )
+        assert second.returncode == 0, second.stderr
+        assert "0 regression(s)" in second.stdout
+
+
+@pytest.mark.parametrize("size", [
+    100,
+    1_000,
+    pytest.param(10_000, marks=pytest.mark.skipif(not HEAVY_BENCH, reason="set CLAUDE_MEMORY_BENCH=1")),
+    pytest.param(100_000, marks=pytest.mark.skipif(not HEAVY_BENCH, reason="set CLAUDE_MEMORY_BENCH=1")),
+])
+def test_scaling(size, tmp_path):
+    result = bench.bench_size(size, iterations=3, workdir=tmp_path)
+    print("\n" + bench.format_report({"sizes": {str(size): result}}))
+
+    assert set(result["warm"]) == WARM_PHASES
+    assert set(result["cold"]) == COLD_PHASES
+    warm, cold = result["warm"], result["cold"]
+    assert warm["total"]["samples"] == 3 * len(bench.PROMPTS)
+    for stats in list(warm.values()) + list(cold.values()):
+        assert stats["p50"] <= stats["p95"] <= stats["p99"]
+    # The persistent index makes warm index loads cheaper than cold rebuilds
+    assert warm["index_load"]["p50"] < cold["index_load"]["p50"]
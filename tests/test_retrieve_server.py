@@ -0,0 +1,389 @@
+"""Tests for the opt-in resident retrieval server and its thin client.
+
+memory_retrieve_client.py is the UserPromptSubmit entry point; with
+retrieval.resident_server.enabled it forwards to memory_retrieve_server.py
+over a Unix socket and falls back to in-process retrieval otherwise.
+"""
+
+import io
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+SCRIPTS_DIR = Path(__file__).parent.parent / "hooks" / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+import memory_retrieve
+from memory_retrieve_client import (
+    FORWARDED_ENV_KEYS,
+    HOOK_TIMEOUT_SECONDS,
+    INTERPRETER_FLAGS,
+    MAX_RESPONSE_TIMEOUT_SECONDS,
+    encode_request,
+    forward,
+    response_timeout,
+    spawn_server,
+)
+from memory_retrieve_server import parse_request
+from memory_search_engine import HAS_FTS5
+from conftest import (
+    make_bulk_index_lines,
+    make_decision_memory,
+    make_preference_memory,
+    write_index,
+    write_memory_file,
+)
+
+PYTHON = sys.executable
+CLIENT_SCRIPT = str(SCRIPTS_DIR / "memory_retrieve_client.py")
+SERVER_SCRIPT = str(SCRIPTS_DIR / "memory_retrieve_server.py")
+RETRIEVE_SCRIPT = str(SCRIPTS_DIR / "memory_retrieve.py")
+HOOKS_JSON = Path(__file__).parent.parent / "hooks" / "hooks.json"
+# hooks.json starts the client without site-packages
+CLIENT_FLAGS = ["-S"]
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(os, "fork") or not HAS_FTS5,
+    reason="resident server needs fork/AF_UNIX and FTS5",
+)
+
+PROMPT = "How does JWT authentication work in this project?"
+
+
+@pytest.fixture
+def runtime_dir():
+    """Short 0700 dir used as XDG_RUNTIME_DIR (AF_UNIX paths are length-limited)."""
+    d = tempfile.mkdtemp(prefix="cm-")
+    os.chmod(d, 0o700)
+    yield d
+    shutil.rmtree(d, ignore_errors=True)
+
+
+def _env(runtime_dir):
+    env = os.environ.copy()
+    env["XDG_RUNTIME_DIR"] = runtime_dir
+    env.pop("ANTHROPIC_API_KEY", None)
+    return env
+
+
+def _socket_path(runtime_dir):
+    out = subprocess.run(
+        [PYTHON, "-c", "from memory_staging_utils import get_retrieve_socket_path as g; print(g())"],
+        capture_output=True, text=True, cwd=str(SCRIPTS_DIR), env=_env(runtime_dir), check=True,
+    )
+    return out.stdout.strip()
+
+
+def _setup_project(memory_project, resident=None):
+    root = memory_project / ".claude" / "memory"
+    mems = [make_decision_memory(), make_preference_memory()]
+    for m in mems:
+        write_memory_file(root, m)
+    write_index(root, *mems)
+    config = {"retrieval": {"resident_server": resident or {"enabled": False}}}
+    (root / "memory-config.json").write_text(json.dumps(config))
+    return root
+
+
+def _hook_input(memory_project, prompt=PROMPT):
+    return json.dumps({"prompt": prompt, "cwd": str(memory_project)})
+
+
+def _request(memory_project, prompt=PROMPT):
+    return _hook_input(memory_project, prompt).encode("utf-8")
+
+
+def _run(script, memory_project, runtime_dir, prompt=PROMPT):
+    flags = CLIENT_FLAGS if script == CLIENT_SCRIPT else []
+    return subprocess.run(
+        [PYTHON, *flags, script], input=_hook_input(memory_project, prompt),
+        capture_output=True, text=True, timeout=15,
+        cwd=str(memory_project), env=_env(runtime_dir),
+    )
+
+
+def _wait_for(predicate, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+@pytest.fixture
+def server(runtime_dir):
+    """Start a server on the per-user socket; yields (socket_path, proc)."""
+    sock = _socket_path(runtime_dir)
+    proc = subprocess.Popen(
+        [PYTHON, SERVER_SCRIPT, "--socket", sock, "--idle-timeout", "30"],
+        env=_env(runtime_dir), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    assert _wait_for(lambda: os.path.exists(sock)), "server did not start"
+    yield sock, proc
+    proc.terminate()
+    proc.wait(timeout=10)
+
+
+class TestClientFallback:
+
+    def test_disabled_runs_in_process(self, memory_project, runtime_dir):
+        _setup_project(memory_project)
+        direct = _run(RETRIEVE_SCRIPT, memory_project, runtime_dir)
+        via_client = _run(CLIENT_SCRIPT, memory_project, runtime_dir)
+        assert via_client.returncode == direct.returncode == 0
+        assert via_client.stdout == direct.stdout
+        assert "use-jwt" in via_client.stdout
+        assert not os.path.exists(_socket_path(runtime_dir))
+
+    def test_enabled_without_server_falls_back_and_spawns(self, memory_project, runtime_dir):
+        _setup_project(memory_project, {"enabled": True, "idle_timeout_seconds": 2})
+        sock = _socket_path(runtime_dir)
+        result = _run(CLIENT_SCRIPT, memory_project, runtime_dir)
+        assert result.returncode == 0
+        assert "use-jwt" in result.stdout
+        # Background server comes up for the next prompt, then idles out
+        assert _wait_for(lambda: os.path.exists(sock))
+        assert _wait_for(lambda: not os.path.exists(sock), timeout=15)
+
+    def test_empty_stdin_is_noop(self, memory_project, runtime_dir):
+        result = subprocess.run(
+            [PYTHON, *CLIENT_FLAGS, CLIENT_SCRIPT], input="", capture_output=True, text=True,
+            timeout=15, cwd=str(memory_project), env=_env(runtime_dir),
+        )
+        assert result.returncode == 0
+        assert result.stdout == ""
+
+
+class TestResidentServer:
+
+    def test_server_matches_in_process_output(self, memory_project, runtime_dir, server):
+        _setup_project(memory_project, {"enabled": True})
+        direct = _run(RETRIEVE_SCRIPT, memory_project, runtime_dir)
+        via_server = _run(CLIENT_SCRIPT, memory_project, runtime_dir)
+        assert via_server.returncode == direct.returncode == 0
+        assert via_server.stdout == direct.stdout
+
+    def test_forward_reports_exit_code_and_output(self, memory_project, server):
+        _setup_project(memory_project, {"enabled": True})
+        sock, _ = server
+        reply = forward(sock, _request(memory_project))
+        assert reply["exit_code"] == 0
+        assert b"use-jwt" in reply["stdout"]
+
+        reply = forward(sock, _request(memory_project, "hi"))
+        assert reply == {"stdout": b"", "stderr": b"", "exit_code": 0}
+
+    def test_requests_do_not_leak_state(self, memory_project, tmp_path, server):
+        """Warm state is per memory root: another project's index is not reused."""
+        _setup_project(memory_project, {"enabled": True})
+        sock, _ = server
+        other = tmp_path / "other"
+        (other / ".claude" / "memory").mkdir(parents=True)
+        (other / ".claude" / "memory" / "memory-config.json").write_text(
+            json.dumps({"retrieval": {"resident_server": {"enabled": True}}}))
+        first = forward(sock, _request(memory_project))
+        second = forward(sock, _request(other))
+        assert b"use-jwt" in first["stdout"]
+        assert second["stdout"] == b""
+
+    def test_declines_project_without_resident_mode(self, memory_project, runtime_dir, server):
+        _setup_project(memory_project)
+        sock, _ = server
+        assert forward(sock, _request(memory_project)) is None
+        direct = _run(RETRIEVE_SCRIPT, memory_project, runtime_dir)
+        via_client = _run(CLIENT_SCRIPT, memory_project, runtime_dir)
+        assert via_client.stdout == direct.stdout
+        assert "use-jwt" in via_client.stdout
+
+    def test_index_change_is_picked_up(self, memory_project, server):
+        root = _setup_project(memory_project, {"enabled": True})
+        sock, _ = server
+        assert b"use-jwt" in forward(sock, _request(memory_project))["stdout"]
+        write_index(root, make_preference_memory())
+        assert b"use-jwt" not in forward(sock, _request(memory_project))["stdout"]
+
+    def test_unforwarded_env_key_is_malformed(self, server):
+        import socket as _socket
+        sock, _ = server
+        s = _socket.socket(_socket.AF_UNIX, _socket.SOCK_STREAM)
+        s.connect(sock)
+        s.sendall(b"/tmp\0PATH=/bin\0\0{}")
+        s.shutdown(_socket.SHUT_WR)
+        assert s.recv(10) == b""
+        s.close()
+
+    def test_malformed_request_gets_no_reply(self, server):
+        import socket as _socket
+        sock, _ = server
+        s = _socket.socket(_socket.AF_UNIX, _socket.SOCK_STREAM)
+        s.connect(sock)
+        s.sendall(b"not json")
+        s.shutdown(_socket.SHUT_WR)
+        assert s.recv(10) == b""
+        s.close()
+
+    def test_second_server_exits_immediately(self, runtime_dir, server):
+        sock, proc = server
+        second = subprocess.run(
+            [PYTHON, SERVER_SCRIPT, "--socket", sock], env=_env(runtime_dir),
+            capture_output=True, timeout=10,
+        )
+        assert second.returncode == 0
+        assert proc.poll() is None
+        assert os.path.exists(sock)
+
+    def test_idle_timeout_removes_socket(self, runtime_dir):
+        sock = _socket_path(runtime_dir)
+        proc = subprocess.run(
+            [PYTHON, SERVER_SCRIPT, "--socket", sock, "--idle-timeout", "0.5"],
+            env=_env(runtime_dir), capture_output=True, timeout=15,
+        )
+        assert proc.returncode == 0
+        assert not os.path.exists(sock)
+
+
+class TestProtocol:
+
+    def test_request_forwards_only_listed_env_keys(self, monkeypatch):
+        monkeypatch.setenv("ANTHROPIC_API_KEY", "sk-test")
+        monkeypatch.setenv("SECRET_TOKEN", "nope")
+        cwd, env, stdin = parse_request(encode_request(b'{"prompt": "x"}'))
+        assert cwd == os.getcwd()
+        assert env["ANTHROPIC_API_KEY"] == "sk-test"
+        assert set(env) <= set(FORWARDED_ENV_KEYS)
+        assert stdin == '{"prompt": "x"}'
+
+    def test_response_timeout_fits_hook_budget(self):
+        hooks = json.loads(HOOKS_JSON.read_text())
+        prompt_hook = hooks["hooks"]["UserPromptSubmit"][0]["hooks"][0]
+        assert prompt_hook["timeout"] == HOOK_TIMEOUT_SECONDS
+        assert "python3 -S " in prompt_hook["command"]
+        assert response_timeout({"response_timeout_seconds": 60}) == MAX_RESPONSE_TIMEOUT_SECONDS
+        assert response_timeout({"response_timeout_seconds": 1.5}) == 1.5
+        assert response_timeout({"response_timeout_seconds": True}) < MAX_RESPONSE_TIMEOUT_SECONDS
+        # A timed-out request still leaves the in-process fallback its 10 s
+        assert HOOK_TIMEOUT_SECONDS - MAX_RESPONSE_TIMEOUT_SECONDS >= 10
+
+
+    def test_client_sees_the_plain_interpreter_path(self, tmp_path):
+        # PYTHONPATH and the user site (where a NumPy may live) survive -S
+        env = dict(os.environ, PYTHONPATH=str(tmp_path))
+        show = "import json, sys; print(json.dumps(sys.path))"
+        plain = subprocess.run([PYTHON, "-c", show], env=env, capture_output=True,
+                               text=True, check=True)
+        client = subprocess.run(
+            [PYTHON, *CLIENT_FLAGS, "-c",
+             f"import sys; sys.path.insert(0, {str(SCRIPTS_DIR)!r});"
+             f"import memory_retrieve_client as c; c.enable_site(); {show}"],
+            env=env, capture_output=True, text=True, check=True)
+        # "" (cwd) is made absolute by site.main(); the scripts dir is ours
+        skip = {"", os.getcwd(), str(SCRIPTS_DIR)}
+        expected = [p for p in json.loads(plain.stdout) if p not in skip]
+        assert str(tmp_path) in expected
+        assert [p for p in json.loads(client.stdout) if p not in skip] == expected
+
+    def test_server_spawned_with_client_flags(self):
+        assert tuple(CLIENT_FLAGS) == INTERPRETER_FLAGS
+        with patch("subprocess.Popen") as popen:
+            spawn_server("/tmp/x.sock", 5)
+        cmd = popen.call_args[0][0]
+        assert cmd[1:1 + len(INTERPRETER_FLAGS)] == list(INTERPRETER_FLAGS)
+        assert cmd[1 + len(INTERPRETER_FLAGS)].endswith("memory_retrieve_server.py")
+
+
+class TestResidentState:
+    """memory_retrieve keeps config, entries and the search handle per root."""
+
+    @pytest.fixture(autouse=True)
+    def resident(self, monkeypatch):
+        monkeypatch.setattr(memory_retrieve, "_resident", None)
+        memory_retrieve.enable_resident_state()
+
+    def _main(self, memory_project, monkeypatch, capsys):
+        monkeypatch.setattr(sys, "stdin", io.StringIO(_hook_input(memory_project)))
+        try:
+            memory_retrieve.main()
+        except SystemExit:
+            pass
+        return capsys.readouterr().out
+
+    def test_handle_reused_until_generation_changes(self, memory_project, monkeypatch, capsys):
+        root = _setup_project(memory_project, {"enabled": True})
+        assert "use-jwt" in self._main(memory_project, monkeypatch, capsys)
+        slot = memory_retrieve._resident[str(root)]
+        handle = slot["index"][1]
+        config = slot["config"][1]
+        assert "use-jwt" in self._main(memory_project, monkeypatch, capsys)
+        assert slot["index"][1] is handle
+        assert slot["config"][1] is config
+        handle.execute("SELECT 1")  # Still open
+
+        write_index(root, make_decision_memory(), make_preference_memory())
+        os.utime(root / "index.md", ns=(1, 1))
+        assert "use-jwt" in self._main(memory_project, monkeypatch, capsys)
+        assert slot["index"][1] is not handle
+
+
+class TestResidentServerBenchmark:
+    """Latency on a 5k-memory store: resident vs. a cold in-process hook.
+
+    Reports the socket round trip alone and the end-to-end hook (a fresh
+    ``python3 -S memory_retrieve_client.py`` process, as hooks.json runs
+    it). The hook still pays interpreter start-up, measured separately as a
+    floor; the client itself should add only a few ms on top of it.
+    """
+
+    def test_5k_store_latency(self, memory_project, runtime_dir, server):
+        root = _setup_project(memory_project, {"enabled": True})
+        (root / "index.md").write_text(
+            "# Memory Index\n\n" + "\n".join(make_bulk_index_lines(5_000)) + "\n",
+            encoding="utf-8",
+        )
+        sock, _ = server
+        payload = _request(memory_project, "authentication database migration plan")
+        forward(sock, payload)  # Builds the persistent FTS index and warms the server
+
+        warm = []
+        for _ in range(30):
+            t0 = time.perf_counter()
+            reply = forward(sock, payload)
+            warm.append((time.perf_counter() - t0) * 1000)
+            assert reply["exit_code"] == 0
+        hook = []
+        for _ in range(15):
+            t0 = time.perf_counter()
+            result = _run(CLIENT_SCRIPT, memory_project, runtime_dir,
+                          "authentication database migration plan")
+            hook.append((time.perf_counter() - t0) * 1000)
+            assert result.returncode == 0, result.stderr
+        interpreter = []
+        for _ in range(15):
+            t0 = time.perf_counter()
+            subprocess.run([PYTHON, *CLIENT_FLAGS, "-c", "pass"], check=True)
+            interpreter.append((time.perf_counter() - t0) * 1000)
+        cold = []
+        for _ in range(5):
+            t0 = time.perf_counter()
+            _run(RETRIEVE_SCRIPT, memory_project, runtime_dir,
+                 "authentication database migration plan")
+            cold.append((time.perf_counter() - t0) * 1000)
+
+        warm_p50 = statistics.median(warm)
+        hook_p50 = statistics.median(hook)
+        interpreter_p50 = statistics.median(interpreter)
+        cold_p50 = statistics.median(cold)
+        print(f"\n[5000 entries] resident round trip p50 {warm_p50:.1f}ms, "
+              f"end-to-end resident hook p50 {hook_p50:.1f}ms "
+              f"(interpreter start p50 {interpreter_p50:.1f}ms), "
+              f"cold in-process hook p50 {cold_p50:.1f}ms")
+        assert warm_p50 < hook_p50 < cold_p50
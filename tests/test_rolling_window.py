@@ -8,6 +8,7 @@ related memory_write.py changes (FlockIndex, retire_record).
 
 import json
 import os
+import shutil
 import sys
 import time
 from pathlib import Path
@@ -25,7 +26,9 @@ from conftest import (
     write_index,
 )
 
+import memory_write
 from memory_write import FlockIndex, retire_record, CATEGORY_FOLDERS, atomic_write_json
+from memory_search_engine import load_memory_meta, read_index_lines, rebuild_memory_meta
 
 
 # ---------------------------------------------------------------------------
@@ -231,7 +234,7 @@ class TestEnforceRollingWindow:
             # Second call: structural error -> breaks the loop
             raise RuntimeError("Simulated structural error")
 
-        with patch("memory_enforce.retire_record", side_effect=mock_retire):
+        with patch("memory_write.retire_record", side_effect=mock_retire):
             result = enforce_rolling_window(mem_root, "session_summary",
                                             max_retained=3)
 
@@ -255,7 +258,7 @@ class TestEnforceRollingWindow:
             return original_retire(target_abs, reason, memory_root,
                                    index_path)
 
-        with patch("memory_enforce.retire_record", side_effect=mock_retire):
+        with patch("memory_write.retire_record", side_effect=mock_retire):
             result = enforce_rolling_window(mem_root, "session_summary",
                                             max_retained=5)
 
@@ -482,8 +485,9 @@ class TestEnforceRollingWindow:
 class TestFlockIndexAndRetireRecord:
     """Tests for FlockIndex.require_acquired() and retire_record()."""
 
-    def test_16_require_acquired_raises_when_not_acquired(self, tmp_path):
+    def test_16_require_acquired_raises_when_not_acquired(self, tmp_path, monkeypatch):
         """FlockIndex with acquired=False -> require_acquired() raises TimeoutError."""
+        monkeypatch.setattr(FlockIndex, "_BACKEND", "mkdir")  # lockdir semantics
         index_path = tmp_path / "index.md"
         index_path.write_text("# Index\n")
         lock_dir = index_path.parent / ".index.lockdir"
@@ -515,8 +519,9 @@ class TestFlockIndexAndRetireRecord:
             # Should not raise
             lock.require_acquired()
 
-    def test_18_existing_lock_timeout_still_passes(self, tmp_path):
+    def test_18_existing_lock_timeout_still_passes(self, tmp_path, monkeypatch):
         """FlockIndex timeout returns self with acquired=False (backward compat)."""
+        monkeypatch.setattr(FlockIndex, "_BACKEND", "mkdir")  # lockdir semantics
         index_path = tmp_path / "index.md"
         index_path.write_text("# Index\n")
         lock_dir = index_path.parent / ".index.lockdir"
@@ -535,8 +540,9 @@ class TestFlockIndexAndRetireRecord:
         if lock_dir.exists():
             lock_dir.rmdir()
 
-    def test_19_existing_permission_denied_still_passes(self, tmp_path):
+    def test_19_existing_permission_denied_still_passes(self, tmp_path, monkeypatch):
         """OSError on mkdir returns self with acquired=False (backward compat)."""
+        monkeypatch.setattr(FlockIndex, "_BACKEND", "mkdir")  # lockdir semantics
         ro_dir = tmp_path / "readonly"
         ro_dir.mkdir()
         index_path = ro_dir / "index.md"
@@ -618,7 +624,8 @@ class TestFlockIndexAndRetireRecord:
 
         # The entry should be removed from the index using the correct
         # relative path: .claude/memory/sessions/rel-path-test.json
-        index_after = index_path.read_text()
+        # (merged view: the removal may still be in the delta log)
+        index_after = "\n".join(read_index_lines(index_path))
         assert "rel-path-test" not in index_after
 
         # Verify the relative path was computed correctly by checking
@@ -688,8 +695,9 @@ class TestFlockIndexAndRetireRecord:
         assert "class _flock_index" not in source
         assert "_flock_index(" not in source
 
-        # Should contain the new public name
-        assert "class FlockIndex" in source
+        # The public name lives in the stdlib-only lock module
+        assert "class FlockIndex" in (SCRIPTS_DIR / "memory_lock.py").read_text()
+        assert "from memory_lock import FlockIndex" in source
 
         # All 6 action handlers should use FlockIndex
         for handler in ["do_create", "do_update", "do_retire",
@@ -704,3 +712,94 @@ class TestFlockIndexAndRetireRecord:
             body = source[start:next_def]
             assert "FlockIndex(" in body, \
                 f"{handler} does not use FlockIndex"
+
+
+# ===========================================================================
+# Batched retirement (retire_records)
+# ===========================================================================
+
+def _setup_many_sessions(tmp_path, session_count):
+    """Like _setup_enforce_project() for hundreds of sessions, with a sidecar."""
+    mem_root = tmp_path / "project" / ".claude" / "memory"
+    (mem_root / "sessions").mkdir(parents=True)
+    memories = []
+    for i in range(session_count):
+        mem = make_session_memory(id_val=f"session-{i:04d}", title=f"Session {i}")
+        mem["created_at"] = mem["updated_at"] = (
+            f"2026-01-{1 + i // 1440:02d}T{i // 60 % 24:02d}:{i % 60:02d}:00Z")
+        write_memory_file(mem_root, mem)
+        memories.append(mem)
+    write_index(mem_root, *memories, path_prefix=".claude/memory")
+    rebuild_memory_meta(mem_root, [(mem_root / "sessions" / f"{m['id']}.json", m)
+                                   for m in memories])
+    return mem_root
+
+
+class TestBatchedRetirement:
+
+    def test_one_index_append_and_sidecar_transaction(self, tmp_path):
+        from memory_enforce import enforce_rolling_window
+
+        mem_root = _setup_many_sessions(tmp_path, 8)
+        with patch.object(memory_write, "append_index_delta",
+                          wraps=memory_write.append_index_delta) as append, \
+                patch.object(memory_write, "record_memory_meta_many",
+                             wraps=memory_write.record_memory_meta_many) as meta, \
+                patch.object(memory_write, "record_memory_meta") as single:
+            result = enforce_rolling_window(mem_root, "session_summary", max_retained=3)
+
+        assert result["retired"] == [f"session-{i:04d}" for i in range(5)]
+        assert append.call_count == 1
+        assert len(append.call_args.args[1]) == 5
+        assert meta.call_count == 1
+        single.assert_not_called()
+
+        index = "\n".join(read_index_lines(mem_root / "index.md"))
+        assert "session-0004" not in index and "session-0005" in index
+        rows = load_memory_meta(mem_root, [f".claude/memory/sessions/session-{i:04d}.json"
+                                           for i in range(8)])
+        assert [rows[p]["status"] for p in sorted(rows)] == ["retired"] * 5 + ["active"] * 3
+
+    def test_deletion_guard_warns_per_victim(self, tmp_path, capsys):
+        from memory_enforce import enforce_rolling_window
+
+        mem_root = _setup_many_sessions(tmp_path, 5)
+        enforce_rolling_window(mem_root, "session_summary", max_retained=2)
+        err = capsys.readouterr().err
+        for i in range(3):
+            assert f"[ROLLING_WINDOW] Retired session-{i:04d}" in err
+
+
+def test_benchmark_batched_rolling_window(tmp_path):
+    """Retire 300 excess session summaries: per-record loop vs one batch."""
+    from memory_enforce import enforce_rolling_window
+
+    total, keep = 305, 5
+    base = _setup_many_sessions(tmp_path / "base", total)
+    timings = {}
+    for mode in ("loop", "batch"):
+        mem_root = tmp_path / mode / ".claude" / "memory"
+        shutil.copytree(base, mem_root)
+        index_path = mem_root / "index.md"
+        t0 = time.perf_counter()
+        if mode == "loop":
+            # Previous behavior: one retire_record() (index append + sidecar
+            # commit) per victim under the lock
+            victims = sorted((mem_root / "sessions").glob("*.json"))[:total - keep]
+            with FlockIndex(index_path):
+                for fp in victims:
+                    retire_record(fp, "Session rolling window: exceeded max_retained limit",
+                                  mem_root, index_path)
+        else:
+            result = enforce_rolling_window(mem_root, "session_summary", keep,
+                                            max_retire_override=total)
+            assert len(result["retired"]) == total - keep
+        timings[mode] = time.perf_counter() - t0
+        entries = [line for line in read_index_lines(index_path) if line.startswith("- [")]
+        assert len(entries) == keep
+
+    print(f"\n[rolling window, retire {total - keep} of {total} sessions] "
+          f"per-record {timings['loop'] * 1000:.0f}ms, "
+          f"batched {timings['batch'] * 1000:.0f}ms "
+          f"({timings['loop'] / timings['batch']:.1f}x)")
+    assert timings["batch"] < timings["loop"]
@@ -0,0 +1,249 @@
+"""Tests for the shared transcript tail reader (memory_transcript.py).
+
+read_transcript_tail() reads the JSONL transcript backwards in blocks,
+decodes only lines with a user/human/assistant type marker, and stops
+once it has max_messages messages. Results must match a forward read of
+the whole file that keeps the last N messages. memory_triage's
+parse_transcript() and memory_judge's extract_recent_context() use it.
+"""
+
+import collections
+import io
+import json
+import re
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+SCRIPTS_DIR = Path(__file__).parent.parent / "hooks" / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+import memory_transcript  # noqa: E402
+from conftest import HEAVY_BENCH  # noqa: E402
+from memory_judge import extract_recent_context  # noqa: E402
+from memory_transcript import _iter_lines_reversed, read_transcript_tail  # noqa: E402
+from memory_triage import parse_transcript  # noqa: E402
+
+MB = 1024 * 1024
+
+
+def forward_parse(path, max_messages):
+    """The previous forward implementation: decode every line, keep the last N."""
+    messages = collections.deque(maxlen=max_messages if max_messages > 0 else None)
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    msg = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if isinstance(msg, dict) and msg.get("type", "") in ("user", "human", "assistant"):
+                    messages.append(msg)
+    except OSError:
+        return []
+    return list(messages)
+
+
+def _user(text):
+    return {"type": "user", "message": {"role": "user", "content": text}}
+
+
+def _assistant(text):
+    return {"type": "assistant", "message": {"role": "assistant",
+                                             "content": [{"type": "text", "text": text}]}}
+
+
+def _tool_result(n_bytes, i):
+    return {"type": "user", "message": {"role": "user", "content": [
+        {"type": "tool_result", "tool_use_id": f"toolu_{i}", "content": "x" * n_bytes}]}}
+
+
+class TestReverseLines:
+
+    @pytest.mark.parametrize("data", [
+        b"", b"a", b"a\n", b"\n", b"a\nb", b"a\nb\n", b"\n\na\n\nb", b"abc\r\ndef\r\n",
+    ])
+    @pytest.mark.parametrize("block_size", [1, 2, 3, 64])
+    def test_matches_split(self, data, block_size):
+        lines = list(_iter_lines_reversed(io.BytesIO(data), block_size))
+        assert lines == data.split(b"\n")[::-1]
+
+    def test_line_longer_than_many_blocks(self):
+        data = b"head\n" + b"y" * 10_000 + b"\ntail"
+        lines = list(_iter_lines_reversed(io.BytesIO(data), 7))
+        assert lines == [b"tail", b"y" * 10_000, b"head"]
+
+    @pytest.mark.parametrize("block_size", [3, 7, 1000])
+    def test_lines_over_cap_yield_none(self, block_size):
+        data = b"y" * 20 + b"\nok\n" + b"z" * 11 + b"\n" + b"w" * 10
+        lines = list(_iter_lines_reversed(io.BytesIO(data), block_size, max_line_bytes=10))
+        assert lines == [b"w" * 10, None, b"ok", None]
+
+
+class TestParseTranscript:
+
+    def _write(self, tmp_path, lines, trailer="\n"):
+        path = tmp_path / "transcript.jsonl"
+        path.write_text("\n".join(lines) + trailer, encoding="utf-8")
+        return str(path)
+
+    def _mixed(self, n):
+        lines = []
+        for i in range(n):
+            lines.append(json.dumps({"type": "progress", "data": i}))
+            lines.append(json.dumps(_user(f"question {i}")))
+            lines.append(json.dumps(_tool_result(300 + i, i)))
+            lines.append(json.dumps(_assistant(f"answer {i} café ✓")))
+            if i % 7 == 0:
+                lines.append("{corrupt json")
+            if i % 5 == 0:
+                lines.append("")
+            if i % 11 == 0:
+                lines.append(json.dumps(["not", "a", "dict"]))
+        return lines
+
+    @pytest.mark.parametrize("max_messages", [1, 3, 50, 1000, 0])
+    @pytest.mark.parametrize("trailer", ["\n", "", "\r\n"])
+    def test_matches_forward_read(self, tmp_path, max_messages, trailer):
+        path = self._write(tmp_path, self._mixed(120), trailer)
+        expected = forward_parse(path, max_messages)
+        assert read_transcript_tail(path, max_messages, block_size=512) == expected
+        assert parse_transcript(path, max_messages) == expected
+
+    def test_torn_last_line_skipped(self, tmp_path):
+        lines = [json.dumps(_user("one")), json.dumps(_assistant("two"))]
+        path = self._write(tmp_path, lines + ['{"type": "user", "mess'], trailer="")
+        assert [m["type"] for m in parse_transcript(path, 50)] == ["user", "assistant"]
+
+    def test_invalid_utf8_line_skipped(self, tmp_path):
+        path = tmp_path / "transcript.jsonl"
+        path.write_bytes(json.dumps(_user("ok")).encode() + b"\n"
+                         + b'{"type": "user", "content": "\xff\xfe"}\n')
+        assert [m["message"]["content"] for m in parse_transcript(str(path), 50)] == ["ok"]
+
+    def test_unhashable_type_skipped(self, tmp_path):
+        path = self._write(tmp_path, [json.dumps({"type": ["user"]}), json.dumps(_user("ok"))])
+        assert len(parse_transcript(path, 50)) == 1
+
+    def test_stops_decoding_at_max_messages(self, tmp_path, monkeypatch):
+        path = self._write(tmp_path, [json.dumps(_user(f"m{i}")) for i in range(1000)])
+        calls = []
+        real_loads = json.loads
+        monkeypatch.setattr(memory_transcript.json, "loads",
+                            lambda s, *a, **k: calls.append(1) or real_loads(s, *a, **k))
+        result = parse_transcript(path, 5)
+        assert [m["message"]["content"] for m in result] == [f"m{i}" for i in range(995, 1000)]
+        assert len(calls) == 5
+
+    def test_prefilter_skips_other_records(self, tmp_path, monkeypatch):
+        lines = [json.dumps(_user("first")), json.dumps({"type": "progress", "data": 1}),
+                 json.dumps({"type": "system", "content": "x"}),
+                 json.dumps({"type": "file-history-snapshot", "snapshot": {}}),
+                 # Nested marker: decoded, then rejected at the top level
+                 json.dumps({"type": "progress", "data": {"message": {"type": "user"}}}),
+                 '{"type":"assistant","message":{"content":"compact separators"}}']
+        path = self._write(tmp_path, lines)
+        decoded = []
+        real_loads = json.loads
+        monkeypatch.setattr(memory_transcript.json, "loads",
+                            lambda s, *a, **k: decoded.append(s) or real_loads(s, *a, **k))
+        result = read_transcript_tail(path, 0)
+        assert [m["type"] for m in result] == ["user", "assistant"]
+        assert len(decoded) == 3
+
+    def test_oversized_line_skipped(self, tmp_path):
+        lines = [json.dumps(_user("small")), json.dumps(_tool_result(5000, 1)),
+                 json.dumps(_assistant("reply"))]
+        path = self._write(tmp_path, lines)
+        result = read_transcript_tail(path, 0, block_size=1024, max_line_bytes=4096)
+        assert [m["type"] for m in result] == ["user", "assistant"]
+        assert len(read_transcript_tail(path, 0, max_line_bytes=0)) == 3
+
+    def test_judge_context_uses_tail(self, tmp_path):
+        lines = [json.dumps(_user(f"question {i}")) for i in range(10)]
+        lines.append(json.dumps({"type": "progress", "data": 1}))
+        lines.append(json.dumps(_assistant("final answer")))
+        path = self._write(tmp_path, lines)
+        assert extract_recent_context(path, max_turns=2) == "user: question 9\nassistant: final answer"
+        assert extract_recent_context(path, max_turns=0) == ""
+
+
+def _synthetic_transcript(path, size):
+    """~size bytes of a tool-heavy session: per turn a prompt, a progress
+    event, an assistant tool call, a 20KB tool result and a reply."""
+    turn = "".join(json.dumps(m) + "\n" for m in [
+        _user("Please look into the failing integration test"),
+        {"type": "progress", "data": {"type": "hook_progress"}},
+        {"type": "assistant", "message": {"role": "assistant", "content": [
+            {"type": "tool_use", "id": "toolu_1", "name": "Bash",
+             "input": {"command": "pytest -q"}}]}},
+        _tool_result(20_000, 1),
+        _assistant("The test fails because the fixture is not reset between runs."),
+    ]).encode()
+    with open(path, "wb") as f:
+        chunk = turn * max(1, (8 * MB) // len(turn))
+        written = 0
+        while written < size:
+            f.write(chunk)
+            written += len(chunk)
+
+
+@pytest.mark.parametrize("size_mb", [
+    10,
+    pytest.param(100, marks=pytest.mark.skipif(not HEAVY_BENCH, reason="set CLAUDE_MEMORY_BENCH=1")),
+    pytest.param(1024, marks=pytest.mark.skipif(not HEAVY_BENCH, reason="set CLAUDE_MEMORY_BENCH=1")),
+])
+def test_tail_reader_benchmark(size_mb, tmp_path, capsys):
+    """parse_transcript(max_messages=50) vs. a forward read of the whole file."""
+    path = str(tmp_path / "transcript.jsonl")
+    _synthetic_transcript(path, size_mb * MB)
+
+    t0 = time.perf_counter()
+    tail = parse_transcript(path, 50)
+    tail_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    forward = forward_parse(path, 50)
+    forward_s = time.perf_counter() - t0
+
+    with capsys.disabled():
+        print(f"\n[{size_mb}MB transcript, last 50 messages] forward read {forward_s * 1000:.0f}ms, "
+              f"reverse tail read {tail_s * 1000:.1f}ms ({forward_s / tail_s:.0f}x)")
+    assert tail == forward
+    assert tail_s < forward_s
+
+
+@pytest.mark.parametrize("size_mb", [
+    10,
+    pytest.param(100, marks=pytest.mark.skipif(not HEAVY_BENCH, reason="set CLAUDE_MEMORY_BENCH=1")),
+])
+def test_prefilter_benchmark(size_mb, tmp_path, monkeypatch, capsys):
+    """Tail read through a run of non-message records, with and without the marker prefilter."""
+    path = tmp_path / "transcript.jsonl"
+    noise = "".join(json.dumps({"type": "progress", "toolUseID": f"toolu_{i}",
+                                "data": {"type": "hook_progress", "output": "." * 2000}}) + "\n"
+                    for i in range(256)).encode()
+    with open(path, "wb") as f:
+        f.write((json.dumps(_user("Please refactor the index writer")) + "\n").encode())
+        for _ in range(size_mb * MB // len(noise)):
+            f.write(noise)
+        f.write((json.dumps(_assistant("Done, the writer now batches appends.")) + "\n").encode())
+
+    t0 = time.perf_counter()
+    filtered = read_transcript_tail(str(path), 2)
+    filtered_s = time.perf_counter() - t0
+    monkeypatch.setattr(memory_transcript, "_MESSAGE_MARKER_RE", re.compile(rb""))
+    t0 = time.perf_counter()
+    unfiltered = read_transcript_tail(str(path), 2)
+    unfiltered_s = time.perf_counter() - t0
+
+    with capsys.disabled():
+        print(f"\n[{size_mb}MB of progress records] decode every line {unfiltered_s * 1000:.0f}ms, "
+              f"marker prefilter {filtered_s * 1000:.0f}ms ({unfiltered_s / filtered_s:.1f}x)")
+    assert filtered == unfiltered
+    assert [m["type"] for m in filtered] == ["user", "assistant"]
+    assert filtered_s < unfiltered_s
@@ -0,0 +1,289 @@
+"""Tests for the incremental triage checkpoint (memory_triage._read_triage_window).
+
+Each Stop fire stores the transcript cursor and the scored message window
+in <staging>/.triage-checkpoint.json. A later fire of the same session
+decodes and scores only the messages appended since, and must produce
+exactly what a full re-read of the transcript tail would.
+"""
+
+import io
+import json
+import os
+import random
+import shutil
+import sys
+import time
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+SCRIPTS_DIR = Path(__file__).parent.parent / "hooks" / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+import memory_transcript  # noqa: E402
+import memory_triage  # noqa: E402
+from conftest import HEAVY_BENCH  # noqa: E402
+from memory_staging_utils import PinnedStagingDir  # noqa: E402
+from memory_triage import (  # noqa: E402
+    TRIAGE_CHECKPOINT_NAME,
+    _read_triage_window,
+    _score_all_raw,
+    _window_metrics,
+    _window_scores,
+    _window_text,
+    extract_activity_metrics,
+    extract_text_content,
+    parse_transcript,
+)
+
+_PHRASES = [
+    "We decided to use Postgres because it handles our write load",
+    "let's go with Redis rather than memcached",
+    "TODO: this is a workaround, fix the tech debt later",
+    "I prefer tabs; always use black for formatting",
+    "The API rate limit cannot exceed 100 requests per minute",
+    "Step 1: run npm install, then restart the server",
+    "Looks good to me.",
+    "```python\nchose = decided()\n```",
+    "use `decided` here",
+    "an unbalanced ``` fence",
+    "a stray ` backtick",
+    "",
+]
+
+
+def _message(rng, i):
+    text = "\n".join(rng.choice(_PHRASES) for _ in range(rng.randint(1, 6)))
+    kind = rng.random()
+    if kind < 0.4:
+        return {"type": "user", "message": {"role": "user", "content": text}}
+    if kind < 0.8:
+        blocks = [{"type": "text", "text": text}]
+        blocks += [{"type": "tool_use", "id": f"t{i}-{j}", "name": rng.choice(["Bash", "Read", "Edit"])}
+                   for j in range(rng.randint(0, 3))]
+        return {"type": "assistant", "message": {"role": "assistant", "content": blocks}}
+    if kind < 0.9:
+        return {"type": "user", "message": {"role": "user", "content": [
+            {"type": "tool_result", "tool_use_id": f"t{i}", "content": "ok"}]}}
+    return {"type": "progress", "data": {"type": "hook_progress"}}
+
+
+def _append(path, messages):
+    with open(path, "a", encoding="utf-8") as f:
+        for msg in messages:
+            f.write(json.dumps(msg) + "\n")
+
+
+def _full(path, max_messages):
+    """What a fire without checkpoint computes: (text, metrics, all_raw)."""
+    messages = parse_transcript(str(path), max_messages)
+    text = extract_text_content(messages)
+    metrics = extract_activity_metrics(messages)
+    return text, metrics, _score_all_raw(text, metrics)
+
+
+def _incremental(path, max_messages, pinned, session_id="session-1"):
+    window, resumed = _read_triage_window(str(path), max_messages, session_id, pinned=pinned)
+    text = _window_text(window)
+    metrics = _window_metrics(window)
+    return (text, metrics, _window_scores(window, text, metrics)), resumed
+
+
+@pytest.fixture
+def pinned(tmp_path):
+    pin = PinnedStagingDir(cwd=str(tmp_path / "project"))
+    pin.__enter__()
+    yield pin
+    pin.__exit__(None, None, None)
+    shutil.rmtree(pin.path, ignore_errors=True)
+
+
+class TestIncrementalWindow:
+
+    @pytest.mark.parametrize("seed", range(6))
+    @pytest.mark.parametrize("max_messages", [5, 50])
+    def test_matches_full_rescore(self, tmp_path, pinned, seed, max_messages):
+        rng = random.Random(seed)
+        path = tmp_path / "transcript.jsonl"
+        path.touch()
+        i = 0
+        for fire in range(25):
+            batch = [_message(rng, i + k) for k in range(rng.randint(0, 12))]
+            i += len(batch)
+            _append(path, batch)
+            result, resumed = _incremental(path, max_messages, pinned)
+            assert resumed == (fire > 0)
+            assert result == _full(path, max_messages)
+
+    def test_decodes_only_new_messages(self, tmp_path, pinned, monkeypatch):
+        path = tmp_path / "transcript.jsonl"
+        rng = random.Random(7)
+        _append(path, [_message(rng, i) for i in range(200)])
+        _incremental(path, 50, pinned)
+
+        decoded = []
+        real_loads = json.loads
+        monkeypatch.setattr(memory_transcript.json, "loads",
+                            lambda s, *a, **k: decoded.append(s) or real_loads(s, *a, **k))
+        new = [{"type": "user", "message": {"content": f"we decided on option {i}"}}
+               for i in range(3)]
+        _append(path, new)
+        result, resumed = _incremental(path, 50, pinned)
+        assert resumed
+        assert len([line for line in decoded if line.startswith(b'{"type"')]) == 3
+        monkeypatch.undo()
+        assert result == _full(path, 50)
+
+    def test_rewritten_transcript_invalidates(self, tmp_path, pinned):
+        path = tmp_path / "transcript.jsonl"
+        _append(path, [{"type": "user", "message": {"content": "we decided to use Redis"}}] * 5)
+        _incremental(path, 50, pinned)
+
+        # Compaction-style rewrite: shorter file with different content
+        path.write_text(json.dumps({"type": "user", "message": {"content": "summary"}}) + "\n")
+        result, resumed = _incremental(path, 50, pinned)
+        assert not resumed
+        assert result == _full(path, 50)
+
+        # Same length, different bytes before the offset
+        before = path.read_text()
+        _incremental(path, 50, pinned)
+        path.write_text(before.replace("summary", "SUMMARY"))
+        result, resumed = _incremental(path, 50, pinned)
+        assert not resumed
+        assert result == _full(path, 50)
+
+    def test_replaced_transcript_invalidates(self, tmp_path, pinned):
+        path = tmp_path / "transcript.jsonl"
+        _append(path, [{"type": "user", "message": {"content": "we decided to use Redis"}}])
+        _incremental(path, 50, pinned)
+        copy = tmp_path / "copy.jsonl"
+        shutil.copy(path, copy)
+        os.replace(copy, path)
+        _, resumed = _incremental(path, 50, pinned)
+        assert not resumed
+
+    def test_partial_last_line_not_checkpointed(self, tmp_path, pinned):
+        path = tmp_path / "transcript.jsonl"
+        _append(path, [{"type": "user", "message": {"content": "first"}}])
+        _incremental(path, 50, pinned)
+        line = json.dumps({"type": "assistant", "message": {"content": "we decided to use Go"}})
+        with open(path, "a") as f:
+            f.write(line[:20])
+        result, resumed = _incremental(path, 50, pinned)
+        assert resumed and result == _full(path, 50)
+        with open(path, "a") as f:
+            f.write(line[20:] + "\n")
+        result, resumed = _incremental(path, 50, pinned)
+        assert resumed
+        assert result == _full(path, 50)
+        assert result[2][0]["primary_hits"] + result[2][0]["booster_hits"] == 1
+
+    @pytest.mark.parametrize("change", ["session", "max_messages", "patterns"])
+    def test_checkpoint_scoped(self, tmp_path, pinned, monkeypatch, change):
+        path = tmp_path / "transcript.jsonl"
+        _append(path, [{"type": "user", "message": {"content": "we decided to use Redis"}}])
+        _incremental(path, 50, pinned)
+        session_id, max_messages = "session-1", 50
+        if change == "session":
+            session_id = "session-2"
+        elif change == "max_messages":
+            max_messages = 20
+        else:
+            monkeypatch.setattr(memory_triage, "_features_fingerprint", lambda: "changed")
+        _, resumed = _incremental(path, max_messages, pinned, session_id)
+        assert not resumed
+
+    def test_corrupt_checkpoint_ignored(self, tmp_path, pinned):
+        path = tmp_path / "transcript.jsonl"
+        _append(path, [{"type": "user", "message": {"content": "we decided to use Redis"}}])
+        _incremental(path, 50, pinned)
+        checkpoint = json.loads(pinned.read_file(TRIAGE_CHECKPOINT_NAME))
+        checkpoint["window"][0]["masks"] = "garbage"
+        pinned.write_file(TRIAGE_CHECKPOINT_NAME, json.dumps(checkpoint))
+        result, resumed = _incremental(path, 50, pinned)
+        assert not resumed
+        assert result == _full(path, 50)
+
+    def test_no_pinned_dir_reads_tail(self, tmp_path):
+        path = tmp_path / "transcript.jsonl"
+        _append(path, [{"type": "user", "message": {"content": "we decided to use Redis"}}])
+        result, resumed = _incremental(path, 50, None)
+        assert not resumed
+        assert result == _full(path, 50)
+
+
+def test_run_triage_resumes(tmp_path):
+    """Second Stop fire of a session reports resumed=True in triage.score."""
+    proj = tmp_path / "proj"
+    (proj / ".claude" / "memory").mkdir(parents=True)
+    path = tmp_path / "transcript.jsonl"
+    _append(path, [{"type": "user", "message": {"content": "hello"}}])
+    hook_input = json.dumps({"transcript_path": str(path), "cwd": str(proj)})
+    events = []
+    try:
+        for _ in range(2):
+            with mock.patch.object(memory_triage, "read_stdin", return_value=hook_input), \
+                 mock.patch("sys.stdout", io.StringIO()), \
+                 mock.patch.object(memory_triage, "emit_event",
+                                   side_effect=lambda name, data, **kw: events.append((name, data))):
+                assert memory_triage._run_triage() == 0
+            _append(path, [{"type": "assistant", "message": {"content": "hi"}}])
+    finally:
+        shutil.rmtree(memory_triage.get_staging_dir(str(proj)), ignore_errors=True)
+    scores = [data for name, data in events if name == "triage.score"]
+    assert [s["resumed"] for s in scores] == [False, True]
+    assert [s["exchanges"] for s in scores] == [1, 2]
+
+
+_PROSE = [
+    "I looked at the failing test and the fixture is not reset between runs.",
+    "We decided to use a per-test temporary directory because shared state leaks.",
+    "The retry loop is a workaround; we should fix the flaky network mock later.",
+    "Next I will update the config loader and rerun the suite.",
+    "That matches what the logs show for the second worker.",
+    "```python\ndef reset(tmp):\n    shutil.rmtree(tmp)\n```",
+]
+
+
+def _session_turn(rng, i):
+    """One tool-heavy turn: prompt, tool call, multi-KB result, reply."""
+    prose = "\n".join(rng.choice(_PROSE) for _ in range(rng.randint(4, 16)))
+    return [
+        {"type": "user", "message": {"content": f"Please continue with step {i}"}},
+        {"type": "assistant", "message": {"content": [
+            {"type": "text", "text": "Running the tests."},
+            {"type": "tool_use", "id": f"t{i}", "name": rng.choice(["Bash", "Read", "Edit"])}]}},
+        {"type": "user", "message": {"content": [
+            {"type": "tool_result", "tool_use_id": f"t{i}", "content": "x" * rng.randint(2000, 20000)}]}},
+        {"type": "progress", "data": {"type": "hook_progress"}},
+        {"type": "assistant", "message": {"content": [{"type": "text", "text": prose}]}},
+    ]
+
+
+@pytest.mark.parametrize("n_turns", [
+    300,
+    pytest.param(3000, marks=pytest.mark.skipif(not HEAVY_BENCH, reason="set CLAUDE_MEMORY_BENCH=1")),
+])
+def test_checkpoint_benchmark(n_turns, tmp_path, pinned, capsys):
+    """Per-fire cost of a session with a Stop fire every 3 turns."""
+    rng = random.Random(0)
+    path = tmp_path / "transcript.jsonl"
+    path.touch()
+    fresh_s = resumed_s = 0.0
+    fires = 0
+    for start in range(0, n_turns, 3):
+        _append(path, [msg for k in range(3) for msg in _session_turn(rng, start + k)])
+        t0 = time.perf_counter()
+        full = _full(path, 50)
+        fresh_s += time.perf_counter() - t0
+        t0 = time.perf_counter()
+        incremental, _ = _incremental(path, 50, pinned)
+        resumed_s += time.perf_counter() - t0
+        fires += 1
+        assert incremental == full
+    with capsys.disabled():
+        print(f"\n[{fires} fires, window 50] full re-read {fresh_s / fires * 1000:.2f}ms/fire, "
+              f"checkpoint {resumed_s / fires * 1000:.2f}ms/fire")
+    assert resumed_s < fresh_s
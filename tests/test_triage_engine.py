@@ -0,0 +1,197 @@
+"""Tests for the triage scoring engine (memory_triage._line_features).
+
+Line features for all text categories come from one pass over the lines.
+Each pattern only runs on lines holding one of the literals read off the
+pattern (_FEATURE_RULES); co-occurrence windows are prefix-sum lookups.
+Scores, hit counts and snippets must equal the previous per-category,
+per-pattern scan, kept below as the reference.
+"""
+
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+SCRIPTS_DIR = Path(__file__).parent.parent / "hooks" / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+import memory_triage  # noqa: E402
+from conftest import HEAVY_BENCH  # noqa: E402
+from memory_triage import (  # noqa: E402
+    _ANY_PRIMARY,
+    _FEATURE_BOOSTER,
+    _FEATURE_NEGATIVE,
+    _FEATURE_PRIMARY,
+    _FEATURE_RULES,
+    _FEATURE_SHIFT,
+    CATEGORY_PATTERNS,
+    CO_OCCURRENCE_WINDOW,
+    SNIPPET_MAX_CHARS,
+    _compile_rules,
+    _fold,
+    _line_features,
+    _literals_hold,
+    _score_all_raw,
+    _scores_from_features,
+    score_text_category,
+)
+
+
+def reference_line_features(lines, edge=0):
+    """The previous scan: every category, every pattern, every line."""
+    n = len(lines)
+    masks = [0] * n
+    for category, cfg in CATEGORY_PATTERNS.items():
+        shift = _FEATURE_SHIFT[category]
+        booster_lines = set(range(min(edge, n))) | set(range(max(0, n - edge), n))
+        for idx, line in enumerate(lines):
+            if any(pat.search(line) for pat in cfg.get("negative", ())):
+                masks[idx] |= _FEATURE_NEGATIVE << shift
+            if any(pat.search(line) for pat in cfg["primary"]):
+                masks[idx] |= _FEATURE_PRIMARY << shift
+                booster_lines.update(range(max(0, idx - CO_OCCURRENCE_WINDOW),
+                                           min(n, idx + CO_OCCURRENCE_WINDOW + 1)))
+        for idx in booster_lines:
+            if any(pat.search(lines[idx]) for pat in cfg["boosters"]):
+                masks[idx] |= _FEATURE_BOOSTER << shift
+    snippets = {idx: lines[idx].strip()[:SNIPPET_MAX_CHARS]
+                for idx, mask in enumerate(masks) if mask & _ANY_PRIMARY}
+    return masks, snippets
+
+
+_WORDS = (
+    "we decided to use postgres because it is faster instead of mysql . must always "
+    "never run the steps first then deploy TODO hack workaround later fix tech debt "
+    "I prefer tabs always use black the constraint limit cannot exceed quota rate "
+    "let's go with redis rather than memcached step 1 npm install restart Run "
+    "following error ## Error Handling - if subagent fails Not Supported the fix "
+    "haven't chose memory_write.py --action delete resolved root cause for now"
+).split()
+_SEPARATORS = [" ", " ", " ", "  ", "\t", " "]
+
+
+def _random_lines(rng, n):
+    lines = []
+    for _ in range(n):
+        words = [rng.choice(_WORDS) for _ in range(rng.randint(0, 12))]
+        if words and rng.random() < 0.2:
+            words[0] = words[0].upper()
+        line = ""
+        for word in words:
+            line += word + rng.choice(_SEPARATORS)
+        lines.append(line.rstrip(" ") if rng.random() < 0.8 else line)
+    return lines
+
+
+class TestRequiredLiterals:
+
+    def test_every_pattern_is_prefiltered(self):
+        for rules in _FEATURE_RULES.values():
+            for role in rules:
+                assert all(literals for _, literals in role)
+
+    def test_literals_read_off_patterns(self):
+        (_, decided), = _compile_rules([re.compile(r"(?<!not )\b(decided|went\s+with)\b", re.I)])
+        assert decided == ("decided", "went with")
+        (_, heading), = _compile_rules([re.compile(r"^#+\s*Error")])
+        assert heading == ("#",)
+        (_, bullet), = _compile_rules([re.compile(r"^[-*]\s*If")])
+        assert bullet == ("*", "-")
+
+    @pytest.mark.parametrize("pattern", [r"\w+ing", r"(?:foo|\d+)", r"\s*x", r"[ \t]x", r"é"])
+    def test_no_literal_always_runs(self, pattern):
+        (_, literals), = _compile_rules([re.compile(pattern)])
+        assert literals is None
+
+    def test_self_check(self):
+        pat = re.compile(r"\b(decided|went\s+with)\b", re.I)
+        parsed = memory_triage._sre_parse.parse(pat.pattern, pat.flags)
+        assert _literals_hold(pat, parsed, {"decided", "went with"})
+        # A misread parse: a literal the pattern never needs, or one missing
+        assert not _literals_hold(pat, parsed, {"decided", "went with", "chose"})
+        assert not _literals_hold(pat, parsed, {"decided"})
+
+    def test_failed_self_check_disables_prefilter(self, monkeypatch):
+        monkeypatch.setattr(memory_triage, "_required_literals", lambda items: {"bogus"})
+        (_, literals), = _compile_rules([re.compile(r"\bdecided\b", re.I)])
+        assert literals is None
+
+    def test_fold(self):
+        assert _fold("  Went\t WITH\n") == "went with"
+        # IGNORECASE matches these to ASCII letters
+        assert _fold("İ ı ſtandard Keep") == "i i standard keep"
+        assert CATEGORY_PATTERNS["PREFERENCE"]["primary"][0].search("ſtandard")
+        assert _line_features(["ſtandard"])[0][0] & (_FEATURE_PRIMARY << _FEATURE_SHIFT["PREFERENCE"])
+
+
+class TestEquivalence:
+
+    @pytest.mark.parametrize("seed", range(8))
+    @pytest.mark.parametrize("edge", [0, CO_OCCURRENCE_WINDOW])
+    def test_matches_reference(self, seed, edge):
+        lines = _random_lines(random.Random(seed), 400)
+        features = _line_features(lines, edge=edge)
+        assert features == reference_line_features(lines, edge=edge)
+        metrics = {"tool_uses": 3, "distinct_tools": 2, "exchanges": 5}
+        assert _scores_from_features(*features, metrics) == _scores_from_features(
+            *reference_line_features(lines, edge=edge), metrics)
+
+    def test_single_category(self):
+        lines = _random_lines(random.Random(99), 200)
+        full = _score_all_raw("\n".join(lines), {})
+        for entry in full[:-1]:
+            score, found, p_hits, b_hits = score_text_category(lines, entry["category"])
+            assert (score, found, p_hits, b_hits) == (
+                entry["score"], entry["snippets"], entry["primary_hits"], entry["booster_hits"])
+
+    @pytest.mark.parametrize("lines, category, expected", [
+        # Booster exactly CO_OCCURRENCE_WINDOW lines away counts, one further does not
+        (["we decided on X"] + [""] * 3 + ["because Y"], "DECISION", (0, 1)),
+        (["we decided on X"] + [""] * 4 + ["because Y"], "DECISION", (1, 0)),
+        (["because Y"] + [""] * 4 + ["we decided on X"], "DECISION", (1, 0)),
+        # Negative lines are not scored
+        (["## Error Handling", "fixed by retry"], "RUNBOOK", (0, 0)),
+    ])
+    def test_window_edges(self, lines, category, expected):
+        assert score_text_category(lines, category)[2:] == expected
+
+
+def _prose(rng, n):
+    sentences = [
+        "I looked at the failing test and the fixture is not reset between runs.",
+        "We decided to use a per-test temporary directory because shared state leaks.",
+        "The retry loop is a workaround; we should fix the flaky network mock later.",
+        "Next I will update the config loader and rerun the suite.",
+        "That matches what the logs show for the second worker.",
+        "    assert result.returncode == 0, result.stderr",
+        "| column | type | default |",
+    ]
+    return [rng.choice(sentences) for _ in range(n)]
+
+
+@pytest.mark.parametrize("n_lines", [
+    5000,
+    pytest.param(50_000, marks=pytest.mark.skipif(not HEAVY_BENCH, reason="set CLAUDE_MEMORY_BENCH=1")),
+])
+def test_engine_benchmark(n_lines, capsys):
+    """_line_features on session-like prose vs. the previous per-pattern scan."""
+    lines = _prose(random.Random(0), n_lines)
+
+    def best(fn):
+        times = []
+        for _ in range(3):
+            t0 = time.perf_counter()
+            result = fn(lines)
+            times.append(time.perf_counter() - t0)
+        return result, min(times)
+
+    engine, engine_s = best(_line_features)
+    reference, reference_s = best(reference_line_features)
+    with capsys.disabled():
+        print(f"\n[{n_lines} lines] per-pattern scan {reference_s * 1000:.1f}ms, "
+              f"engine {engine_s * 1000:.1f}ms ({reference_s / engine_s:.1f}x)")
+    assert engine == reference
+    assert engine_s < reference_s
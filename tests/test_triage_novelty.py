@@ -0,0 +1,212 @@
+"""Tests for the stop-time novelty check in memory_triage.py.
+
+Before any flag, sentinel, context file or subagent work, each triggered
+text category's snippets are matched against index.md with BM25 and
+compared (word 3-gram containment) with the best same-category memory's
+key fields. Categories an existing memory already covers are dropped and
+every decision is logged as a triage.novelty event.
+"""
+
+import io
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+
+from conftest import make_decision_memory, write_index, write_memory_file
+
+SCRIPTS_DIR = Path(__file__).parent.parent / "hooks" / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+import memory_search_engine  # noqa: E402
+from memory_triage import (  # noqa: E402
+    DEFAULT_NOVELTY_THRESHOLD,
+    _shingles,
+    check_novelty,
+    load_config,
+)
+
+SNIPPET = ("We decided to use JWT for authentication because stateless tokens "
+           "scale horizontally without a session store")
+
+
+def _project(tmp_path, **overrides):
+    proj = tmp_path / "project"
+    root = proj / ".claude" / "memory"
+    (root / "decisions").mkdir(parents=True)
+    mem = make_decision_memory(content_overrides={
+        "decision": SNIPPET,
+        "rationale": ["Stateless tokens scale horizontally without a session store"],
+    }, **overrides)
+    write_memory_file(root, mem)
+    write_index(root, mem)
+    return proj
+
+
+def _decision(snippets):
+    return {"category": "DECISION", "score": 0.7, "snippets": snippets}
+
+
+def _session():
+    return {"category": "SESSION_SUMMARY", "score": 0.9, "snippets": ["Activity"]}
+
+
+class TestCheckNovelty:
+
+    def test_redundant_category_dropped(self, tmp_path):
+        proj = _project(tmp_path)
+        kept, decisions = check_novelty([_decision([SNIPPET]), _session()], str(proj))
+        assert [r["category"] for r in kept] == ["SESSION_SUMMARY"]
+        [d] = decisions
+        assert d["decision"] == "drop"
+        assert d["reason"] == "redundant"
+        assert d["candidate"] == ".claude/memory/decisions/use-jwt.json"
+        assert d["bm25"] <= 0
+        assert d["overlap"] == 1.0
+
+    def test_new_information_kept(self, tmp_path):
+        proj = _project(tmp_path)
+        snippet = "We decided to rotate JWT signing keys weekly through the vault sidecar"
+        kept, [d] = check_novelty([_decision([snippet])], str(proj))
+        assert kept[0]["category"] == "DECISION"
+        assert d["decision"] == "keep"
+        assert d["reason"] == "novel"
+        assert d["overlap"] < DEFAULT_NOVELTY_THRESHOLD
+
+    def test_threshold_is_tunable(self, tmp_path):
+        proj = _project(tmp_path)
+        snippet = SNIPPET + " and we will revisit refresh token rotation next quarter"
+        assert check_novelty([_decision([snippet])], str(proj))[0]
+        assert check_novelty([_decision([snippet])], str(proj), threshold=0.5)[0] == []
+
+    def test_only_same_category_candidates(self, tmp_path):
+        proj = _project(tmp_path)
+        entry = {"category": "RUNBOOK", "score": 0.7, "snippets": [SNIPPET]}
+        kept, [d] = check_novelty([entry], str(proj))
+        assert kept == [entry]
+        assert d["reason"] == "no_match"
+
+    def test_retired_candidate_does_not_suppress(self, tmp_path):
+        proj = _project(tmp_path, record_status="retired",
+                        retired_at="2026-01-01T00:00:00Z", retired_reason="old")
+        kept, [d] = check_novelty([_decision([SNIPPET])], str(proj))
+        assert kept
+        assert d["reason"] == "candidate_inactive"
+
+    def test_short_snippets_kept(self, tmp_path):
+        proj = _project(tmp_path)
+        kept, [d] = check_novelty([_decision(["use JWT"])], str(proj))
+        assert kept
+        assert d["reason"] == "too_short"
+
+    def test_no_index_is_a_noop(self, tmp_path):
+        results = [_decision([SNIPPET])]
+        assert check_novelty(results, str(tmp_path)) == (results, [])
+
+    def test_path_outside_memory_root_kept(self, tmp_path):
+        proj = _project(tmp_path)
+        index = proj / ".claude" / "memory" / "index.md"
+        index.write_text(index.read_text().replace(
+            ".claude/memory/decisions/use-jwt.json", "../outside.json"))
+        kept, [d] = check_novelty([_decision([SNIPPET])], str(proj))
+        assert kept
+        assert d["reason"] == "error"
+
+    def test_numpy_engine_stands_in_for_fts5(self, tmp_path):
+        proj = _project(tmp_path)
+        opened = mock.Mock(side_effect=memory_search_engine.open_fts_index)
+        engine = SimpleNamespace(open_bm25_index=opened)
+        with mock.patch.object(memory_search_engine, "HAS_FTS5", False), \
+                mock.patch.object(memory_search_engine, "load_numpy_bm25", return_value=engine):
+            kept, [d] = check_novelty([_decision([SNIPPET])], str(proj))
+        opened.assert_called_once_with(proj / ".claude" / "memory")
+        assert kept == []
+        assert d["reason"] == "redundant"
+
+    def test_numpy_engine_end_to_end(self, tmp_path):
+        pytest.importorskip("numpy")
+        proj = _project(tmp_path)
+        with mock.patch.object(memory_search_engine, "HAS_FTS5", False):
+            kept, [d] = check_novelty([_decision([SNIPPET])], str(proj))
+        assert kept == []
+        assert d["candidate"] == ".claude/memory/decisions/use-jwt.json"
+
+    def test_no_engine_keeps_and_logs(self, tmp_path):
+        proj = _project(tmp_path)
+        results = [_decision([SNIPPET]), _session()]
+        with mock.patch.object(memory_search_engine, "HAS_FTS5", False), \
+                mock.patch.object(memory_search_engine, "load_numpy_bm25", return_value=None):
+            kept, [d] = check_novelty(results, str(proj))
+        assert kept == results
+        assert (d["category"], d["decision"], d["reason"]) == ("DECISION", "keep", "no_engine")
+
+    def test_shingles_ignore_case_and_punctuation(self):
+        assert _shingles("Use JWT, for AUTH!") == _shingles("use jwt for auth")
+        assert _shingles("too short") == set()
+
+
+class TestConfig:
+
+    def _load(self, tmp_path, triage):
+        root = tmp_path / ".claude" / "memory"
+        root.mkdir(parents=True, exist_ok=True)
+        (root / "memory-config.json").write_text(json.dumps({"triage": triage}))
+        return load_config(str(tmp_path))
+
+    def test_defaults(self, tmp_path):
+        config = load_config(str(tmp_path))
+        assert config["novelty_check"] is True
+        assert config["novelty_threshold"] == DEFAULT_NOVELTY_THRESHOLD
+
+    def test_values_parsed_and_clamped(self, tmp_path):
+        assert self._load(tmp_path, {"novelty_check": False})["novelty_check"] is False
+        assert self._load(tmp_path, {"novelty_check": "no"})["novelty_check"] is True
+        assert self._load(tmp_path, {"novelty_threshold": 0.6})["novelty_threshold"] == 0.6
+        assert self._load(tmp_path, {"novelty_threshold": 3})["novelty_threshold"] == 1.0
+        assert self._load(tmp_path, {"novelty_threshold": -1})["novelty_threshold"] == 0.0
+        assert self._load(tmp_path, {"novelty_threshold": True})["novelty_threshold"] == 0.8
+        assert self._load(tmp_path, {"novelty_threshold": "nan"})["novelty_threshold"] == 0.8
+
+
+class TestStopHook:
+
+    def _transcript(self, tmp_path):
+        path = tmp_path / "transcript.jsonl"
+        lines = [
+            {"type": "user", "message": {"role": "user", "content": "Which auth scheme?"}},
+            {"type": "assistant", "message": {"role": "assistant", "content": [
+                {"type": "text", "text": SNIPPET}]}},
+        ]
+        path.write_text("\n".join(json.dumps(m) for m in lines) + "\n")
+        return str(path)
+
+    def _run(self, proj, transcript, **triage):
+        (proj / ".claude" / "memory" / "memory-config.json").write_text(
+            json.dumps({"triage": {"thresholds": {"decision": 0.1}, **triage}}))
+        out = io.StringIO()
+        hook_input = json.dumps({"transcript_path": transcript, "cwd": str(proj)})
+        # Resolve the module at call time: other triage tests reload it
+        mt = sys.modules["memory_triage"]
+        with mock.patch.object(mt, "read_stdin", return_value=hook_input), \
+                mock.patch("sys.stdout", out), \
+                mock.patch.object(mt, "check_stop_flag", return_value=False), \
+                mock.patch.object(mt, "emit_event") as emit:
+            assert mt._run_triage() == 0
+        events = {c.args[0]: c.args[1] for c in emit.call_args_list}
+        return out.getvalue().strip(), events
+
+    def test_covered_decision_allows_stop(self, tmp_path):
+        proj = _project(tmp_path)
+        stdout, events = self._run(proj, self._transcript(tmp_path))
+        assert stdout == ""
+        assert events["triage.novelty"]["dropped"] == ["DECISION"]
+        assert events["triage.novelty"]["checked"][0]["candidate"].endswith("use-jwt.json")
+
+    def test_disabled_check_still_blocks(self, tmp_path):
+        proj = _project(tmp_path)
+        stdout, events = self._run(proj, self._transcript(tmp_path), novelty_check=False)
+        assert json.loads(stdout)["decision"] == "block"
+        assert "triage.novelty" not in events
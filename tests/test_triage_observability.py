@@ -732,6 +732,8 @@ class TestTriageScoreCompleteness:
         assert "fire_count" in data
         assert isinstance(data["fire_count"], int)
         assert data["fire_count"] == 1
+        assert set(data["phase_ms"]) == {"setup", "read", "extract", "score"}
+        assert all(ms >= 0 for ms in data["phase_ms"].values())
 
         # Required kwargs
         assert "session_id" in kwargs
@@ -0,0 +1,352 @@
+"""Tests for the per-project write queue (memory_write.run_queued_batch).
+
+Each session spools its batch to <memory_root>/.write-queue/ and then
+drains the queue under the index lock; whichever session gets the lock
+applies every pending batch in one pass with one index append, and the
+others pick up their results. Includes a stress test with N concurrent
+simulated sessions reporting throughput and index lock wait.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from conftest import make_decision_memory, make_session_memory
+from test_memory_orchestrate import make_save_intent, write_intent
+
+SCRIPTS_DIR = Path(__file__).parent.parent / "hooks" / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+import memory_write  # noqa: E402
+from memory_orchestrate import execute_saves  # noqa: E402
+from memory_search_engine import read_index_lines  # noqa: E402
+from memory_staging_utils import get_staging_dir  # noqa: E402
+from memory_write import (  # noqa: E402
+    WRITE_QUEUE_DIR,
+    FlockIndex,
+    drain_queue,
+    run_queued_batch,
+    submit_to_queue,
+)
+
+WRITE_SCRIPT = str(SCRIPTS_DIR / "memory_write.py")
+ORCHESTRATE_SCRIPT = str(SCRIPTS_DIR / "memory_orchestrate.py")
+PYTHON = sys.executable
+
+
+def _create_op(project, slug, title=None):
+    staging = project / ".claude" / "memory" / ".staging"
+    staging.mkdir(parents=True, exist_ok=True)
+    path = staging / f"input-{slug}.json"
+    path.write_text(json.dumps(make_decision_memory(id_val=slug, title=title or slug)))
+    return {"id": slug, "action": "create", "category": "decision",
+            "target": f".claude/memory/decisions/{slug}.json", "input": str(path)}
+
+
+def _index_paths(root):
+    return {l.split(" -> ")[1].split(" #tags:")[0]
+            for l in read_index_lines(root / "index.md") if l.startswith("- [")}
+
+
+@pytest.fixture
+def project(memory_project, monkeypatch):
+    monkeypatch.chdir(memory_project)
+    return memory_project
+
+
+class TestQueue:
+
+    def test_result_matches_direct_batch(self, project, capsys):
+        root = project / ".claude" / "memory"
+        summary = run_queued_batch([_create_op(project, "use-jwt")])
+        assert (summary["status"], summary["succeeded"]) == ("ok", 1)
+        assert summary["results"][0]["result"]["status"] == "created"
+        assert summary["queue"]["drained_by"] == "self"
+        assert summary["queue"]["entries"] == 1
+        assert _index_paths(root) == {".claude/memory/decisions/use-jwt.json"}
+        assert os.listdir(root / WRITE_QUEUE_DIR) == []
+
+    def test_one_drain_applies_every_session(self, project, capsys):
+        root = project / ".claude" / "memory"
+        other = submit_to_queue([_create_op(project, "from-other-session")], root)
+        appends = []
+        real = memory_write.append_index_delta
+        with patch.object(memory_write, "append_index_delta",
+                          side_effect=lambda *a: appends.append(a) or real(*a)):
+            summary = run_queued_batch([_create_op(project, "from-this-session")])
+        assert summary["queue"] == {**summary["queue"], "drained_by": "self", "entries": 2}
+        assert len(appends) == 1
+        assert _index_paths(root) == {".claude/memory/decisions/from-other-session.json",
+                                      ".claude/memory/decisions/from-this-session.json"}
+        # The other session's summary is waiting for it
+        other_result = json.loads((root / WRITE_QUEUE_DIR / f"{other}.result").read_text())
+        assert other_result["results"][0]["id"] == "from-other-session"
+        assert other_result["results"][0]["ok"] is True
+
+    def test_drain_resolves_targets_against_submitter_cwd(self, project, tmp_path,
+                                                           monkeypatch, capsys):
+        root = project / ".claude" / "memory"
+        op = _create_op(project, "from-other-cwd")
+        op["input"] = os.path.relpath(op["input"], project)
+        entry_id = submit_to_queue([op], root)
+        elsewhere = tmp_path / "elsewhere"
+        elsewhere.mkdir()
+        monkeypatch.chdir(elsewhere)
+        with patch.object(memory_write.os, "chdir", side_effect=AssertionError("chdir")):
+            with FlockIndex(root / "index.md"):
+                drain_queue(root, root / "index.md")
+        assert os.getcwd() == str(elsewhere)
+        result = json.loads((root / WRITE_QUEUE_DIR / f"{entry_id}.result").read_text())
+        assert result["status"] == "ok", result
+        assert (root / "decisions" / "from-other-cwd.json").exists()
+        assert _index_paths(root) == {".claude/memory/decisions/from-other-cwd.json"}
+
+    def test_batch_applied_by_another_session(self, project, capsys):
+        real_submit = memory_write.submit_to_queue
+
+        def submit_then_other_drains(ops, memory_root):
+            entry_id = real_submit(ops, memory_root)
+            with FlockIndex(memory_root / "index.md"):
+                drain_queue(memory_root, memory_root / "index.md")
+            return entry_id
+
+        with patch.object(memory_write, "submit_to_queue", side_effect=submit_then_other_drains):
+            summary = run_queued_batch([_create_op(project, "use-jwt")])
+        assert summary["queue"]["drained_by"] == "other"
+        assert summary["queue"]["entries"] == 0
+        assert summary["succeeded"] == 1
+
+    def test_failures_are_per_operation(self, project, capsys):
+        root = project / ".claude" / "memory"
+        bad = _create_op(project, "bad")
+        Path(bad["input"]).write_text("{not json")
+        summary = run_queued_batch([_create_op(project, "good"), bad,
+                                    {"action": "delete", "target": "x"}])
+        assert summary["status"] == "partial_failure"
+        assert [r["ok"] for r in summary["results"]] == [True, False, False]
+        assert _index_paths(root) == {".claude/memory/decisions/good.json"}
+
+    def test_entry_lost_by_dead_writer_is_reported(self, project, capsys):
+        root = project / ".claude" / "memory"
+        real_submit = memory_write.submit_to_queue
+
+        def submit_then_claim(ops, memory_root):
+            entry_id = real_submit(ops, memory_root)
+            queue = memory_root / WRITE_QUEUE_DIR
+            os.replace(queue / f"{entry_id}.pending", queue / f"{entry_id}.claimed")
+            return entry_id
+
+        with patch.object(memory_write, "submit_to_queue", side_effect=submit_then_claim):
+            summary = run_queued_batch([_create_op(project, "use-jwt")])
+        assert summary["status"] == "failed"
+        assert "QUEUE_ERROR" in summary["results"][0]["error"]
+        assert not (root / "decisions" / "use-jwt.json").exists()
+
+    def test_lock_timeout_falls_back_to_direct_write(self, project, monkeypatch, capsys):
+        root = project / ".claude" / "memory"
+        monkeypatch.setattr(FlockIndex, "_LOCK_TIMEOUT", 0.1)
+        held, release = threading.Event(), threading.Event()
+
+        def holder():
+            with FlockIndex(root / "index.md"):
+                held.set()
+                release.wait(10)
+
+        t = threading.Thread(target=holder)
+        t.start()
+        held.wait(5)
+        try:
+            summary = run_queued_batch([_create_op(project, "use-jwt")], timeout=0.2)
+        finally:
+            release.set()
+            t.join()
+        assert summary["succeeded"] == 1
+        assert "queue" not in summary
+        assert "Write queue timeout" in capsys.readouterr().err
+        assert os.listdir(root / WRITE_QUEUE_DIR) == []
+
+    def test_session_summary_enforced_by_submitter(self, project, capsys):
+        staging = project / ".claude" / "memory" / ".staging"
+        staging.mkdir(parents=True, exist_ok=True)
+        (staging / "s.json").write_text(json.dumps(make_session_memory()))
+        op = {"action": "create", "category": "session_summary",
+              "target": ".claude/memory/sessions/session-2026-01-01.json",
+              "input": str(staging / "s.json")}
+        with patch.object(memory_write, "_run_auto_enforce") as enforce:
+            run_queued_batch([op])
+        enforce.assert_called_once()
+        with patch.object(memory_write, "_run_auto_enforce") as enforce:
+            op["target"] = ".claude/memory/sessions/session-2026-01-02.json"
+            (staging / "s.json").write_text(json.dumps(make_session_memory()))
+            run_queued_batch([op], auto_enforce=False)
+        enforce.assert_not_called()
+
+    def test_unrelated_files_ignored(self, project, capsys):
+        queue = project / ".claude" / "memory" / WRITE_QUEUE_DIR
+        queue.mkdir()
+        (queue / "notes.pending").write_text("{}")
+        assert run_queued_batch([_create_op(project, "use-jwt")])["queue"]["entries"] == 1
+        assert (queue / "notes.pending").exists()
+
+
+class TestCallers:
+
+    def test_cli_queue_flag(self, project):
+        manifest = project / ".claude" / "memory" / ".staging" / "write-batch.json"
+        manifest.parent.mkdir(parents=True, exist_ok=True)
+        manifest.write_text(json.dumps({"operations": [_create_op(project, "use-jwt")]}))
+        result = subprocess.run(
+            [PYTHON, WRITE_SCRIPT, "--action", "batch", "--manifest", str(manifest), "--queue"],
+            capture_output=True, text=True, timeout=30, cwd=str(project),
+        )
+        assert result.returncode == 0, result.stderr
+        out = json.loads(result.stdout)
+        assert out["succeeded"] == 1
+        assert out["queue"]["drained_by"] == "self"
+
+    def test_orchestrator_inprocess_uses_queue(self, tmp_path):
+        manifest = {"status": "ok", "categories": {"decision": {
+            "action": "CREATE", "target_path": ".claude/memory/decisions/x.json",
+            "draft_path": "/tmp/draft.json"}}}
+        staging = tmp_path / "staging"
+        staging.mkdir()
+        reply = {"status": "ok", "succeeded": 1, "failed": 0,
+                 "results": [{"index": 0, "ok": True, "result": {"title": "X"}}]}
+        with patch.object(memory_write, "run_queued_batch", return_value=reply) as queued, \
+                patch.object(memory_write, "run_batch") as direct:
+            out = execute_saves(manifest, str(staging), str(tmp_path), str(SCRIPTS_DIR),
+                                PYTHON, batch=True, inprocess=True, queue=True)
+        queued.assert_called_once()
+        direct.assert_not_called()
+        assert out["saved"][0]["title"] == "X"
+
+    @patch("memory_orchestrate.subprocess.run")
+    def test_orchestrator_subprocess_passes_flag(self, mock_run, tmp_path):
+        mock_run.return_value.stdout = json.dumps({"results": [{"ok": True, "result": {}}]})
+        manifest = {"status": "ok", "categories": {"decision": {
+            "action": "CREATE", "target_path": ".claude/memory/decisions/x.json",
+            "draft_path": "/tmp/draft.json"}}}
+        staging = tmp_path / "staging"
+        staging.mkdir()
+        execute_saves(manifest, str(staging), str(tmp_path), str(SCRIPTS_DIR), PYTHON,
+                      batch=True, queue=True)
+        batch_calls = [c.args[0] for c in mock_run.call_args_list if "batch" in c.args[0]]
+        assert len(batch_calls) == 1
+        assert "--queue" in batch_calls[0]
+
+
+_SESSION = """
+import json, os, sys, time
+sys.path.insert(0, sys.argv[1])
+import memory_write
+waits = []
+real_log = memory_write.FlockIndex._log
+def log(self, hold_ms):
+    waits.append(self._wait_ms)
+    real_log(self, hold_ms)
+memory_write.FlockIndex._log = log
+ops = json.loads(sys.argv[3])
+while not os.path.exists(sys.argv[4]):
+    time.sleep(0.001)
+t = time.perf_counter()
+run = memory_write.run_queued_batch if sys.argv[2] == "queue" else memory_write.run_batch
+summary = run(ops, auto_enforce=False)
+print(json.dumps({"elapsed": time.perf_counter() - t, "lock_wait_ms": sum(waits),
+                  "ok": summary["succeeded"], "ids": [r["id"] for r in summary["results"]],
+                  "queue": summary.get("queue")}))
+"""
+
+
+def _stress(tmp_path, mode, sessions, ops_per_session):
+    project = tmp_path / mode
+    root = project / ".claude" / "memory"
+    (root / "decisions").mkdir(parents=True)
+    (root / "index.md").write_text("# Memory Index\n\n")
+    go = tmp_path / f"go-{mode}"
+    procs = []
+    for s in range(sessions):
+        ops = [_create_op(project, f"s{s}-memory-{i}") for i in range(ops_per_session)]
+        procs.append(subprocess.Popen(
+            [PYTHON, "-c", _SESSION, str(SCRIPTS_DIR), mode, json.dumps(ops), str(go)],
+            cwd=str(project), stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True))
+    time.sleep(1.0)  # Let every session finish importing
+    t0 = time.perf_counter()
+    go.touch()
+    outs = []
+    for p in procs:
+        stdout, stderr = p.communicate(timeout=120)
+        assert p.returncode == 0, stderr
+        outs.append(json.loads(stdout))
+    wall = time.perf_counter() - t0
+    return project, root, outs, wall
+
+
+def test_stress_concurrent_sessions(tmp_path):
+    sessions, per_session = 8, 4
+    report = {}
+    for mode in ("direct", "queue"):
+        project, root, outs, wall = _stress(tmp_path, mode, sessions, per_session)
+        # Every session gets back exactly its own results
+        for s, out in enumerate(outs):
+            assert out["ok"] == per_session
+            assert out["ids"] == [f"s{s}-memory-{i}" for i in range(per_session)]
+        assert len(_index_paths(root)) == sessions * per_session
+        assert len(list((root / "decisions").glob("*.json"))) == sessions * per_session
+        waits = [o["lock_wait_ms"] for o in outs]
+        drains = sum(1 for o in outs if (o["queue"] or {}).get("drained_by") == "self")
+        report[mode] = (wall, sum(waits) / len(waits), max(waits), drains)
+        if mode == "queue":
+            assert 1 <= drains <= sessions
+            assert os.listdir(root / WRITE_QUEUE_DIR) == []
+
+    total = sessions * per_session
+    for mode, (wall, mean_wait, max_wait, drains) in report.items():
+        extra = f", {drains} drains" if mode == "queue" else ""
+        print(f"\n[{sessions} concurrent sessions x {per_session} creates, {mode}] "
+              f"{total / wall:.0f} ops/s, lock wait mean {mean_wait:.1f}ms "
+              f"max {max_wait:.1f}ms{extra}")
+
+
+def test_concurrent_orchestrators_keep_own_save_results(tmp_path):
+    """N orchestrator runs on one project: each staging dir gets its own result."""
+    project = tmp_path / "project"
+    root = project / ".claude" / "memory"
+    for folder in ("decisions", "runbooks"):
+        (root / folder).mkdir(parents=True)
+    (root / "index.md").write_text("# Memory Index\n\n")
+    base = get_staging_dir(str(project))
+    stagings = []
+    try:
+        procs = []
+        for s in range(4):
+            staging = Path(f"{base}-session{s}")
+            staging.mkdir(parents=True, mode=0o700)
+            stagings.append(staging)
+            for cat, title in (("decision", f"Session {s} picks JWT"),
+                               ("runbook", f"Session {s} fixes the lock")):
+                write_intent(staging, cat, make_save_intent(cat, title=title))
+            procs.append(subprocess.Popen(
+                [PYTHON, ORCHESTRATE_SCRIPT, "--staging-dir", str(staging),
+                 "--memory-root", ".claude/memory", "--action", "run"],
+                cwd=str(project), stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True))
+        for p in procs:
+            _, stderr = p.communicate(timeout=120)
+            assert p.returncode == 0, stderr
+
+        for s, staging in enumerate(stagings):
+            result = json.loads((staging / "last-save-result.json").read_text())
+            assert sorted(result["titles"]) == sorted(
+                [f"Session {s} picks JWT", f"Session {s} fixes the lock"])
+            assert result["errors"] == []
+        assert len(_index_paths(root)) == 8
+    finally:
+        for staging in stagings:
+            shutil.rmtree(staging, ignore_errors=True)